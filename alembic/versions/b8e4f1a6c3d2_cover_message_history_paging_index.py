@@ -0,0 +1,42 @@
+"""cover message history paging with ix_messages_agent_sequence
+
+Revision ID: b8e4f1a6c3d2
+Revises: d7e2a9c4f8b1
+Create Date: 2026-10-17 21:12:45.118604
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+from letta.settings import settings
+
+# revision identifiers, used by Alembic.
+revision: str = "b8e4f1a6c3d2"
+down_revision: Union[str, None] = "d7e2a9c4f8b1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Skip this migration for SQLite, which has no INCLUDE columns
+    if not settings.letta_pg_uri_no_default:
+        return
+
+    op.drop_index("ix_messages_agent_sequence", table_name="messages")
+    op.create_index(
+        "ix_messages_agent_sequence",
+        "messages",
+        ["agent_id", "sequence_id"],
+        unique=False,
+        postgresql_include=["id", "role", "is_err", "group_id"],
+    )
+
+
+def downgrade() -> None:
+    # Skip this migration for SQLite, which has no INCLUDE columns
+    if not settings.letta_pg_uri_no_default:
+        return
+
+    op.drop_index("ix_messages_agent_sequence", table_name="messages")
+    op.create_index("ix_messages_agent_sequence", "messages", ["agent_id", "sequence_id"], unique=False)
@@ -1,3 +1,4 @@
+import logging
 from abc import ABC, abstractmethod
 from typing import Any, AsyncGenerator, List, Optional, Union
 
@@ -20,6 +21,7 @@ from letta.schemas.user import User
 from letta.services.agent_manager import AgentManager
 from letta.services.message_manager import MessageManager
 from letta.services.passage_manager import PassageManager
+from letta.services.prompt_assembly_cache import get_prompt_assembly_cache
 from letta.utils import united_diff
 
 logger = get_logger(__name__)
@@ -102,27 +104,20 @@ class BaseAgent(ABC):
             if tool_rules_solver is not None:
                 tool_constraint_block = tool_rules_solver.compile_tool_rule_prompts()
 
-            # compile archive tags if there's an attached archive
-            from letta.services.archive_manager import ArchiveManager
-
-            archive_manager = ArchiveManager()
-            archive = await archive_manager.get_default_archive_for_agent_async(
-                agent_id=agent_state.id,
-                actor=self.actor,
-            )
-
-            if archive:
-                archive_tags = await self.passage_manager.get_unique_tags_for_archive_async(
-                    archive_id=archive.id,
-                    actor=self.actor,
-                )
-            else:
-                archive_tags = None
-
             # TODO: This is a pretty brittle pattern established all over our code, need to get rid of this
             curr_system_message = in_context_messages[0]
             curr_system_message_text = curr_system_message.content[0].text
 
+            # generate just the memory string with current state for comparison
+            prompt_assembly_cache = get_prompt_assembly_cache()
+            curr_memory_str = prompt_assembly_cache.compile_memory(
+                agent_state.id,
+                agent_state.memory,
+                tool_usage_rules=tool_constraint_block,
+                sources=agent_state.sources,
+                max_files_open=agent_state.max_files_open,
+            )
+
             # extract the dynamic section that includes memory blocks, tool rules, and directories
             # this avoids timestamp comparison issues
             def extract_dynamic_section(text):
@@ -136,21 +131,34 @@ class BaseAgent(ABC):
                     return text[start_idx:end_idx]
                 return text  # fallback to full text if markers not found
 
-            curr_dynamic_section = extract_dynamic_section(curr_system_message_text)
-
-            # generate just the memory string with current state for comparison
-            curr_memory_str = agent_state.memory.compile(
-                tool_usage_rules=tool_constraint_block, sources=agent_state.sources, max_files_open=agent_state.max_files_open
-            )
-            new_dynamic_section = extract_dynamic_section(curr_memory_str)
-
-            # compare just the dynamic sections (memory blocks, tool rules, directories)
-            if curr_dynamic_section == new_dynamic_section:
+            # the system message was already found up to date with this memory, otherwise compare just the dynamic
+            # sections (memory blocks, tool rules, directories)
+            if prompt_assembly_cache.is_current(
+                agent_state.id, curr_memory_str, curr_system_message.id, curr_system_message_text
+            ) or extract_dynamic_section(curr_system_message_text) == extract_dynamic_section(curr_memory_str):
+                prompt_assembly_cache.mark_current(agent_state.id, curr_memory_str, curr_system_message.id, curr_system_message_text)
                 logger.debug(
                     f"Memory and sources haven't changed for agent id={agent_state.id} and actor=({self.actor.id}, {self.actor.name}), skipping system prompt rebuild"
                 )
                 return in_context_messages
 
+            # compile archive tags if there's an attached archive
+            from letta.services.archive_manager import ArchiveManager
+
+            archive_manager = ArchiveManager()
+            archive = await archive_manager.get_default_archive_for_agent_async(
+                agent_id=agent_state.id,
+                actor=self.actor,
+            )
+
+            if archive:
+                archive_tags = await self.passage_manager.get_unique_tags_for_archive_async(
+                    archive_id=archive.id,
+                    actor=self.actor,
+                )
+            else:
+                archive_tags = None
+
             memory_edit_timestamp = get_utc_time()
 
             # size of messages and archival memories
@@ -169,9 +177,10 @@ class BaseAgent(ABC):
                 archive_tags=archive_tags,
             )
 
-            diff = united_diff(curr_system_message_text, new_system_message_str)
-            if len(diff) > 0:
-                logger.debug(f"Rebuilding system with new memory...\nDiff:\n{diff}")
+            if new_system_message_str != curr_system_message_text:
+                if logger.isEnabledFor(logging.DEBUG):
+                    diff = united_diff(curr_system_message_text, new_system_message_str)
+                    logger.debug(f"Rebuilding system with new memory...\nDiff:\n{diff}")
 
                 # [DB Call] Update Messages
                 new_system_message = await self.message_manager.update_message_by_id_async(
@@ -180,6 +189,7 @@ class BaseAgent(ABC):
                     actor=self.actor,
                     project_id=agent_state.project_id,
                 )
+                prompt_assembly_cache.mark_current(agent_state.id, curr_memory_str, new_system_message.id, new_system_message_str)
                 return [new_system_message] + in_context_messages[1:]
 
             else:
@@ -33,7 +33,7 @@ from letta.log import get_logger
 from letta.otel.context import get_ctx_attributes
 from letta.otel.metric_registry import MetricRegistry
 from letta.otel.tracing import log_event, trace_method, tracer
-from letta.schemas.agent import AgentState, UpdateAgent
+from letta.schemas.agent import AgentState
 from letta.schemas.enums import JobStatus, MessageRole, ProviderType, StepStatus, ToolType
 from letta.schemas.letta_message import MessageType
 from letta.schemas.letta_message_content import OmittedReasoningContent, ReasoningContent, RedactedReasoningContent, TextContent
@@ -51,14 +51,17 @@ from letta.schemas.user import User
 from letta.server.rest_api.utils import create_approval_request_message_from_llm_response, create_letta_messages_from_llm_response
 from letta.services.agent_manager import AgentManager
 from letta.services.block_manager import BlockManager
+from letta.services.helpers.agent_manager_helper import AGENT_LOAD_PROFILES
 from letta.services.helpers.tool_parser_helper import runtime_override_tool_json_schema
 from letta.services.job_manager import JobManager
 from letta.services.message_manager import MessageManager
 from letta.services.passage_manager import PassageManager
+from letta.services.run_cancellation_bus import RunCancellationWatch, get_run_cancellation_bus
 from letta.services.step_manager import NoopStepManager, StepManager
 from letta.services.summarizer.enums import SummarizationMode
 from letta.services.summarizer.summarizer import Summarizer
 from letta.services.telemetry_manager import NoopTelemetryManager, TelemetryManager
+from letta.services.telemetry_write_buffer import get_telemetry_write_buffer
 from letta.services.tool_executor.tool_execution_manager import ToolExecutionManager
 from letta.settings import model_settings, settings, summarizer_settings
 from letta.system import package_function_response
@@ -103,8 +106,10 @@ class LettaAgent(BaseAgent):
         self.passage_manager = passage_manager
         self.step_manager = step_manager
         self.telemetry_manager = telemetry_manager
+        self.telemetry_write_buffer = get_telemetry_write_buffer()
         self.job_manager = job_manager
         self.current_run_id = current_run_id
+        self._run_cancellation_watch: RunCancellationWatch | None = None
         self.response_messages: list[Message] = []
 
         self.last_function_response = None
@@ -153,13 +158,11 @@ class LettaAgent(BaseAgent):
         if not self.job_manager or not self.current_run_id:
             return False
 
-        try:
-            job = await self.job_manager.get_job_by_id_async(job_id=self.current_run_id, actor=self.actor)
-            return job.status == JobStatus.cancelled
-        except Exception as e:
-            # Log the error but don't fail the execution
-            logger.warning(f"Failed to check job cancellation status for job {self.current_run_id}: {e}")
-            return False
+        # cancellations are pushed to us, so the job row is only read when one could have been missed
+        bus = get_run_cancellation_bus()
+        if self._run_cancellation_watch is None or self._run_cancellation_watch.run_id != self.current_run_id:
+            self._run_cancellation_watch = bus.watch(self.current_run_id)
+        return await bus.is_run_cancelled(self._run_cancellation_watch, job_manager=self.job_manager, actor=self.actor)
 
     @trace_method
     async def step(
@@ -175,7 +178,7 @@ class LettaAgent(BaseAgent):
         # TODO (cliandy): pass in run_id and use at send_message endpoints for all step functions
         agent_state = await self.agent_manager.get_agent_by_id_async(
             agent_id=self.agent_id,
-            include_relationships=["tools", "memory", "tool_exec_environment_variables", "sources"],
+            include_relationships=list(AGENT_LOAD_PROFILES["step_runtime"].include_relationships),
             actor=self.actor,
         )
         result = await self._step(
@@ -211,7 +214,7 @@ class LettaAgent(BaseAgent):
     ):
         agent_state = await self.agent_manager.get_agent_by_id_async(
             agent_id=self.agent_id,
-            include_relationships=["tools", "memory", "tool_exec_environment_variables", "sources"],
+            include_relationships=list(AGENT_LOAD_PROFILES["step_runtime"].include_relationships),
             actor=self.actor,
         )
         current_in_context_messages, new_in_context_messages = await _prepare_in_context_messages_no_persist_async(
@@ -382,7 +385,7 @@ class LettaAgent(BaseAgent):
 
                     # Update step with actual usage now that we have it (if step was created)
                     if logged_step:
-                        await self.step_manager.update_step_success_async(self.actor, step_id, response.usage, stop_reason)
+                        await self.telemetry_write_buffer.step_succeeded(step_id, response.usage, stop_reason)
 
                     # TODO (cliandy): handle message contexts with larger refactor and dedupe logic
                     new_message_idx = len(initial_messages) if initial_messages else 0
@@ -469,7 +472,7 @@ class LettaAgent(BaseAgent):
                                 stop_reason = LettaStopReason(stop_reason=StopReasonType.end_turn.value)
                             # Note: step already updated with success status after _handle_ai_response
                             if logged_step:
-                                await self.step_manager.update_step_stop_reason(self.actor, step_id, stop_reason.stop_reason)
+                                await self.telemetry_write_buffer.step_stopped(step_id, stop_reason.stop_reason)
                             break
 
                         # Handle error cases
@@ -478,8 +481,7 @@ class LettaAgent(BaseAgent):
                             import traceback
 
                             if logged_step:
-                                await self.step_manager.update_step_error_async(
-                                    actor=self.actor,
+                                await self.telemetry_write_buffer.step_failed(
                                     step_id=step_id,  # Use original step_id for telemetry
                                     error_type=type(e).__name__ if "e" in locals() else "Unknown",
                                     error_message=str(e) if "e" in locals() else "Unknown error",
@@ -504,7 +506,7 @@ class LettaAgent(BaseAgent):
                                 self.logger.error("Error in step after logging step")
                                 stop_reason = LettaStopReason(stop_reason=StopReasonType.error.value)
                             if logged_step:
-                                await self.step_manager.update_step_stop_reason(self.actor, step_id, stop_reason.stop_reason)
+                                await self.telemetry_write_buffer.step_stopped(step_id, stop_reason.stop_reason)
                         else:
                             self.logger.error("Invalid StepProgression value")
 
@@ -727,7 +729,7 @@ class LettaAgent(BaseAgent):
 
                     # Update step with actual usage now that we have it (if step was created)
                     if logged_step:
-                        await self.step_manager.update_step_success_async(self.actor, step_id, response.usage, stop_reason)
+                        await self.telemetry_write_buffer.step_succeeded(step_id, response.usage, stop_reason)
 
                     new_message_idx = len(initial_messages) if initial_messages else 0
                     self.response_messages.extend(persisted_messages[new_message_idx:])
@@ -799,7 +801,7 @@ class LettaAgent(BaseAgent):
                             if stop_reason is None:
                                 stop_reason = LettaStopReason(stop_reason=StopReasonType.end_turn.value)
                             if logged_step:
-                                await self.step_manager.update_step_success_async(self.actor, step_id, usage, stop_reason)
+                                await self.telemetry_write_buffer.step_succeeded(step_id, usage, stop_reason)
                             break
 
                         # Handle error cases
@@ -808,8 +810,7 @@ class LettaAgent(BaseAgent):
                             import traceback
 
                             if logged_step:
-                                await self.step_manager.update_step_error_async(
-                                    actor=self.actor,
+                                await self.telemetry_write_buffer.step_failed(
                                     step_id=step_id,  # Use original step_id for telemetry
                                     error_type=type(e).__name__ if "e" in locals() else "Unknown",
                                     error_message=str(e) if "e" in locals() else "Unknown error",
@@ -834,7 +835,7 @@ class LettaAgent(BaseAgent):
                                 self.logger.error("Error in step after logging step")
                                 stop_reason = LettaStopReason(stop_reason=StopReasonType.error.value)
                             if logged_step:
-                                await self.step_manager.update_step_stop_reason(self.actor, step_id, stop_reason.stop_reason)
+                                await self.telemetry_write_buffer.step_stopped(step_id, stop_reason.stop_reason)
                         else:
                             self.logger.error("Invalid StepProgression value")
 
@@ -875,14 +876,7 @@ class LettaAgent(BaseAgent):
     async def _update_agent_last_run_metrics(self, completion_time: datetime, duration_ms: float) -> None:
         if not settings.track_last_agent_run:
             return
-        try:
-            await self.agent_manager.update_agent_async(
-                agent_id=self.agent_id,
-                agent_update=UpdateAgent(last_run_completion=completion_time, last_run_duration_ms=duration_ms),
-                actor=self.actor,
-            )
-        except Exception as e:
-            self.logger.error(f"Failed to update agent's last run metrics: {e}")
+        await self.telemetry_write_buffer.update_agent_last_run(self.agent_id, completion_time, duration_ms)
 
     @trace_method
     async def step_stream(
@@ -903,7 +897,7 @@ class LettaAgent(BaseAgent):
         """
         agent_state = await self.agent_manager.get_agent_by_id_async(
             agent_id=self.agent_id,
-            include_relationships=["tools", "memory", "tool_exec_environment_variables", "sources"],
+            include_relationships=list(AGENT_LOAD_PROFILES["step_runtime"].include_relationships),
             actor=self.actor,
         )
         current_in_context_messages, new_in_context_messages = await _prepare_in_context_messages_no_persist_async(
@@ -1051,7 +1045,7 @@ class LettaAgent(BaseAgent):
                             MetricRegistry().ttft_ms_histogram.record(ns_to_ms(ttft_ns), metric_attributes)
 
                             if self.current_run_id and self.job_manager:
-                                await self.job_manager.record_ttft(self.current_run_id, ttft_ns, self.actor)
+                                await self.telemetry_write_buffer.record_ttft(self.current_run_id, ttft_ns)
 
                             first_chunk = False
 
@@ -1120,8 +1114,7 @@ class LettaAgent(BaseAgent):
 
                     # Update step with actual usage now that we have it (if step was created)
                     if logged_step:
-                        await self.step_manager.update_step_success_async(
-                            self.actor,
+                        await self.telemetry_write_buffer.step_succeeded(
                             step_id,
                             UsageStatistics(
                                 completion_tokens=usage.completion_tokens,
@@ -1241,7 +1234,7 @@ class LettaAgent(BaseAgent):
                                 stop_reason = LettaStopReason(stop_reason=StopReasonType.end_turn.value)
                             # Note: step already updated with success status after _handle_ai_response
                             if logged_step:
-                                await self.step_manager.update_step_stop_reason(self.actor, step_id, stop_reason.stop_reason)
+                                await self.telemetry_write_buffer.step_stopped(step_id, stop_reason.stop_reason)
                             break
 
                         # Handle error cases
@@ -1250,8 +1243,7 @@ class LettaAgent(BaseAgent):
                             import traceback
 
                             if logged_step:
-                                await self.step_manager.update_step_error_async(
-                                    actor=self.actor,
+                                await self.telemetry_write_buffer.step_failed(
                                     step_id=step_id,  # Use original step_id for telemetry
                                     error_type=type(e).__name__ if "e" in locals() else "Unknown",
                                     error_message=str(e) if "e" in locals() else "Unknown error",
@@ -1275,7 +1267,7 @@ class LettaAgent(BaseAgent):
                                 self.logger.error("Error in step after logging step")
                                 stop_reason = LettaStopReason(stop_reason=StopReasonType.error.value)
                             if logged_step:
-                                await self.step_manager.update_step_stop_reason(self.actor, step_id, stop_reason.stop_reason)
+                                await self.telemetry_write_buffer.step_stopped(step_id, stop_reason.stop_reason)
                         else:
                             self.logger.error("Invalid StepProgression value")
 
@@ -1332,13 +1324,16 @@ class LettaAgent(BaseAgent):
                 request_span.add_event(name="letta_request_ms", attributes={"duration_ms": ns_to_ms(duration_ns)})
             await self._update_agent_last_run_metrics(now, ns_to_ms(duration_ns))
             if settings.track_agent_run and self.current_run_id:
-                await self.job_manager.record_response_duration(self.current_run_id, duration_ns, self.actor)
-                await self.job_manager.safe_update_job_status_async(
-                    job_id=self.current_run_id,
-                    new_status=JobStatus.failed if is_error else JobStatus.completed,
-                    actor=self.actor,
-                    metadata=job_update_metadata,
-                )
+                await self.telemetry_write_buffer.record_response_duration(self.current_run_id, duration_ns)
+        # the run's steps and metrics should be readable by the time it is marked as finished
+        await self.telemetry_write_buffer.flush()
+        if request_start_timestamp_ns and settings.track_agent_run and self.current_run_id:
+            await self.job_manager.safe_update_job_status_async(
+                job_id=self.current_run_id,
+                new_status=JobStatus.failed if is_error else JobStatus.completed,
+                actor=self.actor,
+                metadata=job_update_metadata,
+            )
         if request_span:
             request_span.end()
 
@@ -1353,9 +1348,9 @@ class LettaAgent(BaseAgent):
     ) -> None:
         try:
             attrs = ctx_attrs or get_ctx_attributes()
-            await self.step_manager.record_step_metrics_async(
-                actor=self.actor,
+            await self.telemetry_write_buffer.record_step_metrics(
                 step_id=step_id,
+                organization_id=self.actor.organization_id,
                 llm_request_ns=step_metrics.llm_request_ns,
                 tool_execution_ns=step_metrics.tool_execution_ns,
                 step_ns=step_metrics.step_ns,
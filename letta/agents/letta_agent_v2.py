@@ -1,5 +1,6 @@
 import asyncio
 import json
+import logging
 import uuid
 from datetime import datetime
 from typing import AsyncGenerator, Tuple
@@ -27,9 +28,10 @@ from letta.helpers.tool_execution_helper import enable_strict_mode
 from letta.llm_api.llm_client import LLMClient
 from letta.local_llm.constants import INNER_THOUGHTS_KWARG
 from letta.log import get_logger
+from letta.otel.sampling_profiler import profile_phase, set_profile_labels
 from letta.otel.tracing import log_event, trace_method, tracer
 from letta.prompts.prompt_generator import PromptGenerator
-from letta.schemas.agent import AgentState, UpdateAgent
+from letta.schemas.agent import AgentState
 from letta.schemas.enums import AgentType, JobStatus, MessageRole, MessageStreamStatus, StepStatus
 from letta.schemas.letta_message import LettaMessage, MessageType
 from letta.schemas.letta_message_content import OmittedReasoningContent, ReasoningContent, RedactedReasoningContent, TextContent
@@ -50,15 +52,18 @@ from letta.services.helpers.tool_parser_helper import runtime_override_tool_json
 from letta.services.job_manager import JobManager
 from letta.services.message_manager import MessageManager
 from letta.services.passage_manager import PassageManager
+from letta.services.prompt_assembly_cache import get_prompt_assembly_cache
+from letta.services.run_cancellation_bus import RunCancellationWatch, get_run_cancellation_bus
 from letta.services.step_manager import StepManager
 from letta.services.summarizer.enums import SummarizationMode
 from letta.services.summarizer.summarizer import Summarizer
 from letta.services.telemetry_manager import TelemetryManager
+from letta.services.telemetry_write_buffer import get_telemetry_write_buffer
 from letta.services.tool_executor.tool_execution_manager import ToolExecutionManager
 from letta.settings import model_settings, settings, summarizer_settings
 from letta.system import package_function_response
 from letta.types import JsonDict
-from letta.utils import log_telemetry, safe_create_task, united_diff, validate_function_response
+from letta.utils import log_telemetry, united_diff, validate_function_response
 
 
 class LettaAgentV2(BaseAgentV2):
@@ -94,6 +99,7 @@ class LettaAgentV2(BaseAgentV2):
         self.passage_manager = PassageManager()
         self.step_manager = StepManager()
         self.telemetry_manager = TelemetryManager()
+        self.telemetry_write_buffer = get_telemetry_write_buffer()
 
         # TODO: Expand to more
         if summarizer_settings.enable_summarization and model_settings.openai_api_key:
@@ -176,6 +182,7 @@ class LettaAgentV2(BaseAgentV2):
             LettaResponse: Complete response with all messages and metadata
         """
         self._initialize_state()
+        set_profile_labels(agent_id=self.agent_state.id, run_id=run_id)
         request_span = self._request_checkpoint_start(request_start_timestamp_ns=request_start_timestamp_ns)
 
         in_context_messages, input_messages_to_persist = await _prepare_in_context_messages_no_persist_async(
@@ -257,6 +264,7 @@ class LettaAgentV2(BaseAgentV2):
             str: JSON-formatted SSE data chunks for each completed step
         """
         self._initialize_state()
+        set_profile_labels(agent_id=self.agent_state.id, run_id=run_id)
         request_span = self._request_checkpoint_start(request_start_timestamp_ns=request_start_timestamp_ns)
         first_chunk = True
 
@@ -421,11 +429,12 @@ class LettaAgentV2(BaseAgentV2):
                             step_id=step_id,
                             actor=self.actor,
                         )
-                        async for chunk in invocation:
-                            if llm_adapter.supports_token_streaming():
-                                if include_return_message_types is None or chunk.message_type in include_return_message_types:
-                                    first_chunk = True
-                                    yield chunk
+                        with profile_phase("llm"):
+                            async for chunk in invocation:
+                                if llm_adapter.supports_token_streaming():
+                                    if include_return_message_types is None or chunk.message_type in include_return_message_types:
+                                        first_chunk = True
+                                        yield chunk
                         # If you've reached this point without an error, break out of retry loop
                         break
                     except ValueError as e:
@@ -538,15 +547,14 @@ class LettaAgentV2(BaseAgentV2):
                         if self.stop_reason is None:
                             self.stop_reason = LettaStopReason(stop_reason=StopReasonType.end_turn.value)
                         if logged_step and step_id:
-                            await self.step_manager.update_step_stop_reason(self.actor, step_id, self.stop_reason.stop_reason)
+                            await self.telemetry_write_buffer.step_stopped(step_id, self.stop_reason.stop_reason)
                     return
                 if step_progression < StepProgression.STEP_LOGGED:
                     # Error occurred before step was fully logged
                     import traceback
 
                     if logged_step:
-                        await self.step_manager.update_step_error_async(
-                            actor=self.actor,
+                        await self.telemetry_write_buffer.step_failed(
                             step_id=step_id,  # Use original step_id for telemetry
                             error_type=type(e).__name__ if "e" in locals() else "Unknown",
                             error_message=str(e) if "e" in locals() else "Unknown error",
@@ -569,7 +577,7 @@ class LettaAgentV2(BaseAgentV2):
                         self.logger.error("Error in step after logging step")
                         self.stop_reason = LettaStopReason(stop_reason=StopReasonType.error.value)
                     if logged_step:
-                        await self.step_manager.update_step_stop_reason(self.actor, step_id, self.stop_reason.stop_reason)
+                        await self.telemetry_write_buffer.step_stopped(step_id, self.stop_reason.stop_reason)
                 else:
                     self.logger.error("Invalid StepProgression value")
 
@@ -597,6 +605,7 @@ class LettaAgentV2(BaseAgentV2):
         self.job_update_metadata = None
         self.last_function_response = None
         self.response_messages = []
+        self.run_cancellation_watch: RunCancellationWatch | None = None
 
     async def _maybe_get_approval_messages(self, messages: list[Message]) -> Tuple[Message | None, Message | None]:
         if len(messages) >= 2:
@@ -607,13 +616,11 @@ class LettaAgentV2(BaseAgentV2):
 
     @trace_method
     async def _check_run_cancellation(self, run_id) -> bool:
-        try:
-            job = await self.job_manager.get_job_by_id_async(job_id=run_id, actor=self.actor)
-            return job.status == JobStatus.cancelled
-        except Exception as e:
-            # Log the error but don't fail the execution
-            self.logger.warning(f"Failed to check job cancellation status for job {run_id}: {e}")
-            return False
+        # cancellations are pushed to us, so the job row is only read when one could have been missed
+        bus = get_run_cancellation_bus()
+        if self.run_cancellation_watch is None or self.run_cancellation_watch.run_id != run_id:
+            self.run_cancellation_watch = bus.watch(run_id)
+        return await bus.is_run_cancelled(self.run_cancellation_watch, job_manager=self.job_manager, actor=self.actor)
 
     @trace_method
     async def _refresh_messages(self, in_context_messages: list[Message]):
@@ -646,19 +653,6 @@ class LettaAgentV2(BaseAgentV2):
         if self.tool_rules_solver is not None:
             tool_constraint_block = self.tool_rules_solver.compile_tool_rule_prompts()
 
-        archive = await self.archive_manager.get_default_archive_for_agent_async(
-            agent_id=self.agent_state.id,
-            actor=self.actor,
-        )
-
-        if archive:
-            archive_tags = await self.passage_manager.get_unique_tags_for_archive_async(
-                archive_id=archive.id,
-                actor=self.actor,
-            )
-        else:
-            archive_tags = None
-
         # TODO: This is a pretty brittle pattern established all over our code, need to get rid of this
         curr_system_message = in_context_messages[0]
         curr_system_message_text = curr_system_message.content[0].text
@@ -679,18 +673,40 @@ class LettaAgentV2(BaseAgentV2):
         curr_dynamic_section = extract_dynamic_section(curr_system_message_text)
 
         # generate just the memory string with current state for comparison
-        curr_memory_str = agent_state.memory.compile(
-            tool_usage_rules=tool_constraint_block, sources=agent_state.sources, max_files_open=agent_state.max_files_open
+        prompt_assembly_cache = get_prompt_assembly_cache()
+        curr_memory_str = prompt_assembly_cache.compile_memory(
+            agent_state.id,
+            agent_state.memory,
+            tool_usage_rules=tool_constraint_block,
+            sources=agent_state.sources,
+            max_files_open=agent_state.max_files_open,
         )
         new_dynamic_section = extract_dynamic_section(curr_memory_str)
 
         # compare just the dynamic sections (memory blocks, tool rules, directories)
-        if curr_dynamic_section == new_dynamic_section:
+        if (
+            prompt_assembly_cache.is_current(agent_state.id, curr_memory_str, curr_system_message.id, curr_system_message_text)
+            or curr_dynamic_section == new_dynamic_section
+        ):
+            prompt_assembly_cache.mark_current(agent_state.id, curr_memory_str, curr_system_message.id, curr_system_message_text)
             self.logger.debug(
                 f"Memory and sources haven't changed for agent id={agent_state.id} and actor=({self.actor.id}, {self.actor.name}), skipping system prompt rebuild"
             )
             return in_context_messages
 
+        archive = await self.archive_manager.get_default_archive_for_agent_async(
+            agent_id=self.agent_state.id,
+            actor=self.actor,
+        )
+
+        if archive:
+            archive_tags = await self.passage_manager.get_unique_tags_for_archive_async(
+                archive_id=archive.id,
+                actor=self.actor,
+            )
+        else:
+            archive_tags = None
+
         memory_edit_timestamp = get_utc_time()
 
         # size of messages and archival memories
@@ -709,14 +725,16 @@ class LettaAgentV2(BaseAgentV2):
             archive_tags=archive_tags,
         )
 
-        diff = united_diff(curr_system_message_text, new_system_message_str)
-        if len(diff) > 0:
-            self.logger.debug(f"Rebuilding system with new memory...\nDiff:\n{diff}")
+        if new_system_message_str != curr_system_message_text:
+            if self.logger.isEnabledFor(logging.DEBUG):
+                diff = united_diff(curr_system_message_text, new_system_message_str)
+                self.logger.debug(f"Rebuilding system with new memory...\nDiff:\n{diff}")
 
             # [DB Call] Update Messages
             new_system_message = await self.message_manager.update_message_by_id_async(
                 curr_system_message.id, message_update=MessageUpdate(content=new_system_message_str), actor=self.actor
             )
+            prompt_assembly_cache.mark_current(agent_state.id, curr_memory_str, new_system_message.id, new_system_message_str)
             return [new_system_message] + in_context_messages[1:]
 
         else:
@@ -832,12 +850,11 @@ class LettaAgentV2(BaseAgentV2):
             if agent_step_span is not None:
                 agent_step_span.add_event(name="step_ms", attributes={"duration_ms": ns_to_ms(step_ns)})
                 agent_step_span.end()
-            self._record_step_metrics(step_id=step_metrics.id, step_metrics=step_metrics)
+            await self._record_step_metrics(step_id=step_metrics.id, step_metrics=step_metrics)
 
         # Update step with actual usage now that we have it (if step was created)
         if logged_step:
-            await self.step_manager.update_step_success_async(
-                self.actor,
+            await self.telemetry_write_buffer.step_succeeded(
                 step_metrics.id,
                 UsageStatistics(
                     completion_tokens=self.usage.completion_tokens,
@@ -1017,17 +1034,18 @@ class LettaAgentV2(BaseAgentV2):
             )
             messages_to_persist = (initial_messages or []) + tool_call_messages
 
-        persisted_messages = await self.message_manager.create_many_messages_async(
-            messages_to_persist, actor=self.actor, project_id=agent_state.project_id, template_id=agent_state.template_id
-        )
-
-        if run_id:
-            await self.job_manager.add_messages_to_job_async(
-                job_id=run_id,
-                message_ids=[m.id for m in persisted_messages if m.role != "user"],
-                actor=self.actor,
+        with profile_phase("db"):
+            persisted_messages = await self.message_manager.create_many_messages_async(
+                messages_to_persist, actor=self.actor, project_id=agent_state.project_id, template_id=agent_state.template_id
             )
 
+            if run_id:
+                await self.job_manager.add_messages_to_job_async(
+                    job_id=run_id,
+                    message_ids=[m.id for m in persisted_messages if m.role != "user"],
+                    actor=self.actor,
+                )
+
         return persisted_messages, continue_stepping, stop_reason
 
     @trace_method
@@ -1119,12 +1137,13 @@ class LettaAgentV2(BaseAgentV2):
         )
         # TODO: Integrate sandbox result
         log_event(name=f"start_{tool_name}_execution", attributes=tool_args)
-        tool_execution_result = await tool_execution_manager.execute_tool_async(
-            function_name=tool_name,
-            function_args=tool_args,
-            tool=target_tool,
-            step_id=step_id,
-        )
+        with profile_phase("tool"):
+            tool_execution_result = await tool_execution_manager.execute_tool_async(
+                function_name=tool_name,
+                function_args=tool_args,
+                tool=target_tool,
+                step_id=step_id,
+            )
         if agent_step_span:
             end_time = get_utc_timestamp_ns()
             agent_step_span.add_event(
@@ -1180,29 +1199,25 @@ class LettaAgentV2(BaseAgentV2):
 
         return new_in_context_messages
 
-    def _record_step_metrics(
+    async def _record_step_metrics(
         self,
         *,
         step_id: str,
         step_metrics: StepMetrics,
         run_id: str | None = None,
     ):
-        task = safe_create_task(
-            self.step_manager.record_step_metrics_async(
-                actor=self.actor,
-                step_id=step_id,
-                llm_request_ns=step_metrics.llm_request_ns,
-                tool_execution_ns=step_metrics.tool_execution_ns,
-                step_ns=step_metrics.step_ns,
-                agent_id=self.agent_state.id,
-                job_id=run_id,
-                project_id=self.agent_state.project_id,
-                template_id=self.agent_state.template_id,
-                base_template_id=self.agent_state.base_template_id,
-            ),
-            label="record_step_metrics",
+        await self.telemetry_write_buffer.record_step_metrics(
+            step_id=step_id,
+            organization_id=self.actor.organization_id,
+            llm_request_ns=step_metrics.llm_request_ns,
+            tool_execution_ns=step_metrics.tool_execution_ns,
+            step_ns=step_metrics.step_ns,
+            agent_id=self.agent_state.id,
+            job_id=run_id,
+            project_id=self.agent_state.project_id,
+            template_id=self.agent_state.template_id,
+            base_template_id=self.agent_state.base_template_id,
         )
-        return task
 
     @trace_method
     async def _log_request(
@@ -1220,14 +1235,17 @@ class LettaAgentV2(BaseAgentV2):
                 request_span.add_event(name="letta_request_ms", attributes={"duration_ms": ns_to_ms(duration_ns)})
             await self._update_agent_last_run_metrics(now, ns_to_ms(duration_ns))
             if settings.track_agent_run and run_id:
-                await self.job_manager.record_response_duration(run_id, duration_ns, self.actor)
-                await self.job_manager.safe_update_job_status_async(
-                    job_id=run_id,
-                    new_status=JobStatus.failed if is_error else JobStatus.completed,
-                    actor=self.actor,
-                    metadata=job_update_metadata,
-                    stop_reason=self.stop_reason.stop_reason if self.stop_reason else StopReasonType.error,
-                )
+                await self.telemetry_write_buffer.record_response_duration(run_id, duration_ns)
+        # the run's steps and metrics should be readable by the time it is marked as finished
+        await self.telemetry_write_buffer.flush()
+        if request_start_timestamp_ns and settings.track_agent_run and run_id:
+            await self.job_manager.safe_update_job_status_async(
+                job_id=run_id,
+                new_status=JobStatus.failed if is_error else JobStatus.completed,
+                actor=self.actor,
+                metadata=job_update_metadata,
+                stop_reason=self.stop_reason.stop_reason if self.stop_reason else StopReasonType.error,
+            )
         if request_span:
             request_span.end()
 
@@ -1235,14 +1253,7 @@ class LettaAgentV2(BaseAgentV2):
     async def _update_agent_last_run_metrics(self, completion_time: datetime, duration_ms: float) -> None:
         if not settings.track_last_agent_run:
             return
-        try:
-            await self.agent_manager.update_agent_async(
-                agent_id=self.agent_state.id,
-                agent_update=UpdateAgent(last_run_completion=completion_time, last_run_duration_ms=duration_ms),
-                actor=self.actor,
-            )
-        except Exception as e:
-            self.logger.error(f"Failed to update agent's last run metrics: {e}")
+        await self.telemetry_write_buffer.update_agent_last_run(self.agent_state.id, completion_time, duration_ms)
 
     def get_finish_chunks_for_stream(
         self,
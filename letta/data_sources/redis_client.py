@@ -8,11 +8,12 @@ from letta.settings import settings
 
 try:
     from redis import RedisError
-    from redis.asyncio import ConnectionPool, Redis
+    from redis.asyncio import BlockingConnectionPool, ConnectionPool, Redis
 except ImportError:
     RedisError = None
     Redis = None
     ConnectionPool = None
+    BlockingConnectionPool = None
 
 logger = get_logger(__name__)
 
@@ -34,6 +35,7 @@ class AsyncRedisClient:
         socket_connect_timeout: int = 5,
         retry_on_timeout: bool = True,
         health_check_interval: int = 30,
+        max_blocking_connections: Optional[int] = None,
     ):
         """
         Initialize Redis client with connection pool.
@@ -49,20 +51,28 @@ class AsyncRedisClient:
             socket_connect_timeout: Socket connection timeout
             retry_on_timeout: Retry operations on timeout
             health_check_interval: Seconds between health checks
+            max_blocking_connections: Maximum number of connections held by blocking reads such as XREAD with `block`,
+                defaults to `settings.redis_max_blocking_connections`
         """
-        self.pool = ConnectionPool(
+        connection_kwargs = dict(
             host=host,
             port=port,
             db=db,
             password=password,
-            max_connections=max_connections,
             decode_responses=decode_responses,
             socket_timeout=socket_timeout,
             socket_connect_timeout=socket_connect_timeout,
             retry_on_timeout=retry_on_timeout,
             health_check_interval=health_check_interval,
         )
+        self.pool = ConnectionPool(max_connections=max_connections, **connection_kwargs)
+        # Blocking reads hold their connection for as long as they block, so they get a pool of their own where they
+        # wait for a free connection instead of exhausting the pool every other command uses
+        self.blocking_pool = BlockingConnectionPool(
+            max_connections=max_blocking_connections or settings.redis_max_blocking_connections, timeout=None, **connection_kwargs
+        )
         self._client = None
+        self._blocking_client = None
         self._lock = asyncio.Lock()
 
     async def get_client(self) -> Redis:
@@ -73,12 +83,24 @@ class AsyncRedisClient:
                     self._client = Redis(connection_pool=self.pool)
         return self._client
 
+    async def get_blocking_client(self) -> Redis:
+        """Get or create the Redis client for blocking reads, backed by its own connection pool."""
+        if self._blocking_client is None:
+            async with self._lock:
+                if self._blocking_client is None:
+                    self._blocking_client = Redis(connection_pool=self.blocking_pool)
+        return self._blocking_client
+
     async def close(self):
         """Close Redis connection and cleanup."""
         if self._client:
             await self._client.close()
             await self.pool.disconnect()
             self._client = None
+        if self._blocking_client:
+            await self._blocking_client.close()
+            await self.blocking_pool.disconnect()
+            self._blocking_client = None
 
     async def __aenter__(self):
         """Async context manager entry."""
@@ -165,6 +187,12 @@ class AsyncRedisClient:
         client = await self.get_client()
         return await client.set(key, value, ex=ex, px=px, nx=nx, xx=xx)
 
+    @with_retry()
+    async def mget(self, *keys: str) -> List[Optional[str]]:
+        """Get the values of several keys, None for keys that don't exist."""
+        client = await self.get_client()
+        return await client.mget(*keys)
+
     @with_retry()
     async def delete(self, *keys: str) -> int:
         """Delete one or more keys."""
@@ -177,6 +205,13 @@ class AsyncRedisClient:
         client = await self.get_client()
         return await client.exists(*keys)
 
+    # Pub/sub operations
+    @with_retry()
+    async def publish(self, channel: str, message: str) -> int:
+        """Publish a message to a channel, returning the number of subscribers that received it."""
+        client = await self.get_client()
+        return await client.publish(channel, message)
+
     # Set operations
     async def sadd(self, key: str, *members: Union[str, int, float]) -> int:
         """Add members to set."""
@@ -243,12 +278,13 @@ class AsyncRedisClient:
         Args:
             streams: Dict mapping stream names to IDs
             count: Maximum number of entries to return
-            block: Milliseconds to block waiting for data (None = no blocking)
+            block: Milliseconds to block waiting for data (None = no blocking). Blocking reads use the blocking
+                connection pool and wait there when all of its connections are in use.
 
         Returns:
             List of entries from the streams
         """
-        client = await self.get_client()
+        client = await self.get_client() if block is None else await self.get_blocking_client()
         return await client.xread(streams, count=count, block=block)
 
     @with_retry()
@@ -392,6 +428,9 @@ class NoopAsyncRedisClient(AsyncRedisClient):
     async def smismember(self, key: str, values: list[Any] | Any) -> list[int] | int:
         return [0] * len(values) if isinstance(values, list) else 0
 
+    async def mget(self, *keys: str) -> List[Optional[str]]:
+        return [None] * len(keys)
+
     async def delete(self, *keys: str) -> int:
         return 0
 
@@ -404,6 +443,9 @@ class NoopAsyncRedisClient(AsyncRedisClient):
     async def scard(self, key: str) -> int:
         return 0
 
+    async def publish(self, channel: str, message: str) -> int:
+        return 0
+
     async def smembers(self, key: str) -> Set[str]:
         return set()
 
@@ -1,16 +1,21 @@
+import asyncio
+import copy
 import inspect
 import json
+import math
+import uuid
 from dataclasses import dataclass
 from functools import wraps
-from typing import Callable
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
 
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 
-from letta.constants import REDIS_DEFAULT_CACHE_PREFIX
+from letta.constants import REDIS_DEFAULT_CACHE_PREFIX, REDIS_SINGLE_FLIGHT_PREFIX
 from letta.data_sources.redis_client import NoopAsyncRedisClient, get_redis_client
 from letta.log import get_logger
 from letta.plugins.plugins import get_experimental_checker
 from letta.settings import settings
+from letta.utils import safe_create_task
 
 logger = get_logger(__name__)
 
@@ -158,3 +163,178 @@ def async_redis_cache(
         return async_wrapper
 
     return decorator
+
+
+# Scope id -> generation of the results computed for it, bumped whenever the rows behind the scope change
+_single_flight_generations: Dict[str, int] = {}
+_single_flight_clock = 0
+# Past this many tracked scopes the generations are reset, which only starts every scope afresh
+MAX_SINGLE_FLIGHT_SCOPES = 100_000
+# Generation of every scope at once, for changes that can't be traced to particular scopes
+_ALL_SCOPES = "*"
+
+
+@dataclass
+class _Flight:
+    task: asyncio.Task
+    callers: int = 1
+
+
+def _single_flight_generation(scope: Optional[str]) -> Tuple[int, int]:
+    return _single_flight_generations.get(_ALL_SCOPES, 0), _single_flight_generations.get(scope, 0) if scope else 0
+
+
+def _bump_single_flight_generations(scopes: List[str]) -> None:
+    global _single_flight_clock
+    if len(_single_flight_generations) + len(scopes) > MAX_SINGLE_FLIGHT_SCOPES:
+        _single_flight_generations.clear()
+    _single_flight_clock += 1
+    for scope in scopes:
+        _single_flight_generations[scope] = _single_flight_clock
+
+
+def _single_flight_scopes(scope_ids: Union[str, Iterable[Optional[str]], None]) -> List[str]:
+    if scope_ids is None:
+        return [_ALL_SCOPES]
+    if isinstance(scope_ids, str):
+        return [scope_ids]
+    return list({scope_id for scope_id in scope_ids if scope_id})
+
+
+async def _publish_single_flight_generations(scopes: List[str]) -> None:
+    redis_client = await get_redis_client()
+    if isinstance(redis_client, NoopAsyncRedisClient) or settings.single_flight_redis_ttl_seconds <= 0:
+        return
+    # a token has to outlive the results that may have been shared under the one before it
+    expiry = math.ceil(settings.single_flight_redis_ttl_seconds) + 1
+    try:
+        await asyncio.gather(
+            *[redis_client.set(f"{REDIS_SINGLE_FLIGHT_PREFIX}:scope:{scope}", uuid.uuid4().hex, ex=expiry) for scope in scopes]
+        )
+    except Exception as e:
+        # results shared by other processes are still bounded by the ttl
+        logger.warning(f"Failed to invalidate shared single-flight results for {scopes}: {e}")
+
+
+async def invalidate_single_flight(scope_ids: Union[str, Iterable[Optional[str]], None] = None) -> None:
+    """Stop handing out results of `single_flight` reads of `scope_ids`, or of every scope if None.
+
+    Call it after committing a change to the rows those reads return. Calls already in flight finish, but calls made
+    from now on run again rather than joining them, here and, if results are shared through Redis, in other processes.
+    """
+    scopes = _single_flight_scopes(scope_ids)
+    if not scopes:
+        return
+    _bump_single_flight_generations(scopes)
+    await _publish_single_flight_generations(scopes)
+
+
+def invalidate_single_flight_nowait(scope_ids: Union[str, Iterable[Optional[str]], None] = None) -> None:
+    """`invalidate_single_flight` for synchronous callers. Other processes are only told if an event loop is running."""
+    scopes = _single_flight_scopes(scope_ids)
+    if not scopes:
+        return
+    _bump_single_flight_generations(scopes)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    safe_create_task(_publish_single_flight_generations(scopes), label="invalidate single-flight results")
+
+
+def single_flight(
+    key_func: Callable[..., Optional[str]],
+    scope_func: Optional[Callable[..., Optional[str]]] = None,
+    model_class: Any = None,
+    prefix: str = REDIS_SINGLE_FLIGHT_PREFIX,
+):
+    """
+    Decorator that coalesces concurrent identical calls of an async read.
+
+    A call made while another one with the same key is in flight in this process waits for that call and gets a copy of
+    its result, instead of querying the database and building the models again. If `single_flight_redis_ttl_seconds` is
+    set and Redis is configured, results are also shared with other processes for that long.
+
+    Reads are grouped into scopes, e.g. the agent whose rows they return, and the managers that change those rows call
+    `invalidate_single_flight` with the scope afterwards.
+
+    Args:
+        key_func: function to generate the key of a call from its arguments, calls without a key are not coalesced
+        scope_func: function returning the scope id of a call from its arguments
+        model_class: type of the result, required to share results through Redis (e.g. `List[Message]`)
+        prefix: redis key prefix
+    """
+
+    def decorator(func):
+        stats = CacheStats()
+        # (event loop, key, generations) -> the call in flight
+        in_flight: Dict[tuple, _Flight] = {}
+        adapter = TypeAdapter(model_class) if model_class is not None else None
+
+        async def shared_result(redis_client, scope: Optional[str], cache_key: str) -> Tuple[Optional[str], Any]:
+            """Key of the result shared for the scope's current generation, and the result if there is one."""
+            try:
+                tokens = await redis_client.mget(f"{prefix}:scope:{_ALL_SCOPES}", f"{prefix}:scope:{scope}")
+                result_key = f"{cache_key}:{tokens[0]}:{tokens[1]}"
+                cached_value = await redis_client.get(result_key)
+                return result_key, None if cached_value is None else adapter.validate_json(cached_value)
+            except Exception as e:
+                logger.warning(f"Failed to read shared single-flight result: {e}")
+                return None, None
+
+        async def run(args, kwargs, scope: Optional[str], cache_key: str) -> Any:
+            redis_client = None
+            if adapter is not None and settings.single_flight_redis_ttl_seconds > 0:
+                redis_client = await get_redis_client()
+            if redis_client is None or isinstance(redis_client, NoopAsyncRedisClient):
+                return await func(*args, **kwargs)
+
+            result_key, result = await shared_result(redis_client, scope, cache_key)
+            if result is not None:
+                stats.hits += 1
+                return result
+            result = await func(*args, **kwargs)
+            if result_key is not None:
+                try:
+                    ttl_ms = int(settings.single_flight_redis_ttl_seconds * 1000)
+                    await redis_client.set(result_key, adapter.dump_json(result).decode(), px=ttl_ms)
+                except Exception as e:
+                    logger.warning(f"Failed to share single-flight result: {e}")
+            return result
+
+        async def fly(flight_key: tuple, args, kwargs, scope: Optional[str], cache_key: str) -> Any:
+            try:
+                return await run(args, kwargs, scope, cache_key)
+            finally:
+                # nobody joins a call once it has finished, so the number of callers sharing it is final
+                in_flight.pop(flight_key, None)
+
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            key = key_func(*args, **kwargs) if settings.single_flight_enabled else None
+            if key is None:
+                return await func(*args, **kwargs)
+
+            scope = scope_func(*args, **kwargs) if scope_func is not None else None
+            cache_key = f"{prefix}:{func.__qualname__}:{key}"
+            flight_key = (asyncio.get_running_loop(), cache_key, _single_flight_generation(scope))
+            flight = in_flight.get(flight_key)
+            if flight is not None:
+                stats.hits += 1
+                flight.callers += 1
+            else:
+                stats.misses += 1
+                flight = _Flight(task=asyncio.ensure_future(fly(flight_key, args, kwargs, scope, cache_key)))
+                # retrieve the exception of a call every caller stopped waiting for
+                flight.task.add_done_callback(lambda task: task.cancelled() or task.exception())
+                in_flight[flight_key] = flight
+
+            # a caller that goes away doesn't cancel the call for the others waiting on it
+            result = await asyncio.shield(flight.task)
+            # callers sharing a call each get their own copy to change
+            return result if flight.callers == 1 else copy.deepcopy(result)
+
+        async_wrapper.single_flight_stats = stats
+        return async_wrapper
+
+    return decorator
@@ -0,0 +1,225 @@
+import asyncio
+import hashlib
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+from letta.log import get_logger
+from letta.schemas.embedding_config import EmbeddingConfig
+from letta.settings import settings
+
+logger = get_logger(__name__)
+
+EMBEDDING_CACHE_DB_NAME = "embedding_cache.db"
+
+# When the SQLite file grows past its limit, the least recently used rows are deleted until it is back under this share of it
+DISK_PRUNE_TARGET_RATIO = 0.9
+
+
+def _pack(embedding: List[float]) -> bytes:
+    return np.asarray(embedding, dtype=np.float32).tobytes()
+
+
+def _unpack(blob: bytes) -> List[float]:
+    return np.frombuffer(blob, dtype=np.float32).tolist()
+
+
+class EmbeddingCache:
+    """Content-addressed cache of embeddings, keyed by (embedding endpoint, model, dim, sha256(text)).
+
+    An in-memory LRU sits in front of an optional SQLite file, so identical text (e.g. the same document
+    uploaded for many agents) is only sent to the embedding provider once, including across restarts.
+    Embeddings are kept as packed float32 in both, and both are bounded by size, evicting the least
+    recently used entries first.
+    """
+
+    def __init__(self, max_memory_bytes: int, db_path: Optional[str] = None, max_disk_bytes: Optional[int] = None):
+        self.max_memory_bytes = max_memory_bytes
+        self.db_path = db_path
+        self.max_disk_bytes = max_disk_bytes
+        self._data: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(embedding_config: EmbeddingConfig, text: str) -> str:
+        text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return (
+            f"{embedding_config.embedding_endpoint_type}:{embedding_config.embedding_endpoint}:"
+            f"{embedding_config.embedding_model}:{embedding_config.embedding_dim}:{text_hash}"
+        )
+
+    def _get_db(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, embedding BLOB NOT NULL, last_used INTEGER NOT NULL)"
+            )
+            if "last_used" not in {row[1] for row in self._db.execute("PRAGMA table_info(embeddings)")}:
+                # files written before the cache was size bounded
+                self._db.execute("ALTER TABLE embeddings ADD COLUMN last_used INTEGER NOT NULL DEFAULT 0")
+            self._db.execute("CREATE INDEX IF NOT EXISTS ix_embeddings_last_used ON embeddings (last_used)")
+            self._db.commit()
+        return self._db
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Look up embeddings by key, from memory first and then from disk. Missing keys are left out."""
+        found = {}
+        with self._lock:
+            for key in keys:
+                blob = self._data.get(key)
+                if blob is not None:
+                    self._data.move_to_end(key)
+                    found[key] = blob
+
+        missing = [key for key in keys if key not in found]
+        if missing and self.db_path:
+            from_disk = self._read_from_disk(missing)
+            self._set_in_memory(from_disk)
+            found.update(from_disk)
+
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return {key: _unpack(blob) for key, blob in found.items()}
+
+    def set_many(self, embeddings: Dict[str, List[float]]) -> None:
+        packed = {key: _pack(embedding) for key, embedding in embeddings.items()}
+        self._set_in_memory(packed)
+        if packed and self.db_path:
+            self._write_to_disk(packed)
+
+    def _set_in_memory(self, embeddings: Dict[str, bytes]) -> None:
+        with self._lock:
+            for key, blob in embeddings.items():
+                previous = self._data.pop(key, None)
+                if previous is not None:
+                    self._memory_bytes -= len(key) + len(previous)
+                self._data[key] = blob
+                self._memory_bytes += len(key) + len(blob)
+            while self._memory_bytes > self.max_memory_bytes and self._data:
+                key, blob = self._data.popitem(last=False)
+                self._memory_bytes -= len(key) + len(blob)
+
+    def _read_from_disk(self, keys: List[str]) -> Dict[str, bytes]:
+        try:
+            with self._db_lock:
+                db = self._get_db()
+                rows = []
+                # stay under SQLite's bound parameter limit
+                for i in range(0, len(keys), 500):
+                    batch = keys[i : i + 500]
+                    placeholders = ",".join("?" * len(batch))
+                    batch_rows = db.execute(f"SELECT key, embedding FROM embeddings WHERE key IN ({placeholders})", batch).fetchall()
+                    if batch_rows:
+                        db.execute(f"UPDATE embeddings SET last_used = ? WHERE key IN ({placeholders})", [int(time.time())] + batch)
+                    rows.extend(batch_rows)
+                db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to read from embedding cache at {self.db_path}: {e}")
+            return {}
+        return dict(rows)
+
+    def _write_to_disk(self, embeddings: Dict[str, bytes]) -> None:
+        now = int(time.time())
+        rows = [(key, blob, now) for key, blob in embeddings.items()]
+        try:
+            with self._db_lock:
+                db = self._get_db()
+                db.executemany("INSERT OR REPLACE INTO embeddings (key, embedding, last_used) VALUES (?, ?, ?)", rows)
+                db.commit()
+                if self.max_disk_bytes:
+                    self._prune_disk(db, row_bytes=sum(len(key) + len(blob) for key, blob, _ in rows) / len(rows))
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to write to embedding cache at {self.db_path}: {e}")
+
+    def _prune_disk(self, db: sqlite3.Connection, row_bytes: float) -> None:
+        """Delete the least recently used rows while the file holds more than max_disk_bytes. Freed pages are reused by later writes."""
+
+        def used_bytes() -> int:
+            page_size = db.execute("PRAGMA page_size").fetchone()[0]
+            page_count = db.execute("PRAGMA page_count").fetchone()[0]
+            freelist_count = db.execute("PRAGMA freelist_count").fetchone()[0]
+            return (page_count - freelist_count) * page_size
+
+        used = used_bytes()
+        if used <= self.max_disk_bytes:
+            return
+        target = self.max_disk_bytes * DISK_PRUNE_TARGET_RATIO
+        while used > target:
+            num_rows = max(1, math.ceil((used - target) / row_bytes))
+            deleted = db.execute(
+                "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_used LIMIT ?)", (num_rows,)
+            ).rowcount
+            db.commit()
+            if not deleted:
+                break
+            used = used_bytes()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._memory_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+_embedding_cache: Optional[EmbeddingCache] = None
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Get the process-wide embedding cache, or None if it is disabled."""
+    global _embedding_cache
+    if not settings.embedding_cache_enabled:
+        return None
+    if _embedding_cache is None:
+        db_path = str(settings.letta_dir / EMBEDDING_CACHE_DB_NAME) if settings.embedding_cache_persist else None
+        _embedding_cache = EmbeddingCache(
+            max_memory_bytes=settings.embedding_cache_max_memory_mb * 1024 * 1024,
+            db_path=db_path,
+            max_disk_bytes=settings.embedding_cache_max_disk_mb * 1024 * 1024,
+        )
+    return _embedding_cache
+
+
+async def get_or_create_embeddings(
+    texts: List[str],
+    embedding_config: EmbeddingConfig,
+    embed: Callable[[List[str]], Awaitable[List[List[float]]]],
+) -> List[List[float]]:
+    """
+    Return embeddings for `texts` in order, only calling `embed` for texts that are not cached.
+
+    `embed` receives each uncached text once, even if it appears several times in `texts`.
+    """
+    cache = get_embedding_cache()
+    if cache is None or not texts:
+        return await embed(texts)
+
+    keys = [EmbeddingCache.make_key(embedding_config, text) for text in texts]
+    cached = await asyncio.to_thread(cache.get_many, list(dict.fromkeys(keys)))
+
+    uncached = {}
+    for key, text in zip(keys, texts):
+        if key not in cached:
+            uncached.setdefault(key, text)
+
+    if uncached:
+        embeddings = await embed(list(uncached.values()))
+        new_embeddings = dict(zip(uncached.keys(), embeddings))
+        await asyncio.to_thread(cache.set_many, new_embeddings)
+        cached.update(new_embeddings)
+
+    return [cached[key] for key in keys]
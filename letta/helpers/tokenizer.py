@@ -0,0 +1,62 @@
+import math
+from functools import lru_cache
+from typing import List
+
+import tiktoken
+
+from letta.log import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_TIKTOKEN_ENCODING = "cl100k_base"
+
+# Chars-per-token ratio used by approximate counts. The tiktoken encodings average closer to 4 on English text and
+# code, so estimates err on the high side and sizing decisions made with them stay under their limits.
+APPROX_CHARS_PER_TOKEN = 3
+
+# Below this many characters in total a batch is encoded inline, since tiktoken starts a thread pool per batch call
+MIN_THREADED_BATCH_CHARS = 64_000
+TOKENIZER_BATCH_THREADS = 8
+
+
+@lru_cache(maxsize=256)
+def get_encoding(model: str) -> tiktoken.Encoding:
+    """The tiktoken encoding for `model`, falling back to cl100k_base for models tiktoken doesn't know.
+
+    Resolved once per model, so the fallback lookup (and its log line) doesn't run on every count.
+    """
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        logger.debug(f"No tiktoken encoding for model {model}, falling back to {DEFAULT_TIKTOKEN_ENCODING} for token counting")
+        return tiktoken.get_encoding(DEFAULT_TIKTOKEN_ENCODING)
+
+
+def approximate_token_count(text: str) -> int:
+    """Estimate the token count of `text` from its length, for sizing decisions that don't need an exact count."""
+    return math.ceil(len(text) / APPROX_CHARS_PER_TOKEN)
+
+
+def encode_batch(texts: List[str], model: str = "gpt-4") -> List[List[int]]:
+    """Encode `texts` with the encoding of `model`, using tiktoken's threaded batch path for large batches.
+
+    Special tokens in the texts are encoded as plain text.
+    """
+    encoding = get_encoding(model)
+    if len(texts) > 1 and sum(len(text) for text in texts) >= MIN_THREADED_BATCH_CHARS:
+        return encoding.encode_ordinary_batch(texts, num_threads=TOKENIZER_BATCH_THREADS)
+    return [encoding.encode_ordinary(text) for text in texts]
+
+
+def count_tokens(text: str, model: str = "gpt-4", approximate: bool = False) -> int:
+    """Count the tokens of `text` for `model`. `approximate` skips tokenization and estimates from the length."""
+    if approximate:
+        return approximate_token_count(text)
+    return len(get_encoding(model).encode_ordinary(text))
+
+
+def count_tokens_batch(texts: List[str], model: str = "gpt-4", approximate: bool = False) -> List[int]:
+    """`count_tokens` for each of `texts`, tokenizing them in one batch."""
+    if approximate:
+        return [approximate_token_count(text) for text in texts]
+    return [len(tokens) for tokens in encode_batch(texts, model)]
@@ -60,6 +60,7 @@ class TurbopufferClient:
         Returns:
             List of embedding vectors
         """
+        from letta.helpers.embedding_cache import get_or_create_embeddings
         from letta.llm_api.llm_client import LLMClient
 
         # filter out empty strings after stripping
@@ -73,7 +74,11 @@ class TurbopufferClient:
             provider_type=self.default_embedding_config.embedding_endpoint_type,
             actor=actor,
         )
-        embeddings = await embedding_client.request_embeddings(filtered_texts, self.default_embedding_config)
+        embeddings = await get_or_create_embeddings(
+            texts=filtered_texts,
+            embedding_config=self.default_embedding_config,
+            embed=lambda texts: embedding_client.request_embeddings(texts, self.default_embedding_config),
+        )
         return embeddings
 
     @trace_method
@@ -40,7 +40,7 @@ from letta.schemas.letta_message_content import ReasoningContent, RedactedReason
 from letta.schemas.letta_stop_reason import LettaStopReason, StopReasonType
 from letta.schemas.message import Message
 from letta.schemas.openai.chat_completion_response import FunctionCall, ToolCall
-from letta.server.rest_api.json_parser import JSONParser, PydanticJSONParser
+from letta.server.rest_api.json_parser import IncrementalJSONParser, JSONParser, PydanticJSONParser
 
 logger = get_logger(__name__)
 
@@ -78,7 +78,8 @@ class AnthropicStreamingInterface:
         self.tool_call_id = None
         self.tool_call_name = None
         self.accumulated_tool_call_args = ""
-        self.previous_parse = {}
+        # Reads the tool call arguments as they stream, so each delta is parsed once
+        self.tool_call_args_parser = IncrementalJSONParser()
 
         # usage trackers
         self.input_tokens = 0
@@ -121,22 +122,18 @@ class AnthropicStreamingInterface:
             arguments = str(json.dumps(tool_input, indent=2))
         return ToolCall(id=self.tool_call_id, function=FunctionCall(arguments=arguments, name=self.tool_call_name))
 
-    def _check_inner_thoughts_complete(self, combined_args: str) -> bool:
+    def _check_inner_thoughts_complete(self) -> bool:
         """
         Check if inner thoughts are complete in the current tool call arguments
-        by looking for a closing quote after the inner_thoughts field
+        by looking for another argument after the inner_thoughts field
         """
-        try:
-            if not self.put_inner_thoughts_in_kwarg:
-                # None of the things should have inner thoughts in kwargs
-                return True
-            else:
-                parsed = self.json_parser.parse(combined_args)
-                # TODO: This will break on tools with 0 input
-                return len(parsed.keys()) > 1 and INNER_THOUGHTS_KWARG in parsed.keys()
-        except Exception as e:
-            logger.error("Error checking inner thoughts: %s", e)
-            raise
+        if not self.put_inner_thoughts_in_kwarg:
+            # None of the things should have inner thoughts in kwargs
+            return True
+        else:
+            keys = self.tool_call_args_parser.keys
+            # TODO: This will break on tools with 0 input
+            return len(keys) > 1 and INNER_THOUGHTS_KWARG in keys
 
     def get_reasoning_content(self) -> list[TextContent | ReasoningContent | RedactedReasoningContent]:
         def _process_group(
@@ -348,12 +345,10 @@ class AnthropicStreamingInterface:
                     )
 
                 self.accumulated_tool_call_args += delta.partial_json
-                current_parsed = self.json_parser.parse(self.accumulated_tool_call_args)
+                field_deltas = self.tool_call_args_parser.feed(delta.partial_json)
 
                 # Start detecting a difference in inner thoughts
-                previous_inner_thoughts = self.previous_parse.get(INNER_THOUGHTS_KWARG, "")
-                current_inner_thoughts = current_parsed.get(INNER_THOUGHTS_KWARG, "")
-                inner_thoughts_diff = current_inner_thoughts[len(previous_inner_thoughts) :]
+                inner_thoughts_diff = "".join(d.text for d in field_deltas if d.key == INNER_THOUGHTS_KWARG)
 
                 if inner_thoughts_diff:
                     if prev_message_type and prev_message_type != "reasoning_message":
@@ -369,8 +364,9 @@ class AnthropicStreamingInterface:
                     yield reasoning_message
 
                 # Check if inner thoughts are complete - if so, flush the buffer or create approval message
-                if not self.inner_thoughts_complete and self._check_inner_thoughts_complete(self.accumulated_tool_call_args):
+                if not self.inner_thoughts_complete and self._check_inner_thoughts_complete():
                     self.inner_thoughts_complete = True
+                    current_inner_thoughts = self.tool_call_args_parser.get(INNER_THOUGHTS_KWARG, "")
 
                     # Check if this tool requires approval
                     if self.tool_call_name in self.requires_approval_tools:
@@ -423,9 +419,7 @@ class AnthropicStreamingInterface:
 
                 # Start detecting special case of "send_message"
                 if self.tool_call_name == DEFAULT_MESSAGE_TOOL and self.use_assistant_message:
-                    previous_send_message = self.previous_parse.get(DEFAULT_MESSAGE_TOOL_KWARG, "")
-                    current_send_message = current_parsed.get(DEFAULT_MESSAGE_TOOL_KWARG, "")
-                    send_message_diff = current_send_message[len(previous_send_message) :]
+                    send_message_diff = "".join(d.text for d in field_deltas if d.key == DEFAULT_MESSAGE_TOOL_KWARG)
 
                     # Only stream out if it's not an empty string
                     if send_message_diff:
@@ -461,9 +455,6 @@ class AnthropicStreamingInterface:
                         yield tool_call_msg
                     else:
                         self.tool_call_buffer.append(tool_call_msg)
-
-                # Set previous parse
-                self.previous_parse = current_parsed
             elif isinstance(delta, BetaThinkingDelta):
                 # Safety check
                 if not self.anthropic_mode == EventMode.THINKING:
@@ -28,9 +28,11 @@ from letta.helpers.datetime_helpers import get_utc_time_int
 from letta.helpers.decorators import deprecated
 from letta.llm_api.helpers import add_inner_thoughts_to_functions, unpack_all_inner_thoughts_from_kwargs
 from letta.llm_api.llm_client_base import LLMClientBase
+from letta.llm_api.transport_registry import get_llm_transport_registry
 from letta.local_llm.constants import INNER_THOUGHTS_KWARG, INNER_THOUGHTS_KWARG_DESCRIPTION
 from letta.log import get_logger
 from letta.otel.tracing import trace_method
+from letta.schemas.enums import ProviderType
 from letta.schemas.llm_config import LLMConfig
 from letta.schemas.message import Message as PydanticMessage
 from letta.schemas.openai.chat_completion_request import Tool as OpenAITool
@@ -50,6 +52,8 @@ logger = get_logger(__name__)
 
 
 class AnthropicClient(LLMClientBase):
+    PROVIDER_TYPE = ProviderType.anthropic
+
     @trace_method
     @deprecated("Synchronous version of this is no longer valid. Will result in model_dump of coroutine")
     def request(self, request_data: dict, llm_config: LLMConfig) -> dict:
@@ -142,17 +146,11 @@ class AnthropicClient(LLMClientBase):
     ) -> Union[anthropic.AsyncAnthropic, anthropic.Anthropic]:
         api_key, _, _ = self.get_byok_overrides(llm_config)
 
-        if async_client:
-            return (
-                anthropic.AsyncAnthropic(api_key=api_key, max_retries=model_settings.anthropic_max_retries)
-                if api_key
-                else anthropic.AsyncAnthropic(max_retries=model_settings.anthropic_max_retries)
-            )
-        return (
-            anthropic.Anthropic(api_key=api_key, max_retries=model_settings.anthropic_max_retries)
-            if api_key
-            else anthropic.Anthropic(max_retries=model_settings.anthropic_max_retries)
-        )
+        registry = get_llm_transport_registry()
+        get_client = registry.get_async_client if async_client else registry.get_client
+        sdk_class = anthropic.AsyncAnthropic if async_client else anthropic.Anthropic
+        # without an api key the SDK reads ANTHROPIC_API_KEY
+        return get_client(sdk_class, self.PROVIDER_TYPE.value, api_key=api_key or None, max_retries=model_settings.anthropic_max_retries)
 
     @trace_method
     async def _get_anthropic_client_async(
@@ -160,17 +158,11 @@ class AnthropicClient(LLMClientBase):
     ) -> Union[anthropic.AsyncAnthropic, anthropic.Anthropic]:
         api_key, _, _ = await self.get_byok_overrides_async(llm_config)
 
-        if async_client:
-            return (
-                anthropic.AsyncAnthropic(api_key=api_key, max_retries=model_settings.anthropic_max_retries)
-                if api_key
-                else anthropic.AsyncAnthropic(max_retries=model_settings.anthropic_max_retries)
-            )
-        return (
-            anthropic.Anthropic(api_key=api_key, max_retries=model_settings.anthropic_max_retries)
-            if api_key
-            else anthropic.Anthropic(max_retries=model_settings.anthropic_max_retries)
-        )
+        registry = get_llm_transport_registry()
+        get_client = registry.get_async_client if async_client else registry.get_client
+        sdk_class = anthropic.AsyncAnthropic if async_client else anthropic.Anthropic
+        # without an api key the SDK reads ANTHROPIC_API_KEY
+        return get_client(sdk_class, self.PROVIDER_TYPE.value, api_key=api_key or None, max_retries=model_settings.anthropic_max_retries)
 
     @trace_method
     def build_request_data(
@@ -298,7 +290,7 @@ class AnthropicClient(LLMClientBase):
     async def count_tokens(self, messages: List[dict] = None, model: str = None, tools: List[OpenAITool] = None) -> int:
         logging.getLogger("httpx").setLevel(logging.WARNING)
 
-        client = anthropic.AsyncAnthropic()
+        client = get_llm_transport_registry().get_async_client(anthropic.AsyncAnthropic, self.PROVIDER_TYPE.value)
         if messages and len(messages) == 0:
             messages = None
         if tools and len(tools) > 0:
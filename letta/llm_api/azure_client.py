@@ -5,14 +5,17 @@ from openai import AsyncAzureOpenAI, AzureOpenAI
 from openai.types.chat.chat_completion import ChatCompletion
 
 from letta.llm_api.openai_client import OpenAIClient
+from letta.llm_api.transport_registry import get_llm_transport_registry
 from letta.otel.tracing import trace_method
 from letta.schemas.embedding_config import EmbeddingConfig
-from letta.schemas.enums import ProviderCategory
+from letta.schemas.enums import ProviderCategory, ProviderType
 from letta.schemas.llm_config import LLMConfig
 from letta.settings import model_settings
 
 
 class AzureClient(OpenAIClient):
+    PROVIDER_TYPE = ProviderType.azure
+
     def get_byok_overrides(self, llm_config: LLMConfig) -> Tuple[Optional[str], Optional[str], Optional[str]]:
         if llm_config.provider_category == ProviderCategory.byok:
             from letta.services.provider_manager import ProviderManager
@@ -40,7 +43,9 @@ class AzureClient(OpenAIClient):
             base_url = model_settings.azure_base_url or os.environ.get("AZURE_BASE_URL")
             api_version = model_settings.azure_api_version or os.environ.get("AZURE_API_VERSION")
 
-        client = AzureOpenAI(api_key=api_key, azure_endpoint=base_url, api_version=api_version)
+        client = get_llm_transport_registry().get_client(
+            AzureOpenAI, self.PROVIDER_TYPE.value, api_key=api_key, azure_endpoint=base_url, api_version=api_version
+        )
         response: ChatCompletion = client.chat.completions.create(**request_data)
         return response.model_dump()
 
@@ -55,7 +60,9 @@ class AzureClient(OpenAIClient):
             base_url = model_settings.azure_base_url or os.environ.get("AZURE_BASE_URL")
             api_version = model_settings.azure_api_version or os.environ.get("AZURE_API_VERSION")
         try:
-            client = AsyncAzureOpenAI(api_key=api_key, azure_endpoint=base_url, api_version=api_version)
+            client = get_llm_transport_registry().get_async_client(
+                AsyncAzureOpenAI, self.PROVIDER_TYPE.value, api_key=api_key, azure_endpoint=base_url, api_version=api_version
+            )
             response: ChatCompletion = await client.chat.completions.create(**request_data)
         except Exception as e:
             raise self.handle_llm_error(e)
@@ -68,7 +75,9 @@ class AzureClient(OpenAIClient):
         api_key = model_settings.azure_api_key or os.environ.get("AZURE_API_KEY")
         base_url = model_settings.azure_base_url or os.environ.get("AZURE_BASE_URL")
         api_version = model_settings.azure_api_version or os.environ.get("AZURE_API_VERSION")
-        client = AsyncAzureOpenAI(api_key=api_key, api_version=api_version, azure_endpoint=base_url)
+        client = get_llm_transport_registry().get_async_client(
+            AsyncAzureOpenAI, self.PROVIDER_TYPE.value, api_key=api_key, api_version=api_version, azure_endpoint=base_url
+        )
         response = await client.embeddings.create(model=embedding_config.embedding_model, input=inputs)
 
         # TODO: add total usage
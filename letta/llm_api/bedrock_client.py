@@ -4,9 +4,10 @@ import anthropic
 from aioboto3.session import Session
 
 from letta.llm_api.anthropic_client import AnthropicClient
+from letta.llm_api.transport_registry import get_llm_transport_registry
 from letta.log import get_logger
 from letta.otel.tracing import trace_method
-from letta.schemas.enums import ProviderCategory
+from letta.schemas.enums import ProviderCategory, ProviderType
 from letta.schemas.llm_config import LLMConfig
 from letta.schemas.message import Message as PydanticMessage
 from letta.services.provider_manager import ProviderManager
@@ -16,6 +17,8 @@ logger = get_logger(__name__)
 
 
 class BedrockClient(AnthropicClient):
+    PROVIDER_TYPE = ProviderType.bedrock
+
     async def get_byok_overrides_async(self, llm_config: LLMConfig) -> tuple[str, str, str]:
         override_access_key_id, override_secret_access_key, override_default_region = None, None, None
         if llm_config.provider_category == ProviderCategory.byok:
@@ -35,6 +38,7 @@ class BedrockClient(AnthropicClient):
     ) -> Union[anthropic.AsyncAnthropic, anthropic.Anthropic, anthropic.AsyncAnthropicBedrock, anthropic.AnthropicBedrock]:
         override_access_key_id, override_secret_access_key, override_default_region = await self.get_byok_overrides_async(llm_config)
 
+        # Session tokens change with every call, so only the connections are shared, not the client
         session = Session()
         async with session.client(
             "sts",
@@ -52,6 +56,7 @@ class BedrockClient(AnthropicClient):
                 aws_session_token=credentials["SessionToken"],
                 aws_region=override_default_region or model_settings.aws_default_region,
                 max_retries=model_settings.anthropic_max_retries,
+                http_client=get_llm_transport_registry().get_async_http_client(self.PROVIDER_TYPE.value),
             )
         else:
             return anthropic.AnthropicBedrock(
@@ -60,6 +65,7 @@ class BedrockClient(AnthropicClient):
                 aws_session_token=credentials["SessionToken"],
                 aws_region=override_default_region or model_settings.aws_default_region,
                 max_retries=model_settings.anthropic_max_retries,
+                http_client=get_llm_transport_registry().get_http_client(self.PROVIDER_TYPE.value),
             )
 
     @trace_method
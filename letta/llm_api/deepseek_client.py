@@ -9,7 +9,9 @@ from openai.types.chat.chat_completion import ChatCompletion
 from openai.types.chat.chat_completion_chunk import ChatCompletionChunk
 
 from letta.llm_api.openai_client import OpenAIClient
+from letta.llm_api.transport_registry import get_llm_transport_registry
 from letta.otel.tracing import trace_method
+from letta.schemas.enums import ProviderType
 from letta.schemas.llm_config import LLMConfig
 from letta.schemas.message import Message as PydanticMessage
 from letta.schemas.openai.chat_completion_request import (
@@ -322,6 +324,8 @@ def convert_deepseek_response_to_chatcompletion(
 
 
 class DeepseekClient(OpenAIClient):
+    PROVIDER_TYPE = ProviderType.deepseek
+
     def requires_auto_tool_choice(self, llm_config: LLMConfig) -> bool:
         return False
 
@@ -366,7 +370,9 @@ class DeepseekClient(OpenAIClient):
         Performs underlying synchronous request to OpenAI API and returns raw response dict.
         """
         api_key = model_settings.deepseek_api_key or os.environ.get("DEEPSEEK_API_KEY")
-        client = OpenAI(api_key=api_key, base_url=llm_config.model_endpoint)
+        client = get_llm_transport_registry().get_client(
+            OpenAI, self.PROVIDER_TYPE.value, api_key=api_key, base_url=llm_config.model_endpoint
+        )
 
         response: ChatCompletion = client.chat.completions.create(**request_data)
         return response.model_dump()
@@ -377,7 +383,9 @@ class DeepseekClient(OpenAIClient):
         Performs underlying asynchronous request to OpenAI API and returns raw response dict.
         """
         api_key = model_settings.deepseek_api_key or os.environ.get("DEEPSEEK_API_KEY")
-        client = AsyncOpenAI(api_key=api_key, base_url=llm_config.model_endpoint)
+        client = get_llm_transport_registry().get_async_client(
+            AsyncOpenAI, self.PROVIDER_TYPE.value, api_key=api_key, base_url=llm_config.model_endpoint
+        )
 
         response: ChatCompletion = await client.chat.completions.create(**request_data)
         return response.model_dump()
@@ -388,7 +396,9 @@ class DeepseekClient(OpenAIClient):
         Performs underlying asynchronous streaming request to OpenAI and returns the async stream iterator.
         """
         api_key = model_settings.deepseek_api_key or os.environ.get("DEEPSEEK_API_KEY")
-        client = AsyncOpenAI(api_key=api_key, base_url=llm_config.model_endpoint)
+        client = get_llm_transport_registry().get_async_client(
+            AsyncOpenAI, self.PROVIDER_TYPE.value, api_key=api_key, base_url=llm_config.model_endpoint
+        )
         response_stream: AsyncStream[ChatCompletionChunk] = await client.chat.completions.create(
             **request_data, stream=True, stream_options={"include_usage": True}
         )
@@ -7,16 +7,24 @@ from google.genai.types import HttpOptions
 from letta.errors import ErrorCode, LLMAuthenticationError, LLMError
 from letta.llm_api.google_constants import GOOGLE_MODEL_FOR_API_KEY_CHECK
 from letta.llm_api.google_vertex_client import GoogleVertexClient
+from letta.llm_api.transport_registry import get_llm_transport_registry
 from letta.log import get_logger
+from letta.schemas.enums import ProviderType
 from letta.settings import model_settings, settings
 
 logger = get_logger(__name__)
 
 
 class GoogleAIClient(GoogleVertexClient):
+    PROVIDER_TYPE = ProviderType.google_ai
+
     def _get_client(self):
         timeout_ms = int(settings.llm_request_timeout_seconds * 1000)
-        return genai.Client(
+        # genai.Client keeps its own sync and async connection pools, which are shared by sharing the client
+        return get_llm_transport_registry().get_client(
+            genai.Client,
+            self.PROVIDER_TYPE.value,
+            http_client_option=None,
             api_key=model_settings.gemini_api_key,
             http_options=HttpOptions(timeout=timeout_ms),
         )
@@ -74,11 +82,8 @@ async def google_ai_get_model_list_async(
 
     url, headers = get_gemini_endpoint_and_headers(base_url, None, api_key, key_in_header)
 
-    # Determine if we need to close the client at the end
-    close_client = False
     if client is None:
-        client = httpx.AsyncClient()
-        close_client = True
+        client = get_llm_transport_registry().get_async_http_client(ProviderType.google_ai.value)
 
     try:
         response = await client.get(url, headers=headers)
@@ -108,11 +113,6 @@ async def google_ai_get_model_list_async(
         printd(f"Got unknown Exception, exception={e}")
         raise e
 
-    finally:
-        # Close the client if we created it
-        if close_client:
-            await client.aclose()
-
 
 def google_ai_get_model_details(base_url: str, api_key: str, model: str, key_in_header: bool = True) -> dict:
     """Synchronous version to get model details from Google AI API using httpx."""
@@ -123,15 +123,15 @@ def google_ai_get_model_details(base_url: str, api_key: str, model: str, key_in_
     url, headers = get_gemini_endpoint_and_headers(base_url, model, api_key, key_in_header)
 
     try:
-        with httpx.Client() as client:
-            response = client.get(url, headers=headers)
-            printd(f"response = {response}")
-            response.raise_for_status()  # Raises HTTPStatusError for 4XX/5XX status
-            response_data = response.json()  # convert to dict from string
-            printd(f"response.json = {response_data}")
+        client = get_llm_transport_registry().get_http_client(ProviderType.google_ai.value)
+        response = client.get(url, headers=headers)
+        printd(f"response = {response}")
+        response.raise_for_status()  # Raises HTTPStatusError for 4XX/5XX status
+        response_data = response.json()  # convert to dict from string
+        printd(f"response.json = {response_data}")
 
-            # Return the model details
-            return response_data
+        # Return the model details
+        return response_data
 
     except httpx.HTTPStatusError as http_err:
         # Handle HTTP errors (e.g., response 4XX, 5XX)
@@ -163,11 +163,8 @@ async def google_ai_get_model_details_async(
 
     url, headers = get_gemini_endpoint_and_headers(base_url, model, api_key, key_in_header)
 
-    # Determine if we need to close the client at the end
-    close_client = False
     if client is None:
-        client = httpx.AsyncClient()
-        close_client = True
+        client = get_llm_transport_registry().get_async_http_client(ProviderType.google_ai.value)
 
     try:
         response = await client.get(url, headers=headers)
@@ -198,11 +195,6 @@ async def google_ai_get_model_details_async(
         printd(f"Got unknown Exception, exception={e}")
         raise e
 
-    finally:
-        # Close the client if we created it
-        if close_client:
-            await client.aclose()
-
 
 def google_ai_get_model_context_window(base_url: str, api_key: str, model: str, key_in_header: bool = True) -> int:
     model_details = google_ai_get_model_details(base_url=base_url, api_key=api_key, model=model, key_in_header=key_in_header)
@@ -30,10 +30,12 @@ from letta.errors import (
 from letta.helpers.datetime_helpers import get_utc_time_int
 from letta.helpers.json_helpers import json_dumps, json_loads
 from letta.llm_api.llm_client_base import LLMClientBase
+from letta.llm_api.transport_registry import get_llm_transport_registry
 from letta.local_llm.json_parser import clean_json_string_extra_backslash
 from letta.local_llm.utils import count_tokens
 from letta.log import get_logger
 from letta.otel.tracing import trace_method
+from letta.schemas.enums import ProviderType
 from letta.schemas.llm_config import LLMConfig
 from letta.schemas.message import Message as PydanticMessage
 from letta.schemas.openai.chat_completion_request import Tool
@@ -45,11 +47,16 @@ logger = get_logger(__name__)
 
 
 class GoogleVertexClient(LLMClientBase):
+    PROVIDER_TYPE = ProviderType.google_vertex
     MAX_RETRIES = model_settings.gemini_max_retries
 
     def _get_client(self):
         timeout_ms = int(settings.llm_request_timeout_seconds * 1000)
-        return genai.Client(
+        # genai.Client keeps its own sync and async connection pools, which are shared by sharing the client
+        return get_llm_transport_registry().get_client(
+            genai.Client,
+            self.PROVIDER_TYPE.value,
+            http_client_option=None,
             vertexai=True,
             project=model_settings.google_cloud_project,
             location=model_settings.google_cloud_location,
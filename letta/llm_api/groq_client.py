@@ -6,14 +6,18 @@ from openai.types.chat.chat_completion import ChatCompletion
 from openai.types.chat.chat_completion_chunk import ChatCompletionChunk
 
 from letta.llm_api.openai_client import OpenAIClient
+from letta.llm_api.transport_registry import get_llm_transport_registry
 from letta.otel.tracing import trace_method
 from letta.schemas.embedding_config import EmbeddingConfig
+from letta.schemas.enums import ProviderType
 from letta.schemas.llm_config import LLMConfig
 from letta.schemas.message import Message as PydanticMessage
 from letta.settings import model_settings
 
 
 class GroqClient(OpenAIClient):
+    PROVIDER_TYPE = ProviderType.groq
+
     def requires_auto_tool_choice(self, llm_config: LLMConfig) -> bool:
         return False
 
@@ -47,7 +51,9 @@ class GroqClient(OpenAIClient):
         Performs underlying synchronous request to Groq API and returns raw response dict.
         """
         api_key = model_settings.groq_api_key or os.environ.get("GROQ_API_KEY")
-        client = OpenAI(api_key=api_key, base_url=llm_config.model_endpoint)
+        client = get_llm_transport_registry().get_client(
+            OpenAI, self.PROVIDER_TYPE.value, api_key=api_key, base_url=llm_config.model_endpoint
+        )
 
         response: ChatCompletion = client.chat.completions.create(**request_data)
         return response.model_dump()
@@ -58,7 +64,9 @@ class GroqClient(OpenAIClient):
         Performs underlying asynchronous request to Groq API and returns raw response dict.
         """
         api_key = model_settings.groq_api_key or os.environ.get("GROQ_API_KEY")
-        client = AsyncOpenAI(api_key=api_key, base_url=llm_config.model_endpoint)
+        client = get_llm_transport_registry().get_async_client(
+            AsyncOpenAI, self.PROVIDER_TYPE.value, api_key=api_key, base_url=llm_config.model_endpoint
+        )
 
         response: ChatCompletion = await client.chat.completions.create(**request_data)
         return response.model_dump()
@@ -67,7 +75,9 @@ class GroqClient(OpenAIClient):
     async def request_embeddings(self, inputs: List[str], embedding_config: EmbeddingConfig) -> List[List[float]]:
         """Request embeddings given texts and embedding config"""
         api_key = model_settings.groq_api_key or os.environ.get("GROQ_API_KEY")
-        client = AsyncOpenAI(api_key=api_key, base_url=embedding_config.embedding_endpoint)
+        client = get_llm_transport_registry().get_async_client(
+            AsyncOpenAI, self.PROVIDER_TYPE.value, api_key=api_key, base_url=embedding_config.embedding_endpoint
+        )
         response = await client.embeddings.create(model=embedding_config.embedding_model, input=inputs)
 
         # TODO: add total usage
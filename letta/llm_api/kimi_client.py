@@ -4,6 +4,7 @@ from typing import List, Optional
 from letta.llm_api.llm_client_base import LLMClientBase
 from letta.llm_api.openai_client import OpenAIClient
 from letta.schemas.embedding_config import EmbeddingConfig
+from letta.schemas.enums import ProviderType
 from letta.schemas.llm_config import LLMConfig
 from letta.settings import model_settings
 from letta.schemas.openai.chat_completion_request import ToolFunctionChoice
@@ -13,7 +14,9 @@ from letta.schemas.openai.chat_completion_response import ChatCompletionResponse
 
 class KimiClient(OpenAIClient):
     """Kimi API client (Moonshot AI) - inherits from OpenAI client since the API is compatible"""
-    
+
+    PROVIDER_TYPE = ProviderType.kimi
+
     def _prepare_client_kwargs(self, llm_config: LLMConfig) -> dict:
         """Prepare client configuration for Kimi API"""
         api_key = model_settings.kimi_api_key or os.environ.get("KIMI_API_KEY")
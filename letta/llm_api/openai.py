@@ -16,10 +16,12 @@ from letta.llm_api.openai_client import (
     supports_structured_output,
     supports_temperature_param,
 )
+from letta.llm_api.transport_registry import get_llm_transport_registry
 from letta.local_llm.constants import INNER_THOUGHTS_KWARG, INNER_THOUGHTS_KWARG_DESCRIPTION, INNER_THOUGHTS_KWARG_DESCRIPTION_GO_FIRST
 from letta.local_llm.utils import num_tokens_from_functions, num_tokens_from_messages
 from letta.log import get_logger
 from letta.otel.tracing import log_event
+from letta.schemas.enums import ProviderType
 from letta.schemas.llm_config import LLMConfig
 from letta.schemas.message import Message as PydanticMessage, MessageRole as _MessageRole
 from letta.schemas.openai.chat_completion_request import (
@@ -142,11 +144,9 @@ async def openai_get_model_list_async(
 
     logger.debug(f"Sending request to {url}")
 
-    # Use provided client or create a new one
-    close_client = False
+    # Use provided client or the shared pooled one
     if client is None:
-        client = httpx.AsyncClient()
-        close_client = True
+        client = get_llm_transport_registry().get_async_http_client(ProviderType.openai.value)
 
     try:
         response = await client.get(url, headers=headers, params=extra_params)
@@ -170,9 +170,6 @@ async def openai_get_model_list_async(
         # Handle other potential errors
         logger.debug(f"Got unknown Exception, exception={e}")
         raise e
-    finally:
-        if close_client:
-            await client.aclose()
 
 
 def build_openai_chat_completions_request(
@@ -550,7 +547,7 @@ def openai_chat_completions_request_stream(
 
     data = prepare_openai_payload(chat_completion_request)
     data["stream"] = True
-    client = OpenAI(api_key=api_key, base_url=url, max_retries=0)
+    client = get_llm_transport_registry().get_client(OpenAI, ProviderType.openai.value, api_key=api_key, base_url=url, max_retries=0)
     try:
         stream = client.chat.completions.create(**data)
         for chunk in stream:
@@ -574,7 +571,7 @@ def openai_chat_completions_request(
     https://platform.openai.com/docs/guides/text-generation?lang=curl
     """
     data = prepare_openai_payload(chat_completion_request)
-    client = OpenAI(api_key=api_key, base_url=url, max_retries=0)
+    client = get_llm_transport_registry().get_client(OpenAI, ProviderType.openai.value, api_key=api_key, base_url=url, max_retries=0)
     log_event(name="llm_request_sent", attributes=data)
     chat_completion = client.chat.completions.create(**data)
     log_event(name="llm_response_received", attributes=chat_completion.model_dump())
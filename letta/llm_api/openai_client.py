@@ -23,10 +23,12 @@ from letta.errors import (
 )
 from letta.llm_api.helpers import add_inner_thoughts_to_functions, convert_to_structured_output, unpack_all_inner_thoughts_from_kwargs
 from letta.llm_api.llm_client_base import LLMClientBase
+from letta.llm_api.transport_registry import get_llm_transport_registry
 from letta.local_llm.constants import INNER_THOUGHTS_KWARG, INNER_THOUGHTS_KWARG_DESCRIPTION, INNER_THOUGHTS_KWARG_DESCRIPTION_GO_FIRST
 from letta.log import get_logger
 from letta.otel.tracing import trace_method
 from letta.schemas.embedding_config import EmbeddingConfig
+from letta.schemas.enums import ProviderType
 from letta.schemas.letta_message_content import MessageContentType
 from letta.schemas.llm_config import LLMConfig
 from letta.schemas.message import Message as PydanticMessage
@@ -118,6 +120,8 @@ def requires_auto_tool_choice(llm_config: LLMConfig) -> bool:
 
 
 class OpenAIClient(LLMClientBase):
+    PROVIDER_TYPE = ProviderType.openai
+
     def _prepare_client_kwargs(self, llm_config: LLMConfig) -> dict:
         api_key, _, _ = self.get_byok_overrides(llm_config)
 
@@ -265,7 +269,7 @@ class OpenAIClient(LLMClientBase):
         """
         Performs underlying synchronous request to OpenAI API and returns raw response dict.
         """
-        client = OpenAI(**self._prepare_client_kwargs(llm_config))
+        client = get_llm_transport_registry().get_client(OpenAI, self.PROVIDER_TYPE.value, **self._prepare_client_kwargs(llm_config))
         response: ChatCompletion = client.chat.completions.create(**request_data)
         return response.model_dump()
 
@@ -275,7 +279,7 @@ class OpenAIClient(LLMClientBase):
         Performs underlying asynchronous request to OpenAI API and returns raw response dict.
         """
         kwargs = await self._prepare_client_kwargs_async(llm_config)
-        client = AsyncOpenAI(**kwargs)
+        client = get_llm_transport_registry().get_async_client(AsyncOpenAI, self.PROVIDER_TYPE.value, **kwargs)
         response: ChatCompletion = await client.chat.completions.create(**request_data)
         return response.model_dump()
 
@@ -315,7 +319,7 @@ class OpenAIClient(LLMClientBase):
         Performs underlying asynchronous streaming request to OpenAI and returns the async stream iterator.
         """
         kwargs = await self._prepare_client_kwargs_async(llm_config)
-        client = AsyncOpenAI(**kwargs)
+        client = get_llm_transport_registry().get_async_client(AsyncOpenAI, self.PROVIDER_TYPE.value, **kwargs)
         response_stream: AsyncStream[ChatCompletionChunk] = await client.chat.completions.create(
             **request_data, stream=True, stream_options={"include_usage": True}
         )
@@ -328,7 +332,7 @@ class OpenAIClient(LLMClientBase):
             return []
 
         kwargs = self._prepare_client_kwargs_embedding(embedding_config)
-        client = AsyncOpenAI(**kwargs)
+        client = get_llm_transport_registry().get_async_client(AsyncOpenAI, self.PROVIDER_TYPE.value, **kwargs)
 
         # track results by original index to maintain order
         results = [None] * len(inputs)
@@ -5,13 +5,17 @@ from openai import AsyncOpenAI, OpenAI
 from openai.types.chat.chat_completion import ChatCompletion
 
 from letta.llm_api.openai_client import OpenAIClient
+from letta.llm_api.transport_registry import get_llm_transport_registry
 from letta.otel.tracing import trace_method
 from letta.schemas.embedding_config import EmbeddingConfig
+from letta.schemas.enums import ProviderType
 from letta.schemas.llm_config import LLMConfig
 from letta.settings import model_settings
 
 
 class TogetherClient(OpenAIClient):
+    PROVIDER_TYPE = ProviderType.together
+
     def requires_auto_tool_choice(self, llm_config: LLMConfig) -> bool:
         return True
 
@@ -24,7 +28,9 @@ class TogetherClient(OpenAIClient):
 
         if not api_key:
             api_key = model_settings.together_api_key or os.environ.get("TOGETHER_API_KEY")
-        client = OpenAI(api_key=api_key, base_url=llm_config.model_endpoint)
+        client = get_llm_transport_registry().get_client(
+            OpenAI, self.PROVIDER_TYPE.value, api_key=api_key, base_url=llm_config.model_endpoint
+        )
 
         response: ChatCompletion = client.chat.completions.create(**request_data)
         return response.model_dump()
@@ -38,7 +44,9 @@ class TogetherClient(OpenAIClient):
 
         if not api_key:
             api_key = model_settings.together_api_key or os.environ.get("TOGETHER_API_KEY")
-        client = AsyncOpenAI(api_key=api_key, base_url=llm_config.model_endpoint)
+        client = get_llm_transport_registry().get_async_client(
+            AsyncOpenAI, self.PROVIDER_TYPE.value, api_key=api_key, base_url=llm_config.model_endpoint
+        )
 
         response: ChatCompletion = await client.chat.completions.create(**request_data)
         return response.model_dump()
@@ -47,7 +55,9 @@ class TogetherClient(OpenAIClient):
     async def request_embeddings(self, inputs: List[str], embedding_config: EmbeddingConfig) -> List[List[float]]:
         """Request embeddings given texts and embedding config"""
         api_key = model_settings.together_api_key or os.environ.get("TOGETHER_API_KEY")
-        client = AsyncOpenAI(api_key=api_key, base_url=embedding_config.embedding_endpoint)
+        client = get_llm_transport_registry().get_async_client(
+            AsyncOpenAI, self.PROVIDER_TYPE.value, api_key=api_key, base_url=embedding_config.embedding_endpoint
+        )
         response = await client.embeddings.create(model=embedding_config.embedding_model, input=inputs)
 
         # TODO: add total usage
@@ -0,0 +1,339 @@
+import asyncio
+import hashlib
+import importlib.util
+import threading
+import weakref
+from collections import Counter, OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Optional, Type, TypeVar
+
+import httpx
+
+from letta.log import get_logger
+from letta.otel.metric_registry import MetricRegistry
+from letta.settings import settings
+from letta.utils import safe_create_task
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+# httpcore trace events of a request that couldn't reuse an open connection
+_CONNECTION_EVENTS = {
+    "connection.connect_tcp.complete": "connect",
+    "connection.connect_unix_socket.complete": "connect",
+    "connection.start_tls.complete": "tls_handshake",
+}
+
+
+def _http2_available() -> bool:
+    if not settings.llm_http2_enabled:
+        return False
+    if importlib.util.find_spec("h2") is None:
+        logger.warning("llm_http2_enabled is set but the h2 package is not installed, using HTTP/1.1")
+        return False
+    return True
+
+
+class _AsyncStreamWithCallback(httpx.AsyncByteStream):
+    """A response stream that calls `on_close` once it has been closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, on_close: Callable[[], Awaitable[None]]):
+        self._stream = stream
+        self._on_close = on_close
+        self._closed = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            await self._stream.aclose()
+        finally:
+            await self._on_close()
+
+
+class _StreamWithCallback(httpx.SyncByteStream):
+    """A response stream that calls `on_close` once it has been closed."""
+
+    def __init__(self, stream: httpx.SyncByteStream, on_close: Callable[[], None]):
+        self._stream = stream
+        self._on_close = on_close
+        self._closed = False
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield from self._stream
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._stream.close()
+        finally:
+            self._on_close()
+
+
+class _PooledAsyncClient(httpx.AsyncClient):
+    """An `httpx.AsyncClient` that counts its open requests, so that once evicted it is closed when the last one is done.
+
+    A request is open until its response is closed, which for streamed responses is after the body has been read.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._in_flight = 0
+        self._evicted = False
+
+    async def send(self, request: httpx.Request, **kwargs) -> httpx.Response:
+        self._in_flight += 1
+        try:
+            response = await super().send(request, **kwargs)
+        except BaseException:
+            await self._request_done()
+            raise
+        if kwargs.get("stream"):
+            response.stream = _AsyncStreamWithCallback(response.stream, self._request_done)
+        else:
+            await self._request_done()
+        return response
+
+    async def _request_done(self) -> None:
+        self._in_flight -= 1
+        if self._evicted and not self._in_flight:
+            await self.aclose()
+
+    def evict(self) -> None:
+        """Close the client now if it is idle, otherwise once its open requests are done."""
+        self._evicted = True
+        if self._in_flight:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # built outside of an event loop and never used from one, there are no connections to close
+            return
+        safe_create_task(self.aclose(), label="close_evicted_llm_http_client")
+
+
+class _PooledClient(httpx.Client):
+    """Like `_PooledAsyncClient`, for synchronous clients, which may be shared by several threads."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._in_flight_lock = threading.Lock()
+        self._in_flight = 0
+        self._evicted = False
+
+    def send(self, request: httpx.Request, **kwargs) -> httpx.Response:
+        with self._in_flight_lock:
+            self._in_flight += 1
+        try:
+            response = super().send(request, **kwargs)
+        except BaseException:
+            self._request_done()
+            raise
+        if kwargs.get("stream"):
+            response.stream = _StreamWithCallback(response.stream, self._request_done)
+        else:
+            self._request_done()
+        return response
+
+    def _request_done(self) -> None:
+        with self._in_flight_lock:
+            self._in_flight -= 1
+            close = self._evicted and not self._in_flight
+        if close:
+            self.close()
+
+    def evict(self) -> None:
+        """Close the client now if it is idle, otherwise once its open requests are done."""
+        with self._in_flight_lock:
+            self._evicted = True
+            close = not self._in_flight
+        if close:
+            self.close()
+
+
+def _client_key(sdk_class: type, provider: str, options: dict) -> tuple:
+    """Provider, SDK class, endpoint, and a hash of everything else the client is built with, including credentials."""
+    base_url = options.get("base_url") or options.get("azure_endpoint")
+    fingerprint = hashlib.sha256(repr(sorted(options.items(), key=lambda item: item[0])).encode()).hexdigest()
+    return provider, f"{sdk_class.__module__}.{sdk_class.__qualname__}", str(base_url), fingerprint
+
+
+class LLMTransportRegistry:
+    """Provider SDK clients shared across LLM requests, so requests reuse open connections instead of each paying for
+    a new TCP connection and TLS handshake.
+
+    A client is built once per provider, SDK class, endpoint and credentials (kept only as a hash), and handed an httpx
+    client with the pool limits from settings. Connections belong to the event loop they were opened on, so clients
+    are kept per running event loop, clients asked for outside of one are kept apart. Beyond `max_clients` the least
+    recently used client is evicted, and its connections closed once the requests still using it are done.
+
+    Every request sent through a pooled client is counted, together with the connections and TLS handshakes it needed,
+    in `stats` and the `count_llm_http_connection_events` metric, which gives the connection reuse rate per provider.
+    """
+
+    def __init__(self, max_clients: Optional[int] = None):
+        self._max_clients = max_clients
+        self._lock = threading.Lock()
+        self._loop_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, OrderedDict]" = weakref.WeakKeyDictionary()
+        self._strong_loop_clients: dict = {}
+        self._clients: "OrderedDict[tuple, tuple]" = OrderedDict()
+        # (provider, event) -> count
+        self.stats: Counter = Counter()
+
+    @property
+    def max_clients(self) -> int:
+        return self._max_clients if self._max_clients is not None else settings.llm_http_max_clients
+
+    def get_async_client(self, sdk_class: Type[T], provider: str, http_client_option: Optional[str] = "http_client", **options) -> T:
+        """`sdk_class(**options)`, shared with earlier callers and given a pooled `httpx.AsyncClient` as `http_client_option`.
+
+        Pass `http_client_option=None` for SDKs that manage their own connections, they are still shared.
+        """
+
+        def build():
+            if not http_client_option:
+                return sdk_class(**options), None
+            http_client = self._new_async_http_client(provider)
+            return sdk_class(**options, **{http_client_option: http_client}), http_client
+
+        if not settings.llm_http_pool_enabled:
+            return sdk_class(**options)
+        return self._get(_client_key(sdk_class, provider, options), build)
+
+    def get_client(self, sdk_class: Type[T], provider: str, http_client_option: Optional[str] = "http_client", **options) -> T:
+        """Like `get_async_client`, for synchronous SDK clients, which are given a pooled `httpx.Client`."""
+
+        def build():
+            if not http_client_option:
+                return sdk_class(**options), None
+            http_client = self._new_http_client(provider)
+            return sdk_class(**options, **{http_client_option: http_client}), http_client
+
+        if not settings.llm_http_pool_enabled:
+            return sdk_class(**options)
+        return self._get(_client_key(sdk_class, provider, options), build)
+
+    def get_async_http_client(self, provider: str) -> httpx.AsyncClient:
+        """A pooled `httpx.AsyncClient` for direct calls to a provider's API. Callers must not close it."""
+
+        def build():
+            http_client = self._new_async_http_client(provider)
+            return http_client, http_client
+
+        if not settings.llm_http_pool_enabled:
+            return httpx.AsyncClient(**self._http_client_kwargs())
+        return self._get(_client_key(httpx.AsyncClient, provider, {}), build)
+
+    def get_http_client(self, provider: str) -> httpx.Client:
+        """A pooled `httpx.Client` for direct calls to a provider's API. Callers must not close it."""
+
+        def build():
+            http_client = self._new_http_client(provider)
+            return http_client, http_client
+
+        if not settings.llm_http_pool_enabled:
+            return httpx.Client(**self._http_client_kwargs())
+        return self._get(_client_key(httpx.Client, provider, {}), build)
+
+    def _get(self, key: tuple, build: Callable[[], tuple]) -> Any:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        evicted = []
+        with self._lock:
+            clients = self._clients if loop is None else self._clients_of_loop(loop)
+            if key in clients:
+                clients.move_to_end(key)
+                return clients[key][0]
+
+            # (client, the httpx client it sends requests with, if pooled by us)
+            clients[key] = build()
+            client = clients[key][0]
+            while len(clients) > self.max_clients:
+                evicted.append(clients.popitem(last=False)[1][1])
+
+        # requests may still be using an evicted client, so it is closed once they are done
+        for http_client in evicted:
+            if http_client is not None:
+                http_client.evict()
+        return client
+
+    def _clients_of_loop(self, loop: asyncio.AbstractEventLoop) -> OrderedDict:
+        try:
+            return self._loop_clients.setdefault(loop, OrderedDict())
+        except TypeError:
+            # loops that can't be weakly referenced are kept for the life of the process
+            return self._strong_loop_clients.setdefault(loop, OrderedDict())
+
+    def _http_client_kwargs(self) -> dict:
+        return dict(
+            limits=httpx.Limits(
+                max_connections=settings.llm_http_max_connections,
+                max_keepalive_connections=settings.llm_http_max_keepalive_connections,
+                keepalive_expiry=settings.llm_http_keepalive_expiry_seconds,
+            ),
+            http2=_http2_available(),
+            timeout=httpx.Timeout(settings.llm_request_timeout_seconds),
+            follow_redirects=True,
+        )
+
+    def _new_async_http_client(self, provider: str) -> _PooledAsyncClient:
+        async def trace(event: str, info: dict) -> None:
+            if event in _CONNECTION_EVENTS:
+                self._record(provider, _CONNECTION_EVENTS[event])
+
+        async def on_request(request: httpx.Request) -> None:
+            self._record(provider, "request")
+            request.extensions.setdefault("trace", trace)
+
+        return _PooledAsyncClient(event_hooks={"request": [on_request]}, **self._http_client_kwargs())
+
+    def _new_http_client(self, provider: str) -> _PooledClient:
+        def trace(event: str, info: dict) -> None:
+            if event in _CONNECTION_EVENTS:
+                self._record(provider, _CONNECTION_EVENTS[event])
+
+        def on_request(request: httpx.Request) -> None:
+            self._record(provider, "request")
+            request.extensions.setdefault("trace", trace)
+
+        return _PooledClient(event_hooks={"request": [on_request]}, **self._http_client_kwargs())
+
+    def _record(self, provider: str, event: str) -> None:
+        self.stats[(provider, event)] += 1
+        MetricRegistry().llm_http_connection_events_counter.add(1, attributes={"provider": provider, "event": event})
+
+    async def aclose(self) -> None:
+        """Close the pooled connections of the running event loop and those of clients built outside of one."""
+        with self._lock:
+            loop = asyncio.get_running_loop()
+            try:
+                loop_clients = self._loop_clients.pop(loop, None)
+            except TypeError:
+                loop_clients = self._strong_loop_clients.pop(loop, None)
+            pooled = list((loop_clients or {}).values()) + list(self._clients.values())
+            self._clients.clear()
+        for _, http_client in pooled:
+            try:
+                if isinstance(http_client, httpx.AsyncClient):
+                    await http_client.aclose()
+                elif http_client is not None:
+                    http_client.close()
+            except Exception as e:
+                logger.warning(f"Failed to close pooled LLM client: {e}")
+
+
+_llm_transport_registry = LLMTransportRegistry()
+
+
+def get_llm_transport_registry() -> LLMTransportRegistry:
+    return _llm_transport_registry
@@ -4,13 +4,16 @@ from typing import List, Optional
 from letta.llm_api.llm_client_base import LLMClientBase
 from letta.llm_api.openai_client import OpenAIClient
 from letta.schemas.embedding_config import EmbeddingConfig
+from letta.schemas.enums import ProviderType
 from letta.schemas.llm_config import LLMConfig
 from letta.settings import model_settings
 
 
 class ZhipuClient(OpenAIClient):
     """Zhipu AI (智谱AI) client - inherits from OpenAI client since the API is compatible"""
-    
+
+    PROVIDER_TYPE = ProviderType.zhipu
+
     def _prepare_client_kwargs(self, llm_config: LLMConfig) -> dict:
         """Prepare client configuration for Zhipu API"""
         api_key = model_settings.zhipu_api_key or os.environ.get("ZHIPU_API_KEY")
@@ -3,7 +3,6 @@ import warnings
 from typing import List, Union
 
 import requests
-import tiktoken
 
 import letta.local_llm.llm_chat_completion_wrappers.airoboros as airoboros
 import letta.local_llm.llm_chat_completion_wrappers.chatml as chatml
@@ -11,6 +10,7 @@ import letta.local_llm.llm_chat_completion_wrappers.configurable_wrapper as conf
 import letta.local_llm.llm_chat_completion_wrappers.dolphin as dolphin
 import letta.local_llm.llm_chat_completion_wrappers.llama3 as llama3
 import letta.local_llm.llm_chat_completion_wrappers.zephyr as zephyr
+from letta.helpers.tokenizer import count_tokens_batch
 from letta.log import get_logger
 from letta.schemas.openai.chat_completion_request import Tool, ToolCall
 
@@ -71,22 +71,16 @@ def num_tokens_from_functions(functions: List[dict], model: str = "gpt-4"):
 
     Copied from https://community.openai.com/t/how-to-calculate-the-tokens-when-using-function-call/266573/11
     """
-    try:
-        encoding = tiktoken.encoding_for_model(model)
-    except KeyError:
-        from letta.utils import printd
-
-        printd("Warning: model not found. Using cl100k_base encoding.")
-        encoding = tiktoken.get_encoding("cl100k_base")
-
+    # collect every string to tokenize and tokenize them in one batch
+    texts = []
     num_tokens = 0
     for function in functions:
-        function_tokens = len(encoding.encode(function["name"]))
+        texts.append(function["name"])
         if function["description"]:
             if not isinstance(function["description"], str):
                 warnings.warn(f"Function {function['name']} has non-string description: {function['description']}")
             else:
-                function_tokens += len(encoding.encode(function["description"]))
+                texts.append(function["description"])
         else:
             warnings.warn(f"Function {function['name']} has no description, function: {function}")
 
@@ -94,32 +88,32 @@ def num_tokens_from_functions(functions: List[dict], model: str = "gpt-4"):
             parameters = function["parameters"]
             if "properties" in parameters:
                 for propertiesKey in parameters["properties"]:
-                    function_tokens += len(encoding.encode(propertiesKey))
+                    texts.append(propertiesKey)
                     v = parameters["properties"][propertiesKey]
                     for field in v:
                         try:
                             if field == "type":
-                                function_tokens += 2
+                                num_tokens += 2
                                 # Handle both string and array types, e.g. {"type": ["string", "null"]}
                                 if isinstance(v["type"], list):
-                                    function_tokens += len(encoding.encode(",".join(v["type"])))
+                                    texts.append(",".join(v["type"]))
                                 else:
-                                    function_tokens += len(encoding.encode(v["type"]))
+                                    texts.append(v["type"])
                             elif field == "description":
-                                function_tokens += 2
-                                function_tokens += len(encoding.encode(v["description"]))
+                                num_tokens += 2
+                                texts.append(v["description"])
                             elif field == "enum":
-                                function_tokens -= 3
+                                num_tokens -= 3
                                 for o in v["enum"]:
-                                    function_tokens += 3
-                                    function_tokens += len(encoding.encode(o))
+                                    num_tokens += 3
+                                    texts.append(o)
                             elif field == "items":
-                                function_tokens += 2
+                                num_tokens += 2
                                 if isinstance(v["items"], dict) and "type" in v["items"]:
-                                    function_tokens += len(encoding.encode(v["items"]["type"]))
+                                    texts.append(v["items"]["type"])
                             elif field == "default":
-                                function_tokens += 2
-                                function_tokens += len(encoding.encode(str(v["default"])))
+                                num_tokens += 2
+                                texts.append(str(v["default"]))
                             elif field == "title":
                                 # TODO: Is this right? For MCP
                                 continue
@@ -131,34 +125,20 @@ def num_tokens_from_functions(functions: List[dict], model: str = "gpt-4"):
                         except:
                             logger.error(f"Failed to encode field {field} with value {v}")
                             raise
-                function_tokens += 11
+                num_tokens += 11
 
-        num_tokens += function_tokens
+    try:
+        num_tokens += sum(count_tokens_batch(texts, model))
+    except TypeError:
+        logger.error(f"Failed to encode function definitions: {[text for text in texts if not isinstance(text, str)]}")
+        raise
 
     num_tokens += 12
     return num_tokens
 
 
-def num_tokens_from_tool_calls(tool_calls: Union[List[dict], List[ToolCall]], model: str = "gpt-4"):
-    """Based on above code (num_tokens_from_functions).
-
-    Example to encode:
-    [{
-        'id': '8b6707cf-2352-4804-93db-0423f',
-        'type': 'function',
-        'function': {
-            'name': 'send_message',
-            'arguments': '{\n  "message": "More human than human is our motto."\n}'
-        }
-    }]
-    """
-    try:
-        encoding = tiktoken.encoding_for_model(model)
-    except KeyError:
-        # print("Warning: model not found. Using cl100k_base encoding.")
-        encoding = tiktoken.get_encoding("cl100k_base")
-
-    num_tokens = 0
+def _tool_call_texts(tool_calls: Union[List[dict], List[ToolCall]]) -> List[str]:
+    texts = []
     for tool_call in tool_calls:
         if isinstance(tool_call, dict):
             tool_call_id = tool_call["id"]
@@ -174,17 +154,30 @@ def num_tokens_from_tool_calls(tool_calls: Union[List[dict], List[ToolCall]], mo
             tool_call_function_arguments = tool_call_function.arguments
         else:
             raise ValueError(f"Unknown tool call type: {type(tool_call)}")
+        texts.extend([tool_call_id, tool_call_type, tool_call_function_name, tool_call_function_arguments])
+    return texts
 
-        function_tokens = len(encoding.encode(tool_call_id))
-        function_tokens += 2 + len(encoding.encode(tool_call_type))
-        function_tokens += 2 + len(encoding.encode(tool_call_function_name))
-        function_tokens += 2 + len(encoding.encode(tool_call_function_arguments))
-
-        num_tokens += function_tokens
 
+def _num_tool_call_overhead_tokens(tool_calls: Union[List[dict], List[ToolCall]]) -> int:
+    # 2 tokens around each of type, name and arguments, plus 12 for the list
     # TODO adjust?
-    num_tokens += 12
-    return num_tokens
+    return 6 * len(tool_calls) + 12
+
+
+def num_tokens_from_tool_calls(tool_calls: Union[List[dict], List[ToolCall]], model: str = "gpt-4"):
+    """Based on above code (num_tokens_from_functions).
+
+    Example to encode:
+    [{
+        'id': '8b6707cf-2352-4804-93db-0423f',
+        'type': 'function',
+        'function': {
+            'name': 'send_message',
+            'arguments': '{\n  "message": "More human than human is our motto."\n}'
+        }
+    }]
+    """
+    return sum(count_tokens_batch(_tool_call_texts(tool_calls), model)) + _num_tool_call_overhead_tokens(tool_calls)
 
 
 def num_tokens_from_messages(messages: List[dict], model: str = "gpt-4") -> int:
@@ -198,12 +191,6 @@ def num_tokens_from_messages(messages: List[dict], model: str = "gpt-4") -> int:
     For counting tokens in function calling REQUESTS, see:
         https://community.openai.com/t/how-to-calculate-the-tokens-when-using-function-call/266573/11
     """
-    try:
-        # Attempt to search for the encoding based on the model string
-        encoding = tiktoken.encoding_for_model(model)
-    except KeyError:
-        # print("Warning: model not found. Using cl100k_base encoding.")
-        encoding = tiktoken.get_encoding("cl100k_base")
     if model in {
         "gpt-3.5-turbo-0613",
         "gpt-3.5-turbo-16k-0613",
@@ -233,29 +220,30 @@ def num_tokens_from_messages(messages: List[dict], model: str = "gpt-4") -> int:
         # raise NotImplementedError(
         # f"""num_tokens_from_messages() is not implemented for model {model}. See https://github.com/openai/openai-python/blob/main/chatml.md for information on how messages are converted to tokens."""
         # )
+    # collect every string to tokenize and tokenize them in one batch
+    texts = []
     num_tokens = 0
     for message in messages:
         num_tokens += tokens_per_message
         for key, value in message.items():
-            try:
-                if isinstance(value, list) and key == "tool_calls":
-                    num_tokens += num_tokens_from_tool_calls(tool_calls=value, model=model)
-                    # special case for tool calling (list)
-                    # num_tokens += len(encoding.encode(value["name"]))
-                    # num_tokens += len(encoding.encode(value["arguments"]))
-
-                else:
-                    if value is not None:
-                        if not isinstance(value, str):
-                            raise ValueError(f"Message has non-string value: {key} with value: {value} - message={message}")
-                        num_tokens += len(encoding.encode(value))
-
-                if key == "name":
-                    num_tokens += tokens_per_name
-
-            except TypeError as e:
-                print(f"tiktoken encoding failed on: {value}")
-                raise e
+            if isinstance(value, list) and key == "tool_calls":
+                # special case for tool calling (list)
+                texts.extend(_tool_call_texts(value))
+                num_tokens += _num_tool_call_overhead_tokens(value)
+
+            elif value is not None:
+                if not isinstance(value, str):
+                    raise ValueError(f"Message has non-string value: {key} with value: {value} - message={message}")
+                texts.append(value)
+
+            if key == "name":
+                num_tokens += tokens_per_name
+
+    try:
+        num_tokens += sum(count_tokens_batch(texts, model))
+    except TypeError as e:
+        logger.error(f"tiktoken encoding failed on: {[text for text in texts if not isinstance(text, str)]}")
+        raise e
 
     num_tokens += 3  # every reply is primed with <|start|>assistant<|message|>
     return num_tokens
@@ -3,7 +3,7 @@ import uuid
 from datetime import datetime
 from typing import TYPE_CHECKING, List, Optional, Set
 
-from sqlalchemy import JSON, Boolean, DateTime, Index, Integer, String
+from sqlalchemy import JSON, Boolean, DateTime, Index, Integer, String, inspect
 from sqlalchemy.ext.asyncio import AsyncAttrs
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -106,6 +106,11 @@ class Agent(SqlalchemyBase, OrganizationMixin, ProjectMixin, TemplateEntityMixin
     hidden: Mapped[Optional[bool]] = mapped_column(Boolean, nullable=True, default=None, doc="If set to True, the agent will be hidden.")
     _vector_db_namespace: Mapped[Optional[str]] = mapped_column(String, nullable=True, doc="Private field for vector database namespace")
 
+    # context window accounting
+    _context_token_ledger: Mapped[Optional[dict]] = mapped_column(
+        JSON, nullable=True, doc="Private field for the running token counts of the agent's context window."
+    )
+
     # relationships
     organization: Mapped["Organization"] = relationship("Organization", back_populates="agents", lazy="raise")
     tool_exec_environment_variables: Mapped[List["AgentEnvironmentVariable"]] = relationship(
@@ -295,7 +300,6 @@ class Agent(SqlalchemyBase, OrganizationMixin, ProjectMixin, TemplateEntityMixin
             "name": self.name,
             "description": self.description,
             "system": self.system,
-            "message_ids": self.message_ids,
             "metadata": self.metadata_,  # Exposed as 'metadata' to Pydantic
             "llm_config": self.llm_config,
             "embedding_config": self.embedding_config,
@@ -304,7 +308,6 @@ class Agent(SqlalchemyBase, OrganizationMixin, ProjectMixin, TemplateEntityMixin
             "base_template_id": self.base_template_id,
             "deployment_id": self.deployment_id,
             "entity_id": self.entity_id,
-            "tool_rules": self.tool_rules,
             "message_buffer_autoclear": self.message_buffer_autoclear,
             "created_by_id": self.created_by_id,
             "last_updated_by_id": self.last_updated_by_id,
@@ -312,13 +315,18 @@ class Agent(SqlalchemyBase, OrganizationMixin, ProjectMixin, TemplateEntityMixin
             "updated_at": self.updated_at,
             "timezone": self.timezone,
             "enable_sleeptime": self.enable_sleeptime,
-            "response_format": self.response_format,
             "last_run_completion": self.last_run_completion,
             "last_run_duration_ms": self.last_run_duration_ms,
             "max_files_open": self.max_files_open,
             "per_file_view_window_char_limit": self.per_file_view_window_char_limit,
             "hidden": self.hidden,
         }
+        # Base fields a load profile may defer are left to their defaults, callers leave them out of what they return
+        unloaded = inspect(self).unloaded
+        for column in ("message_ids", "tool_rules", "response_format"):
+            if column not in unloaded:
+                state[column] = getattr(self, column)
+
         optional_fields = {
             "tags": [],
             "tools": [],
@@ -19,7 +19,8 @@ class Message(SqlalchemyBase, OrganizationMixin, AgentMixin):
     __table_args__ = (
         Index("ix_messages_agent_created_at", "agent_id", "created_at"),
         Index("ix_messages_created_at", "created_at", "id"),
-        Index("ix_messages_agent_sequence", "agent_id", "sequence_id"),
+        # Covers history paging, which picks a page by these columns before reading its rows
+        Index("ix_messages_agent_sequence", "agent_id", "sequence_id", postgresql_include=["id", "role", "is_err", "group_id"]),
         Index("ix_messages_org_agent", "organization_id", "agent_id"),
     )
     __pydantic_model__ = PydanticMessage
@@ -29,6 +29,8 @@ class PassageTag(SqlalchemyBase, OrganizationMixin):
         Index("ix_passage_tags_tag", "tag"),
         Index("ix_passage_tags_archive_tag", "archive_id", "tag"),
         Index("ix_passage_tags_org_archive", "organization_id", "archive_id"),
+        # covers tag-filtered passage searches, which look up passage ids by tag
+        Index("ix_passage_tags_tag_passage_id", "tag", "passage_id"),
     )
 
     # primary key
@@ -399,12 +399,11 @@ class SqlalchemyBase(CommonSqlalchemyMetaMixins, Base):
                 # PostgreSQL with pgvector
                 query = query.order_by(cls.embedding.cosine_distance(query_embedding).asc())
             else:
-                # SQLite with custom vector type
-                from letta.orm.sqlite_functions import adapt_array
+                # SQLite with sqlite-vec (falls back to the Python UDF if the extension is unavailable)
+                from letta.orm.sqlite_functions import sqlite_cosine_distance
 
-                query_embedding_binary = adapt_array(query_embedding)
                 query = query.order_by(
-                    func.cosine_distance(cls.embedding, query_embedding_binary).asc(),
+                    sqlite_cosine_distance(cls.embedding, query_embedding).asc(),
                     cls.created_at.asc() if ascending else cls.created_at.desc(),
                     cls.id.asc(),
                 )
@@ -2,7 +2,7 @@ import sqlite3
 from typing import Optional, Union
 
 import numpy as np
-from sqlalchemy import event
+from sqlalchemy import event, func
 from sqlalchemy.engine import Engine
 
 from letta.constants import MAX_EMBEDDING_DIM
@@ -14,6 +14,10 @@ if settings.database_engine == DatabaseChoice.SQLITE:
 
 logger = get_logger(__name__)
 
+# Set once sqlite-vec has been loaded into a connection. Queries are built against this flag whichever connection
+# runs them, so connections the extension fails to load into get a Python vec_distance_cosine instead.
+_sqlite_vec_loaded = False
+
 
 def adapt_array(arr):
     """
@@ -110,6 +114,10 @@ def cosine_distance(embedding1, embedding2, expected_dim=MAX_EMBEDDING_DIM):
     """
     Calculate cosine distance between two embeddings
 
+    This is the pure-Python fallback used when the sqlite-vec extension cannot be loaded.
+    It is called once per row, so it decodes blobs directly instead of going through
+    validate_and_transform_embedding.
+
     Args:
         embedding1: First embedding
         embedding2: Second embedding
@@ -122,20 +130,83 @@ def cosine_distance(embedding1, embedding2, expected_dim=MAX_EMBEDDING_DIM):
     if embedding1 is None or embedding2 is None:
         return 0.0  # Maximum distance if either embedding is None
 
-    try:
-        vec1 = validate_and_transform_embedding(embedding1, expected_dim)
-        vec2 = validate_and_transform_embedding(embedding2, expected_dim)
-    except ValueError:
+    vec1 = _as_float32(embedding1)
+    vec2 = _as_float32(embedding2)
+    if vec1 is None or vec2 is None or vec1.shape[0] != expected_dim or vec2.shape[0] != expected_dim:
+        return 0.0
+
+    norm = np.linalg.norm(vec1) * np.linalg.norm(vec2)
+    if norm == 0:
         return 0.0
 
-    similarity = np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
+    similarity = np.dot(vec1, vec2) / norm
     distance = float(1.0 - similarity)
 
     return distance
 
 
-# Note: sqlite-vec provides native SQL functions for vector operations
-# We don't need custom Python distance functions since sqlite-vec handles this at the SQL level
+def _as_float32(embedding) -> Optional[np.ndarray]:
+    """Decode an embedding without copying when it is already a float32 blob."""
+    if isinstance(embedding, (bytes, sqlite3.Binary, memoryview)):
+        if len(embedding) % 4 != 0:
+            return None
+        return np.frombuffer(embedding, dtype=np.float32)
+    if isinstance(embedding, (list, np.ndarray)):
+        return np.asarray(embedding, dtype=np.float32)
+    return None
+
+
+def is_sqlite_vec_loaded() -> bool:
+    """Whether the sqlite-vec extension is available on SQLite connections"""
+    return _sqlite_vec_loaded
+
+
+def sqlite_cosine_distance(embedding_column, query_embedding):
+    """
+    Build a cosine distance SQL expression for ordering passages on SQLite.
+
+    Uses sqlite-vec's native ``vec_distance_cosine`` when the extension is loaded, which
+    scans the stored float32 blobs in C. Falls back to the ``cosine_distance`` Python UDF otherwise.
+
+    Args:
+        embedding_column: The embedding column (or CTE column) to compare against
+        query_embedding: The padded query embedding as a list or numpy array
+
+    Returns:
+        A SQL expression yielding the cosine distance for each row
+    """
+    query_embedding_binary = adapt_array(query_embedding)
+    if _sqlite_vec_loaded:
+        return func.vec_distance_cosine(embedding_column, query_embedding_binary)
+    return func.cosine_distance(embedding_column, query_embedding_binary)
+
+
+def _load_sqlite_vec(connection) -> bool:
+    """Load sqlite-vec into a raw sqlite3 connection, returning whether it succeeded"""
+    global _sqlite_vec_loaded
+
+    # Python builds without extension loading support (e.g. some system Pythons on macOS) can't load it
+    loaded = False
+    if hasattr(connection, "enable_load_extension"):
+        try:
+            connection.enable_load_extension(True)
+            sqlite_vec.load(connection)
+            connection.enable_load_extension(False)
+            loaded = True
+        except Exception as e:
+            logger.warning("Could not load sqlite-vec extension, falling back to Python cosine_distance: %s", e)
+
+    if not loaded:
+        # another connection may have loaded it, in which case queries call vec_distance_cosine on this one too
+        connection.create_function("vec_distance_cosine", 2, cosine_distance)
+        return False
+
+    _sqlite_vec_loaded = True
+    return True
+
+
+# Note: sqlite-vec provides native SQL functions for vector operations (vec_distance_cosine).
+# The cosine_distance Python UDF is still registered as a fallback for builds that cannot load extensions.
 @event.listens_for(Engine, "connect")
 def register_functions(dbapi_connection, connection_record):
     """Register SQLite functions and enable sqlite-vec extension"""
@@ -148,19 +219,15 @@ def register_functions(dbapi_connection, connection_record):
         actual_connection = dbapi_connection._connection if is_aiosqlite_connection else dbapi_connection
 
         # Enable sqlite-vec extension
-        try:
-            if is_aiosqlite_connection:
-                # For aiosqlite connections, we cannot use async operations in sync event handlers
-                # The extension will need to be loaded per-connection when actually used
-                logger.debug("Detected aiosqlite connection - sqlite-vec will be loaded per-query")
-            else:
-                # For sync connections
-                # dbapi_connection.enable_load_extension(True)
-                # sqlite_vec.load(dbapi_connection)
-                # dbapi_connection.enable_load_extension(False)
-                logger.info("sqlite-vec extension successfully loaded for sqlite3 (sync)")
-        except Exception as e:
-            raise RuntimeError(f"Failed to load sqlite-vec extension: {e}")
+        if is_aiosqlite_connection:
+            # For aiosqlite connections, we cannot use async operations in sync event handlers,
+            # so load the extension on the underlying sqlite3 connection directly
+            raw_conn = getattr(actual_connection, "_connection", actual_connection)
+            if _load_sqlite_vec(raw_conn):
+                logger.debug("sqlite-vec extension successfully loaded for aiosqlite")
+        else:
+            if _load_sqlite_vec(dbapi_connection):
+                logger.debug("sqlite-vec extension successfully loaded for sqlite3 (sync)")
 
         # Register custom cosine_distance function for backward compatibility
         try:
@@ -182,6 +182,32 @@ class MetricRegistry:
             ),
         )
 
+    # (includes model)
+    @property
+    def embedding_batch_latency_ms_histogram(self) -> Histogram:
+        return self._get_or_create_metric(
+            "hist_embedding_batch_latency_ms",
+            partial(
+                self._meter.create_histogram,
+                name="hist_embedding_batch_latency_ms",
+                description="Histogram for embedding batch request latency (ms)",
+                unit="ms",
+            ),
+        )
+
+    # (includes model)
+    @property
+    def embedding_rate_limit_counter(self) -> Counter:
+        return self._get_or_create_metric(
+            "count_embedding_rate_limited",
+            partial(
+                self._meter.create_counter,
+                name="count_embedding_rate_limited",
+                description="Counts the number of rate limited embedding batch requests",
+                unit="1",
+            ),
+        )
+
     # Database connection pool metrics
     # (includes engine_name)
     @property
@@ -273,3 +299,17 @@ class MetricRegistry:
                 unit="1",
             ),
         )
+
+    # LLM provider connection pool metrics
+    # (includes provider, event: request, connect or tls_handshake)
+    @property
+    def llm_http_connection_events_counter(self) -> Counter:
+        return self._get_or_create_metric(
+            "count_llm_http_connection_events",
+            partial(
+                self._meter.create_counter,
+                name="count_llm_http_connection_events",
+                description="Count of requests sent to LLM providers and of the connections and TLS handshakes they needed",
+                unit="1",
+            ),
+        )
@@ -0,0 +1,208 @@
+import signal
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from letta.log import get_logger
+from letta.settings import telemetry_settings
+
+logger = get_logger(__name__)
+
+# Labels of the code running in the current context, e.g. the route of the request it serves
+_profile_labels: ContextVar[Tuple[Tuple[str, str], ...]] = ContextVar("profile_labels", default=())
+# Step phase the current context declared it is in with `profile_phase`
+_profile_phase: ContextVar[Optional["_Phase"]] = ContextVar("profile_phase", default=None)
+
+# Step phases, told apart by the innermost frame that belongs to one of these modules
+PHASE_MODULES = (
+    ("db", ("sqlalchemy", "asyncpg", "psycopg", "psycopg2", "aiosqlite", "sqlite3", "letta.orm", "letta.server.db")),
+    ("llm", ("letta.llm_api", "letta.adapters", "letta.interfaces", "openai", "anthropic", "google.genai")),
+    ("tool", ("letta.services.tool_executor", "letta.services.tool_sandbox", "letta.functions")),
+    ("serialization", ("pydantic", "pydantic_core", "json", "orjson", "letta.serialize_schemas", "letta.helpers.json_helpers")),
+)
+OTHER_PHASE = "other"
+# Frame that stands for the wall-clock time a phase spent off the CPU, awaiting the LLM, a tool or the database
+WAITING_FRAME = "<waiting>"
+# Label keys samples can be filtered by, in the order they prefix the collapsed stacks
+LABEL_KEYS = ("route", "agent_id", "run_id", "phase")
+
+StackKey = Tuple[Tuple[Tuple[str, str], ...], Tuple[str, ...]]
+
+
+def set_profile_labels(**labels: Optional[str]) -> None:
+    """Label the samples taken from now on in the current context, e.g. the request or run being served."""
+    current = dict(_profile_labels.get())
+    current.update({key: value for key, value in labels.items() if value is not None})
+    _profile_labels.set(tuple(current.items()))
+
+
+class _Phase:
+    def __init__(self, name: str):
+        self.name = name
+        self.cpu_samples = 0
+
+
+@contextmanager
+def profile_phase(phase: str) -> Iterator[None]:
+    """Mark the code in this block, awaits included, as one step phase: "llm", "tool" or "db".
+
+    CPU samples taken in the block fall back to this phase when their stack doesn't tell. The wall-clock time the
+    block spends beyond those samples, while it awaits the LLM, a tool or the database, is counted as samples of a
+    `<waiting>` frame, so the flamegraph shows where a step's time goes and not only where its CPU time goes. A phase
+    inside another one counts toward the outer phase.
+    """
+    if _profile_phase.get() is not None:
+        yield
+        return
+    current = _Phase(phase)
+    _profile_phase.set(current)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        # set rather than reset, async generators may be closed from a different context than they started in
+        _profile_phase.set(None)
+        profiler = _sampling_profiler
+        if profiler is not None and profiler.running:
+            profiler.record_waiting(current, time.perf_counter() - start)
+
+
+def _module_phase(module: str) -> Optional[str]:
+    for phase, prefixes in PHASE_MODULES:
+        if any(module == prefix or module.startswith(prefix + ".") for prefix in prefixes):
+            return phase
+    return None
+
+
+class SamplingProfiler:
+    """Statistical CPU profiler built on a profiling interval timer, for deployments without a cloud profiler.
+
+    Every `interval_seconds` of CPU time the process spends, SIGPROF interrupts the main thread, where the event loop
+    runs, and the stack it was executing is counted together with the labels of the context it ran in and the step
+    phase the stack is in. Only the main thread is sampled, tools running in other threads or processes are not.
+    Time spent awaiting the LLM, tools or the database uses no CPU, it is counted by `profile_phase` instead.
+
+    Samples are kept per process: with several uvicorn workers, each samples only the requests it serves and the
+    profiler endpoint returns the samples of the worker that happened to serve it.
+
+    Counts are kept for up to `max_stacks` distinct labelled stacks, samples of further stacks are only counted as
+    dropped until the profiler is reset.
+    """
+
+    def __init__(self, interval_seconds: Optional[float] = None, max_stacks: Optional[int] = None, max_depth: int = 128):
+        self.interval_seconds = (
+            interval_seconds if interval_seconds is not None else telemetry_settings.profiler_sampling_interval_ms / 1000
+        )
+        self.max_stacks = max_stacks if max_stacks is not None else telemetry_settings.profiler_max_stacks
+        self.max_depth = max_depth
+        self.dropped = 0
+        self._samples: Counter = Counter()
+        # code object -> (frame name, phase of its module)
+        self._frames: Dict[object, Tuple[str, Optional[str]]] = {}
+        self._previous_handler = None
+        self._running = False
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    @property
+    def total_samples(self) -> int:
+        return sum(self._samples.values()) + self.dropped
+
+    def start(self) -> bool:
+        """Start sampling. Only possible from the main thread on platforms with SIGPROF."""
+        if self._running:
+            return True
+        if not hasattr(signal, "SIGPROF") or threading.current_thread() is not threading.main_thread():
+            logger.warning("Sampling profiler needs SIGPROF and has to be started from the main thread, not starting it")
+            return False
+        self._previous_handler = signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval_seconds, self.interval_seconds)
+        self._running = True
+        logger.info(f"Sampling profiler started, sampling every {self.interval_seconds * 1000:g}ms of CPU time")
+        return True
+
+    def stop(self) -> None:
+        if not self._running:
+            return
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, self._previous_handler or signal.SIG_DFL)
+        self._running = False
+
+    def reset(self) -> None:
+        self._samples = Counter()
+        self.dropped = 0
+
+    def record_waiting(self, phase: _Phase, seconds: float) -> None:
+        """Count the wall-clock time `phase` spent off the CPU, its duration less the CPU samples taken in it."""
+        waiting_samples = round(seconds / self.interval_seconds) - phase.cpu_samples
+        if waiting_samples <= 0:
+            return
+        self._count((_profile_labels.get() + (("phase", phase.name),), (WAITING_FRAME,)), waiting_samples)
+
+    def _count(self, key: StackKey, samples: int) -> None:
+        if key in self._samples or len(self._samples) < self.max_stacks:
+            self._samples[key] += samples
+        else:
+            self.dropped += samples
+
+    def _sample(self, signum, frame) -> None:
+        stack = []
+        phase = None
+        depth = 0
+        while frame is not None and depth < self.max_depth:
+            code = frame.f_code
+            described = self._frames.get(code)
+            if described is None:
+                module = frame.f_globals.get("__name__", "?")
+                described = (f"{module}:{getattr(code, 'co_qualname', code.co_name)}", _module_phase(module))
+                self._frames[code] = described
+            stack.append(described[0])
+            if phase is None:
+                phase = described[1]
+            frame = frame.f_back
+            depth += 1
+        stack.reverse()
+
+        declared_phase = _profile_phase.get()
+        if declared_phase is not None:
+            declared_phase.cpu_samples += 1
+            phase = phase or declared_phase.name
+        self._count((_profile_labels.get() + (("phase", phase or OTHER_PHASE),), tuple(stack)), 1)
+
+    def samples(self, **filters: Optional[str]) -> Iterable[Tuple[StackKey, int]]:
+        """Counted stacks whose labels match every given filter."""
+        filters = {key: value for key, value in filters.items() if value is not None}
+        for key, count in list(self._samples.items()):
+            labels = dict(key[0])
+            if all(labels.get(name) == value for name, value in filters.items()):
+                yield key, count
+
+    def collapsed(self, include_labels: bool = True, **filters: Optional[str]) -> str:
+        """Samples in the collapsed stack format flamegraph.pl, speedscope and inferno read, one stack per line.
+
+        With `include_labels`, the labels of a sample become its outermost frames, so the graph splits by route, agent,
+        run and phase before it splits by code.
+        """
+        merged: Counter = Counter()
+        for (labels, stack), count in self.samples(**filters):
+            prefix = ()
+            if include_labels:
+                values = dict(labels)
+                prefix = tuple(f"{name}={values[name]}" for name in LABEL_KEYS if name in values)
+            merged[";".join(prefix + stack)] += count
+        return "".join(f"{stack} {count}\n" for stack, count in merged.most_common())
+
+
+_sampling_profiler: Optional[SamplingProfiler] = None
+
+
+def get_sampling_profiler() -> SamplingProfiler:
+    global _sampling_profiler
+    if _sampling_profiler is None:
+        _sampling_profiler = SamplingProfiler()
+    return _sampling_profiler
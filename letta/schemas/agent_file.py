@@ -12,11 +12,15 @@ from letta.schemas.file import FileAgent, FileAgentBase, FileMetadata, FileMetad
 from letta.schemas.group import Group, GroupCreate
 from letta.schemas.mcp import MCPServer
 from letta.schemas.message import Message, MessageCreate, ToolReturn
+from letta.schemas.passage import Passage
 from letta.schemas.source import Source, SourceCreate
 from letta.schemas.tool import Tool
 from letta.schemas.user import User
 from letta.services.message_manager import MessageManager
 
+# Number of messages exported per agent
+AGENT_FILE_MESSAGE_LIMIT = 50
+
 
 class ImportResult:
     """Result of an agent file import operation"""
@@ -120,9 +124,14 @@ class AgentSchema(CreateAgent):
 
     @classmethod
     async def from_agent_state(
-        cls, agent_state: AgentState, message_manager: MessageManager, files_agents: List[FileAgent], actor: User
+        cls,
+        agent_state: AgentState,
+        message_manager: MessageManager,
+        files_agents: List[FileAgent],
+        actor: User,
+        messages: Optional[List[Message]] = None,
     ) -> "AgentSchema":
-        """Convert AgentState to AgentSchema"""
+        """Convert AgentState to AgentSchema, loading its messages unless they are passed in"""
 
         create_agent = CreateAgent(
             name=agent_state.name,
@@ -168,9 +177,10 @@ class AgentSchema(CreateAgent):
             per_file_view_window_char_limit=agent_state.per_file_view_window_char_limit,
         )
 
-        messages = await message_manager.list_messages_for_agent_async(
-            agent_id=agent_state.id, actor=actor, limit=50
-        )  # TODO: Expand to get more messages
+        if messages is None:
+            messages = await message_manager.list_messages_for_agent_async(
+                agent_id=agent_state.id, actor=actor, limit=AGENT_FILE_MESSAGE_LIMIT
+            )  # TODO: Expand to get more messages
 
         # Convert messages to MessageSchema objects
         message_schemas = [MessageSchema.from_message(msg) for msg in messages]
@@ -234,14 +244,34 @@ class BlockSchema(CreateBlock):
         return cls(id=block.id, **create_block.model_dump())
 
 
+class FilePassageSchema(BaseModel):
+    """Chunk of a file's content with its embedding, exported so imports don't have to embed the file again"""
+
+    text: str = Field(..., description="The text of the chunk")
+    embedding: Optional[List[float]] = Field(
+        None, description="The embedding of the chunk, made with the embedding config of the file's source"
+    )
+
+    @classmethod
+    def from_passage(cls, passage: Passage) -> "FilePassageSchema":
+        """Convert Passage to FilePassageSchema, dropping the padding stored with the embedding"""
+        embedding = passage.embedding
+        if embedding and passage.embedding_config and passage.embedding_config.embedding_dim:
+            embedding = embedding[: passage.embedding_config.embedding_dim]
+        return cls(text=passage.text, embedding=embedding)
+
+
 class FileSchema(FileMetadataBase):
     """File with human-readable ID for agent file"""
 
     __id_prefix__ = "file"
     id: str = Field(..., description="Human-readable identifier for this file in the file")
+    passages: List[FilePassageSchema] = Field(
+        default_factory=list, description="Embedded chunks of the file's content, if they were exported with the file"
+    )
 
     @classmethod
-    def from_file_metadata(cls, file_metadata: FileMetadata) -> "FileSchema":
+    def from_file_metadata(cls, file_metadata: FileMetadata, passages: Optional[List[Passage]] = None) -> "FileSchema":
         """Convert FileMetadata to FileSchema"""
 
         create_file = FileMetadataBase(
@@ -261,7 +291,11 @@ class FileSchema(FileMetadataBase):
         )
 
         # Create FileSchema with the file's ID (will be remapped later)
-        return cls(id=file_metadata.id, **create_file.model_dump())
+        return cls(
+            id=file_metadata.id,
+            passages=[FilePassageSchema.from_passage(passage) for passage in passages or []],
+            **create_file.model_dump(),
+        )
 
 
 class SourceSchema(SourceCreate):
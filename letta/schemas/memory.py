@@ -2,7 +2,7 @@ import asyncio
 import logging
 from datetime import datetime
 from io import StringIO
-from typing import TYPE_CHECKING, List, Optional, Union
+from typing import TYPE_CHECKING, Callable, Dict, List, MutableMapping, Optional, Union
 
 from openai.types.beta.function_tool import FunctionTool as OpenAITool
 from pydantic import BaseModel, Field, field_validator
@@ -49,6 +49,41 @@ class ContextWindowOverview(BaseModel):
     messages: List[Message] = Field(..., description="The messages in the context window.")
 
 
+class ContextTokenLedgerEntry(BaseModel):
+    """
+    Token count of a single in-context message, valid as long as the message is not edited.
+    """
+
+    updated_at: Optional[datetime] = Field(None, description="The updated_at of the message when it was counted.")
+    num_tokens: int = Field(..., description="The number of tokens in the message.")
+
+
+class ContextTokenLedger(BaseModel):
+    """
+    Running token accounting for an agent's context window, persisted with the agent.
+
+    Each component is stored with a hash of the text it was counted from, so only components that changed
+    (e.g. after the system prompt is rebuilt) and messages that were not counted before need to be tokenized.
+    """
+
+    token_counter: str = Field(..., description="Identifier of the token counter (and model) the counts were produced with.")
+
+    system_hash: Optional[str] = Field(None, description="Hash of the system prompt that was counted.")
+    num_tokens_system: int = Field(0, description="The number of tokens in the system prompt.")
+    core_memory_hash: Optional[str] = Field(None, description="Hash of the core memory that was counted.")
+    num_tokens_core_memory: int = Field(0, description="The number of tokens in the core memory.")
+    external_memory_summary_hash: Optional[str] = Field(None, description="Hash of the external memory summary that was counted.")
+    num_tokens_external_memory_summary: int = Field(0, description="The number of tokens in the external memory summary.")
+    summary_memory_hash: Optional[str] = Field(None, description="Hash of the summary memory that was counted.")
+    num_tokens_summary_memory: int = Field(0, description="The number of tokens in the summary memory.")
+    functions_definitions_hash: Optional[str] = Field(None, description="Hash of the functions definitions that were counted.")
+    num_tokens_functions_definitions: int = Field(0, description="The number of tokens in the functions definitions.")
+
+    messages: Dict[str, ContextTokenLedgerEntry] = Field(
+        default_factory=dict, description="Per-message token counts for the in-context messages, keyed by message id."
+    )
+
+
 class Memory(BaseModel, validate_assignment=True):
     """
 
@@ -102,69 +137,105 @@ class Memory(BaseModel, validate_assignment=True):
         """Deprecated. Async setter that stores the string but does not validate or use it."""
         self.prompt_template = prompt_template
 
-    @trace_method
-    def _render_memory_blocks_standard(self, s: StringIO):
-        if len(self.blocks) == 0:
-            # s.write("<memory_blocks></memory_blocks>") # TODO: consider empty tags
-            s.write("")
-            return
+    @staticmethod
+    def _render_block(block: Block, line_numbered: bool) -> str:
+        label = block.label or "block"
+        value = block.value or ""
+        desc = block.description or ""
+        limit = block.limit if block.limit is not None else 0
 
-        s.write("<memory_blocks>\nThe following memory blocks are currently engaged in your core memory unit:\n\n")
-        for idx, block in enumerate(self.blocks):
-            label = block.label or "block"
-            value = block.value or ""
-            desc = block.description or ""
-            chars_current = len(value)
-            limit = block.limit if block.limit is not None else 0
+        s = StringIO()
+        s.write(f"<{label}>\n")
+        s.write("<description>\n")
+        s.write(f"{desc}\n")
+        s.write("</description>\n")
+        s.write("<metadata>")
+        if getattr(block, "read_only", False):
+            s.write("\n- read_only=true")
+        s.write(f"\n- chars_current={len(value)}")
+        s.write(f"\n- chars_limit={limit}\n")
+        s.write("</metadata>\n")
+        s.write("<value>\n")
+        if line_numbered:
+            s.write(f"{CORE_MEMORY_LINE_NUMBER_WARNING}\n")
+            if value:
+                for i, line in enumerate(value.split("\n"), start=1):
+                    s.write(f"Line {i}: {line}\n")
+        else:
+            s.write(f"{value}\n")
+        s.write("</value>\n")
+        s.write(f"</{label}>\n")
+        return s.getvalue()
 
+    @staticmethod
+    def _render_file_block(fb: FileBlock, react: bool) -> str:
+        status = FileStatus.open.value if getattr(fb, "value", None) else FileStatus.closed.value
+        label = fb.label or "file"
+        desc = fb.description or ""
+        chars_current = len(fb.value or "")
+        limit = fb.limit if fb.limit is not None else 0
+
+        s = StringIO()
+        if react:
+            s.write(f'<file status="{status}">\n')
             s.write(f"<{label}>\n")
+        else:
+            s.write(f'<file status="{status}" name="{label}">\n')
+        if react or desc:
             s.write("<description>\n")
             s.write(f"{desc}\n")
             s.write("</description>\n")
-            s.write("<metadata>")
-            if getattr(block, "read_only", False):
-                s.write("\n- read_only=true")
-            s.write(f"\n- chars_current={chars_current}")
-            s.write(f"\n- chars_limit={limit}\n")
-            s.write("</metadata>\n")
+        s.write("<metadata>")
+        if getattr(fb, "read_only", False):
+            s.write("\n- read_only=true")
+        s.write(f"\n- chars_current={chars_current}\n")
+        s.write(f"- chars_limit={limit}\n")
+        s.write("</metadata>\n")
+        if react:
             s.write("<value>\n")
-            s.write(f"{value}\n")
+            s.write(f"{fb.value or ''}\n")
             s.write("</value>\n")
             s.write(f"</{label}>\n")
-            if idx != len(self.blocks) - 1:
-                s.write("\n")
-        s.write("\n</memory_blocks>")
+        elif getattr(fb, "value", None):
+            s.write("<value>\n")
+            s.write(f"{fb.value}\n")
+            s.write("</value>\n")
+        s.write("</file>\n")
+        return s.getvalue()
+
+    @staticmethod
+    def _cached_section(section_cache: Optional[MutableMapping[tuple, str]], key: tuple, render: Callable[[], str]) -> str:
+        if section_cache is None:
+            return render()
+        section = section_cache.get(key)
+        if section is None:
+            section = render()
+            section_cache[key] = section
+        return section
+
+    def _render_memory_blocks(self, s: StringIO, line_numbered: bool, section_cache=None):
+        if len(self.blocks) == 0 and not line_numbered:
+            # s.write("<memory_blocks></memory_blocks>") # TODO: consider empty tags
+            s.write("")
+            return
 
-    def _render_memory_blocks_line_numbered(self, s: StringIO):
         s.write("<memory_blocks>\nThe following memory blocks are currently engaged in your core memory unit:\n\n")
         for idx, block in enumerate(self.blocks):
-            label = block.label or "block"
-            value = block.value or ""
-            desc = block.description or ""
-            limit = block.limit if block.limit is not None else 0
-
-            s.write(f"<{label}>\n")
-            s.write("<description>\n")
-            s.write(f"{desc}\n")
-            s.write("</description>\n")
-            s.write("<metadata>")
-            if getattr(block, "read_only", False):
-                s.write("\n- read_only=true")
-            s.write(f"\n- chars_current={len(value)}")
-            s.write(f"\n- chars_limit={limit}\n")
-            s.write("</metadata>\n")
-            s.write("<value>\n")
-            s.write(f"{CORE_MEMORY_LINE_NUMBER_WARNING}\n")
-            if value:
-                for i, line in enumerate(value.split("\n"), start=1):
-                    s.write(f"Line {i}: {line}\n")
-            s.write("</value>\n")
-            s.write(f"</{label}>\n")
+            # keyed by what the section shows rather than the block id, blocks are edited in place before they are saved
+            key = ("block", line_numbered, block.label, block.description, block.limit, block.read_only, block.value)
+            s.write(self._cached_section(section_cache, key, lambda block=block: self._render_block(block, line_numbered)))
             if idx != len(self.blocks) - 1:
                 s.write("\n")
         s.write("\n</memory_blocks>")
 
-    def _render_directories_common(self, s: StringIO, sources, max_files_open):
+    @trace_method
+    def _render_memory_blocks_standard(self, s: StringIO, section_cache=None):
+        self._render_memory_blocks(s, line_numbered=False, section_cache=section_cache)
+
+    def _render_memory_blocks_line_numbered(self, s: StringIO, section_cache=None):
+        self._render_memory_blocks(s, line_numbered=True, section_cache=section_cache)
+
+    def _render_directories(self, s: StringIO, sources, max_files_open, react: bool, section_cache=None):
         s.write("\n\n<directories>\n")
         if max_files_open is not None:
             current_open = sum(1 for b in self.file_blocks if getattr(b, "value", None))
@@ -188,84 +259,24 @@ class Memory(BaseModel, validate_assignment=True):
             if self.file_blocks:
                 for fb in self.file_blocks:
                     if source_id is not None and getattr(fb, "source_id", None) == source_id:
-                        status = FileStatus.open.value if getattr(fb, "value", None) else FileStatus.closed.value
-                        label = fb.label or "file"
-                        desc = fb.description or ""
-                        chars_current = len(fb.value or "")
-                        limit = fb.limit if fb.limit is not None else 0
-
-                        s.write(f'<file status="{status}" name="{label}">\n')
-                        if desc:
-                            s.write("<description>\n")
-                            s.write(f"{desc}\n")
-                            s.write("</description>\n")
-                        s.write("<metadata>")
-                        if getattr(fb, "read_only", False):
-                            s.write("\n- read_only=true")
-                        s.write(f"\n- chars_current={chars_current}\n")
-                        s.write(f"- chars_limit={limit}\n")
-                        s.write("</metadata>\n")
-                        if getattr(fb, "value", None):
-                            s.write("<value>\n")
-                            s.write(f"{fb.value}\n")
-                            s.write("</value>\n")
-                        s.write("</file>\n")
+                        key = ("file", react, fb.label, fb.description, fb.limit, fb.read_only, fb.value)
+                        s.write(self._cached_section(section_cache, key, lambda fb=fb: self._render_file_block(fb, react)))
 
             s.write("</directory>\n")
         s.write("</directories>")
 
-    def _render_directories_react(self, s: StringIO, sources, max_files_open):
-        s.write("\n\n<directories>\n")
-        if max_files_open is not None:
-            current_open = sum(1 for b in self.file_blocks if getattr(b, "value", None))
-            s.write("<file_limits>\n")
-            s.write(f"- current_files_open={current_open}\n")
-            s.write(f"- max_files_open={max_files_open}\n")
-            s.write("</file_limits>\n")
+    def _render_directories_common(self, s: StringIO, sources, max_files_open, section_cache=None):
+        self._render_directories(s, sources, max_files_open, react=False, section_cache=section_cache)
 
-        for source in sources:
-            source_name = getattr(source, "name", "")
-            source_desc = getattr(source, "description", None)
-            source_instr = getattr(source, "instructions", None)
-            source_id = getattr(source, "id", None)
+    def _render_directories_react(self, s: StringIO, sources, max_files_open, section_cache=None):
+        self._render_directories(s, sources, max_files_open, react=True, section_cache=section_cache)
 
-            s.write(f'<directory name="{source_name}">\n')
-            if source_desc:
-                s.write(f"<description>{source_desc}</description>\n")
-            if source_instr:
-                s.write(f"<instructions>{source_instr}</instructions>\n")
-
-            if self.file_blocks:
-                for fb in self.file_blocks:
-                    if source_id is not None and getattr(fb, "source_id", None) == source_id:
-                        status = FileStatus.open.value if getattr(fb, "value", None) else FileStatus.closed.value
-                        label = fb.label or "file"
-                        desc = fb.description or ""
-                        chars_current = len(fb.value or "")
-                        limit = fb.limit if fb.limit is not None else 0
-
-                        s.write(f'<file status="{status}">\n')
-                        s.write(f"<{label}>\n")
-                        s.write("<description>\n")
-                        s.write(f"{desc}\n")
-                        s.write("</description>\n")
-                        s.write("<metadata>")
-                        if getattr(fb, "read_only", False):
-                            s.write("\n- read_only=true")
-                        s.write(f"\n- chars_current={chars_current}\n")
-                        s.write(f"- chars_limit={limit}\n")
-                        s.write("</metadata>\n")
-                        s.write("<value>\n")
-                        s.write(f"{fb.value or ''}\n")
-                        s.write("</value>\n")
-                        s.write(f"</{label}>\n")
-                        s.write("</file>\n")
+    def compile(self, tool_usage_rules=None, sources=None, max_files_open=None, section_cache=None) -> str:
+        """Efficiently render memory, tool rules, and sources into a prompt string.
 
-            s.write("</directory>\n")
-        s.write("</directories>")
-
-    def compile(self, tool_usage_rules=None, sources=None, max_files_open=None) -> str:
-        """Efficiently render memory, tool rules, and sources into a prompt string."""
+        `section_cache` maps the state of a single block or file to its rendered section. Sections found there are
+        reused instead of rendered again, and the ones rendered are added to it.
+        """
         s = StringIO()
 
         raw_type = self.agent_type.value if hasattr(self.agent_type, "value") else (self.agent_type or "")
@@ -276,9 +287,9 @@ class Memory(BaseModel, validate_assignment=True):
         # Memory blocks (not for react/workflow). Always include wrapper for preview/tests.
         if not is_react:
             if is_line_numbered:
-                self._render_memory_blocks_line_numbered(s)
+                self._render_memory_blocks_line_numbered(s, section_cache=section_cache)
             else:
-                self._render_memory_blocks_standard(s)
+                self._render_memory_blocks_standard(s, section_cache=section_cache)
 
         if tool_usage_rules is not None:
             desc = getattr(tool_usage_rules, "description", None) or ""
@@ -290,9 +301,9 @@ class Memory(BaseModel, validate_assignment=True):
 
         if sources:
             if is_react:
-                self._render_directories_react(s, sources, max_files_open)
+                self._render_directories_react(s, sources, max_files_open, section_cache=section_cache)
             else:
-                self._render_directories_common(s, sources, max_files_open)
+                self._render_directories_common(s, sources, max_files_open, section_cache=section_cache)
 
         return s.getvalue()
 
@@ -47,6 +47,7 @@ from letta.server.rest_api.middleware import CheckPasswordMiddleware, ProfilerCo
 from letta.server.rest_api.routers.openai.chat_completions.chat_completions import router as openai_chat_completions_router
 from letta.server.rest_api.routers.v1 import ROUTERS as v1_routes
 from letta.server.rest_api.routers.v1.organizations import router as organizations_router
+from letta.server.rest_api.routers.v1.profiler import router as profiler_router
 from letta.server.rest_api.routers.v1.users import router as users_router  # TODO: decide on admin
 from letta.server.rest_api.static_files import mount_static_files
 from letta.server.rest_api.utils import SENTRY_ENABLED
@@ -109,7 +110,11 @@ async def lifespan(app_: FastAPI):
     """
     worker_id = os.getpid()
 
-    if telemetry_settings.profiler:
+    if telemetry_settings.profiler and telemetry_settings.profiler_backend == "sampling":
+        from letta.otel.sampling_profiler import get_sampling_profiler
+
+        get_sampling_profiler().start()
+    elif telemetry_settings.profiler:
         try:
             import googlecloudprofiler
 
@@ -170,6 +175,47 @@ async def lifespan(app_: FastAPI):
     except Exception as e:
         logger.error(f"[Worker {worker_id}] Scheduler shutdown failed: {e}", exc_info=True)
 
+    # Close pooled MCP sessions so stdio server processes exit with us
+    try:
+        from letta.services.mcp.session_pool import get_mcp_session_pool
+
+        mcp_session_pool = get_mcp_session_pool()
+        if mcp_session_pool is not None:
+            await mcp_session_pool.aclose()
+            logger.info(f"[Worker {worker_id}] MCP session pool shutdown completed")
+    except Exception as e:
+        logger.warning(f"[Worker {worker_id}] MCP session pool shutdown failed: {e}")
+
+    # Stop listening for run cancellations
+    try:
+        from letta.services.run_cancellation_bus import get_run_cancellation_bus
+
+        await get_run_cancellation_bus().close()
+    except Exception as e:
+        logger.warning(f"[Worker {worker_id}] Run cancellation bus shutdown failed: {e}")
+
+    # Write out buffered step and run telemetry
+    try:
+        from letta.services.telemetry_write_buffer import get_telemetry_write_buffer
+
+        await get_telemetry_write_buffer().close()
+    except Exception as e:
+        logger.warning(f"[Worker {worker_id}] Telemetry write buffer shutdown failed: {e}")
+
+    # Close keep-alive connections to LLM providers
+    try:
+        from letta.llm_api.transport_registry import get_llm_transport_registry
+
+        await get_llm_transport_registry().aclose()
+    except Exception as e:
+        logger.warning(f"[Worker {worker_id}] LLM transport registry shutdown failed: {e}")
+
+    # Stop sampling so the timer doesn't fire during interpreter shutdown
+    if telemetry_settings.profiler and telemetry_settings.profiler_backend == "sampling":
+        from letta.otel.sampling_profiler import get_sampling_profiler
+
+        get_sampling_profiler().stop()
+
     # Cleanup SQLAlchemy instrumentation
     if not settings.disable_tracing and settings.sqlalchemy_tracing:
         try:
@@ -411,6 +457,7 @@ def create_application() -> "FastAPI":
     # admin/users
     app.include_router(users_router, prefix=ADMIN_PREFIX)
     app.include_router(organizations_router, prefix=ADMIN_PREFIX)
+    app.include_router(profiler_router, prefix=ADMIN_PREFIX)
 
     # openai
     app.include_router(openai_chat_completions_router, prefix=OPENAI_API_PREFIX)
@@ -1,6 +1,8 @@
 import json
+import re
 from abc import ABC, abstractmethod
-from typing import Any
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
 
 from pydantic_core import from_json
 
@@ -228,6 +230,387 @@ class OptimisticJSONParser(JSONParser):
         raise decode_error
 
 
+_WHITESPACE = " \t\r\n"
+# Characters that end a run of plain characters inside a JSON string
+_STRING_SPECIAL_CHARS = re.compile(r'["\\]')
+# Characters that can change the nesting depth of an object or array, outside of its strings
+_NESTED_SPECIAL_CHARS = re.compile(r'["{}\[\]]')
+# Characters that end a number or a literal
+_SCALAR_END_CHARS = re.compile(r"[,}\]\s]")
+_SIMPLE_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+# IncrementalJSONParser states
+_EXPECT_OBJECT = "expect_object"
+_EXPECT_KEY = "expect_key"
+_KEY = "key"
+_EXPECT_COLON = "expect_colon"
+_EXPECT_VALUE = "expect_value"
+_STRING_VALUE = "string_value"
+_SCALAR_VALUE = "scalar_value"
+_NESTED_VALUE = "nested_value"
+_EXPECT_DELIMITER = "expect_delimiter"
+_DONE = "done"
+_INVALID = "invalid"
+
+
+@dataclass
+class JSONFieldDelta:
+    """What a single `IncrementalJSONParser.feed` call added to one member of the streamed object."""
+
+    key: str
+    # Position of the member in the object
+    index: int
+    # Decoded characters added to a string value
+    text: str = ""
+    # Source text of the value, and of the delimiter after it, consumed by this feed
+    raw: str = ""
+    # Whether the value is complete, once it is `value` holds it
+    complete: bool = False
+    value: Any = None
+
+
+class IncrementalJSONParser(JSONParser):
+    """
+    A resumable parser for a JSON object that arrives in fragments, such as streamed tool call arguments.
+
+    Parser state is kept across `feed` calls, so every character is scanned once however many fragments the object
+    is split into, and each call returns a `JSONFieldDelta` for every top-level member it added to. String values are
+    decoded as they stream in, so a caller can forward e.g. the `message` argument without reparsing what it already
+    saw. Values nested deeper than the top-level members are only tracked as raw text until they are complete.
+
+    `parse` takes the accumulated text like the other parsers and only feeds the part that is new since the last call.
+    Input that is not a JSON object falls back to `PydanticJSONParser`.
+    """
+
+    def __init__(self):
+        self._handlers = {
+            _EXPECT_OBJECT: self._expect_object,
+            _EXPECT_KEY: self._expect_key,
+            _KEY: self._read_key,
+            _EXPECT_COLON: self._expect_colon,
+            _EXPECT_VALUE: self._expect_value,
+            _STRING_VALUE: self._read_string,
+            _SCALAR_VALUE: self._read_scalar,
+            _NESTED_VALUE: self._read_nested,
+            _EXPECT_DELIMITER: self._expect_delimiter,
+        }
+        self.reset()
+
+    def reset(self) -> None:
+        self._state = _EXPECT_OBJECT
+        self._chunks: List[str] = []
+        self._length = 0
+        self._values: Dict[str, Any] = {}
+        self._keys: List[str] = []
+        self._deltas: Dict[int, JSONFieldDelta] = {}
+        # the key being read, or the key of the member being read
+        self._key_parts: List[str] = []
+        self._key = None
+        self._index = -1
+        # the value being read
+        self._value_parts: List[str] = []
+        self._escape = ""
+        self._high_surrogate: Optional[int] = None
+        self._depth = 0
+        self._in_nested_string = False
+
+    @property
+    def started(self) -> bool:
+        """Whether the opening brace of the object has been read."""
+        return self._state not in (_EXPECT_OBJECT, _INVALID)
+
+    @property
+    def done(self) -> bool:
+        """Whether the closing brace of the object has been read."""
+        return self._state == _DONE
+
+    @property
+    def valid(self) -> bool:
+        return self._state != _INVALID
+
+    @property
+    def keys(self) -> List[str]:
+        """Keys of the members whose value has started, in order."""
+        return list(dict.fromkeys(self._keys))
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far."""
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
+
+    @property
+    def value(self) -> Any:
+        """The object read so far, with the member being read included as far as it can be."""
+        if self._state == _INVALID:
+            return PydanticJSONParser().parse(self.text)
+        value = dict(self._values)
+        if self._state in (_STRING_VALUE, _SCALAR_VALUE, _NESTED_VALUE):
+            try:
+                value[self._key] = self._partial_value()
+            except ValueError:
+                pass
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.value.get(key, default)
+
+    def parse(self, input_str: str) -> Any:
+        """Parse `input_str`, which is expected to extend the text of the previous call."""
+        if not input_str:
+            return {}
+        last_chunk = self._chunks[-1] if self._chunks else ""
+        if len(input_str) < self._length or not input_str.startswith(last_chunk, self._length - len(last_chunk)):
+            self.reset()
+        self.feed(input_str[self._length :])
+        return self.value
+
+    def feed(self, fragment: str) -> List[JSONFieldDelta]:
+        """Read the next fragment of the object and return what it added to each member."""
+        if fragment:
+            self._chunks.append(fragment)
+            self._length += len(fragment)
+        self._deltas = {}
+        pos = 0
+        while pos < len(fragment) and self._state not in (_DONE, _INVALID):
+            pos = self._handlers[self._state](fragment, pos)
+        return list(self._deltas.values())
+
+    def _delta(self) -> JSONFieldDelta:
+        delta = self._deltas.get(self._index)
+        if delta is None:
+            delta = self._deltas[self._index] = JSONFieldDelta(key=self._key, index=self._index)
+        return delta
+
+    def _skip_whitespace(self, fragment: str, pos: int) -> int:
+        while pos < len(fragment) and fragment[pos] in _WHITESPACE:
+            pos += 1
+        return pos
+
+    def _fail(self, fragment: str) -> int:
+        self._state = _INVALID
+        return len(fragment)
+
+    def _complete_value(self, value: Any) -> None:
+        self._values[self._key] = value
+        delta = self._delta()
+        delta.complete = True
+        delta.value = value
+        self._value_parts = []
+        self._state = _EXPECT_DELIMITER
+
+    def _partial_value(self) -> Any:
+        if self._state == _STRING_VALUE:
+            return "".join(self._value_parts)
+        if self._state == _SCALAR_VALUE:
+            return json.loads("".join(self._value_parts))
+        return from_json("".join(self._value_parts), allow_partial="trailing-strings")
+
+    def _expect_object(self, fragment: str, pos: int) -> int:
+        pos = self._skip_whitespace(fragment, pos)
+        if pos == len(fragment):
+            return pos
+        if fragment[pos] != "{":
+            return self._fail(fragment)
+        self._state = _EXPECT_KEY
+        return pos + 1
+
+    def _expect_key(self, fragment: str, pos: int) -> int:
+        pos = self._skip_whitespace(fragment, pos)
+        if pos == len(fragment):
+            return pos
+        if fragment[pos] == '"':
+            self._state = _KEY
+            self._key_parts = []
+        elif fragment[pos] == "}":
+            self._state = _DONE
+        else:
+            return self._fail(fragment)
+        return pos + 1
+
+    def _read_key(self, fragment: str, pos: int) -> int:
+        if self._escape:
+            # the character after a backslash can't end the key
+            self._key_parts.append(fragment[pos])
+            self._escape = ""
+            pos += 1
+        match = _STRING_SPECIAL_CHARS.search(fragment, pos)
+        if match is None:
+            self._key_parts.append(fragment[pos:])
+            return len(fragment)
+        end = match.start()
+        self._key_parts.append(fragment[pos:end])
+        if fragment[end] == "\\":
+            self._key_parts.append("\\")
+            self._escape = "\\"
+            return end + 1
+        try:
+            self._key = json.loads('"' + "".join(self._key_parts) + '"')
+        except ValueError:
+            return self._fail(fragment)
+        self._state = _EXPECT_COLON
+        return end + 1
+
+    def _expect_colon(self, fragment: str, pos: int) -> int:
+        pos = self._skip_whitespace(fragment, pos)
+        if pos == len(fragment):
+            return pos
+        if fragment[pos] != ":":
+            return self._fail(fragment)
+        self._index += 1
+        self._keys.append(self._key)
+        self._delta()
+        self._state = _EXPECT_VALUE
+        return pos + 1
+
+    def _expect_value(self, fragment: str, pos: int) -> int:
+        pos = self._skip_whitespace(fragment, pos)
+        if pos == len(fragment):
+            return pos
+        c = fragment[pos]
+        self._value_parts = []
+        if c == '"':
+            self._state = _STRING_VALUE
+            self._delta().raw += c
+            return pos + 1
+        if c in "{[":
+            self._state = _NESTED_VALUE
+            self._depth = 1
+            self._in_nested_string = False
+            self._value_parts.append(c)
+            self._delta().raw += c
+            return pos + 1
+        if c in ",}]":
+            return self._fail(fragment)
+        self._state = _SCALAR_VALUE
+        return pos
+
+    def _read_string(self, fragment: str, pos: int) -> int:
+        if self._escape:
+            return self._read_escape(fragment, pos)
+        match = _STRING_SPECIAL_CHARS.search(fragment, pos)
+        end = match.start() if match else len(fragment)
+        if end > pos:
+            self._add_text(fragment[pos:end])
+            self._delta().raw += fragment[pos:end]
+        if match is None:
+            return end
+        self._delta().raw += fragment[end]
+        if fragment[end] == "\\":
+            self._escape = "\\"
+        else:
+            self._flush_high_surrogate()
+            self._complete_value("".join(self._value_parts))
+        return end + 1
+
+    def _read_escape(self, fragment: str, pos: int) -> int:
+        if self._escape == "\\":
+            c = fragment[pos]
+            self._delta().raw += c
+            if c == "u":
+                self._escape += c
+                return pos + 1
+            if c not in _SIMPLE_ESCAPES:
+                return self._fail(fragment)
+            self._escape = ""
+            self._add_text(_SIMPLE_ESCAPES[c])
+            return pos + 1
+
+        # reading the hex digits of a \uXXXX escape
+        end = min(pos + 6 - len(self._escape), len(fragment))
+        self._escape += fragment[pos:end]
+        self._delta().raw += fragment[pos:end]
+        if len(self._escape) == 6:
+            try:
+                code_point = int(self._escape[2:], 16)
+            except ValueError:
+                return self._fail(fragment)
+            self._escape = ""
+            self._add_code_point(code_point)
+        return end
+
+    def _add_code_point(self, code_point: int) -> None:
+        # characters outside the BMP are escaped as a pair of surrogates, which may arrive in different fragments
+        if 0xDC00 <= code_point <= 0xDFFF and self._high_surrogate is not None:
+            high_surrogate, self._high_surrogate = self._high_surrogate, None
+            self._add_text(chr(0x10000 + ((high_surrogate - 0xD800) << 10) + (code_point - 0xDC00)))
+        elif 0xD800 <= code_point <= 0xDBFF:
+            self._flush_high_surrogate()
+            self._high_surrogate = code_point
+        else:
+            self._add_text(chr(code_point))
+
+    def _flush_high_surrogate(self) -> None:
+        if self._high_surrogate is not None:
+            high_surrogate, self._high_surrogate = self._high_surrogate, None
+            self._add_text(chr(high_surrogate))
+
+    def _add_text(self, text: str) -> None:
+        self._flush_high_surrogate()
+        self._value_parts.append(text)
+        self._delta().text += text
+
+    def _read_scalar(self, fragment: str, pos: int) -> int:
+        match = _SCALAR_END_CHARS.search(fragment, pos)
+        end = match.start() if match else len(fragment)
+        self._value_parts.append(fragment[pos:end])
+        self._delta().raw += fragment[pos:end]
+        if match is not None:
+            try:
+                self._complete_value(json.loads("".join(self._value_parts)))
+            except ValueError:
+                return self._fail(fragment)
+        return end
+
+    def _read_nested(self, fragment: str, pos: int) -> int:
+        if self._escape:
+            # the character after a backslash can't end the string it is in
+            self._escape = ""
+            self._value_parts.append(fragment[pos])
+            self._delta().raw += fragment[pos]
+            pos += 1
+        pattern = _STRING_SPECIAL_CHARS if self._in_nested_string else _NESTED_SPECIAL_CHARS
+        match = pattern.search(fragment, pos)
+        end = match.end() if match else len(fragment)
+        self._value_parts.append(fragment[pos:end])
+        self._delta().raw += fragment[pos:end]
+        if match is None:
+            return end
+
+        c = match.group()
+        if self._in_nested_string:
+            if c == "\\":
+                self._escape = "\\"
+            else:
+                self._in_nested_string = False
+        elif c == '"':
+            self._in_nested_string = True
+        elif c in "{[":
+            self._depth += 1
+        else:
+            self._depth -= 1
+            if self._depth == 0:
+                try:
+                    self._complete_value(json.loads("".join(self._value_parts)))
+                except ValueError:
+                    return self._fail(fragment)
+        return end
+
+    def _expect_delimiter(self, fragment: str, pos: int) -> int:
+        pos = self._skip_whitespace(fragment, pos)
+        if pos == len(fragment):
+            return pos
+        if fragment[pos] == ",":
+            self._delta().raw += ","
+            self._state = _EXPECT_KEY
+        elif fragment[pos] == "}":
+            self._state = _DONE
+        else:
+            return self._fail(fragment)
+        return pos + 1
+
+
 # TODO: Keeping this around for posterity
 # def main():
 #     test_string = '{"inner_thoughts":}'
@@ -1,13 +1,39 @@
+import re
+
 from starlette.middleware.base import BaseHTTPMiddleware
 
+from letta.otel.sampling_profiler import set_profile_labels
+from letta.settings import telemetry_settings
+
+# Primitive ids in paths, e.g. agent-<uuid>, replaced by their prefix so a route's samples aren't split per id
+_ID_SEGMENT = re.compile(r"^(?P<prefix>[a-z_]+)-[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$", re.IGNORECASE)
+
+
+def route_labels(method: str, path: str) -> dict:
+    """Profile labels of a request: its route with ids templated out, and the agent it is for, if any."""
+    segments = []
+    agent_id = None
+    for segment in path.rstrip("/").split("/"):
+        match = _ID_SEGMENT.match(segment)
+        if match:
+            prefix = match.group("prefix")
+            if prefix == "agent" and agent_id is None:
+                agent_id = segment
+            segment = "{" + prefix + "_id}"
+        segments.append(segment)
+    return {"route": f"{method} {'/'.join(segments) or '/'}", "agent_id": agent_id}
+
 
 class ProfilerContextMiddleware(BaseHTTPMiddleware):
-    """Middleware to set context if using profiler. Currently just uses google-cloud-profiler."""
+    """Middleware to set context if using profiler, either google-cloud-profiler or the built-in sampling profiler."""
 
     async def dispatch(self, request, call_next):
         ctx = None
         if request.url.path in {"/v1/health", "/v1/health/"}:
             return await call_next(request)
+        if telemetry_settings.profiler_backend == "sampling":
+            set_profile_labels(**route_labels(request.method, request.url.path))
+            return await call_next(request)
         try:
             labels = {
                 "method": request.method,
@@ -4,7 +4,7 @@ import asyncio
 import json
 import time
 from collections import defaultdict
-from typing import AsyncIterator, Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
 
 from letta.data_sources.redis_client import AsyncRedisClient
 from letta.log import get_logger
@@ -16,6 +16,21 @@ from letta.utils import safe_create_task
 logger = get_logger(__name__)
 
 
+def _get_stream_key(run_id: str) -> str:
+    return f"sse:run:{run_id}"
+
+
+def _seq_id_to_stream_id(seq_id: int) -> str:
+    """Stream entry ID for a chunk. Using the seq_id as the sequence part keeps IDs increasing per run."""
+    return f"0-{seq_id}"
+
+
+def _parse_stream_id(entry_id: str) -> Tuple[int, int]:
+    """Parse a stream entry ID into a comparable (milliseconds, sequence) tuple."""
+    ms, _, seq = entry_id.partition("-")
+    return int(ms), int(seq or 0)
+
+
 class RedisSSEStreamWriter:
     """
     Efficiently writes SSE chunks to Redis streams with batching and TTL management.
@@ -23,7 +38,7 @@ class RedisSSEStreamWriter:
     Features:
     - Batches writes using Redis pipelines for performance
     - Automatically sets/refreshes TTL on streams
-    - Tracks sequential IDs for cursor-based recovery
+    - Tracks sequential IDs for cursor-based recovery (stream entry IDs are `0-<seq_id>`)
     - Handles flush on size or time thresholds
     """
 
@@ -57,6 +72,8 @@ class RedisSSEStreamWriter:
         self.seq_counters: Dict[str, int] = defaultdict(lambda: 1)
         # Track last flush time per run
         self.last_flush: Dict[str, float] = defaultdict(float)
+        # Runs whose last flush failed, part of which may have been written anyway
+        self.unconfirmed_runs: Set[str] = set()
 
         # Background flush task
         self._flush_task = None
@@ -129,30 +146,48 @@ class RedisSSEStreamWriter:
 
         chunks = self.buffer[run_id]
         self.buffer[run_id] = []
-        stream_key = f"sse:run:{run_id}"
+        stream_key = _get_stream_key(run_id)
+
+        is_complete = chunks[-1].get("complete") == "true"
 
         try:
             client = await self.redis.get_client()
 
-            async with client.pipeline(transaction=False) as pipe:
-                for chunk in chunks:
-                    await pipe.xadd(stream_key, chunk, maxlen=self.max_stream_length, approximate=True)
+            if run_id in self.unconfirmed_runs:
+                # The pipeline isn't a transaction, so a failed flush may have written some of its chunks. Adding them
+                # again would fail on their IDs, skip the ones the stream already ends with.
+                tail = await client.xrevrange(stream_key, count=1)
+                if tail:
+                    written_seq_id = int(tail[0][1].get("seq_id", 0))
+                    chunks = [chunk for chunk in chunks if chunk["seq_id"] > written_seq_id]
 
-                await pipe.expire(stream_key, self.stream_ttl)
+            if chunks:
+                async with client.pipeline(transaction=False) as pipe:
+                    for chunk in chunks:
+                        # Entry IDs mirror seq_ids so readers can resume from a cursor with a range query
+                        await pipe.xadd(
+                            stream_key, chunk, id=_seq_id_to_stream_id(chunk["seq_id"]), maxlen=self.max_stream_length, approximate=True
+                        )
 
-                await pipe.execute()
+                    await pipe.expire(stream_key, self.stream_ttl)
 
-            self.last_flush[run_id] = time.time()
+                    await pipe.execute()
+
+                logger.debug(
+                    f"Flushed {len(chunks)} chunks to Redis stream {stream_key}, seq_ids {chunks[0]['seq_id']}-{chunks[-1]['seq_id']}"
+                )
 
-            logger.debug(f"Flushed {len(chunks)} chunks to Redis stream {stream_key}, seq_ids {chunks[0]['seq_id']}-{chunks[-1]['seq_id']}")
+            self.last_flush[run_id] = time.time()
+            self.unconfirmed_runs.discard(run_id)
 
-            if chunks[-1].get("complete") == "true":
+            if is_complete:
                 self._cleanup_run(run_id)
 
         except Exception as e:
             logger.error(f"Failed to flush chunks for run {run_id}: {e}")
             # Put chunks back in buffer to retry
             self.buffer[run_id] = chunks + self.buffer[run_id]
+            self.unconfirmed_runs.add(run_id)
             raise
 
     async def _periodic_flush(self):
@@ -182,6 +217,7 @@ class RedisSSEStreamWriter:
         self.buffer.pop(run_id, None)
         self.seq_counters.pop(run_id, None)
         self.last_flush.pop(run_id, None)
+        self.unconfirmed_runs.discard(run_id)
 
     async def mark_complete(self, run_id: str):
         """Mark a stream as complete and flush."""
@@ -247,6 +283,166 @@ async def create_background_stream_processor(
             await writer.stop()
 
 
+class _RunStreamReader:
+    """A single blocking XREAD loop for one run, fanning entries out to every local subscriber."""
+
+    def __init__(self, redis_client: AsyncRedisClient, run_id: str, last_id: str, block_ms: int, batch_size: int):
+        self.redis = redis_client
+        self.run_id = run_id
+        self.stream_key = _get_stream_key(run_id)
+        self.last_id = last_id
+        self.block_ms = block_ms
+        self.batch_size = batch_size
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.task: Optional[asyncio.Task] = None
+
+    async def run(self, on_exit) -> None:
+        try:
+            while self.subscribers:
+                response = await self.redis.xread({self.stream_key: self.last_id}, count=self.batch_size, block=self.block_ms)
+                for _, entries in _iter_xread_response(response):
+                    for entry in entries:
+                        self.last_id = entry[0]
+                        for queue in self.subscribers:
+                            queue.put_nowait(entry)
+                        if entry[1].get("complete") == "true":
+                            return
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error reading Redis stream {self.stream_key}: {e}")
+            for queue in self.subscribers:
+                queue.put_nowait(e)
+        finally:
+            on_exit(self)
+
+
+def _iter_xread_response(response) -> List[Tuple[str, List]]:
+    """Normalize an XREAD reply, which is a list of [stream, entries] pairs (RESP2) or a dict (RESP3)."""
+    if not response:
+        return []
+    if isinstance(response, dict):
+        return [(stream, entries[0] if entries and isinstance(entries[0], list) else entries) for stream, entries in response.items()]
+    return [(stream, entries) for stream, entries in response]
+
+
+class RedisSSEStreamReader:
+    """
+    Per-process reader for SSE chunks stored in Redis streams.
+
+    Instead of every attached client polling Redis, each run has one background task blocking on XREAD
+    that fans new entries out to all local subscribers of that run. Subscribers catch up from their cursor
+    with a single XRANGE starting at the cursor's stream ID, then switch to the shared live feed.
+
+    Each XREAD holds a connection of the client's blocking pool while it blocks, so at most
+    `redis_max_blocking_connections` runs are followed at once. Further runs wait for a connection rather than
+    taking them from the pool the rest of the server uses.
+    """
+
+    def __init__(self, redis_client: AsyncRedisClient, block_ms: int = 1000, batch_size: int = 100):
+        """
+        Args:
+            redis_client: Redis client instance
+            block_ms: Milliseconds each XREAD blocks for (must stay below the client's socket timeout)
+            batch_size: Maximum number of entries per XREAD/XRANGE call
+        """
+        self.redis = redis_client
+        self.block_ms = block_ms
+        self.batch_size = batch_size
+        self._readers: Dict[str, _RunStreamReader] = {}
+        self._lock = asyncio.Lock()
+
+    async def _subscribe(self, run_id: str) -> asyncio.Queue:
+        async with self._lock:
+            reader = self._readers.get(run_id)
+            if reader is None:
+                # Start after the current tail so that, combined with the subscriber's XRANGE catch-up,
+                # no entry written between the two calls is missed
+                tail = await self.redis.xrevrange(_get_stream_key(run_id), count=1)
+                reader = _RunStreamReader(
+                    self.redis,
+                    run_id=run_id,
+                    last_id=tail[0][0] if tail else "0-0",
+                    block_ms=self.block_ms,
+                    batch_size=self.batch_size,
+                )
+                self._readers[run_id] = reader
+
+            queue = asyncio.Queue()
+            reader.subscribers.add(queue)
+            if reader.task is None:
+                reader.task = safe_create_task(reader.run(on_exit=self._on_reader_exit), label=f"redis_sse_reader_{run_id}")
+            return queue
+
+    def _unsubscribe(self, run_id: str, queue: asyncio.Queue) -> None:
+        reader = self._readers.get(run_id)
+        if reader is not None:
+            reader.subscribers.discard(queue)
+
+    def _on_reader_exit(self, reader: _RunStreamReader) -> None:
+        if self._readers.get(reader.run_id) is reader:
+            self._readers.pop(reader.run_id, None)
+
+    async def read(
+        self, run_id: str, starting_after: Optional[int] = None, batch_size: Optional[int] = None
+    ) -> AsyncIterator[Tuple[str, Dict]]:
+        """
+        Yield (entry_id, fields) for every chunk of a run after the given seq_id, ending with the complete chunk.
+        """
+        batch_size = batch_size or self.batch_size
+        stream_key = _get_stream_key(run_id)
+        cursor_seq_id = starting_after or 0
+        last_yielded = (0, cursor_seq_id)
+
+        queue = await self._subscribe(run_id)
+        try:
+            # Catch up from the cursor. Entry IDs mirror seq_ids, so this starts right at the cursor
+            # instead of scanning the stream from the beginning.
+            start = _seq_id_to_stream_id(cursor_seq_id + 1)
+            while True:
+                entries = await self.redis.xrange(stream_key, start=start, count=batch_size)
+                for entry_id, fields in entries:
+                    if _parse_stream_id(entry_id) <= last_yielded:
+                        continue
+                    last_yielded = _parse_stream_id(entry_id)
+                    if int(fields.get("seq_id", 0)) <= cursor_seq_id:
+                        # Streams written before entry IDs mirrored seq_ids use time-based IDs
+                        continue
+                    yield entry_id, fields
+                    if fields.get("complete") == "true":
+                        return
+                if len(entries) < batch_size:
+                    break
+                ms, seq = _parse_stream_id(entries[-1][0])
+                start = f"{ms}-{seq + 1}"
+
+            # Follow the shared live feed, skipping entries already delivered by the catch-up
+            while True:
+                item = await queue.get()
+                if isinstance(item, Exception):
+                    raise item
+                entry_id, fields = item
+                if _parse_stream_id(entry_id) <= last_yielded or int(fields.get("seq_id", 0)) <= cursor_seq_id:
+                    continue
+                last_yielded = _parse_stream_id(entry_id)
+                yield entry_id, fields
+                if fields.get("complete") == "true":
+                    return
+        finally:
+            self._unsubscribe(run_id, queue)
+
+
+_stream_reader: Optional[RedisSSEStreamReader] = None
+
+
+def get_redis_sse_stream_reader(redis_client: AsyncRedisClient) -> RedisSSEStreamReader:
+    """Get the per-process stream reader for the given Redis client."""
+    global _stream_reader
+    if _stream_reader is None or _stream_reader.redis is not redis_client:
+        _stream_reader = RedisSSEStreamReader(redis_client)
+    return _stream_reader
+
+
 async def redis_sse_stream_generator(
     redis_client: AsyncRedisClient,
     run_id: str,
@@ -259,55 +455,33 @@ async def redis_sse_stream_generator(
 
     This generator reads chunks stored in Redis streams and yields them as SSE events.
     It supports cursor-based recovery by allowing you to start from a specific seq_id.
+    New chunks are delivered by the process-wide RedisSSEStreamReader, which blocks on XREAD
+    instead of polling.
 
     Args:
         redis_client: Redis client instance
         run_id: The run ID to read chunks for
         starting_after: Sequential ID (integer) to start reading from (default: None for beginning)
-        poll_interval: Seconds to wait between polls when no new data (default: 0.1)
-        batch_size: Number of entries to read per batch (default: 100)
+        poll_interval: Deprecated, kept for API compatibility. Reads block on XREAD instead of polling.
+        batch_size: Number of entries to read per catch-up batch (default: 100)
 
     Yields:
         SSE-formatted chunks from the Redis stream
     """
-    stream_key = f"sse:run:{run_id}"
-    last_redis_id = "-"
-    cursor_seq_id = starting_after or 0
-
-    logger.debug(f"Starting redis_sse_stream_generator for run_id={run_id}, stream_key={stream_key}")
-
-    while True:
-        entries = await redis_client.xrange(stream_key, start=last_redis_id, count=batch_size)
+    logger.debug(f"Starting redis_sse_stream_generator for run_id={run_id}, stream_key={_get_stream_key(run_id)}")
 
-        if entries:
-            yielded_any = False
-            for entry_id, fields in entries:
-                if entry_id == last_redis_id:
-                    continue
-
-                chunk_seq_id = int(fields.get("seq_id", 0))
-                if chunk_seq_id > cursor_seq_id:
-                    data = fields.get("data", "")
-                    if not data:
-                        logger.debug(f"No data found for chunk {chunk_seq_id} in run {run_id}")
-                        continue
-
-                    if '"run_id":null' in data:
-                        data = data.replace('"run_id":null', f'"run_id":"{run_id}"')
-
-                    if '"seq_id":null' in data:
-                        data = data.replace('"seq_id":null', f'"seq_id":{chunk_seq_id}')
-
-                    yield data
-                    yielded_any = True
-
-                    if fields.get("complete") == "true":
-                        return
+    reader = get_redis_sse_stream_reader(redis_client)
+    async for _, fields in reader.read(run_id, starting_after=starting_after, batch_size=batch_size):
+        chunk_seq_id = int(fields.get("seq_id", 0))
+        data = fields.get("data", "")
+        if not data:
+            logger.debug(f"No data found for chunk {chunk_seq_id} in run {run_id}")
+            continue
 
-                last_redis_id = entry_id
+        if '"run_id":null' in data:
+            data = data.replace('"run_id":null', f'"run_id":"{run_id}"')
 
-            if not yielded_any and len(entries) > 1:
-                continue
+        if '"seq_id":null' in data:
+            data = data.replace('"seq_id":null', f'"seq_id":{chunk_seq_id}')
 
-        if not entries or (len(entries) == 1 and entries[0][0] == last_redis_id):
-            await asyncio.sleep(poll_interval)
+        yield data
@@ -56,6 +56,7 @@ from letta.serialize_schemas.pydantic_agent_schema import AgentSchema
 from letta.server.rest_api.dependencies import HeaderParams, get_headers, get_letta_server
 from letta.server.rest_api.redis_stream_manager import create_background_stream_processor, redis_sse_stream_generator
 from letta.server.server import SyncServer
+from letta.services.helpers.agent_manager_helper import AGENT_LOAD_PROFILES
 from letta.settings import settings
 from letta.utils import safe_create_shielded_task, safe_create_task, truncate_file_visible_content
 
@@ -113,6 +114,14 @@ async def list_agents(
         include_in_schema=False,
         description="If set to True, include agents marked as hidden in the results.",
     ),
+    load_profile: Literal["list_summary"] | None = Query(
+        None,
+        include_in_schema=False,
+        description=(
+            "Load only what agent listings render, taking precedence over include_relationships. The agents returned are "
+            "partial: relationships the profile doesn't load are empty and the columns it defers are left out of the response."
+        ),
+    ),
 ):
     """
     Get a list of all agents.
@@ -126,7 +135,7 @@ async def list_agents(
     final_sort_by = order_by if order_by else sort_by
 
     # Call list_agents directly without unnecessary dict handling
-    return await server.agent_manager.list_agents_async(
+    agents = await server.agent_manager.list_agents_async(
         actor=actor,
         name=name,
         before=before,
@@ -144,7 +153,14 @@ async def list_agents(
         ascending=final_ascending,
         sort_by=final_sort_by,
         show_hidden_agents=show_hidden_agents,
+        load_profile=load_profile,
     )
+    if load_profile is None:
+        return agents
+
+    # the deferred columns were never read, leave them out rather than report their defaults
+    deferred_columns = set(AGENT_LOAD_PROFILES[load_profile].deferred_columns)
+    return JSONResponse(content=[agent.model_dump(mode="json", exclude=deferred_columns) for agent in agents])
 
 
 @router.get("/count", response_model=int, operation_id="count_agents")
@@ -176,6 +192,10 @@ async def export_agent(
         False,
         description="If true, exports using the legacy single-agent format (v1). If false, exports using the new multi-entity format (v2).",
     ),
+    include_file_passages: bool = Query(
+        False,
+        description="If true, exports the embedded chunks of the agent's files so importing them does not embed the files again. Ignored for the legacy format.",
+    ),
     # do not remove, used to autogeneration of spec
     # TODO: Think of a better way to export AgentFileSchema
     spec: AgentFileSchema | None = None,
@@ -200,7 +220,9 @@ async def export_agent(
     else:
         # Use the new multi-entity export format
         try:
-            agent_file_schema = await server.agent_serialization_manager.export(agent_ids=[agent_id], actor=actor)
+            agent_file_schema = await server.agent_serialization_manager.export(
+                agent_ids=[agent_id], actor=actor, include_file_passages=include_file_passages
+            )
             return agent_file_schema.model_dump()
         except AgentNotFoundForExportError:
             raise HTTPException(status_code=404, detail=f"Agent with id={agent_id} not found for user_id={actor.id}.")
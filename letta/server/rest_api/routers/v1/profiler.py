@@ -0,0 +1,39 @@
+from typing import Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from letta.otel.sampling_profiler import get_sampling_profiler
+
+router = APIRouter(prefix="/profiler", tags=["profiler", "admin"])
+
+
+@router.get("/flamegraph", tags=["admin"], response_class=PlainTextResponse, operation_id="get_profiler_flamegraph")
+async def get_profiler_flamegraph(
+    route: Optional[str] = Query(
+        None, description="Only samples taken while serving this route, e.g. 'POST /v1/agents/{agent_id}/messages'."
+    ),
+    agent_id: Optional[str] = Query(None, description="Only samples taken while serving this agent."),
+    run_id: Optional[str] = Query(None, description="Only samples taken while executing this run."),
+    phase: Optional[Literal["llm", "tool", "db", "serialization", "other"]] = Query(None, description="Only samples in this step phase."),
+    include_labels: bool = Query(True, description="Prefix each stack with the route, agent, run and phase it was sampled in."),
+    reset: bool = Query(False, description="Discard all samples after reading them."),
+):
+    """
+    Get the samples of the built-in sampling profiler as collapsed stacks, one `frame;frame;... count` line per stack,
+    ready for flamegraph.pl, speedscope or inferno.
+
+    Samples are kept per process. With several uvicorn workers this returns only the samples of the worker that served
+    this request, run a single worker to profile every request.
+    """
+    profiler = get_sampling_profiler()
+    if not profiler.running:
+        raise HTTPException(
+            status_code=404,
+            detail="The sampling profiler is not running, set LETTA_TELEMETRY_PROFILER=true and LETTA_TELEMETRY_PROFILER_BACKEND=sampling.",
+        )
+    collapsed = profiler.collapsed(include_labels=include_labels, route=route, agent_id=agent_id, run_id=run_id, phase=phase)
+    headers = {"X-Profiler-Samples": str(profiler.total_samples), "X-Profiler-Dropped-Samples": str(profiler.dropped)}
+    if reset:
+        profiler.reset()
+    return PlainTextResponse(collapsed, headers=headers)
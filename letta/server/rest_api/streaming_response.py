@@ -13,11 +13,11 @@ from starlette.types import Send
 
 from letta.errors import LettaUnexpectedStreamCancellationError, PendingApprovalError
 from letta.log import get_logger
-from letta.schemas.enums import JobStatus
 from letta.schemas.letta_ping import LettaPing
 from letta.schemas.user import User
 from letta.server.rest_api.utils import capture_sentry_exception
 from letta.services.job_manager import JobManager
+from letta.services.run_cancellation_bus import get_run_cancellation_bus
 from letta.settings import settings
 from letta.utils import safe_create_task
 
@@ -133,28 +133,28 @@ async def cancellation_aware_stream_wrapper(
     Raises:
         asyncio.CancelledError: If the job is cancelled during streaming
     """
+    bus = get_run_cancellation_bus()
+    watch = bus.watch(job_id)
     last_cancellation_check = asyncio.get_event_loop().time()
 
     try:
         async for chunk in stream_generator:
-            # Check for cancellation periodically (not on every chunk for performance)
+            # Cancellations are pushed to the watch, so checking it on every chunk is free. The job itself is only
+            # read periodically, and only when the cancellation bus can't vouch for having seen every cancellation.
             current_time = asyncio.get_event_loop().time()
-            if current_time - last_cancellation_check >= cancellation_check_interval:
-                try:
-                    job = await job_manager.get_job_by_id_async(job_id=job_id, actor=actor)
-                    if job.status == JobStatus.cancelled:
-                        logger.info(f"Stream cancelled for job {job_id}, interrupting stream")
-                        # Send cancellation event to client
-                        cancellation_event = {"message_type": "stop_reason", "stop_reason": "cancelled"}
-                        yield f"data: {json.dumps(cancellation_event)}\n\n"
-                        # Raise custom exception for explicit job cancellation
-                        raise JobCancelledException(job_id, f"Job {job_id} was cancelled")
-                except Exception as e:
-                    # Log warning but don't fail the stream if cancellation check fails
-                    logger.warning(f"Failed to check job cancellation for job {job_id}: {e}")
-
+            cancelled = watch.cancelled
+            if not cancelled and current_time - last_cancellation_check >= cancellation_check_interval:
+                cancelled = await bus.is_run_cancelled(watch, job_manager=job_manager, actor=actor)
                 last_cancellation_check = current_time
 
+            if cancelled:
+                logger.info(f"Stream cancelled for job {job_id}, interrupting stream")
+                # Send cancellation event to client
+                cancellation_event = {"message_type": "stop_reason", "stop_reason": "cancelled"}
+                yield f"data: {json.dumps(cancellation_event)}\n\n"
+                # Raise custom exception for explicit job cancellation
+                raise JobCancelledException(job_id, f"Job {job_id} was cancelled")
+
             yield chunk
 
     except JobCancelledException:
@@ -102,6 +102,7 @@ from letta.services.mcp_manager import MCPManager
 from letta.services.message_manager import MessageManager
 from letta.services.organization_manager import OrganizationManager
 from letta.services.passage_manager import PassageManager
+from letta.services.provider_catalog import get_provider_catalog
 from letta.services.provider_manager import ProviderManager
 from letta.services.sandbox_config_manager import SandboxConfigManager
 from letta.services.source_manager import SourceManager
@@ -232,7 +233,8 @@ class SyncServer(Server):
             mcp_manager=self.mcp_manager,
             file_manager=self.file_manager,
             file_agent_manager=self.file_agent_manager,
-            message_manager=self.message_manager
+            message_manager=self.message_manager,
+            passage_manager=self.passage_manager,
         )
 
         # Managers that depend on the managers above
@@ -500,7 +502,7 @@ class SyncServer(Server):
         """Initialize the MCP clients (there may be multiple)"""
         self.mcp_clients: Dict[str, AsyncBaseMCPClient] = {}
 
-        # TODO: Remove these in memory caches
+        # TODO: Remove these in memory caches, only the synchronous handle lookups still use them
         self._llm_config_cache = {}
         self._embedding_config_cache = {}
 
@@ -863,32 +865,26 @@ class SyncServer(Server):
 
     @trace_method
     def get_cached_llm_config(self, actor: User, **kwargs):
-        key = make_key(**kwargs)
+        key = make_key(organization_id=actor.organization_id, **kwargs)
         if key not in self._llm_config_cache:
             self._llm_config_cache[key] = self.get_llm_config_from_handle(actor=actor, **kwargs)
-        return self._llm_config_cache[key]
+        return self._llm_config_cache[key].model_copy(deep=True)
 
     @trace_method
     async def get_cached_llm_config_async(self, actor: User, **kwargs):
-        key = make_key(**kwargs)
-        if key not in self._llm_config_cache:
-            self._llm_config_cache[key] = await self.get_llm_config_from_handle_async(actor=actor, **kwargs)
-        return self._llm_config_cache[key]
+        # model lists are cached by the provider catalog, which also sees provider edits
+        return await self.get_llm_config_from_handle_async(actor=actor, **kwargs)
 
     @trace_method
     def get_cached_embedding_config(self, actor: User, **kwargs):
-        key = make_key(**kwargs)
+        key = make_key(organization_id=actor.organization_id, **kwargs)
         if key not in self._embedding_config_cache:
             self._embedding_config_cache[key] = self.get_embedding_config_from_handle(actor=actor, **kwargs)
-        return self._embedding_config_cache[key]
+        return self._embedding_config_cache[key].model_copy(deep=True)
 
-    # @async_redis_cache(key_func=lambda (actor, **kwargs): actor.id + hash(kwargs))
     @trace_method
     async def get_cached_embedding_config_async(self, actor: User, **kwargs):
-        key = make_key(**kwargs)
-        if key not in self._embedding_config_cache:
-            self._embedding_config_cache[key] = await self.get_embedding_config_from_handle_async(actor=actor, **kwargs)
-        return self._embedding_config_cache[key]
+        return await self.get_embedding_config_from_handle_async(actor=actor, **kwargs)
 
     @trace_method
     def create_agent(
@@ -1618,7 +1614,7 @@ class SyncServer(Server):
         async def get_provider_models(provider: Provider) -> list[LLMConfig]:
             try:
                 async with asyncio.timeout(constants.GET_PROVIDERS_TIMEOUT_SECONDS):
-                    return await provider.list_llm_models_async()
+                    return await get_provider_catalog().list_llm_models(provider)
             except asyncio.TimeoutError:
                 warnings.warn(f"Timeout while listing LLM models for provider {provider}")
                 return []
@@ -1670,8 +1666,7 @@ class SyncServer(Server):
         # Fetch embedding models from each provider concurrently
         async def get_provider_embedding_models(provider):
             try:
-                # All providers now have list_embedding_models_async
-                return await provider.list_embedding_models_async()
+                return await get_provider_catalog().list_embedding_models(provider)
             except Exception as e:
                 import traceback
 
@@ -1815,12 +1810,10 @@ class SyncServer(Server):
             provider_name, model_name = handle.split("/", 1)
             provider = await self.get_provider_from_name_async(provider_name, actor)
 
-            all_llm_configs = await provider.list_llm_models_async()
-            llm_configs = [config for config in all_llm_configs if config.handle == handle]
-            if not llm_configs:
-                llm_configs = [config for config in all_llm_configs if config.model == model_name]
+            catalog = get_provider_catalog()
+            llm_configs = await catalog.find_llm_configs(provider, handle)
             if not llm_configs:
-                available_handles = [config.handle for config in all_llm_configs]
+                available_handles = [config.handle for config in await catalog.list_llm_models(provider)]
                 raise HandleNotFoundError(handle, available_handles)
         except ValueError as e:
             llm_configs = [config for config in self.get_local_llm_configs() if config.handle == handle]
@@ -1893,8 +1886,7 @@ class SyncServer(Server):
             provider_name, model_name = handle.split("/", 1)
             provider = await self.get_provider_from_name_async(provider_name, actor)
 
-            all_embedding_configs = await provider.list_embedding_models_async()
-            embedding_configs = [config for config in all_embedding_configs if config.handle == handle]
+            embedding_configs = await get_provider_catalog().find_embedding_configs(provider, handle)
             if not embedding_configs:
                 raise ValueError(f"Embedding model {model_name} is not supported by {provider_name}")
         except ValueError as e:
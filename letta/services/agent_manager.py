@@ -1,10 +1,12 @@
 import asyncio
+import logging
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Literal, Optional, Set, Tuple
 from zoneinfo import ZoneInfo
 
 import sqlalchemy as sa
-from sqlalchemy import delete, func, insert, literal, or_, select, tuple_
+from pydantic import ValidationError
+from sqlalchemy import delete, func, insert, literal, or_, select, tuple_, update
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from letta.constants import (
@@ -26,6 +28,7 @@ from letta.constants import (
 )
 from letta.helpers import ToolRulesSolver
 from letta.helpers.datetime_helpers import get_utc_time
+from letta.helpers.decorators import single_flight
 from letta.llm_api.llm_client import LLMClient
 from letta.log import get_logger
 from letta.orm import (
@@ -60,7 +63,7 @@ from letta.schemas.enums import AgentType, ProviderType, TagMatchMode, ToolType,
 from letta.schemas.file import FileMetadata as PydanticFileMetadata
 from letta.schemas.group import Group as PydanticGroup, ManagerType
 from letta.schemas.llm_config import LLMConfig
-from letta.schemas.memory import ContextWindowOverview, Memory
+from letta.schemas.memory import ContextTokenLedger, ContextWindowOverview, Memory
 from letta.schemas.message import Message, Message as PydanticMessage, MessageCreate, MessageUpdate
 from letta.schemas.passage import Passage as PydanticPassage
 from letta.schemas.source import Source as PydanticSource
@@ -72,6 +75,7 @@ from letta.serialize_schemas.marshmallow_message import SerializedMessageSchema
 from letta.serialize_schemas.marshmallow_tool import SerializedToolSchema
 from letta.serialize_schemas.pydantic_agent_schema import AgentSchema
 from letta.server.db import db_registry
+from letta.services.agent_state_cache import get_agent_state_cache
 from letta.services.archive_manager import ArchiveManager
 from letta.services.block_manager import BlockManager
 from letta.services.context_window_calculator.context_window_calculator import ContextWindowCalculator
@@ -79,6 +83,7 @@ from letta.services.context_window_calculator.token_counter import AnthropicToke
 from letta.services.file_processor.chunker.line_chunker import LineChunker
 from letta.services.files_agents_manager import FileAgentManager
 from letta.services.helpers.agent_manager_helper import (
+    AGENT_LOAD_PROFILES,
     _apply_filters,
     _apply_identity_filters,
     _apply_pagination,
@@ -103,6 +108,7 @@ from letta.services.helpers.agent_manager_helper import (
 from letta.services.identity_manager import IdentityManager
 from letta.services.message_manager import MessageManager
 from letta.services.passage_manager import PassageManager
+from letta.services.prompt_assembly_cache import get_prompt_assembly_cache
 from letta.services.source_manager import SourceManager
 from letta.services.tool_manager import ToolManager
 from letta.settings import DatabaseChoice, settings
@@ -921,7 +927,10 @@ class AgentManager:
             session.flush()
             session.refresh(agent)
 
-            return agent.to_pydantic()
+            agent_state = agent.to_pydantic()
+
+        get_agent_state_cache().invalidate_nowait(agent_id)
+        return agent_state
 
     @enforce_types
     @trace_method
@@ -937,6 +946,7 @@ class AgentManager:
         new_idents = set(agent_update.identity_ids or [])
         new_tags = set(agent_update.tags or [])
 
+        cached_versions = await get_agent_state_cache().snapshot(agent_id)
         async with db_registry.async_session() as session, session.begin():
             agent: AgentModel = await AgentModel.read_async(db_session=session, identifier=agent_id, actor=actor)
             agent.updated_at = datetime.now(timezone.utc)
@@ -1047,7 +1057,10 @@ class AgentManager:
             await session.flush()
             await session.refresh(agent)
 
-            return await agent.to_pydantic_async()
+            agent_state = await agent.to_pydantic_async()
+
+        await get_agent_state_cache().write_through(agent_state, actor.organization_id, cached_versions)
+        return agent_state
 
     @enforce_types
     @trace_method
@@ -1057,6 +1070,7 @@ class AgentManager:
         message_ids: List[str],
         actor: PydanticUser,
     ) -> None:
+        cached_versions = await get_agent_state_cache().snapshot(agent_id)
         async with db_registry.async_session() as session:
             query = select(AgentModel)
             query = AgentModel.apply_access_predicate(query, actor, ["read"], AccessType.ORGANIZATION)
@@ -1071,8 +1085,17 @@ class AgentManager:
             agent.message_ids = message_ids
 
             await agent.update_async(db_session=session, actor=actor, no_commit=True, no_refresh=True)
+            updated_at = agent.updated_at
             await session.commit()
 
+        await get_agent_state_cache().update_fields(
+            agent_id,
+            cached_versions,
+            message_ids=list(message_ids),
+            updated_at=updated_at,
+            last_updated_by_id=actor.id,
+        )
+
     # TODO: Make this general and think about how to roll this into sqlalchemybase
     @trace_method
     def list_agents(
@@ -1154,6 +1177,7 @@ class AgentManager:
         ascending: bool = True,
         sort_by: Optional[str] = "created_at",
         show_hidden_agents: Optional[bool] = None,
+        load_profile: Optional[str] = None,
     ) -> List[PydanticAgentState]:
         """
         Retrieves agents with optimized filtering and optional field selection.
@@ -1176,10 +1200,18 @@ class AgentManager:
             ascending (bool): Sort agents in ascending order.
             sort_by (Optional[str]): Sort agents by this field.
             show_hidden_agents (bool): If True, include agents marked as hidden in the results.
+            load_profile (Optional[str]): Name of an entry in `AGENT_LOAD_PROFILES` to load, instead of `include_relationships`.
+                The agents returned are partial, the profile's deferred columns are left at their schema defaults and
+                should be excluded when the agents are serialized.
 
         Returns:
             List[PydanticAgentState]: The filtered list of matching agents.
         """
+        deferred_columns = ()
+        if load_profile is not None:
+            profile = AGENT_LOAD_PROFILES[load_profile]
+            include_relationships, deferred_columns = list(profile.include_relationships), profile.deferred_columns
+
         async with db_registry.async_session() as session:
             query = select(AgentModel)
             query = AgentModel.apply_access_predicate(query, actor, ["read"], AccessType.ORGANIZATION)
@@ -1188,7 +1220,7 @@ class AgentManager:
             query = _apply_filters(query, name, query_text, project_id, template_id, base_template_id)
             query = _apply_identity_filters(query, identity_id, identifier_keys)
             query = _apply_tag_filter(query, tags, match_all_tags)
-            query = _apply_relationship_filters(query, include_relationships)
+            query = _apply_relationship_filters(query, include_relationships, deferred_columns)
 
             # Apply hidden filter
             if not show_hidden_agents:
@@ -1321,6 +1353,13 @@ class AgentManager:
 
     @enforce_types
     @trace_method
+    # not shared through Redis, agent states carry tool secrets and are already cached per process
+    @single_flight(
+        key_func=lambda self, agent_id, actor, include_relationships=None: (
+            f"{actor.organization_id}:{agent_id}:{','.join(sorted(include_relationships)) if include_relationships is not None else '*'}"
+        ),
+        scope_func=lambda self, agent_id, *args, **kwargs: agent_id,
+    )
     async def get_agent_by_id_async(
         self,
         agent_id: str,
@@ -1328,6 +1367,19 @@ class AgentManager:
         include_relationships: Optional[List[str]] = None,
     ) -> PydanticAgentState:
         """Fetch an agent by its ID."""
+        return await get_agent_state_cache().get_or_load(
+            agent_id,
+            actor.organization_id,
+            include_relationships,
+            lambda: self._load_agent_by_id_async(agent_id=agent_id, actor=actor, include_relationships=include_relationships),
+        )
+
+    async def _load_agent_by_id_async(
+        self,
+        agent_id: str,
+        actor: PydanticUser,
+        include_relationships: Optional[List[str]] = None,
+    ) -> PydanticAgentState:
         async with db_registry.async_session() as session:
             try:
                 query = select(AgentModel)
@@ -1429,6 +1481,7 @@ class AgentManager:
                     sleeptime_agent_group = GroupModel.read(db_session=session, identifier=agent.multi_agent_group.id, actor=actor)
                     sleeptime_group_to_delete = sleeptime_agent_group
 
+            deleted_agent_ids = [agent.id for agent in agents_to_delete]
             try:
                 if sleeptime_group_to_delete is not None:
                     session.delete(sleeptime_group_to_delete)
@@ -1441,6 +1494,7 @@ class AgentManager:
                 logger.exception(f"Failed to hard delete Agent with ID {agent_id}")
                 raise ValueError(f"Failed to hard delete Agent with ID {agent_id}: {e}")
             else:
+                get_agent_state_cache().invalidate_nowait(deleted_agent_ids)
                 logger.debug(f"Agent with ID {agent_id} successfully hard deleted")
 
     @enforce_types
@@ -1479,6 +1533,7 @@ class AgentManager:
                     )
                     sleeptime_group_to_delete = sleeptime_agent_group
 
+            deleted_agent_ids = [agent.id for agent in agents_to_delete]
             try:
                 if sleeptime_group_to_delete is not None:
                     await session.delete(sleeptime_group_to_delete)
@@ -1491,6 +1546,7 @@ class AgentManager:
                 logger.exception(f"Failed to hard delete Agent with ID {agent_id}")
                 raise ValueError(f"Failed to hard delete Agent with ID {agent_id}: {e}")
             else:
+                await get_agent_state_cache().invalidate(deleted_agent_ids)
                 logger.debug(f"Agent with ID {agent_id} successfully hard deleted")
 
     @enforce_types
@@ -1636,6 +1692,7 @@ class AgentManager:
 
             # Update the agent in the database
             agent.update(session, actor=actor)
+            get_agent_state_cache().invalidate_nowait(agent_id)
 
             # Return the updated agent state
             return agent.to_pydantic()
@@ -1789,16 +1846,24 @@ class AgentManager:
             return agent_state, curr_system_message, num_messages, num_archival_memories
 
         curr_system_message_openai = curr_system_message.to_openai_dict()
+        curr_system_message_text = curr_system_message_openai["content"]
 
         # note: we only update the system prompt if the core memory is changed
         # this means that the archival/recall memory statistics may be someout out of date
-        curr_memory_str = agent_state.memory.compile(
+        prompt_assembly_cache = get_prompt_assembly_cache()
+        curr_memory_str = prompt_assembly_cache.compile_memory(
+            agent_id,
+            agent_state.memory,
             sources=agent_state.sources,
             tool_usage_rules=tool_rules_solver.compile_tool_rule_prompts(),
             max_files_open=agent_state.max_files_open,
         )
-        if curr_memory_str in curr_system_message_openai["content"] and not force:
+        if not force and (
+            prompt_assembly_cache.is_current(agent_id, curr_memory_str, curr_system_message.id, curr_system_message_text)
+            or curr_memory_str in curr_system_message_text
+        ):
             # NOTE: could this cause issues if a block is removed? (substring match would still work)
+            prompt_assembly_cache.mark_current(agent_id, curr_memory_str, curr_system_message.id, curr_system_message_text)
             logger.debug(
                 f"Memory hasn't changed for agent id={agent_id} and actor=({actor.id}, {actor.name}), skipping system prompt rebuild"
             )
@@ -1823,9 +1888,10 @@ class AgentManager:
             archival_memory_size=num_archival_memories,
         )
 
-        diff = united_diff(curr_system_message_openai["content"], new_system_message_str)
-        if len(diff) > 0:  # there was a diff
-            logger.debug(f"Rebuilding system with new memory...\nDiff:\n{diff}")
+        if new_system_message_str != curr_system_message_text:
+            if logger.isEnabledFor(logging.DEBUG):
+                diff = united_diff(curr_system_message_text, new_system_message_str)
+                logger.debug(f"Rebuilding system with new memory...\nDiff:\n{diff}")
 
             # Swap the system message out (only if there is a diff)
             temp_message = PydanticMessage.dict_to_message(
@@ -1842,6 +1908,7 @@ class AgentManager:
                     actor=actor,
                     project_id=agent_state.project_id,
                 )
+                prompt_assembly_cache.mark_current(agent_id, curr_memory_str, curr_system_message.id, new_system_message_str)
             else:
                 curr_system_message = temp_message
 
@@ -1946,6 +2013,7 @@ class AgentManager:
             agent.message_ids = [system_message_id]
             await agent.update_async(db_session=session, actor=actor)
             agent_state = await agent.to_pydantic_async(include_relationships=["sources"])
+        await get_agent_state_cache().invalidate(agent_id)
 
         # Optionally add default initial messages after the system message
         if add_default_initial_messages:
@@ -2105,6 +2173,7 @@ class AgentManager:
 
             # Commit the changes
             agent = await agent.update_async(session, actor=actor)
+            await get_agent_state_cache().invalidate(agent_id)
             return await agent.to_pydantic_async()
 
     @enforce_types
@@ -2232,6 +2301,7 @@ class AgentManager:
                 delete_query = delete(SourcesAgents).where(SourcesAgents.agent_id == agent_id, SourcesAgents.source_id == source_id)
                 await session.execute(delete_query)
                 await session.commit()
+                await get_agent_state_cache().invalidate(agent_id, ["sources"])
 
             # Get agent without loading relationships for return value
             agent = await AgentModel.read_async(db_session=session, identifier=agent_id, actor=actor)
@@ -2298,6 +2368,11 @@ class AgentManager:
                 setattr(block, key, value)
 
             await block.update_async(session, actor=actor)
+            # the block can be shared with other agents
+            await get_agent_state_cache().invalidate(
+                await self.block_manager.get_agent_ids_for_blocks_async(session, [block.id]),
+                ["memory"],
+            )
             return block.to_pydantic()
 
     @enforce_types
@@ -2323,6 +2398,7 @@ class AgentManager:
             # Add new block
             agent.core_memory.append(new_block)
             agent.update(session, actor=actor)
+            get_agent_state_cache().invalidate_nowait(agent_id)
             return agent.to_pydantic()
 
     @enforce_types
@@ -2336,6 +2412,7 @@ class AgentManager:
             # Attach block to the main agent
             agent.core_memory.append(block)
             agent.update(session, actor=actor, no_commit=True)
+            updated_agent_ids = [agent_id]
 
             # If agent is part of a sleeptime group, attach block to the sleeptime_agent
             if agent.multi_agent_group and agent.multi_agent_group.manager_type == ManagerType.sleeptime:
@@ -2348,10 +2425,12 @@ class AgentManager:
                             if other_agent.agent_type == AgentType.sleeptime_agent and block not in other_agent.core_memory:
                                 other_agent.core_memory.append(block)
                                 other_agent.update(session, actor=actor, no_commit=True)
+                                updated_agent_ids.append(other_agent_id)
                         except NoResultFound:
                             # Agent might not exist anymore, skip
                             continue
             session.commit()
+            get_agent_state_cache().invalidate_nowait(updated_agent_ids)
 
             return agent.to_pydantic()
 
@@ -2367,6 +2446,7 @@ class AgentManager:
             agent.core_memory.append(block)
             # await agent.update_async(session, actor=actor, no_commit=True)
             await agent.update_async(session)
+            updated_agent_ids = [agent_id]
 
             # If agent is part of a sleeptime group, attach block to the sleeptime_agent
             if agent.multi_agent_group and agent.multi_agent_group.manager_type == ManagerType.sleeptime:
@@ -2380,6 +2460,7 @@ class AgentManager:
                                 other_agent.core_memory.append(block)
                                 # await other_agent.update_async(session, actor=actor, no_commit=True)
                                 await other_agent.update_async(session, actor=actor)
+                                updated_agent_ids.append(other_agent_id)
                         except NoResultFound:
                             # Agent might not exist anymore, skip
                             continue
@@ -2388,6 +2469,7 @@ class AgentManager:
             # TODO: Ideally we do two no commits on the update_async calls, and then commit here - but that errors for some reason?
             # TODO: I have too many things rn so lets look at this later
             # await session.commit()
+            await get_agent_state_cache().invalidate(updated_agent_ids)
 
             return await agent.to_pydantic_async()
 
@@ -2410,6 +2492,7 @@ class AgentManager:
                 raise NoResultFound(f"No block with id '{block_id}' found for agent '{agent_id}' with actor id: '{actor.id}'")
 
             agent.update(session, actor=actor)
+            get_agent_state_cache().invalidate_nowait(agent_id)
             return agent.to_pydantic()
 
     @enforce_types
@@ -2431,6 +2514,7 @@ class AgentManager:
                 raise NoResultFound(f"No block with id '{block_id}' found for agent '{agent_id}' with actor id: '{actor.id}'")
 
             await agent.update_async(session, actor=actor)
+            await get_agent_state_cache().invalidate(agent_id)
             return await agent.to_pydantic_async()
 
     @enforce_types
@@ -2452,6 +2536,7 @@ class AgentManager:
                 raise NoResultFound(f"No block with label '{block_label}' found for agent '{agent_id}' with actor id: '{actor.id}'")
 
             agent.update(session, actor=actor)
+            get_agent_state_cache().invalidate_nowait(agent_id)
             return agent.to_pydantic()
 
     # ======================================================================================================================
@@ -2725,6 +2810,8 @@ class AgentManager:
                 embed_query=embed_query,
                 ascending=ascending,
                 embedding_config=embedding_config,
+                tags=tags,
+                tag_match_mode=tag_match_mode,
             )
 
             # Add limit
@@ -2740,28 +2827,6 @@ class AgentManager:
             # Convert to Pydantic models
             pydantic_passages = [p.to_pydantic() for p in passages]
 
-            # TODO: Integrate tag filtering directly into the SQL query for better performance.
-            # Currently using post-filtering which is less efficient but simpler to implement.
-            # Future optimization: Add JOIN with passage_tags table and WHERE clause for tag filtering.
-            if tags:
-                filtered_passages = []
-                for passage in pydantic_passages:
-                    if passage.tags:
-                        passage_tags = set(passage.tags)
-                        query_tags = set(tags)
-
-                        if tag_match_mode == TagMatchMode.ALL:
-                            # ALL mode: passage must have all query tags
-                            if query_tags.issubset(passage_tags):
-                                filtered_passages.append(passage)
-                        else:
-                            # ANY mode (default): passage must have at least one query tag
-                            if query_tags.intersection(passage_tags):
-                                filtered_passages.append(passage)
-
-                # Return as tuples with empty metadata for SQL path
-                return [(p, 0.0, {}) for p in filtered_passages]
-
             # Return as tuples with empty metadata for SQL path
             return [(p, 0.0, {}) for p in pydantic_passages]
 
@@ -3018,6 +3083,7 @@ class AgentManager:
 
             # Commit and refresh the agent
             agent.update(session, actor=actor)
+            get_agent_state_cache().invalidate_nowait(agent_id)
             return agent.to_pydantic()
 
     @enforce_types
@@ -3087,6 +3153,8 @@ class AgentManager:
                     session.add(agent)
 
             await session.commit()
+            # tool rules live on the agent row
+            await get_agent_state_cache().invalidate(agent_id, None if default_requires_approval else ["tools"])
 
     @enforce_types
     @trace_method
@@ -3159,6 +3227,7 @@ class AgentManager:
                     logger.info(f"All {len(tool_ids)} tools already attached to agent {agent_id}")
 
             await session.commit()
+            await get_agent_state_cache().invalidate(agent_id, ["tools"])
 
     @enforce_types
     @trace_method
@@ -3285,6 +3354,7 @@ class AgentManager:
 
             # Commit and refresh the agent
             agent.update(session, actor=actor)
+            get_agent_state_cache().invalidate_nowait(agent_id)
             return agent.to_pydantic()
 
     @enforce_types
@@ -3315,6 +3385,7 @@ class AgentManager:
                 logger.debug(f"Detached tool id={tool_id} from agent id={agent_id}")
 
             await session.commit()
+            await get_agent_state_cache().invalidate(agent_id, ["tools"])
 
     @enforce_types
     @trace_method
@@ -3351,6 +3422,7 @@ class AgentManager:
                 logger.info(f"Detached all {detached_count} tools from agent {agent_id}")
 
             await session.commit()
+            await get_agent_state_cache().invalidate(agent_id, ["tools"])
 
     @enforce_types
     @trace_method
@@ -3378,6 +3450,7 @@ class AgentManager:
             agent.tool_rules = tool_rules
             session.add(agent)
             await session.commit()
+            await get_agent_state_cache().invalidate(agent_id)
 
     @enforce_types
     @trace_method
@@ -3727,6 +3800,11 @@ class AgentManager:
             return row
 
     @trace_method
+    @single_flight(
+        key_func=lambda self, agent_id, actor: f"{actor.organization_id}:{agent_id}",
+        scope_func=lambda self, agent_id, actor: agent_id,
+        model_class=ContextWindowOverview,
+    )
     async def get_context_window(self, agent_id: str, actor: PydanticUser) -> ContextWindowOverview:
         agent_state, system_message, num_messages, num_archival_memories = await self.rebuild_system_prompt_async(
             agent_id=agent_id, actor=actor, force=True, dry_run=True
@@ -3741,7 +3819,8 @@ class AgentManager:
         else:
             token_counter = TiktokenCounter(agent_state.llm_config.model)
 
-        return await calculator.calculate_context_window(
+        token_ledger = await self.get_context_token_ledger_async(agent_id=agent_id, actor=actor)
+        context_window_overview, updated_token_ledger = await calculator.calculate_context_window(
             agent_state=agent_state,
             actor=actor,
             token_counter=token_counter,
@@ -3749,4 +3828,49 @@ class AgentManager:
             system_message_compiled=system_message,
             num_archival_memories=num_archival_memories,
             num_messages=num_messages,
+            token_ledger=token_ledger,
         )
+        if updated_token_ledger != token_ledger:
+            await self.update_context_token_ledger_async(agent_id=agent_id, token_ledger=updated_token_ledger, actor=actor)
+
+        return context_window_overview
+
+    @enforce_types
+    @trace_method
+    async def get_context_token_ledger_async(self, agent_id: str, actor: PydanticUser) -> Optional[ContextTokenLedger]:
+        """Get the persisted token ledger for an agent's context window, if one has been recorded.
+
+        This is a performant query that only fetches the specific field needed.
+        """
+        async with db_registry.async_session() as session:
+            result = await session.execute(
+                select(AgentModel._context_token_ledger)
+                .where(AgentModel.id == agent_id)
+                .where(AgentModel.organization_id == actor.organization_id)
+                .where(AgentModel.is_deleted == False)
+            )
+            row = result.scalar_one_or_none()
+            if not row:
+                return None
+
+            try:
+                return ContextTokenLedger.model_validate(row)
+            except ValidationError as e:
+                # A ledger written by an older schema is just a cache miss, it gets rebuilt on the next count
+                logger.warning(f"Discarding invalid context token ledger for agent {agent_id}: {e}")
+                return None
+
+    @enforce_types
+    @trace_method
+    async def update_context_token_ledger_async(
+        self, agent_id: str, token_ledger: Optional[ContextTokenLedger], actor: PydanticUser
+    ) -> None:
+        """Persist the token ledger for an agent's context window. Does not bump the agent's updated_at."""
+        async with db_registry.async_session() as session:
+            await session.execute(
+                update(AgentModel)
+                .where(AgentModel.id == agent_id)
+                .where(AgentModel.organization_id == actor.organization_id)
+                .values(_context_token_ledger=token_ledger.model_dump(mode="json") if token_ledger else None)
+            )
+            await session.commit()
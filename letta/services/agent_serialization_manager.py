@@ -1,7 +1,7 @@
 import asyncio
 import uuid
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Awaitable, Dict, List, Optional
 
 from letta.constants import MCP_TOOL_TAG_NAME_PREFIX
 from letta.errors import (
@@ -16,6 +16,7 @@ from letta.helpers.tpuf_client import should_use_tpuf
 from letta.log import get_logger
 from letta.schemas.agent import AgentState, CreateAgent
 from letta.schemas.agent_file import (
+    AGENT_FILE_MESSAGE_LIMIT,
     AgentFileSchema,
     AgentSchema,
     BlockSchema,
@@ -35,6 +36,7 @@ from letta.schemas.file import FileMetadata
 from letta.schemas.group import Group, GroupCreate
 from letta.schemas.mcp import MCPServer
 from letta.schemas.message import Message
+from letta.schemas.passage import Passage
 from letta.schemas.source import Source
 from letta.schemas.tool import Tool
 from letta.schemas.user import User
@@ -48,8 +50,10 @@ from letta.services.file_processor.parser.markitdown_parser import MarkitdownFil
 from letta.services.file_processor.parser.mistral_parser import MistralFileParser
 from letta.services.files_agents_manager import FileAgentManager
 from letta.services.group_manager import GroupManager
+from letta.services.helpers.agent_manager_helper import AGENT_LOAD_PROFILES
 from letta.services.mcp_manager import MCPManager
 from letta.services.message_manager import MessageManager
+from letta.services.passage_manager import PassageManager
 from letta.services.source_manager import SourceManager
 from letta.services.tool_manager import ToolManager
 from letta.settings import settings
@@ -80,6 +84,7 @@ class AgentSerializationManager:
         file_manager: FileManager,
         file_agent_manager: FileAgentManager,
         message_manager: MessageManager,
+        passage_manager: Optional[PassageManager] = None,
     ):
         self.agent_manager = agent_manager
         self.tool_manager = tool_manager
@@ -90,6 +95,7 @@ class AgentSerializationManager:
         self.file_manager = file_manager
         self.file_agent_manager = file_agent_manager
         self.message_manager = message_manager
+        self.passage_manager = passage_manager or PassageManager()
         self.file_parser = MistralFileParser() if settings.mistral_api_key else MarkitdownFileParser()
 
         # ID mapping state for export
@@ -167,14 +173,11 @@ class AgentSerializationManager:
         all_source_ids = set()
         all_file_ids = set()
 
+        files_agents_by_agent_id = await self.file_agent_manager.list_files_for_agents(
+            [agent_state.id for agent_state in agent_states], actor
+        )
         for agent_state in agent_states:
-            files_agents = await self.file_agent_manager.list_files_for_agent(
-                agent_id=agent_state.id,
-                actor=actor,
-                is_open_only=False,
-                return_as_blocks=False,
-                per_file_view_window_char_limit=agent_state.per_file_view_window_char_limit,
-            )
+            files_agents = files_agents_by_agent_id[agent_state.id]
             # cache the results for reuse during conversion
             if files_agents_cache is not None:
                 files_agents_cache[agent_state.id] = files_agents
@@ -187,7 +190,9 @@ class AgentSerializationManager:
 
         return sources, files
 
-    async def _convert_agent_state_to_schema(self, agent_state: AgentState, actor: User, files_agents_cache: dict = None) -> AgentSchema:
+    async def _convert_agent_state_to_schema(
+        self, agent_state: AgentState, actor: User, files_agents_cache: dict = None, messages: Optional[List[Message]] = None
+    ) -> AgentSchema:
         """Convert AgentState to AgentSchema with ID remapping"""
 
         agent_file_id = self._map_db_to_file_id(agent_state.id, AgentSchema.__id_prefix__)
@@ -204,7 +209,7 @@ class AgentSerializationManager:
                 per_file_view_window_char_limit=agent_state.per_file_view_window_char_limit,
             )
         agent_schema = await AgentSchema.from_agent_state(
-            agent_state, message_manager=self.message_manager, files_agents=files_agents, actor=actor
+            agent_state, message_manager=self.message_manager, files_agents=files_agents, actor=actor, messages=messages
         )
         agent_schema.id = agent_file_id
 
@@ -269,10 +274,10 @@ class AgentSerializationManager:
         source_schema.id = source_file_id
         return source_schema
 
-    def _convert_file_to_schema(self, file_metadata) -> FileSchema:
+    def _convert_file_to_schema(self, file_metadata, passages: Optional[List[Passage]] = None) -> FileSchema:
         """Convert FileMetadata to FileSchema with ID remapping"""
         file_file_id = self._map_db_to_file_id(file_metadata.id, FileSchema.__id_prefix__, allow_new=False)
-        file_schema = FileSchema.from_file_metadata(file_metadata)
+        file_schema = FileSchema.from_file_metadata(file_metadata, passages=passages)
         file_schema.id = file_file_id
         file_schema.source_id = self._map_db_to_file_id(file_metadata.source_id, SourceSchema.__id_prefix__, allow_new=False)
         return file_schema
@@ -342,12 +347,13 @@ class AgentSerializationManager:
             logger.error(f"Failed to convert group {group.id}: {e}")
             raise
 
-    async def export(self, agent_ids: List[str], actor: User) -> AgentFileSchema:
+    async def export(self, agent_ids: List[str], actor: User, include_file_passages: bool = False) -> AgentFileSchema:
         """
         Export agents and their related entities to AgentFileSchema format.
 
         Args:
             agent_ids: List of agent UUIDs to export
+            include_file_passages: Whether to export the embedded chunks of files, so importing them doesn't embed them again
 
         Returns:
             AgentFileSchema with all related entities
@@ -358,7 +364,9 @@ class AgentSerializationManager:
         try:
             self._reset_state()
 
-            agent_states = await self.agent_manager.get_agents_by_ids_async(agent_ids=agent_ids, actor=actor)
+            agent_states = await self.agent_manager.get_agents_by_ids_async(
+                agent_ids=agent_ids, actor=actor, include_relationships=list(AGENT_LOAD_PROFILES["full_export"].include_relationships)
+            )
 
             # Validate that all requested agents were found
             if len(agent_states) != len(agent_ids):
@@ -375,7 +383,11 @@ class AgentSerializationManager:
 
             group_agent_ids = list(set(group_agent_ids) - set(agent_ids))
             if group_agent_ids:
-                group_agent_states = await self.agent_manager.get_agents_by_ids_async(agent_ids=group_agent_ids, actor=actor)
+                group_agent_states = await self.agent_manager.get_agents_by_ids_async(
+                    agent_ids=group_agent_ids,
+                    actor=actor,
+                    include_relationships=list(AGENT_LOAD_PROFILES["full_export"].include_relationships),
+                )
                 if len(group_agent_states) != len(group_agent_ids):
                     found_ids = {agent.id for agent in group_agent_states}
                     missing_ids = [agent_id for agent_id in group_agent_ids if agent_id not in found_ids]
@@ -400,15 +412,31 @@ class AgentSerializationManager:
             # Extract sources and files from agent states BEFORE conversion (with caching)
             source_set, file_set = await self._extract_unique_sources_and_files_from_agents(agent_states, actor, files_agents_cache)
 
+            # Load the messages of all agents up front, the conversion below maps IDs in order so it stays sequential
+            agent_messages = await self._gather_bounded(
+                [
+                    self.message_manager.list_messages_for_agent_async(agent_id=agent_state.id, actor=actor, limit=AGENT_FILE_MESSAGE_LIMIT)
+                    for agent_state in agent_states
+                ]
+            )
+
             # Convert to schemas with ID remapping (reusing cached file-agent data)
             agent_schemas = [
-                await self._convert_agent_state_to_schema(agent_state, actor=actor, files_agents_cache=files_agents_cache)
-                for agent_state in agent_states
+                await self._convert_agent_state_to_schema(
+                    agent_state, actor=actor, files_agents_cache=files_agents_cache, messages=messages
+                )
+                for agent_state, messages in zip(agent_states, agent_messages)
             ]
             tool_schemas = [self._convert_tool_to_schema(tool) for tool in tool_set]
             block_schemas = [self._convert_block_to_schema(block) for block in block_set]
             source_schemas = [self._convert_source_to_schema(source) for source in source_set]
-            file_schemas = [self._convert_file_to_schema(file_metadata) for file_metadata in file_set]
+            passages_by_file_id = {}
+            if include_file_passages:
+                passages_by_file_id = await self.passage_manager.list_passages_by_file_ids_async([f.id for f in file_set], actor)
+            file_schemas = [
+                self._convert_file_to_schema(file_metadata, passages=passages_by_file_id.get(file_metadata.id))
+                for file_metadata in file_set
+            ]
             mcp_server_schemas = [self._convert_mcp_server_to_schema(mcp_server) for mcp_server in mcp_server_set]
             group_schemas = [self._convert_group_to_schema(group) for group in groups]
 
@@ -572,10 +600,11 @@ class AgentSerializationManager:
                     else:
                         logger.warning(f"Source {source_name} was not created during bulk upsert")
 
-            # 4. Create files (depends on sources)
+            # 4. Create files (depends on sources) - using batch create for efficiency
+            pydantic_files = []
             for file_schema in schema.files:
                 # Convert FileSchema back to FileMetadata
-                file_data = file_schema.model_dump(exclude={"id", "content"})
+                file_data = file_schema.model_dump(exclude={"id", "content", "passages"})
                 # Remap source_id from file ID to database ID
                 file_data["source_id"] = file_to_db_ids[file_schema.source_id]
                 # Set processing status to PARSING since we have parsed content but need to re-embed
@@ -583,14 +612,19 @@ class AgentSerializationManager:
                 file_data["error_message"] = None
                 file_data["total_chunks"] = None
                 file_data["chunks_embedded"] = None
-                file_metadata = FileMetadata(**file_data)
-                created_file = await self.file_manager.create_file(file_metadata, actor, text=file_schema.content)
+                pydantic_files.append(FileMetadata(**file_data))
+
+            created_files = await self.file_manager.create_files_async(pydantic_files, actor, texts=[f.content for f in schema.files])
+            for file_schema, created_file in zip(schema.files, created_files):
                 file_to_db_ids[file_schema.id] = created_file.id
+                # Save the db call of fetching content again
+                created_file.content = file_schema.content
+                file_metadata_cache[created_file.id] = created_file
                 imported_count += 1
 
             # 5. Process files for chunking/embedding (depends on files and sources)
-            # Start background tasks for file processing
-            background_tasks = []
+            # Start a background task for file processing
+            files_to_process = []
             if schema.files and any(f.content for f in schema.files):
                 # Use override embedding config if provided, otherwise use agent's config
                 embedder_config = override_embedding_config if override_embedding_config else schema.agents[0].embedding_config
@@ -609,31 +643,43 @@ class AgentSerializationManager:
                     actor=actor,
                 )
 
+                source_schemas_by_id = {source_schema.id: source_schema for source_schema in schema.sources}
                 for file_schema in schema.files:
                     if file_schema.content:  # Only process files with content
-                        file_db_id = file_to_db_ids[file_schema.id]
+                        file_metadata = file_metadata_cache[file_to_db_ids[file_schema.id]]
                         source_db_id = file_to_db_ids[file_schema.source_id]
 
-                        # Get the created file metadata (with caching)
-                        if file_db_id not in file_metadata_cache:
-                            file_metadata_cache[file_db_id] = await self.file_manager.get_file_by_id(file_db_id, actor)
-                        file_metadata = file_metadata_cache[file_db_id]
-
-                        # Save the db call of fetching content again
-                        file_metadata.content = file_schema.content
-
-                        # Create background task for file processing
-                        # TODO: This can be moved to celery or RQ or something
-                        task = safe_create_task(
-                            self._process_file_async(
-                                file_metadata=file_metadata, source_id=source_db_id, file_processor=file_processor, actor=actor
-                            ),
-                            label=f"process_file_{file_metadata.file_name}",
-                        )
-                        background_tasks.append(task)
-                        logger.info(f"Started background processing for file {file_metadata.file_name} (ID: {file_db_id})")
+                        # Reuse the exported chunks unless they were embedded differently than the import asks for,
+                        # or don't all have the dimension of the source's embedding config
+                        passages = None
+                        source_embedding_config = source_schemas_by_id[file_schema.source_id].embedding_config
+                        if (
+                            file_schema.passages
+                            and not override_embedding_config
+                            and all(p.embedding and len(p.embedding) == source_embedding_config.embedding_dim for p in file_schema.passages)
+                        ):
+                            passages = [
+                                Passage(
+                                    text=passage_schema.text,
+                                    embedding=passage_schema.embedding,
+                                    embedding_config=source_embedding_config,
+                                    organization_id=actor.organization_id,
+                                    source_id=source_db_id,
+                                    file_id=file_metadata.id,
+                                )
+                                for passage_schema in file_schema.passages
+                            ]
+                        files_to_process.append((file_metadata, source_db_id, passages))
+
+                # TODO: This can be moved to celery or RQ or something
+                safe_create_task(
+                    self._process_files_async(files_to_process, file_processor=file_processor, actor=actor),
+                    label="process_imported_files",
+                )
+                logger.info(f"Started background processing for {len(files_to_process)} files")
 
             # 6. Create agents with empty message history
+            agent_creates = []
             for agent_schema in schema.agents:
                 # Override embedding_config if provided
                 if override_embedding_config:
@@ -672,40 +718,23 @@ class AgentSerializationManager:
                 if project_id:
                     agent_data["project_id"] = project_id
 
-                agent_create = CreateAgent(**agent_data)
-                created_agent = await self.agent_manager.create_agent_async(agent_create, actor, _init_with_no_messages=True)
+                agent_creates.append(CreateAgent(**agent_data))
+
+            created_agents = await self._gather_bounded(
+                [self.agent_manager.create_agent_async(agent_create, actor, _init_with_no_messages=True) for agent_create in agent_creates]
+            )
+            for agent_schema, created_agent in zip(schema.agents, created_agents):
                 file_to_db_ids[agent_schema.id] = created_agent.id
                 imported_count += 1
 
             # 7. Create messages and update agent message_ids
-            for agent_schema in schema.agents:
-                agent_db_id = file_to_db_ids[agent_schema.id]
-                message_file_to_db_ids = {}
-
-                # Create messages for this agent
-                messages = []
-                for message_schema in agent_schema.messages:
-                    # Convert MessageSchema back to Message, setting agent_id to new DB ID
-                    message_data = message_schema.model_dump(exclude={"id", "type"})
-                    message_data["agent_id"] = agent_db_id  # Remap agent_id to new database ID
-                    message_obj = Message(**message_data)
-                    messages.append(message_obj)
-                    # Map file ID to the generated database ID immediately
-                    message_file_to_db_ids[message_schema.id] = message_obj.id
-
-                created_messages = await self.message_manager.create_many_messages_async(
-                    pydantic_msgs=messages,
-                    actor=actor,
-                    project_id=created_agent.project_id,
-                    template_id=created_agent.template_id,
-                )
-                imported_count += len(created_messages)
-
-                # Remap in_context_message_ids from file IDs to database IDs
-                in_context_db_ids = [message_file_to_db_ids[message_schema_id] for message_schema_id in agent_schema.in_context_message_ids]
-
-                # Update agent with the correct message_ids
-                await self.agent_manager.update_message_ids_async(agent_id=agent_db_id, message_ids=in_context_db_ids, actor=actor)
+            created_message_counts = await self._gather_bounded(
+                [
+                    self._import_agent_messages_async(agent_schema, created_agent, actor)
+                    for agent_schema, created_agent in zip(schema.agents, created_agents)
+                ]
+            )
+            imported_count += sum(created_message_counts)
 
             # 8. Create file-agent relationships (depends on agents and files)
             for agent_schema in schema.agents:
@@ -756,11 +785,11 @@ class AgentSerializationManager:
                 imported_count += 1
 
             # prepare result message
-            num_background_tasks = len(background_tasks)
-            if num_background_tasks > 0:
+            num_files_to_process = len(files_to_process)
+            if num_files_to_process > 0:
                 message = (
                     f"Import completed successfully. Imported {imported_count} entities. "
-                    f"{num_background_tasks} file(s) are being processed in the background for embeddings."
+                    f"{num_files_to_process} file(s) are being processed in the background for embeddings."
                 )
             else:
                 message = f"Import completed successfully. Imported {imported_count} entities."
@@ -938,6 +967,44 @@ class AgentSerializationManager:
 
         logger.info("Schema validation passed")
 
+    async def _gather_bounded(self, awaitables: List[Awaitable]) -> List[Any]:
+        """Await all of the given awaitables, at most `agent_file_max_concurrency` at a time, returning their results in order"""
+        semaphore = asyncio.Semaphore(settings.agent_file_max_concurrency)
+
+        async def run(awaitable: Awaitable) -> Any:
+            async with semaphore:
+                return await awaitable
+
+        return await asyncio.gather(*[run(awaitable) for awaitable in awaitables])
+
+    async def _import_agent_messages_async(self, agent_schema: AgentSchema, created_agent: AgentState, actor: User) -> int:
+        """Create the messages of an imported agent and point its in-context messages at them, returning how many were created"""
+        message_file_to_db_ids = {}
+
+        messages = []
+        for message_schema in agent_schema.messages:
+            # Convert MessageSchema back to Message, setting agent_id to new DB ID
+            message_data = message_schema.model_dump(exclude={"id", "type"})
+            message_data["agent_id"] = created_agent.id  # Remap agent_id to new database ID
+            message_obj = Message(**message_data)
+            messages.append(message_obj)
+            # Map file ID to the generated database ID immediately
+            message_file_to_db_ids[message_schema.id] = message_obj.id
+
+        created_messages = await self.message_manager.create_many_messages_async(
+            pydantic_msgs=messages,
+            actor=actor,
+            project_id=created_agent.project_id,
+            template_id=created_agent.template_id,
+        )
+
+        # Remap in_context_message_ids from file IDs to database IDs
+        in_context_db_ids = [message_file_to_db_ids[message_schema_id] for message_schema_id in agent_schema.in_context_message_ids]
+
+        # Update agent with the correct message_ids
+        await self.agent_manager.update_message_ids_async(agent_id=created_agent.id, message_ids=in_context_db_ids, actor=actor)
+        return len(created_messages)
+
     def _filter_dict_for_model(self, data: dict, model_cls):
         """Filter a dictionary to only include keys that are in the model fields"""
         try:
@@ -946,7 +1013,27 @@ class AgentSerializationManager:
             allowed = model_cls.__fields__.keys()  # Pydantic v1
         return {k: v for k, v in data.items() if k in allowed}
 
-    async def _process_file_async(self, file_metadata: FileMetadata, source_id: str, file_processor: FileProcessor, actor: User):
+    async def _process_files_async(
+        self, files: List[tuple[FileMetadata, str, Optional[List[Passage]]]], file_processor: FileProcessor, actor: User
+    ):
+        """Process imported files in the background, `agent_file_max_concurrency` at a time"""
+        await self._gather_bounded(
+            [
+                self._process_file_async(
+                    file_metadata=file_metadata, source_id=source_id, file_processor=file_processor, actor=actor, passages=passages
+                )
+                for file_metadata, source_id, passages in files
+            ]
+        )
+
+    async def _process_file_async(
+        self,
+        file_metadata: FileMetadata,
+        source_id: str,
+        file_processor: FileProcessor,
+        actor: User,
+        passages: Optional[List[Passage]] = None,
+    ):
         """
         Process a file asynchronously in the background.
 
@@ -958,6 +1045,7 @@ class AgentSerializationManager:
             source_id: The database ID of the source
             file_processor: The file processor instance to use
             actor: The user performing the action
+            passages: Chunks exported with the file, inserted instead of embedding the file again
         """
         file_id = file_metadata.id
         file_name = file_metadata.file_name
@@ -966,7 +1054,7 @@ class AgentSerializationManager:
             logger.info(f"Starting background processing for file {file_name} (ID: {file_id})")
 
             # process the file for chunking/embedding
-            passages = await file_processor.process_imported_file(file_metadata=file_metadata, source_id=source_id)
+            passages = await file_processor.process_imported_file(file_metadata=file_metadata, source_id=source_id, passages=passages)
 
             logger.info(f"Successfully processed file {file_name} with {len(passages)} passages")
 
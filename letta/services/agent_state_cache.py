@@ -0,0 +1,285 @@
+import asyncio
+import math
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple, Union
+
+from letta.data_sources.redis_client import AsyncRedisClient, NoopAsyncRedisClient, get_redis_client
+from letta.helpers.decorators import invalidate_single_flight, invalidate_single_flight_nowait
+from letta.log import get_logger
+from letta.schemas.agent import AgentState
+from letta.settings import settings
+from letta.utils import safe_create_task
+
+logger = get_logger(__name__)
+
+AGENT_STATE_VERSION_PREFIX = "letta:agent_state_version:"
+
+# The agent row itself, every cached state depends on it
+AGENT_ROW = "agent"
+# Relationships AgentModel.to_pydantic_async can load
+AGENT_STATE_RELATIONSHIPS = (
+    "tags",
+    "tools",
+    "sources",
+    "memory",
+    "identity_ids",
+    "multi_agent_group",
+    "tool_exec_environment_variables",
+)
+# secrets are read from the same rows as tool_exec_environment_variables
+_RELATIONSHIP_ALIASES = {"secrets": "tool_exec_environment_variables"}
+
+# Past this many tracked versions the cache is flushed rather than growing without bound
+MAX_TRACKED_VERSIONS = 100_000
+
+# version key -> (version in this process, version token shared through Redis)
+Versions = Dict[str, Tuple[int, Optional[str]]]
+CacheKey = Tuple[str, str, Optional[FrozenSet[str]]]
+
+
+@dataclass
+class _CacheEntry:
+    state: AgentState
+    versions: Versions
+    expires_at: float
+
+
+def _canonical_relationships(relationships: Optional[Iterable[str]]) -> List[str]:
+    if relationships is None:
+        return list(AGENT_STATE_RELATIONSHIPS)
+    canonical = {_RELATIONSHIP_ALIASES.get(rel, rel) for rel in relationships}
+    return [rel for rel in AGENT_STATE_RELATIONSHIPS if rel in canonical]
+
+
+def _agent_key(agent_id: str, relationship: str) -> str:
+    return f"agent:{agent_id}:{relationship}"
+
+
+def _relationship_key(relationship: str) -> str:
+    return f"relationship:{relationship}"
+
+
+def _dependency_keys(agent_id: str, include_relationships: Optional[Iterable[str]]) -> List[str]:
+    """Version keys a state loaded with `include_relationships` has to be checked against."""
+    keys = [_agent_key(agent_id, AGENT_ROW)]
+    for rel in _canonical_relationships(include_relationships):
+        keys.append(_agent_key(agent_id, rel))
+        keys.append(_relationship_key(rel))
+    return keys
+
+
+def _invalidation_keys(agent_ids: Union[str, Iterable[str]], relationships: Optional[Iterable[str]]) -> List[str]:
+    if isinstance(agent_ids, str):
+        agent_ids = [agent_ids]
+    if relationships is None:
+        # the agent row key is part of every cached state, bumping it drops all of them
+        return [_agent_key(agent_id, AGENT_ROW) for agent_id in agent_ids]
+    rels = _canonical_relationships(relationships)
+    return [_agent_key(agent_id, rel) for agent_id in agent_ids for rel in rels]
+
+
+class AgentStateCache:
+    """Versioned cache of the AgentStates built by `AgentManager.get_agent_by_id_async`.
+
+    States are cached per agent, organization and set of loaded relationships. Each cached state records the versions
+    of the agent row, of each relationship it loaded for that agent, and of each of those relationships across all
+    agents. Manager methods bump the versions they change after committing, so a state is served only while nothing
+    it was built from has changed, and at most for `agent_state_cache_ttl_seconds`.
+
+    Versions live in this process and, when Redis is configured, as tokens in Redis so writes made by other processes
+    invalidate this one's copies too. The states themselves stay in process: they carry agent secrets and can be
+    large. Without Redis, the cache is only used when the server runs a single worker.
+
+    Invalidating an agent here also invalidates the `single_flight` reads scoped to it.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[CacheKey, _CacheEntry]" = OrderedDict()
+        self._local_versions: Dict[str, int] = {}
+        self._clock = 0
+
+    @property
+    def max_entries(self) -> int:
+        return self._max_entries if self._max_entries is not None else settings.agent_state_cache_size
+
+    @property
+    def ttl_seconds(self) -> float:
+        return self._ttl_seconds if self._ttl_seconds is not None else settings.agent_state_cache_ttl_seconds
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get_or_load(
+        self,
+        agent_id: str,
+        organization_id: str,
+        include_relationships: Optional[Iterable[str]],
+        load: Callable[[], Awaitable[AgentState]],
+    ) -> AgentState:
+        """Return a copy of the cached state if it is still current, otherwise `load` it and cache the result."""
+        if not settings.agent_state_cache_enabled:
+            return await load()
+
+        cache_key = (agent_id, organization_id, None if include_relationships is None else frozenset(include_relationships))
+        # read before loading, so a write that lands while loading leaves the new entry stale rather than wrong
+        versions = await self._read_versions(_dependency_keys(agent_id, include_relationships))
+        if versions is None:
+            return await load()
+
+        entry = self._entries.get(cache_key)
+        if entry is not None:
+            if entry.versions == versions and entry.expires_at > time.monotonic():
+                self._entries.move_to_end(cache_key)
+                return entry.state.model_copy(deep=True)
+            del self._entries[cache_key]
+
+        state = await load()
+        self._store(cache_key, state.model_copy(deep=True), versions)
+        return state
+
+    async def snapshot(self, agent_id: str) -> Optional[Versions]:
+        """Versions of everything an agent's states depend on. Take it before a write to pass to `write_through`."""
+        if not settings.agent_state_cache_enabled:
+            return None
+        return await self._read_versions(_dependency_keys(agent_id, None))
+
+    async def invalidate(self, agent_ids: Union[str, Iterable[str]], relationships: Optional[Iterable[str]] = None) -> None:
+        """Drop the cached states of `agent_ids` that loaded any of `relationships`, or all of them if None."""
+        await self._bump(_invalidation_keys(agent_ids, relationships))
+        await invalidate_single_flight(agent_ids)
+
+    async def invalidate_relationship(self, relationship: str) -> None:
+        """Drop every cached state that loaded `relationship`, for changes that can't be traced to particular agents."""
+        await self._bump([_relationship_key(rel) for rel in _canonical_relationships([relationship])])
+        await invalidate_single_flight()
+
+    def invalidate_nowait(self, agent_ids: Union[str, Iterable[str]], relationships: Optional[Iterable[str]] = None) -> None:
+        """`invalidate` for synchronous callers. Other processes are only told if an event loop is running."""
+        self._bump_nowait(_invalidation_keys(agent_ids, relationships))
+        invalidate_single_flight_nowait(agent_ids)
+
+    def invalidate_relationship_nowait(self, relationship: str) -> None:
+        """`invalidate_relationship` for synchronous callers. Other processes are only told if an event loop is running."""
+        self._bump_nowait([_relationship_key(rel) for rel in _canonical_relationships([relationship])])
+        invalidate_single_flight_nowait()
+
+    async def write_through(
+        self,
+        state: AgentState,
+        organization_id: str,
+        before: Optional[Versions],
+        relationships: Optional[Iterable[str]] = None,
+    ) -> None:
+        """Invalidate what a committed update changed and cache the full state it produced.
+
+        `before` is the `snapshot` taken before the update started. The state is only cached if nothing besides this
+        update has changed the agent since then.
+        """
+        bumped = await self._bump(_invalidation_keys(state.id, relationships))
+        await invalidate_single_flight(state.id)
+        if before is None or not settings.agent_state_cache_enabled:
+            return
+        current = await self._read_versions(_dependency_keys(state.id, None))
+        if current is None or current != {**before, **bumped}:
+            return
+        self._store((state.id, organization_id, None), state.model_copy(deep=True), current)
+
+    async def update_fields(self, agent_id: str, before: Optional[Versions], **fields) -> None:
+        """Apply a committed update of agent row columns to the cached states instead of dropping them.
+
+        `before` is the `snapshot` taken before the update started. States that were already stale, or any state if
+        something else changed the agent since `before`, are dropped as usual.
+        """
+        bumped = await self._bump(_invalidation_keys(agent_id, None))
+        await invalidate_single_flight(agent_id)
+        if before is None or not settings.agent_state_cache_enabled:
+            return
+        current = await self._read_versions(_dependency_keys(agent_id, None))
+        if current is None or current != {**before, **bumped}:
+            return
+        for cache_key, entry in list(self._entries.items()):
+            if cache_key[0] != agent_id or any(before.get(key) != version for key, version in entry.versions.items()):
+                continue
+            entry.state = entry.state.model_copy(update=fields)
+            entry.versions = {key: current[key] for key in entry.versions}
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._local_versions.clear()
+
+    async def _get_shared_client(self) -> Optional[AsyncRedisClient]:
+        redis_client = await get_redis_client()
+        if isinstance(redis_client, NoopAsyncRedisClient):
+            return None
+        return redis_client
+
+    async def _read_versions(self, keys: List[str]) -> Optional[Versions]:
+        """Current versions of `keys`, or None if cached states can't be trusted right now."""
+        redis_client = await self._get_shared_client()
+        if redis_client is None:
+            if settings.uvicorn_workers > 1:
+                # other workers' writes would go unseen
+                return None
+            tokens = [None] * len(keys)
+        else:
+            try:
+                tokens = await redis_client.mget(*[AGENT_STATE_VERSION_PREFIX + key for key in keys])
+            except Exception as e:
+                logger.warning(f"Failed to read agent state versions, bypassing the agent state cache: {e}")
+                return None
+        return {key: (self._local_versions.get(key, 0), token) for key, token in zip(keys, tokens)}
+
+    async def _bump(self, keys: List[str]) -> Versions:
+        self._bump_local(keys)
+        tokens = await self._bump_shared(keys)
+        return {key: (self._local_versions.get(key, 0), tokens.get(key)) for key in keys}
+
+    def _bump_nowait(self, keys: List[str]) -> None:
+        self._bump_local(keys)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        safe_create_task(self._bump_shared(keys), label="invalidate cached agent states")
+
+    def _bump_local(self, keys: List[str]) -> None:
+        if len(self._local_versions) + len(keys) > MAX_TRACKED_VERSIONS:
+            self.clear()
+        self._clock += 1
+        for key in keys:
+            self._local_versions[key] = self._clock
+
+    async def _bump_shared(self, keys: List[str]) -> Dict[str, str]:
+        redis_client = await self._get_shared_client()
+        if redis_client is None:
+            return {}
+        tokens = {key: uuid.uuid4().hex for key in keys}
+        # a token has to outlive the cached states that may have read the one before it
+        expiry = math.ceil(self.ttl_seconds) + 1
+        try:
+            await asyncio.gather(*[redis_client.set(AGENT_STATE_VERSION_PREFIX + key, token, ex=expiry) for key, token in tokens.items()])
+        except Exception as e:
+            # states cached by other processes are still bounded by the ttl
+            logger.warning(f"Failed to publish agent state versions for {keys}: {e}")
+        return tokens
+
+    def _store(self, cache_key: CacheKey, state: AgentState, versions: Versions) -> None:
+        if any(self._local_versions.get(key, 0) != version for key, (version, _) in versions.items()):
+            # changed in this process since `versions` were read
+            return
+        self._entries[cache_key] = _CacheEntry(state=state, versions=versions, expires_at=time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(cache_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+_agent_state_cache = AgentStateCache()
+
+
+def get_agent_state_cache() -> AgentStateCache:
+    return _agent_state_cache
@@ -3,6 +3,7 @@ from datetime import datetime
 from typing import Dict, List, Optional
 
 from sqlalchemy import and_, delete, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from letta.log import get_logger
@@ -17,6 +18,7 @@ from letta.schemas.block import Block as PydanticBlock, BlockUpdate
 from letta.schemas.enums import ActorType
 from letta.schemas.user import User as PydanticUser
 from letta.server.db import db_registry
+from letta.services.agent_state_cache import get_agent_state_cache
 from letta.settings import DatabaseChoice, settings
 from letta.utils import enforce_types
 
@@ -121,6 +123,7 @@ class BlockManager:
                 setattr(block, key, value)
 
             block.update(db_session=session, actor=actor)
+            get_agent_state_cache().invalidate_nowait(self.get_agent_ids_for_blocks(session, [block_id]), ["memory"])
             return block.to_pydantic()
 
     @enforce_types
@@ -139,6 +142,7 @@ class BlockManager:
             await block.update_async(db_session=session, actor=actor, no_commit=True, no_refresh=True)
             pydantic_block = block.to_pydantic()
             await session.commit()
+            await get_agent_state_cache().invalidate(await self.get_agent_ids_for_blocks_async(session, [block_id]), ["memory"])
             return pydantic_block
 
     @enforce_types
@@ -146,6 +150,8 @@ class BlockManager:
     def delete_block(self, block_id: str, actor: PydanticUser) -> None:
         """Delete a block by its ID."""
         with db_registry.session() as session:
+            agent_ids = self.get_agent_ids_for_blocks(session, [block_id])
+
             # First, delete all references in blocks_agents table
             session.execute(delete(BlocksAgents).where(BlocksAgents.block_id == block_id))
             session.flush()
@@ -153,12 +159,15 @@ class BlockManager:
             # Then delete the block itself
             block = BlockModel.read(db_session=session, identifier=block_id)
             block.hard_delete(db_session=session, actor=actor)
+            get_agent_state_cache().invalidate_nowait(agent_ids, ["memory"])
 
     @enforce_types
     @trace_method
     async def delete_block_async(self, block_id: str, actor: PydanticUser) -> None:
         """Delete a block by its ID."""
         async with db_registry.async_session() as session:
+            agent_ids = await self.get_agent_ids_for_blocks_async(session, [block_id])
+
             # First, delete all references in blocks_agents table
             await session.execute(delete(BlocksAgents).where(BlocksAgents.block_id == block_id))
             await session.flush()
@@ -166,6 +175,18 @@ class BlockManager:
             # Then delete the block itself
             block = await BlockModel.read_async(db_session=session, identifier=block_id, actor=actor)
             await block.hard_delete_async(db_session=session, actor=actor)
+            await get_agent_state_cache().invalidate(agent_ids, ["memory"])
+
+    @staticmethod
+    def get_agent_ids_for_blocks(session: Session, block_ids: List[str]) -> List[str]:
+        """IDs of the agents the given blocks are attached to."""
+        return list(session.execute(select(BlocksAgents.agent_id).where(BlocksAgents.block_id.in_(block_ids)).distinct()).scalars())
+
+    @staticmethod
+    async def get_agent_ids_for_blocks_async(session: AsyncSession, block_ids: List[str]) -> List[str]:
+        """IDs of the agents the given blocks are attached to."""
+        result = await session.execute(select(BlocksAgents.agent_id).where(BlocksAgents.block_id.in_(block_ids)).distinct())
+        return list(result.scalars())
 
     @enforce_types
     @trace_method
@@ -669,6 +690,7 @@ class BlockManager:
 
             # 4) Commit
             session.commit()
+            get_agent_state_cache().invalidate_nowait(self.get_agent_ids_for_blocks(session, [block.id]), ["memory"])
             return block.to_pydantic()
 
     @enforce_types
@@ -708,6 +730,7 @@ class BlockManager:
             block = self._move_block_to_sequence(session, block, next_entry.sequence_number, actor)
 
             session.commit()
+            get_agent_state_cache().invalidate_nowait(self.get_agent_ids_for_blocks(session, [block.id]), ["memory"])
             return block.to_pydantic()
 
     @enforce_types
@@ -748,6 +771,7 @@ class BlockManager:
                 block.value = new_val
 
             await session.commit()
+            await get_agent_state_cache().invalidate(await self.get_agent_ids_for_blocks_async(session, list(found_ids)), ["memory"])
 
             if return_hydrated:
                 # TODO: implement for async
@@ -1,5 +1,7 @@
 import asyncio
-from typing import Any, List, Optional, Tuple
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
 
 from openai.types.beta.function_tool import FunctionTool as OpenAITool
 
@@ -7,7 +9,7 @@ from letta.log import get_logger
 from letta.schemas.agent import AgentState
 from letta.schemas.enums import MessageRole
 from letta.schemas.letta_message_content import TextContent
-from letta.schemas.memory import ContextWindowOverview
+from letta.schemas.memory import ContextTokenLedger, ContextTokenLedgerEntry, ContextWindowOverview
 from letta.schemas.message import Message
 from letta.schemas.user import User as PydanticUser
 from letta.services.context_window_calculator.token_counter import TokenCounter
@@ -105,14 +107,16 @@ class ContextWindowCalculator:
         system_message_compiled: Message,
         num_archival_memories: int,
         num_messages: int,
-    ) -> ContextWindowOverview:
-        """Calculate context window information using the provided token counter"""
+        token_ledger: Optional[ContextTokenLedger] = None,
+    ) -> Tuple[ContextWindowOverview, ContextTokenLedger]:
+        """Calculate context window information using the provided token counter
+
+        If a token ledger from a previous calculation is passed in, only components whose content changed and
+        messages that have not been counted before are tokenized. Returns the overview and the updated ledger.
+        """
         messages = await message_manager.get_messages_by_ids_async(message_ids=agent_state.message_ids[1:], actor=actor)
         in_context_messages = [system_message_compiled] + messages
 
-        # Convert messages to appropriate format
-        converted_messages = token_counter.convert_messages(in_context_messages)
-
         # Extract system components
         system_prompt = ""
         core_memory = ""
@@ -139,21 +143,31 @@ class ContextWindowCalculator:
         if agent_state.tools:
             available_functions_definitions = [OpenAITool(type="function", function=f.json_schema) for f in agent_state.tools]
 
-        # Count tokens concurrently
+        # Counts from a different counter (e.g. the agent switched models) cannot be reused
+        if token_ledger is None or token_ledger.token_counter != token_counter.counter_id:
+            token_ledger = ContextTokenLedger(token_counter=token_counter.counter_id)
+        else:
+            token_ledger = token_ledger.model_copy(deep=True)
+
+        functions_definitions_hash = (
+            _hash_text(json.dumps([t.model_dump() for t in available_functions_definitions], sort_keys=True))
+            if available_functions_definitions
+            else None
+        )
+
+        # Count tokens concurrently, reusing ledger entries for unchanged components
         token_counts = await asyncio.gather(
-            token_counter.count_text_tokens(system_prompt),
-            token_counter.count_text_tokens(core_memory),
-            token_counter.count_text_tokens(external_memory_summary),
-            token_counter.count_text_tokens(summary_memory) if summary_memory else asyncio.sleep(0, result=0),
-            (
-                token_counter.count_message_tokens(converted_messages[message_start_index:])
-                if len(converted_messages) > message_start_index
-                else asyncio.sleep(0, result=0)
-            ),
-            (
-                token_counter.count_tool_tokens(available_functions_definitions)
-                if available_functions_definitions
-                else asyncio.sleep(0, result=0)
+            self._count_component(token_ledger, "system", system_prompt, token_counter.count_text_tokens),
+            self._count_component(token_ledger, "core_memory", core_memory, token_counter.count_text_tokens),
+            self._count_component(token_ledger, "external_memory_summary", external_memory_summary, token_counter.count_text_tokens),
+            self._count_component(token_ledger, "summary_memory", summary_memory, token_counter.count_text_tokens),
+            self._count_messages(token_ledger, in_context_messages[message_start_index:], token_counter),
+            self._count_component(
+                token_ledger,
+                "functions_definitions",
+                available_functions_definitions,
+                token_counter.count_tool_tokens,
+                content_hash=functions_definitions_hash,
             ),
         )
 
@@ -168,7 +182,7 @@ class ContextWindowCalculator:
 
         num_tokens_used_total = sum(token_counts)
 
-        return ContextWindowOverview(
+        overview = ContextWindowOverview(
             # context window breakdown (in messages)
             num_messages=len(in_context_messages),
             num_archival_memory=num_archival_memories,
@@ -191,3 +205,57 @@ class ContextWindowCalculator:
             num_tokens_functions_definitions=num_tokens_available_functions_definitions,
             functions_definitions=available_functions_definitions,
         )
+        return overview, token_ledger
+
+    @staticmethod
+    async def _count_component(
+        token_ledger: ContextTokenLedger,
+        component: str,
+        content: Any,
+        count_fn: Callable[[Any], Awaitable[int]],
+        content_hash: Optional[str] = None,
+    ) -> int:
+        """Count tokens for a context component, skipping the count if the ledger already has it for the same content."""
+        if not content:
+            setattr(token_ledger, f"{component}_hash", None)
+            setattr(token_ledger, f"num_tokens_{component}", 0)
+            return 0
+
+        content_hash = content_hash or _hash_text(content)
+        if getattr(token_ledger, f"{component}_hash") == content_hash:
+            return getattr(token_ledger, f"num_tokens_{component}")
+
+        num_tokens = await count_fn(content)
+        setattr(token_ledger, f"{component}_hash", content_hash)
+        setattr(token_ledger, f"num_tokens_{component}", num_tokens)
+        return num_tokens
+
+    @staticmethod
+    async def _count_messages(token_ledger: ContextTokenLedger, messages: List[Message], token_counter: TokenCounter) -> int:
+        """Count tokens for the in-context messages, only tokenizing messages missing from (or stale in) the ledger.
+
+        Entries for messages that are no longer in context (e.g. trimmed by summarization) are dropped.
+        """
+        if not token_counter.additive_message_counts:
+            # Per-message counts can't be summed for this counter, but it still memoizes the list in-process
+            token_ledger.messages = {}
+            return await token_counter.count_in_context_message_tokens(messages)
+
+        ledger_entries = {}
+        message_token_counts = []
+        for message in messages:
+            entry = token_ledger.messages.get(message.id)
+            if entry is None or message.updated_at is None or entry.updated_at != message.updated_at:
+                entry = ContextTokenLedgerEntry(
+                    updated_at=message.updated_at,
+                    num_tokens=await token_counter.count_single_message_tokens(message),
+                )
+            ledger_entries[message.id] = entry
+            message_token_counts.append(entry.num_tokens)
+
+        token_ledger.messages = ledger_entries
+        return token_counter.sum_message_tokens(message_token_counts)
+
+
+def _hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
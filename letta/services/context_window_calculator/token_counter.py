@@ -1,7 +1,10 @@
 import hashlib
 import json
+import threading
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, List, Optional
 
 from letta.helpers.decorators import async_redis_cache
 from letta.llm_api.anthropic_client import AnthropicClient
@@ -10,10 +13,95 @@ from letta.schemas.message import Message
 from letta.schemas.openai.chat_completion_request import Tool as OpenAITool
 from letta.utils import count_tokens
 
+# Upper bound on the number of entries kept by the in-process token count caches
+TOKEN_COUNT_CACHE_SIZE = 50_000
+# Every reply is primed with <|start|>assistant<|message|> (see num_tokens_from_messages)
+TIKTOKEN_REPLY_PRIMING_TOKENS = 3
+
+
+class TokenCountCache:
+    """Size-bounded, per-process LRU cache for token counts.
+
+    Sits in front of the Redis-backed caches so repeated counts of unchanged content
+    do not pay for hashing the full payload or a Redis round trip.
+    """
+
+    def __init__(self, maxsize: int = TOKEN_COUNT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[int]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: int) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# Shared across all counter instances, since counters are constructed per request
+token_count_cache = TokenCountCache()
+
+
+def token_count_lru_cache(key_func: Callable):
+    """Decorator that memoizes an async token count in the shared in-process LRU cache.
+
+    Stack it above async_redis_cache so that hits never reach Redis.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            cache_key = key_func(*args, **kwargs)
+            num_tokens = token_count_cache.get(cache_key)
+            if num_tokens is None:
+                num_tokens = await func(*args, **kwargs)
+                token_count_cache.set(cache_key, num_tokens)
+            return num_tokens
+
+        return async_wrapper
+
+    return decorator
+
+
+def _message_cache_key(message: Message) -> Optional[tuple]:
+    """Cache key for a persisted message; unsaved messages (no updated_at) are never cached."""
+    if message.id is None or message.updated_at is None:
+        return None
+    return (message.id, message.updated_at)
+
 
 class TokenCounter(ABC):
     """Abstract base class for token counting strategies"""
 
+    # Whether the count for a message list equals the sum of per-message counts (plus a constant),
+    # which allows per-message counts to be persisted and reused across calls
+    additive_message_counts: bool = False
+
+    @property
+    @abstractmethod
+    def counter_id(self) -> str:
+        """Identifier of the counting strategy and model, counts from different counters are not comparable"""
+
     @abstractmethod
     async def count_text_tokens(self, text: str) -> int:
         """Count tokens in a text string"""
@@ -30,6 +118,30 @@ class TokenCounter(ABC):
     def convert_messages(self, messages: List[Any]) -> List[Dict[str, Any]]:
         """Convert messages to the appropriate format for this counter"""
 
+    async def count_in_context_message_tokens(self, messages: List[Message]) -> int:
+        """Count tokens in a list of Message objects.
+
+        Subclasses may override this to memoize counts per message (keyed by message id and updated_at),
+        so only messages that have not been seen before are tokenized.
+        """
+        if not messages:
+            return 0
+        return await self.count_message_tokens(self.convert_messages(messages))
+
+    async def count_single_message_tokens(self, message: Message) -> int:
+        """Count tokens contributed by a single message.
+
+        Counting each message on its own is only exact when additive_message_counts is set, callers should check it first.
+        """
+        converted = self.convert_messages([message])
+        if not converted:
+            return 0
+        return await self.count_message_tokens(converted)
+
+    def sum_message_tokens(self, message_token_counts: List[int]) -> int:
+        """Combine per-message counts into the count for the whole list. Exact only when additive_message_counts is set."""
+        return sum(message_token_counts)
+
 
 class AnthropicTokenCounter(TokenCounter):
     """Token counter using Anthropic's API"""
@@ -39,6 +151,7 @@ class AnthropicTokenCounter(TokenCounter):
         self.model = model
 
     @trace_method
+    @token_count_lru_cache(key_func=lambda self, text: ("anthropic_text_tokens", self.model, hashlib.sha256(text.encode()).hexdigest()))
     @async_redis_cache(
         key_func=lambda self, text: f"anthropic_text_tokens:{self.model}:{hashlib.sha256(text.encode()).hexdigest()[:16]}",
         prefix="token_counter",
@@ -76,23 +189,42 @@ class AnthropicTokenCounter(TokenCounter):
     def convert_messages(self, messages: List[Any]) -> List[Dict[str, Any]]:
         return Message.to_anthropic_dicts_from_list(messages)
 
+    @property
+    def counter_id(self) -> str:
+        return f"anthropic:{self.model}"
+
+    async def count_in_context_message_tokens(self, messages: List[Message]) -> int:
+        # Anthropic counts are not additive across messages (the API adds per-request overhead),
+        # so memoize the whole list keyed by the (id, updated_at) of each message instead of its JSON.
+        if not messages:
+            return 0
+        message_keys = [_message_cache_key(m) for m in messages]
+        if any(k is None for k in message_keys):
+            return await self.count_message_tokens(self.convert_messages(messages))
+
+        cache_key = ("anthropic_message_tokens", self.model, tuple(message_keys))
+        num_tokens = token_count_cache.get(cache_key)
+        if num_tokens is None:
+            num_tokens = await self.count_message_tokens(self.convert_messages(messages))
+            token_count_cache.set(cache_key, num_tokens)
+        return num_tokens
+
 
 class TiktokenCounter(TokenCounter):
     """Token counter using tiktoken"""
 
+    additive_message_counts = True
+
     def __init__(self, model: str):
         self.model = model
 
+    # tiktoken runs locally, so a Redis round trip costs more than it saves; only use the in-process cache
     @trace_method
-    @async_redis_cache(
-        key_func=lambda self, text: f"tiktoken_text_tokens:{self.model}:{hashlib.sha256(text.encode()).hexdigest()[:16]}",
-        prefix="token_counter",
-        ttl_s=3600,  # cache for 1 hour
-    )
+    @token_count_lru_cache(key_func=lambda self, text: ("tiktoken_text_tokens", self.model, hashlib.sha256(text.encode()).hexdigest()))
     async def count_text_tokens(self, text: str) -> int:
         if not text:
             return 0
-        return count_tokens(text)
+        return count_tokens(text, self.model)
 
     @trace_method
     @async_redis_cache(
@@ -126,3 +258,36 @@ class TiktokenCounter(TokenCounter):
 
     def convert_messages(self, messages: List[Any]) -> List[Dict[str, Any]]:
         return Message.to_openai_dicts_from_list(messages)
+
+    @property
+    def counter_id(self) -> str:
+        return f"tiktoken:{self.model}"
+
+    async def count_single_message_tokens(self, message: Message) -> int:
+        cache_key = _message_cache_key(message)
+        if cache_key is not None:
+            cache_key = ("tiktoken_message_tokens", self.model, cache_key)
+            num_tokens = token_count_cache.get(cache_key)
+            if num_tokens is not None:
+                return num_tokens
+
+        from letta.local_llm.utils import num_tokens_from_messages
+
+        # Messages that convert to nothing (e.g. approvals without tool calls) count as zero
+        converted = self.convert_messages([message])
+        num_tokens = num_tokens_from_messages(messages=converted, model=self.model) - TIKTOKEN_REPLY_PRIMING_TOKENS if converted else 0
+        if cache_key is not None:
+            token_count_cache.set(cache_key, num_tokens)
+        return num_tokens
+
+    def sum_message_tokens(self, message_token_counts: List[int]) -> int:
+        if not any(message_token_counts):
+            return 0
+        return sum(message_token_counts) + TIKTOKEN_REPLY_PRIMING_TOKENS
+
+    async def count_in_context_message_tokens(self, messages: List[Message]) -> int:
+        # tiktoken counts are additive per message (plus a constant reply priming), so each message
+        # is tokenized once and its count is memoized by (id, updated_at).
+        if not messages:
+            return 0
+        return self.sum_message_tokens([await self.count_single_message_tokens(m) for m in messages])
@@ -1,7 +1,7 @@
 import asyncio
 import os
 from datetime import datetime, timedelta, timezone
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from sqlalchemy import func, select, update
 from sqlalchemy.dialects.postgresql import insert as pg_insert
@@ -13,6 +13,7 @@ from letta.helpers.pinecone_utils import list_pinecone_index_for_files, should_u
 from letta.log import get_logger
 from letta.orm.errors import NoResultFound
 from letta.orm.file import FileContent as FileContentModel, FileMetadata as FileMetadataModel
+from letta.orm.files_agents import FileAgent as FileAgentModel
 from letta.orm.sqlalchemy_base import AccessType
 from letta.otel.tracing import trace_method
 from letta.schemas.enums import FileProcessingStatus
@@ -21,6 +22,8 @@ from letta.schemas.source import Source as PydanticSource
 from letta.schemas.source_metadata import FileStats, OrganizationSourcesStats, SourceStats
 from letta.schemas.user import User as PydanticUser
 from letta.server.db import db_registry
+from letta.services.agent_state_cache import get_agent_state_cache
+from letta.services.file_processor.line_index import FileLineIndex, file_line_index_cache
 from letta.settings import settings
 from letta.utils import enforce_types
 
@@ -41,6 +44,8 @@ class FileManager:
 
     async def _invalidate_file_caches(self, file_id: str, actor: PydanticUser, original_filename: str = None, source_id: str = None):
         """Invalidate all caches related to a file."""
+        file_line_index_cache.invalidate(file_id)
+
         # TEMPORARILY DISABLED - caching is disabled
         # # invalidate file content cache (all variants)
         # await self.get_file_by_id.cache_invalidate(self, file_id, actor, include_content=True)
@@ -86,6 +91,49 @@ class FileManager:
                 await session.rollback()
                 return await self.get_file_by_id(file_metadata.id, actor=actor)
 
+    @enforce_types
+    @trace_method
+    async def create_files_async(
+        self,
+        files_metadata: List[PydanticFileMetadata],
+        actor: PydanticUser,
+        *,
+        texts: Optional[List[Optional[str]]] = None,
+    ) -> List[PydanticFileMetadata]:
+        """
+        Create multiple new files, and the content of those that have text, in a single transaction.
+
+        Args:
+            files_metadata: Files to create, with their IDs already set
+            actor: User performing the action
+            texts: Content of each file, in the same order as `files_metadata` (None for files without content)
+
+        Returns:
+            List[PydanticFileMetadata]: The created files, in the order they were given
+        """
+        if not files_metadata:
+            return []
+        texts = texts or [None] * len(files_metadata)
+
+        async with db_registry.async_session() as session:
+            file_orms, content_orms = [], []
+            for file_metadata, text in zip(files_metadata, texts):
+                file_metadata.organization_id = actor.organization_id
+                file_orm = FileMetadataModel(**file_metadata.model_dump(to_orm=True, exclude_none=True))
+                file_orms.append(file_orm)
+                if text is not None:
+                    content_orms.append(FileContentModel(file_id=file_orm.id, text=text))
+
+            await FileMetadataModel.batch_create_async(file_orms, session, actor=actor, no_commit=True, no_refresh=True)
+            await FileContentModel.batch_create_async(content_orms, session, actor=actor, no_commit=True, no_refresh=True)
+            await session.commit()
+
+        for file_orm in file_orms:
+            await self._invalidate_file_caches(file_orm.id, actor, file_orm.original_file_name, file_orm.source_id)
+
+        created_files = {file.id: file for file in await self.get_files_by_ids_async([f.id for f in files_metadata], actor)}
+        return [created_files[file_metadata.id] for file_metadata in files_metadata]
+
     # TODO: We make actor optional for now, but should most likely be enforced due to security reasons
     @enforce_types
     @trace_method
@@ -373,7 +421,7 @@ class FileManager:
                     .values(file_id=file_id, text=text)
                     .on_conflict_do_update(
                         index_elements=[FileContentModel.file_id],
-                        set_={"text": text},
+                        set_={"text": text, "updated_at": func.now()},
                     )
                 )
                 await session.execute(stmt)
@@ -384,7 +432,9 @@ class FileManager:
                 existing = result.scalar_one_or_none()
 
                 if existing:
-                    await session.execute(update(FileContentModel).where(FileContentModel.file_id == file_id).values(text=text))
+                    await session.execute(
+                        update(FileContentModel).where(FileContentModel.file_id == file_id).values(text=text, updated_at=func.now())
+                    )
                 else:
                     session.add(FileContentModel(file_id=file_id, text=text))
 
@@ -464,8 +514,11 @@ class FileManager:
 
             # invalidate cache for this file before deletion
             await self._invalidate_file_caches(file_id, actor, file.original_file_name, file.source_id)
+            result = await session.execute(select(FileAgentModel.agent_id).where(FileAgentModel.file_id == file_id))
+            agent_ids = list(result.scalars())
 
             await file.hard_delete_async(db_session=session, actor=actor)
+            await get_agent_state_cache().invalidate(agent_ids, ["memory"])
             return await file.to_pydantic_async()
 
     @enforce_types
@@ -658,6 +711,55 @@ class FileManager:
 
             return await asyncio.gather(*[file.to_pydantic_async(include_content=include_content) for file in files_orm])
 
+    @enforce_types
+    @trace_method
+    async def get_file_line_indexes_async(self, file_ids: List[str], actor: PydanticUser) -> Dict[str, FileLineIndex]:
+        """
+        Get searchable line indexes for the given files, building and caching the ones that are missing or stale.
+
+        Args:
+            file_ids: List of file IDs to index
+            actor: User performing the action
+
+        Returns:
+            Dict[str, FileLineIndex]: Line indexes by file ID (files without content are omitted)
+        """
+        if not file_ids:
+            return {}
+
+        # Only the content timestamps are needed to validate cached indexes, not the content itself
+        async with db_registry.async_session() as session:
+            query = (
+                select(FileContentModel.file_id, FileContentModel.updated_at)
+                .join(FileMetadataModel, FileMetadataModel.id == FileContentModel.file_id)
+                .where(
+                    FileContentModel.file_id.in_(file_ids),
+                    FileMetadataModel.organization_id == actor.organization_id,
+                    FileMetadataModel.is_deleted == False,
+                )
+            )
+            content_updated_at = dict((await session.execute(query)).all())
+
+        indexes = {}
+        stale_file_ids = []
+        for file_id, updated_at in content_updated_at.items():
+            index = file_line_index_cache.get(file_id, updated_at)
+            if index is None:
+                stale_file_ids.append(file_id)
+            else:
+                indexes[file_id] = index
+
+        if stale_file_ids:
+            files = await self.get_files_by_ids_async(stale_file_ids, actor=actor, include_content=True)
+            built = await asyncio.gather(
+                *[asyncio.to_thread(FileLineIndex.build, file, content_updated_at[file.id]) for file in files if file.content]
+            )
+            for index in built:
+                file_line_index_cache.set(index)
+                indexes[index.file_id] = index
+
+        return indexes
+
     @enforce_types
     @trace_method
     async def get_files_for_agents_async(
@@ -1,19 +1,44 @@
 import asyncio
+import random
+import time
+import weakref
 from typing import List, Optional, Tuple, cast
 
+import openai
+
+from letta.errors import LLMRateLimitError
+from letta.helpers.embedding_cache import get_or_create_embeddings
+from letta.helpers.tokenizer import count_tokens_batch
 from letta.llm_api.llm_client import LLMClient
 from letta.llm_api.openai_client import OpenAIClient
 from letta.log import get_logger
+from letta.otel.metric_registry import MetricRegistry
 from letta.otel.tracing import log_event, trace_method
 from letta.schemas.embedding_config import EmbeddingConfig
 from letta.schemas.enums import ProviderType
 from letta.schemas.passage import Passage
 from letta.schemas.user import User
 from letta.services.file_processor.embedder.base_embedder import BaseEmbedder
-from letta.settings import model_settings
+from letta.settings import model_settings, settings
 
 logger = get_logger(__name__)
 
+RATE_LIMIT_BASE_BACKOFF_SECONDS = 1.0
+RATE_LIMIT_MAX_BACKOFF_SECONDS = 60.0
+
+# Shared by all embedders so concurrent file uploads together stay under the in-flight limit. Semaphores are bound to
+# the event loop they are first used on, so keep one per loop.
+_in_flight_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def _get_in_flight_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphore = _in_flight_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(settings.embedding_max_concurrent_batches)
+        _in_flight_semaphores[loop] = semaphore
+    return semaphore
+
 
 class OpenAIEmbedder(BaseEmbedder):
     """OpenAI-based embedding generation"""
@@ -51,39 +76,83 @@ class OpenAIEmbedder(BaseEmbedder):
                 "embedding_endpoint_type": self.embedding_config.embedding_endpoint_type,
             },
         )
+        metric_attributes = {"model": self.embedding_config.embedding_model}
+
+        attempt = 0
+        while True:
+            try:
+                # only the request itself counts against the in-flight limit, not backoff or split retries
+                async with _get_in_flight_semaphore():
+                    start_time = time.perf_counter()
+                    embeddings = await self.client.request_embeddings(inputs=batch, embedding_config=self.embedding_config)
+                    latency_ms = (time.perf_counter() - start_time) * 1000
+                break
+            except Exception as e:
+                if self._is_rate_limit_error(e) and attempt < settings.embedding_rate_limit_max_retries:
+                    delay = self._get_rate_limit_delay(e, attempt)
+                    attempt += 1
+                    MetricRegistry().embedding_rate_limit_counter.add(1, metric_attributes)
+                    logger.warning(f"Rate limited embedding batch of size {len(batch)}, retrying in {delay:.1f}s (attempt {attempt})")
+                    log_event(
+                        "embedder.batch_rate_limited",
+                        {"batch_size": len(batch), "attempt": attempt, "delay_seconds": delay, "error": str(e)},
+                    )
+                    await asyncio.sleep(delay)
+                    continue
+
+                # if it's a token limit error and we can split, do it
+                if self._is_token_limit_error(e) and len(batch) > 1:
+                    logger.warning(f"Token limit exceeded for batch of size {len(batch)}, splitting in half and retrying")
+                    log_event(
+                        "embedder.batch_split_retry",
+                        {
+                            "original_batch_size": len(batch),
+                            "error": str(e),
+                            "split_size": len(batch) // 2,
+                        },
+                    )
+
+                    # split batch in half
+                    mid = len(batch) // 2
+                    batch1 = batch[:mid]
+                    batch1_indices = batch_indices[:mid]
+                    batch2 = batch[mid:]
+                    batch2_indices = batch_indices[mid:]
+
+                    # retry with smaller batches
+                    result1 = await self._embed_batch(batch1, batch1_indices)
+                    result2 = await self._embed_batch(batch2, batch2_indices)
+
+                    return result1 + result2
+
+                # map other errors, or token limit errors on a single item, to the common LLM errors
+                raise self.client.handle_llm_error(e)
+
+        MetricRegistry().embedding_batch_latency_ms_histogram.record(latency_ms, metric_attributes)
+        log_event(
+            "embedder.batch_completed",
+            {"batch_size": len(batch), "embeddings_generated": len(embeddings), "latency_ms": latency_ms},
+        )
+        return [(idx, e) for idx, e in zip(batch_indices, embeddings)]
 
+    def _is_rate_limit_error(self, error: Exception) -> bool:
+        """Check if the error is due to the provider rate limiting us"""
+        if isinstance(error, (openai.RateLimitError, LLMRateLimitError)):
+            return True
+        error_str = str(error).lower()
+        return "rate limit" in error_str or "too many requests" in error_str
+
+    def _get_rate_limit_delay(self, error: Exception, attempt: int) -> float:
+        """Use the provider's Retry-After if given, otherwise exponential backoff with jitter"""
+        response = getattr(error, "response", None)
+        retry_after = getattr(response, "headers", {}).get("retry-after") if response is not None else None
         try:
-            embeddings = await self.client.request_embeddings(inputs=batch, embedding_config=self.embedding_config)
-            log_event("embedder.batch_completed", {"batch_size": len(batch), "embeddings_generated": len(embeddings)})
-            return [(idx, e) for idx, e in zip(batch_indices, embeddings)]
-        except Exception as e:
-            # if it's a token limit error and we can split, do it
-            if self._is_token_limit_error(e) and len(batch) > 1:
-                logger.warning(f"Token limit exceeded for batch of size {len(batch)}, splitting in half and retrying")
-                log_event(
-                    "embedder.batch_split_retry",
-                    {
-                        "original_batch_size": len(batch),
-                        "error": str(e),
-                        "split_size": len(batch) // 2,
-                    },
-                )
-
-                # split batch in half
-                mid = len(batch) // 2
-                batch1 = batch[:mid]
-                batch1_indices = batch_indices[:mid]
-                batch2 = batch[mid:]
-                batch2_indices = batch_indices[mid:]
-
-                # retry with smaller batches
-                result1 = await self._embed_batch(batch1, batch1_indices)
-                result2 = await self._embed_batch(batch2, batch2_indices)
-
-                return result1 + result2
-            else:
-                # re-raise for other errors or if batch size is already 1
-                raise
+            if retry_after is not None:
+                return min(float(retry_after), RATE_LIMIT_MAX_BACKOFF_SECONDS)
+        except (TypeError, ValueError):
+            pass
+        backoff = min(RATE_LIMIT_BASE_BACKOFF_SECONDS * (2**attempt), RATE_LIMIT_MAX_BACKOFF_SECONDS)
+        return backoff * random.uniform(0.5, 1.0)
 
     def _is_token_limit_error(self, error: Exception) -> bool:
         """Check if the error is due to token limit exceeded"""
@@ -101,39 +170,42 @@ class OpenAIEmbedder(BaseEmbedder):
 
         return is_token_limit
 
-    @trace_method
-    async def generate_embedded_passages(self, file_id: str, source_id: str, chunks: List[str], actor: User) -> List[Passage]:
-        """Generate embeddings for chunks with batching and concurrent processing"""
-        if not chunks:
-            return []
-
-        logger.info(f"Generating embeddings for {len(chunks)} chunks using {self.embedding_config.embedding_model}")
-        log_event(
-            "embedder.generation_started",
-            {
-                "total_chunks": len(chunks),
-                "model": self.embedding_config.embedding_model,
-                "embedding_endpoint_type": self.embedding_config.embedding_endpoint_type,
-                "batch_size": self.embedding_config.batch_size,
-                "file_id": file_id,
-                "source_id": source_id,
-            },
-        )
+    def _create_batches(self, chunks: List[str]) -> Tuple[List[List[str]], List[List[int]]]:
+        """Pack chunks into batches of at most `batch_size` chunks and (estimated) `embedding_batch_max_tokens` tokens, keeping their original indices"""
+        max_tokens = settings.embedding_batch_max_tokens
 
-        # Create batches with their original indices
-        batches = []
-        batch_indices = []
+        batches, batch_indices = [], []
+        batch, indices, batch_tokens = [], [], 0
+        # estimated without tokenizing every chunk, the token limit split-and-retry in _embed_batch still catches batches
+        # that turn out to be too large
+        chunk_tokens = count_tokens_batch(chunks, approximate=True)
+        for i, (chunk, num_tokens) in enumerate(zip(chunks, chunk_tokens)):
+            if batch and (len(batch) >= self.embedding_config.batch_size or batch_tokens + num_tokens > max_tokens):
+                batches.append(batch)
+                batch_indices.append(indices)
+                batch, indices, batch_tokens = [], [], 0
+            batch.append(chunk)
+            indices.append(i)
+            batch_tokens += num_tokens
 
-        for i in range(0, len(chunks), self.embedding_config.batch_size):
-            batch = chunks[i : i + self.embedding_config.batch_size]
-            indices = list(range(i, min(i + self.embedding_config.batch_size, len(chunks))))
+        if batch:
             batches.append(batch)
             batch_indices.append(indices)
+        return batches, batch_indices
+
+    async def _embed_chunks(self, chunks: List[str]) -> List[List[float]]:
+        """Embed chunks in concurrent batches, returning embeddings in the order of `chunks`"""
+        batches, batch_indices = self._create_batches(chunks)
 
         logger.info(f"Processing {len(batches)} batches")
         log_event(
             "embedder.batching_completed",
-            {"total_batches": len(batches), "batch_size": self.embedding_config.batch_size, "total_chunks": len(chunks)},
+            {
+                "total_batches": len(batches),
+                "batch_size": self.embedding_config.batch_size,
+                "max_batch_tokens": settings.embedding_batch_max_tokens,
+                "total_chunks": len(chunks),
+            },
         )
 
         async def process(batch: List[str], indices: List[int]):
@@ -144,7 +216,7 @@ class OpenAIEmbedder(BaseEmbedder):
                 log_event("embedder.batch_failed", {"batch_size": len(batch), "error": str(e), "error_type": type(e).__name__})
                 raise
 
-        # Execute all batches concurrently with semaphore control
+        # Execute all batches concurrently, the in-flight semaphore bounds how many requests are outstanding
         tasks = [process(batch, indices) for batch, indices in zip(batches, batch_indices)]
 
         log_event(
@@ -161,10 +233,33 @@ class OpenAIEmbedder(BaseEmbedder):
 
         # Sort by index to maintain original order
         indexed_embeddings.sort(key=lambda x: x[0])
+        return [embedding for _, embedding in indexed_embeddings]
+
+    @trace_method
+    async def generate_embedded_passages(self, file_id: str, source_id: str, chunks: List[str], actor: User) -> List[Passage]:
+        """Generate embeddings for chunks with batching and concurrent processing"""
+        if not chunks:
+            return []
+
+        logger.info(f"Generating embeddings for {len(chunks)} chunks using {self.embedding_config.embedding_model}")
+        log_event(
+            "embedder.generation_started",
+            {
+                "total_chunks": len(chunks),
+                "model": self.embedding_config.embedding_model,
+                "embedding_endpoint_type": self.embedding_config.embedding_endpoint_type,
+                "batch_size": self.embedding_config.batch_size,
+                "file_id": file_id,
+                "source_id": source_id,
+            },
+        )
+
+        # Only chunks that haven't been embedded before are sent to the provider
+        embeddings = await get_or_create_embeddings(texts=chunks, embedding_config=self.embedding_config, embed=self._embed_chunks)
 
         # Create Passage objects in original order
         passages = []
-        for (idx, embedding), text in zip(indexed_embeddings, chunks):
+        for embedding, text in zip(embeddings, chunks):
             passage = Passage(
                 text=text,
                 file_id=file_id,
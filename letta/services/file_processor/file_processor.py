@@ -1,7 +1,10 @@
-from typing import List
+import asyncio
+from datetime import timedelta
+from typing import Awaitable, Callable, List, Optional
 
 from mistralai import OCRPageObject, OCRResponse, OCRUsageInfo
 
+from letta.helpers.datetime_helpers import get_utc_time
 from letta.log import get_logger
 from letta.otel.context import get_ctx_attributes
 from letta.otel.tracing import log_event, trace_method
@@ -21,6 +24,11 @@ from letta.services.source_manager import SourceManager
 
 logger = get_logger(__name__)
 
+# Embedding batches that may be embedded and inserted at the same time by the native ingestion pipeline
+EMBEDDING_PIPELINE_CONCURRENCY = 4
+# Chunked batches waiting to be embedded, chunking pauses when this many are queued
+EMBEDDING_PIPELINE_QUEUE_SIZE = 8
+
 
 class FileProcessor:
     """Main PDF processing orchestrator"""
@@ -44,8 +52,18 @@ class FileProcessor:
         # get vector db type from the embedder
         self.vector_db_type = embedder.vector_db_type
 
-    async def _chunk_and_embed_with_fallback(self, file_metadata: FileMetadata, ocr_response, source_id: str) -> List:
-        """Chunk text and generate embeddings with fallback to default chunker if needed"""
+    async def _run_with_chunker_fallback(
+        self,
+        file_metadata: FileMetadata,
+        run: Callable[[Callable[[object], List[str]], str], Awaitable[List[Passage]]],
+        before_retry: Optional[Callable[[], Awaitable[None]]] = None,
+    ) -> List[Passage]:
+        """
+        Run a chunking strategy with the file-specific chunker, retrying with the default chunker if it fails.
+
+        `run` is given the chunker's per-page function and the event to log when a page yields no chunks.
+        `before_retry` cleans up after a failed first attempt.
+        """
         filename = file_metadata.file_name
 
         # Create file-type-specific chunker
@@ -53,36 +71,7 @@ class FileProcessor:
 
         # First attempt with file-specific chunker
         try:
-            all_chunks = []
-            for page in ocr_response.pages:
-                chunks = text_chunker.chunk_text(page)
-                if not chunks:
-                    log_event(
-                        "file_processor.chunking_failed",
-                        {
-                            "filename": filename,
-                            "page_index": ocr_response.pages.index(page),
-                        },
-                    )
-                    raise ValueError("No chunks created from text")
-                all_chunks.extend(chunks)
-
-            # Update with chunks length
-            file_metadata = await self.file_manager.update_file_status(
-                file_id=file_metadata.id,
-                actor=self.actor,
-                processing_status=FileProcessingStatus.EMBEDDING,
-                total_chunks=len(all_chunks),
-                chunks_embedded=0,
-            )
-
-            all_passages = await self.embedder.generate_embedded_passages(
-                file_id=file_metadata.id,
-                source_id=source_id,
-                chunks=all_chunks,
-                actor=self.actor,
-            )
-            return all_passages
+            return await run(text_chunker.chunk_text, "file_processor.chunking_failed")
 
         except Exception as e:
             logger.warning(f"Failed to chunk/embed with file-specific chunker for {filename}: {str(e)}. Retrying with default chunker.")
@@ -94,31 +83,14 @@ class FileProcessor:
             # Retry with default chunker
             try:
                 logger.info(f"Retrying chunking with default SentenceSplitter for {filename}")
-                all_chunks = []
-
-                for page in ocr_response.pages:
-                    chunks = text_chunker.default_chunk_text(page)
-                    if not chunks:
-                        log_event(
-                            "file_processor.default_chunking_failed",
-                            {
-                                "filename": filename,
-                                "page_index": ocr_response.pages.index(page),
-                            },
-                        )
-                        raise ValueError("No chunks created from text with default chunker")
-                    all_chunks.extend(chunks)
-
-                all_passages = await self.embedder.generate_embedded_passages(
-                    file_id=file_metadata.id,
-                    source_id=source_id,
-                    chunks=all_chunks,
-                    actor=self.actor,
-                )
+                if before_retry is not None:
+                    await before_retry()
+
+                all_passages = await run(text_chunker.default_chunk_text, "file_processor.default_chunking_failed")
                 logger.info(f"Successfully generated passages with default chunker for {filename}")
                 log_event(
                     "file_processor.default_chunking_success",
-                    {"filename": filename, "total_chunks": len(all_chunks)},
+                    {"filename": filename, "total_chunks": len(all_passages)},
                 )
                 return all_passages
 
@@ -134,6 +106,145 @@ class FileProcessor:
                 )
                 raise fallback_error
 
+    async def _chunk_and_embed_with_fallback(self, file_metadata: FileMetadata, ocr_response, source_id: str) -> List:
+        """Chunk text and generate embeddings with fallback to default chunker if needed"""
+
+        async def chunk_and_embed(chunk_page: Callable[[object], List[str]], chunking_failed_event: str) -> List[Passage]:
+            all_chunks = []
+            for page_index, page in enumerate(ocr_response.pages):
+                chunks = chunk_page(page)
+                if not chunks:
+                    log_event(chunking_failed_event, {"filename": file_metadata.file_name, "page_index": page_index})
+                    raise ValueError("No chunks created from text")
+                all_chunks.extend(chunks)
+
+            # Update with chunks length
+            await self.file_manager.update_file_status(
+                file_id=file_metadata.id,
+                actor=self.actor,
+                processing_status=FileProcessingStatus.EMBEDDING,
+                total_chunks=len(all_chunks),
+                chunks_embedded=0,
+            )
+
+            return await self.embedder.generate_embedded_passages(
+                file_id=file_metadata.id,
+                source_id=source_id,
+                chunks=all_chunks,
+                actor=self.actor,
+            )
+
+        return await self._run_with_chunker_fallback(file_metadata, chunk_and_embed)
+
+    async def _chunk_embed_and_insert(
+        self,
+        file_metadata: FileMetadata,
+        pages: List,
+        source_id: str,
+        chunk_page: Callable[[object], List[str]],
+        chunking_failed_event: str,
+    ) -> List[Passage]:
+        """
+        Chunk, embed and insert passages as a pipeline: pages are chunked one at a time into embedding batches,
+        which are embedded and written to the database concurrently, with a bounded queue in between. Passages
+        become searchable as each batch lands, and only the batches in flight hold embeddings in memory.
+
+        Returns the created passages without their embeddings.
+        """
+        filename = file_metadata.file_name
+        batch_size = self.embedder.embedding_config.batch_size
+        batch_queue: asyncio.Queue = asyncio.Queue(maxsize=EMBEDDING_PIPELINE_QUEUE_SIZE)
+        created_passages: List[List[Passage]] = []
+        chunks_embedded = 0
+        progress_lock = asyncio.Lock()
+
+        # Batches finish out of order, so derive created_at from the chunk index to keep passages in document order
+        created_at = get_utc_time()
+
+        await self.file_manager.update_file_status(
+            file_id=file_metadata.id,
+            actor=self.actor,
+            processing_status=FileProcessingStatus.EMBEDDING,
+            chunks_embedded=0,
+        )
+
+        async def produce_batches():
+            total_chunks = 0
+            batch = []
+            for page_index, page in enumerate(pages):
+                chunks = await asyncio.to_thread(chunk_page, page)
+                if not chunks:
+                    log_event(chunking_failed_event, {"filename": filename, "page_index": page_index})
+                    raise ValueError("No chunks created from text")
+
+                for chunk in chunks:
+                    batch.append(chunk)
+                    total_chunks += 1
+                    if len(batch) == batch_size:
+                        await batch_queue.put((total_chunks - len(batch), batch))
+                        batch = []
+
+            if batch:
+                await batch_queue.put((total_chunks - len(batch), batch))
+            for _ in range(EMBEDDING_PIPELINE_CONCURRENCY):
+                await batch_queue.put(None)
+
+            await self.file_manager.update_file_status(file_id=file_metadata.id, actor=self.actor, total_chunks=total_chunks)
+
+        async def embed_and_insert_batches():
+            nonlocal chunks_embedded
+            while (item := await batch_queue.get()) is not None:
+                start_index, batch = item
+                passages = await self.embedder.generate_embedded_passages(
+                    file_id=file_metadata.id,
+                    source_id=source_id,
+                    chunks=batch,
+                    actor=self.actor,
+                )
+                for i, passage in enumerate(passages):
+                    passage.created_at = created_at + timedelta(microseconds=start_index + i)
+
+                passages = await self.passage_manager.create_many_source_passages_async(
+                    passages=passages,
+                    file_metadata=file_metadata,
+                    actor=self.actor,
+                )
+                created_passages.append([passage.model_copy(update={"embedding": None}) for passage in passages])
+
+                async with progress_lock:
+                    chunks_embedded += len(passages)
+                    await self.file_manager.update_file_status(file_id=file_metadata.id, actor=self.actor, chunks_embedded=chunks_embedded)
+
+        tasks = [asyncio.create_task(produce_batches())]
+        tasks.extend(asyncio.create_task(embed_and_insert_batches()) for _ in range(EMBEDDING_PIPELINE_CONCURRENCY))
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        return sorted((passage for batch in created_passages for passage in batch), key=lambda p: p.created_at)
+
+    async def _chunk_embed_and_insert_with_fallback(self, file_metadata: FileMetadata, pages: List, source_id: str) -> List[Passage]:
+        """Run the native ingestion pipeline with fallback to default chunker if needed"""
+
+        async def chunk_embed_and_insert(chunk_page: Callable[[object], List[str]], chunking_failed_event: str) -> List[Passage]:
+            return await self._chunk_embed_and_insert(
+                file_metadata=file_metadata,
+                pages=pages,
+                source_id=source_id,
+                chunk_page=chunk_page,
+                chunking_failed_event=chunking_failed_event,
+            )
+
+        async def delete_inserted_passages() -> None:
+            # The first attempt inserts batches as it goes, drop them before re-chunking
+            await self.passage_manager.delete_source_passages_by_file_id_async(file_id=file_metadata.id, actor=self.actor)
+
+        return await self._run_with_chunker_fallback(file_metadata, chunk_embed_and_insert, before_retry=delete_inserted_passages)
+
     # TODO: Factor this function out of SyncServer
     @trace_method
     async def process(
@@ -211,23 +322,24 @@ class FileProcessor:
                 {"filename": filename, "pages_to_process": len(ocr_response.pages)},
             )
 
-            # Chunk and embed with fallback logic
-            all_passages = await self._chunk_and_embed_with_fallback(
-                file_metadata=file_metadata,
-                ocr_response=ocr_response,
-                source_id=source_id,
-            )
-
             if self.vector_db_type == VectorDBProvider.NATIVE:
-                all_passages = await self.passage_manager.create_many_source_passages_async(
-                    passages=all_passages,
+                # Chunk, embed and insert as a pipeline with fallback logic
+                all_passages = await self._chunk_embed_and_insert_with_fallback(
                     file_metadata=file_metadata,
-                    actor=self.actor,
+                    pages=ocr_response.pages,
+                    source_id=source_id,
                 )
                 log_event(
                     "file_processor.passages_created",
                     {"filename": filename, "total_passages": len(all_passages)},
                 )
+            else:
+                # Chunk and embed with fallback logic, the vector db stores the passages
+                all_passages = await self._chunk_and_embed_with_fallback(
+                    file_metadata=file_metadata,
+                    ocr_response=ocr_response,
+                    source_id=source_id,
+                )
 
             logger.info(f"Successfully processed {filename}: {len(all_passages)} passages")
             log_event(
@@ -273,6 +385,36 @@ class FileProcessor:
 
             return []
 
+    async def _insert_imported_passages(self, file_metadata: FileMetadata, passages: List[Passage]) -> List[Passage]:
+        """Insert passages that were already chunked and embedded, skipping straight to COMPLETED"""
+        filename = file_metadata.file_name
+        try:
+            file_metadata = await self.file_manager.update_file_status(
+                file_id=file_metadata.id, actor=self.actor, processing_status=FileProcessingStatus.EMBEDDING
+            )
+            all_passages = await self.passage_manager.create_many_source_passages_async(
+                passages=passages, file_metadata=file_metadata, actor=self.actor
+            )
+            await self.file_manager.update_file_status(
+                file_id=file_metadata.id,
+                actor=self.actor,
+                processing_status=FileProcessingStatus.COMPLETED,
+                total_chunks=len(all_passages),
+                chunks_embedded=len(all_passages),
+            )
+            log_event("file_processor.import_passages_reused", {"filename": filename, "total_passages": len(all_passages)})
+            return all_passages
+
+        except Exception as e:
+            logger.exception("Inserting imported passages failed for %s: %s", filename, e)
+            await self.file_manager.update_file_status(
+                file_id=file_metadata.id,
+                actor=self.actor,
+                processing_status=FileProcessingStatus.ERROR,
+                error_message=str(e) if str(e) else f"Import file processing failed: {type(e).__name__}",
+            )
+            return []
+
     def _create_ocr_response_from_content(self, content: str):
         """Create minimal OCR response from existing content"""
         return OCRResponse(
@@ -291,10 +433,18 @@ class FileProcessor:
 
     # TODO: The file state machine here is kind of out of date, we need to match with the correct one above
     @trace_method
-    async def process_imported_file(self, file_metadata: FileMetadata, source_id: str) -> List[Passage]:
-        """Process an imported file that already has content - skip OCR, do chunking/embedding"""
+    async def process_imported_file(
+        self, file_metadata: FileMetadata, source_id: str, passages: Optional[List[Passage]] = None
+    ) -> List[Passage]:
+        """Process an imported file that already has content - skip OCR, do chunking/embedding
+
+        Passages exported with the file are inserted as they are instead, when they are stored natively.
+        """
         filename = file_metadata.file_name
 
+        if passages and self.vector_db_type == VectorDBProvider.NATIVE:
+            return await self._insert_imported_passages(file_metadata=file_metadata, passages=passages)
+
         if not file_metadata.content:
             logger.warning(f"No content found for imported file {filename}")
             return []
@@ -312,17 +462,17 @@ class FileProcessor:
             logger.info(f"Chunking imported file content for {filename}")
             log_event("file_processor.import_chunking_started", {"filename": filename, "content_length": len(content)})
 
-            # Chunk and embed using existing logic
-            all_passages = await self._chunk_and_embed_with_fallback(
-                file_metadata=file_metadata, ocr_response=ocr_response, source_id=source_id
-            )
-
-            # Create passages in database (unless using Pinecone)
             if self.vector_db_type == VectorDBProvider.NATIVE:
-                all_passages = await self.passage_manager.create_many_source_passages_async(
-                    passages=all_passages, file_metadata=file_metadata, actor=self.actor
+                # Chunk, embed and create passages in database as a pipeline
+                all_passages = await self._chunk_embed_and_insert_with_fallback(
+                    file_metadata=file_metadata, pages=ocr_response.pages, source_id=source_id
                 )
                 log_event("file_processor.import_passages_created", {"filename": filename, "total_passages": len(all_passages)})
+            else:
+                # Chunk and embed using existing logic
+                all_passages = await self._chunk_and_embed_with_fallback(
+                    file_metadata=file_metadata, ocr_response=ocr_response, source_id=source_id
+                )
 
             # Update file status to completed (valid transition from EMBEDDING)
             # pinecone completes slowly, so gets updated later
@@ -0,0 +1,111 @@
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from letta.schemas.file import FileMetadata
+from letta.services.file_processor.chunker.line_chunker import LineChunker
+
+# Upper bound on the total size of file content held by the in-process line index cache
+LINE_INDEX_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+
+@dataclass
+class FileLineIndex:
+    """Numbered lines of a file, as LineChunker presents them to the agent, ready to be searched."""
+
+    file_id: str
+    file_name: str
+    content_size: int  # size of the raw content in bytes
+    content_updated_at: Optional[datetime]
+    lines: List[str]  # chunked lines, numbered from 1 when shown to the agent
+
+    @classmethod
+    def build(cls, file_metadata: FileMetadata, content_updated_at: Optional[datetime] = None) -> "FileLineIndex":
+        return cls(
+            file_id=file_metadata.id,
+            file_name=file_metadata.file_name,
+            content_size=len(file_metadata.content.encode("utf-8")) if file_metadata.content else 0,
+            content_updated_at=content_updated_at,
+            lines=LineChunker().chunk_lines(file_metadata),
+        )
+
+    def format_line(self, idx: int) -> str:
+        return f"{idx + 1}: {self.lines[idx]}"
+
+    def search(self, pattern: re.Pattern, context_lines: int, max_matches: int) -> List[Tuple[int, List[str]]]:
+        """Return up to `max_matches` (1-based line number, context lines) pairs for lines matching `pattern`."""
+        matches = []
+        num_lines = len(self.lines)
+        for idx, line in enumerate(self.lines):
+            if not pattern.search(line.strip()):
+                continue
+
+            context = []
+            for i in range(max(0, idx - context_lines), min(num_lines, idx + context_lines + 1)):
+                prefix = ">" if i == idx else " "
+                context.append(f"{prefix} {self.format_line(i)}")
+            matches.append((idx + 1, context))
+
+            if len(matches) >= max_matches:
+                break
+        return matches
+
+
+class FileLineIndexCache:
+    """Size-bounded, per-process LRU cache of file line indexes, keyed by file id.
+
+    Entries are invalidated when a file's content is replaced, and are also checked against the
+    content's updated_at so an index built before an upsert in another process is never served.
+    """
+
+    def __init__(self, max_bytes: int = LINE_INDEX_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[str, FileLineIndex]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, file_id: str, content_updated_at: Optional[datetime] = None) -> Optional[FileLineIndex]:
+        with self._lock:
+            index = self._data.get(file_id)
+            if index is None:
+                return None
+            if content_updated_at is not None and index.content_updated_at != content_updated_at:
+                self._pop(file_id)
+                return None
+            self._data.move_to_end(file_id)
+            return index
+
+    def set(self, index: FileLineIndex) -> None:
+        if index.content_size > self.max_bytes:
+            return
+        with self._lock:
+            self._pop(index.file_id)
+            self._data[index.file_id] = index
+            self._size += index.content_size
+            while self._size > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self._size -= evicted.content_size
+
+    def invalidate(self, file_id: str) -> None:
+        with self._lock:
+            self._pop(file_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._size = 0
+
+    def _pop(self, file_id: str) -> None:
+        index = self._data.pop(file_id, None)
+        if index is not None:
+            self._size -= index.content_size
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# Shared across all FileManager instances, since managers are constructed per executor
+file_line_index_cache = FileLineIndexCache()
@@ -11,6 +11,7 @@ from letta.schemas.block import Block as PydanticBlock, FileBlock as PydanticFil
 from letta.schemas.file import FileAgent as PydanticFileAgent, FileMetadata
 from letta.schemas.user import User as PydanticUser
 from letta.server.db import db_registry
+from letta.services.agent_state_cache import get_agent_state_cache
 from letta.utils import enforce_types
 
 logger = get_logger(__name__)
@@ -91,6 +92,7 @@ class FileAgentManager:
                     existing.end_line = end_line
 
                     await existing.update_async(session, actor=actor)
+                    await get_agent_state_cache().invalidate(agent_id, ["memory"])
                     return existing.to_pydantic(), []
 
                 assoc = FileAgentModel(
@@ -106,6 +108,7 @@ class FileAgentManager:
                     end_line=end_line,
                 )
                 await assoc.create_async(session, actor=actor)
+                await get_agent_state_cache().invalidate(agent_id, ["memory"])
                 return assoc.to_pydantic(), []
 
     @enforce_types
@@ -138,6 +141,7 @@ class FileAgentManager:
             assoc.last_accessed_at = datetime.now(timezone.utc)
 
             await assoc.update_async(session, actor=actor)
+            await get_agent_state_cache().invalidate(agent_id, ["memory"])
             return assoc.to_pydantic()
 
     @enforce_types
@@ -164,6 +168,7 @@ class FileAgentManager:
             assoc.last_accessed_at = datetime.now(timezone.utc)
 
             await assoc.update_async(session, actor=actor)
+            await get_agent_state_cache().invalidate(agent_id, ["memory"])
             return assoc.to_pydantic()
 
     @enforce_types
@@ -173,6 +178,7 @@ class FileAgentManager:
         async with db_registry.async_session() as session:
             assoc = await self._get_association_by_file_id(session, agent_id, file_id, actor)
             await assoc.hard_delete_async(session, actor=actor)
+            await get_agent_state_cache().invalidate(agent_id, ["memory"])
 
     @enforce_types
     @trace_method
@@ -201,6 +207,7 @@ class FileAgentManager:
 
             result = await session.execute(stmt)
             await session.commit()
+            await get_agent_state_cache().invalidate({agent_id for agent_id, _ in agent_file_pairs}, ["memory"])
 
             return result.rowcount
 
@@ -291,6 +298,23 @@ class FileAgentManager:
             else:
                 return [r.to_pydantic() for r in rows]
 
+    @enforce_types
+    @trace_method
+    async def list_files_for_agents(self, agent_ids: List[str], actor: PydanticUser) -> Dict[str, List[PydanticFileAgent]]:
+        """Return the associations of several agents in a single query, keyed by agent id."""
+        files_by_agent_id = {agent_id: [] for agent_id in agent_ids}
+        if not agent_ids:
+            return files_by_agent_id
+
+        async with db_registry.async_session() as session:
+            query = select(FileAgentModel).where(
+                FileAgentModel.agent_id.in_(agent_ids),
+                FileAgentModel.organization_id == actor.organization_id,
+            )
+            for row in (await session.execute(query)).scalars().all():
+                files_by_agent_id[row.agent_id].append(row.to_pydantic())
+            return files_by_agent_id
+
     @enforce_types
     @trace_method
     async def list_files_for_agent_paginated(
@@ -387,6 +411,7 @@ class FileAgentManager:
             )
             await session.execute(stmt)
             await session.commit()
+            await get_agent_state_cache().invalidate(agent_id, ["memory"])
 
     @enforce_types
     @trace_method
@@ -407,6 +432,7 @@ class FileAgentManager:
             )
             await session.execute(stmt)
             await session.commit()
+            await get_agent_state_cache().invalidate(agent_id, ["memory"])
 
     @enforce_types
     @trace_method
@@ -440,6 +466,7 @@ class FileAgentManager:
 
             closed_file_names = [row.file_name for row in (await session.execute(stmt))]
             await session.commit()
+            await get_agent_state_cache().invalidate(agent_id, ["memory"])
             return closed_file_names
 
     @enforce_types
@@ -570,6 +597,7 @@ class FileAgentManager:
                     end_line=end_line,
                 )
                 await new_file_agent.create_async(session, actor=actor)
+            await get_agent_state_cache().invalidate(agent_id, ["memory"])
 
             return closed_file_names, file_was_already_open, previous_ranges
 
@@ -684,6 +712,7 @@ class FileAgentManager:
                 )
 
             await session.commit()
+            await get_agent_state_cache().invalidate(agent_id, ["memory"])
             return closed_file_names
 
     async def _get_association_by_file_id(self, session, agent_id: str, file_id: str, actor: PydanticUser) -> FileAgentModel:
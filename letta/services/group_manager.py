@@ -14,6 +14,7 @@ from letta.schemas.letta_message import LettaMessage
 from letta.schemas.message import Message as PydanticMessage
 from letta.schemas.user import User as PydanticUser
 from letta.server.db import db_registry
+from letta.services.agent_state_cache import get_agent_state_cache
 from letta.settings import DatabaseChoice, settings
 from letta.utils import enforce_types
 
@@ -123,6 +124,7 @@ class GroupManager:
                 self._process_shared_block_relationship(session=session, group=new_group, block_ids=group.shared_block_ids)
 
             new_group.create(session, actor=actor)
+            get_agent_state_cache().invalidate_nowait(self._get_affected_agent_ids(group), ["multi_agent_group", "memory"])
             return new_group.to_pydantic()
 
     @enforce_types
@@ -173,6 +175,7 @@ class GroupManager:
                 await self._process_shared_block_relationship_async(session=session, group=new_group, block_ids=group.shared_block_ids)
 
             await new_group.create_async(session, actor=actor)
+            await get_agent_state_cache().invalidate(self._get_affected_agent_ids(group), ["multi_agent_group", "memory"])
             return new_group.to_pydantic()
 
     @enforce_types
@@ -236,6 +239,8 @@ class GroupManager:
                 )
 
             await group.update_async(session, actor=actor)
+            # the previous manager agent loses the group, so this can't be narrowed to the group's current agents
+            await get_agent_state_cache().invalidate_relationship("multi_agent_group")
             return group.to_pydantic()
 
     @enforce_types
@@ -245,6 +250,7 @@ class GroupManager:
             # Retrieve the agent
             group = GroupModel.read(db_session=session, identifier=group_id, actor=actor)
             group.hard_delete(session)
+            get_agent_state_cache().invalidate_relationship_nowait("multi_agent_group")
 
     @enforce_types
     @trace_method
@@ -252,6 +258,7 @@ class GroupManager:
         async with db_registry.async_session() as session:
             group = await GroupModel.read_async(db_session=session, identifier=group_id, actor=actor)
             await group.hard_delete_async(session)
+            await get_agent_state_cache().invalidate_relationship("multi_agent_group")
 
     @enforce_types
     @trace_method
@@ -366,6 +373,8 @@ class GroupManager:
             # Update turns counter
             group.turns_counter = (group.turns_counter + 1) % group.sleeptime_agent_frequency
             group.update(session, actor=actor)
+            if group.manager_agent_id:
+                get_agent_state_cache().invalidate_nowait(group.manager_agent_id, ["multi_agent_group"])
             return group.turns_counter
 
     @enforce_types
@@ -378,6 +387,8 @@ class GroupManager:
             # Update turns counter
             group.turns_counter = (group.turns_counter + 1) % group.sleeptime_agent_frequency
             await group.update_async(session, actor=actor)
+            if group.manager_agent_id:
+                await get_agent_state_cache().invalidate(group.manager_agent_id, ["multi_agent_group"])
             return group.turns_counter
 
     @enforce_types
@@ -390,6 +401,8 @@ class GroupManager:
             prev_last_processed_message_id = group.last_processed_message_id
             group.last_processed_message_id = last_processed_message_id
             group.update(session, actor=actor)
+            if group.manager_agent_id:
+                get_agent_state_cache().invalidate_nowait(group.manager_agent_id, ["multi_agent_group"])
 
             return prev_last_processed_message_id
 
@@ -406,6 +419,8 @@ class GroupManager:
             prev_last_processed_message_id = group.last_processed_message_id
             group.last_processed_message_id = last_processed_message_id
             await group.update_async(session, actor=actor)
+            if group.manager_agent_id:
+                await get_agent_state_cache().invalidate(group.manager_agent_id, ["multi_agent_group"])
 
             return prev_last_processed_message_id
 
@@ -542,6 +557,14 @@ class GroupManager:
                 for block in blocks:
                     session.add(BlocksAgents(agent_id=manager_agent.id, block_id=block.id, block_label=block.label))
 
+    @staticmethod
+    def _get_affected_agent_ids(group: Union[GroupCreate, InternalTemplateGroupCreate]) -> List[str]:
+        agent_ids = set(group.agent_ids or [])
+        manager_agent_id = getattr(group.manager_config, "manager_agent_id", None)
+        if manager_agent_id:
+            agent_ids.add(manager_agent_id)
+        return list(agent_ids)
+
     @staticmethod
     def ensure_buffer_length_range_valid(
         max_value: Optional[int],
@@ -1,10 +1,11 @@
 import uuid
+from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Literal, Optional, Set
+from typing import Dict, List, Literal, Optional, Set, Tuple
 
 import numpy as np
 from sqlalchemy import Select, and_, asc, desc, func, literal, nulls_last, or_, select, union_all
-from sqlalchemy.orm import noload
+from sqlalchemy.orm import defer, noload, selectinload
 from sqlalchemy.sql.expression import exists
 
 from letta import system
@@ -28,13 +29,14 @@ from letta.orm.archives_agents import ArchivesAgents
 from letta.orm.errors import NoResultFound
 from letta.orm.identity import Identity
 from letta.orm.passage import ArchivalPassage, SourcePassage
+from letta.orm.passage_tag import PassageTag
 from letta.orm.sources_agents import SourcesAgents
 from letta.otel.tracing import trace_method
 from letta.prompts import gpt_system
 from letta.prompts.prompt_generator import PromptGenerator
 from letta.schemas.agent import AgentState
 from letta.schemas.embedding_config import EmbeddingConfig
-from letta.schemas.enums import AgentType, MessageRole
+from letta.schemas.enums import AgentType, MessageRole, TagMatchMode
 from letta.schemas.letta_message_content import TextContent
 from letta.schemas.memory import Memory
 from letta.schemas.message import Message, MessageCreate
@@ -762,20 +764,58 @@ def _apply_filters(
     return query
 
 
-def _apply_relationship_filters(query, include_relationships: Optional[List[str]] = None):
+# How each relationship `include_relationships` can name is loaded. The related rows are loaded without their own
+# relationships, which `AgentModel.to_pydantic_async` never reads (an identity would otherwise load all of its agents,
+# and a group all of its agents and blocks).
+_RELATIONSHIP_LOADERS = {
+    "memory": ("core_memory", "file_agents"),
+    "identity_ids": ("identities",),
+    "tool_exec_environment_variables": ("tool_exec_environment_variables",),
+    "secrets": ("tool_exec_environment_variables",),
+    "tools": ("tools",),
+    "sources": ("sources",),
+    "tags": ("tags",),
+    "multi_agent_group": ("multi_agent_group",),
+}
+_AGENT_RELATIONSHIPS = list(dict.fromkeys(attr for attrs in _RELATIONSHIP_LOADERS.values() for attr in attrs))
+
+
+@dataclass(frozen=True)
+class AgentLoadProfile:
+    """What an agent query loads for an endpoint that only renders part of the agent."""
+
+    include_relationships: Tuple[str, ...]
+    # Columns left unloaded. The agent state falls back to their defaults, so responses must leave them out.
+    # Only for agents that aren't cached.
+    deferred_columns: Tuple[str, ...] = ()
+
+
+AGENT_LOAD_PROFILES: Dict[str, AgentLoadProfile] = {
+    # agent listings, which show an agent's name, model, tags and last run but not its memory or tools
+    "list_summary": AgentLoadProfile(
+        include_relationships=("tags", "identity_ids"),
+        deferred_columns=("message_ids", "tool_rules", "response_format"),
+    ),
+    # everything an agent step reads
+    "step_runtime": AgentLoadProfile(include_relationships=("tools", "memory", "tool_exec_environment_variables", "sources")),
+    # agent file exports
+    "full_export": AgentLoadProfile(include_relationships=tuple(_RELATIONSHIP_LOADERS)),
+}
+
+
+def _apply_relationship_filters(query, include_relationships: Optional[List[str]] = None, deferred_columns: Tuple[str, ...] = ()):
     if include_relationships is None:
-        return query
+        include_relationships = list(_RELATIONSHIP_LOADERS)
 
-    if "memory" not in include_relationships:
-        query = query.options(noload(AgentModel.core_memory), noload(AgentModel.file_agents))
-    if "identity_ids" not in include_relationships:
-        query = query.options(noload(AgentModel.identities))
-
-    relationships = ["tool_exec_environment_variables", "tools", "sources", "tags", "multi_agent_group"]
+    included = {attr for rel in include_relationships for attr in _RELATIONSHIP_LOADERS.get(rel, ())}
+    for attr in _AGENT_RELATIONSHIPS:
+        if attr in included:
+            query = query.options(selectinload(getattr(AgentModel, attr)).noload("*"))
+        else:
+            query = query.options(noload(getattr(AgentModel, attr)))
 
-    for rel in relationships:
-        if rel not in include_relationships:
-            query = query.options(noload(getattr(AgentModel, rel)))
+    if deferred_columns:
+        query = query.options(*[defer(getattr(AgentModel, column), raiseload=True) for column in deferred_columns])
 
     return query
 
@@ -919,12 +959,11 @@ async def build_passage_query(
             # PostgreSQL with pgvector
             main_query = main_query.order_by(combined_query.c.embedding.cosine_distance(embedded_text).asc())
         else:
-            # SQLite with custom vector type
-            from letta.orm.sqlite_functions import adapt_array
+            # SQLite with sqlite-vec (falls back to the Python UDF if the extension is unavailable)
+            from letta.orm.sqlite_functions import sqlite_cosine_distance
 
-            query_embedding_binary = adapt_array(embedded_text)
             main_query = main_query.order_by(
-                func.cosine_distance(combined_query.c.embedding, query_embedding_binary).asc(),
+                sqlite_cosine_distance(combined_query.c.embedding, embedded_text).asc(),
                 combined_query.c.created_at.asc() if ascending else combined_query.c.created_at.desc(),
                 combined_query.c.id.asc(),
             )
@@ -1054,12 +1093,11 @@ async def build_source_passage_query(
             # PostgreSQL with pgvector
             query = query.order_by(SourcePassage.embedding.cosine_distance(embedded_text).asc())
         else:
-            # SQLite with custom vector type
-            from letta.orm.sqlite_functions import adapt_array
+            # SQLite with sqlite-vec (falls back to the Python UDF if the extension is unavailable)
+            from letta.orm.sqlite_functions import sqlite_cosine_distance
 
-            query_embedding_binary = adapt_array(embedded_text)
             query = query.order_by(
-                func.cosine_distance(SourcePassage.embedding, query_embedding_binary).asc(),
+                sqlite_cosine_distance(SourcePassage.embedding, embedded_text).asc(),
                 SourcePassage.created_at.asc() if ascending else SourcePassage.created_at.desc(),
                 SourcePassage.id.asc(),
             )
@@ -1116,6 +1154,8 @@ async def build_agent_passage_query(
     embed_query: bool = False,
     ascending: bool = True,
     embedding_config: Optional[EmbeddingConfig] = None,
+    tags: Optional[List[str]] = None,
+    tag_match_mode: Optional[TagMatchMode] = None,
 ) -> Select:
     """Build query for agent passages with all filters applied."""
 
@@ -1146,6 +1186,19 @@ async def build_agent_passage_query(
         query = query.where(ArchivalPassage.created_at >= start_date)
     if end_date:
         query = query.where(ArchivalPassage.created_at <= end_date)
+    if tags:
+        # semi-join against passage_tags so limit and ordering apply to the already filtered passages
+        unique_tags = list(set(tags))
+        tagged_passage_ids = select(PassageTag.passage_id).where(
+            PassageTag.tag.in_(unique_tags),
+            PassageTag.organization_id == actor.organization_id,
+            PassageTag.is_deleted == False,
+        )
+        if tag_match_mode == TagMatchMode.ALL:
+            tagged_passage_ids = tagged_passage_ids.group_by(PassageTag.passage_id).having(
+                func.count(func.distinct(PassageTag.tag)) == len(unique_tags)
+            )
+        query = query.where(ArchivalPassage.id.in_(tagged_passage_ids))
 
     # Handle text search or vector search
     if embedded_text:
@@ -1153,12 +1206,11 @@ async def build_agent_passage_query(
             # PostgreSQL with pgvector
             query = query.order_by(ArchivalPassage.embedding.cosine_distance(embedded_text).asc())
         else:
-            # SQLite with custom vector type
-            from letta.orm.sqlite_functions import adapt_array
+            # SQLite with sqlite-vec (falls back to the Python UDF if the extension is unavailable)
+            from letta.orm.sqlite_functions import sqlite_cosine_distance
 
-            query_embedding_binary = adapt_array(embedded_text)
             query = query.order_by(
-                func.cosine_distance(ArchivalPassage.embedding, query_embedding_binary).asc(),
+                sqlite_cosine_distance(ArchivalPassage.embedding, embedded_text).asc(),
                 ArchivalPassage.created_at.asc() if ascending else ArchivalPassage.created_at.desc(),
                 ArchivalPassage.id.asc(),
             )
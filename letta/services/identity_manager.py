@@ -22,6 +22,7 @@ from letta.schemas.identity import (
 )
 from letta.schemas.user import User as PydanticUser
 from letta.server.db import db_registry
+from letta.services.agent_state_cache import get_agent_state_cache
 from letta.settings import DatabaseChoice, settings
 from letta.utils import enforce_types
 
@@ -113,6 +114,8 @@ class IdentityManager:
             allow_partial=False,
         )
         await new_identity.create_async(db_session=db_session, actor=actor)
+        if identity.agent_ids:
+            await get_agent_state_cache().invalidate(identity.agent_ids, ["identity_ids"])
         return new_identity.to_pydantic()
 
     @enforce_types
@@ -202,6 +205,9 @@ class IdentityManager:
                 replace=replace,
             )
         await existing_identity.update_async(db_session=db_session, actor=actor)
+        if identity.agent_ids is not None:
+            # agents can be detached as well as attached, so every agent's identities may have changed
+            await get_agent_state_cache().invalidate_relationship("identity_ids")
         return existing_identity.to_pydantic()
 
     @enforce_types
@@ -232,6 +238,7 @@ class IdentityManager:
                 raise HTTPException(status_code=403, detail="Forbidden")
             await session.delete(identity)
             await session.commit()
+            await get_agent_state_cache().invalidate_relationship("identity_ids")
 
     @enforce_types
     @trace_method
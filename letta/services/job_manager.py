@@ -25,6 +25,7 @@ from letta.schemas.step import Step as PydanticStep
 from letta.schemas.usage import LettaUsageStatistics
 from letta.schemas.user import User as PydanticUser
 from letta.server.db import db_registry
+from letta.services.run_cancellation_bus import get_run_cancellation_bus
 from letta.utils import enforce_types
 
 logger = get_logger(__name__)
@@ -182,6 +183,10 @@ class JobManager:
             result = job.to_pydantic()
             await session.commit()
 
+        if job_update.status == JobStatus.cancelled:
+            # wake up the agent loop and streams working on this run, wherever they are running
+            await get_run_cancellation_bus().publish(job_id)
+
         # Dispatch callback outside of database session if needed
         if needs_callback:
             callback_info = {
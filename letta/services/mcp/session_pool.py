@@ -0,0 +1,295 @@
+import asyncio
+import hashlib
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+import anyio
+
+from letta.functions.mcp_client.types import BaseServerConfig
+from letta.log import get_logger
+from letta.services.mcp.base_client import AsyncBaseMCPClient
+from letta.settings import tool_settings
+from letta.utils import safe_create_task
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+# Errors meaning the connection itself is gone, so the session is replaced by a fresh one
+CONNECTION_ERRORS = (
+    ConnectionError,
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+    anyio.EndOfStream,
+)
+
+
+@dataclass(frozen=True)
+class MCPSessionKey:
+    """Identifies sessions that can be shared: same server, same resolved config, same caller identity."""
+
+    server_id: str
+    config_hash: str
+    user_id: Optional[str]  # OAuth sessions are per user, so sessions are never shared across users
+    agent_id: Optional[str]  # sent as a header when connecting
+    server_url: Optional[str] = None
+
+    @classmethod
+    def create(
+        cls, server_id: str, server_config: BaseServerConfig, user_id: Optional[str] = None, agent_id: Optional[str] = None
+    ) -> "MCPSessionKey":
+        config_hash = hashlib.sha256(server_config.model_dump_json().encode("utf-8")).hexdigest()
+        return cls(
+            server_id=server_id,
+            config_hash=config_hash,
+            user_id=user_id,
+            agent_id=agent_id,
+            server_url=getattr(server_config, "server_url", None),
+        )
+
+
+class PooledMCPSession:
+    """A connected MCP client shared by concurrent callers.
+
+    The MCP transports are built on anyio task groups, which must be exited by the task that entered them, so each
+    session is owned by a background task that connects, waits until the session is closed or has been idle for too
+    long, and then cleans up.
+    """
+
+    def __init__(self, key: MCPSessionKey, client: AsyncBaseMCPClient, idle_timeout: float):
+        self.key = key
+        self.client = client
+        self.idle_timeout = idle_timeout
+        self.in_use = 0
+        self.last_used = time.monotonic()
+        self.last_health_check = time.monotonic()
+        self._ready: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._close_event = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.on_closed: Optional[Callable[["PooledMCPSession"], None]] = None
+
+    async def start(self) -> None:
+        self._task = safe_create_task(self._run(), label=f"mcp_session_{self.key.server_id}")
+        await asyncio.shield(self._ready)
+
+    async def wait_ready(self) -> bool:
+        """Wait for a session another caller is still connecting, returning whether it connected."""
+        try:
+            await asyncio.shield(self._ready)
+            return True
+        except Exception:
+            return False
+
+    async def _run(self) -> None:
+        try:
+            try:
+                await self.client.connect_to_server()
+            except BaseException as e:
+                if not self._ready.done():
+                    self._ready.set_exception(e)
+                return
+            self.last_used = time.monotonic()
+            self._ready.set_result(None)
+
+            while not self._close_event.is_set():
+                idle_for = time.monotonic() - self.last_used
+                if self.in_use == 0 and idle_for >= self.idle_timeout:
+                    logger.debug(f"Closing MCP session for server {self.key.server_id} after {idle_for:.0f}s idle")
+                    break
+                try:
+                    await asyncio.wait_for(self._close_event.wait(), timeout=max(self.idle_timeout - idle_for, 0.1))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._close_event.set()
+            if self.on_closed:
+                self.on_closed(self)
+            try:
+                await self.client.cleanup()
+            except BaseException as e:
+                logger.warning(f"Error cleaning up MCP session for server {self.key.server_id}: {e}")
+
+    @property
+    def is_alive(self) -> bool:
+        return not self._close_event.is_set() and self.client.initialized and self._task is not None and not self._task.done()
+
+    async def check_health(self, timeout: float) -> bool:
+        """Ping the server, closing the session if it doesn't answer."""
+        self.last_health_check = time.monotonic()
+        try:
+            await asyncio.wait_for(self.client.session.send_ping(), timeout=timeout)
+            return True
+        except Exception as e:
+            logger.info(f"MCP session for server {self.key.server_id} failed health check, reconnecting: {e}")
+            self.close()
+            return False
+
+    @property
+    def is_idle(self) -> bool:
+        """Connected and not serving any request, so it can be closed without disturbing a caller."""
+        return self.in_use == 0 and self._ready.done()
+
+    def close(self) -> None:
+        self._close_event.set()
+
+    async def wait_closed(self) -> None:
+        if self._task is not None:
+            await asyncio.wait([self._task])
+
+
+class MCPSessionPool:
+    """Long-lived MCP client sessions, reused across tool calls instead of connecting for every call.
+
+    Each key has at most one connected session, which multiplexes concurrent requests. At most `max_concurrency` requests
+    are in flight per server, across all of its sessions (one per user and agent calling it). Sessions are health-checked
+    with a ping when they have been unused for a while, closed when idle for `idle_timeout`, and replaced by a fresh
+    session if the connection drops. Once there are more than `max_sessions`, the least recently used idle sessions
+    are closed.
+    """
+
+    def __init__(self, max_concurrency: int, idle_timeout: float, max_sessions: int = 100, health_check_interval: float = 30.0):
+        self.max_concurrency = max_concurrency
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.health_check_interval = health_check_interval
+        self._sessions: Dict[MCPSessionKey, PooledMCPSession] = {}
+        self._connect_locks: Dict[MCPSessionKey, asyncio.Lock] = {}
+        self._server_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    async def run(
+        self,
+        key: MCPSessionKey,
+        client_factory: Callable[[], Awaitable[AsyncBaseMCPClient]],
+        fn: Callable[[AsyncBaseMCPClient], Awaitable[T]],
+        idempotent: bool = False,
+    ) -> T:
+        """Run `fn` with a connected client for `key`, connecting with `client_factory` if there is no live session.
+
+        A connection that drops during `fn` closes the session, so the next call reconnects. `fn` itself is only run
+        again on the fresh session if it is `idempotent`: the server may have received the request before the
+        connection dropped, and running a tool call twice could repeat its side effects.
+        """
+        semaphore = self._server_semaphores.setdefault(key.server_id, asyncio.Semaphore(self.max_concurrency))
+        for attempt in range(2):
+            pooled = await self._get_session(key, client_factory)
+            async with semaphore:
+                pooled.in_use += 1
+                try:
+                    return await fn(pooled.client)
+                except CONNECTION_ERRORS as e:
+                    pooled.close()
+                    if attempt or not idempotent:
+                        raise
+                    logger.info(f"MCP session for server {key.server_id} dropped, reconnecting: {e}")
+                finally:
+                    pooled.in_use -= 1
+                    pooled.last_used = time.monotonic()
+                    # sessions that were busy when the pool went over its cap can be closed now
+                    if len(self._sessions) > self.max_sessions:
+                        self._close_least_recently_used(len(self._sessions) - self.max_sessions)
+
+    async def _get_session(self, key: MCPSessionKey, client_factory: Callable[[], Awaitable[AsyncBaseMCPClient]]) -> PooledMCPSession:
+        pooled = await self._get_live_session(key)
+        if pooled is not None:
+            return pooled
+
+        lock = self._connect_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            # another caller may have connected while we waited
+            pooled = await self._get_live_session(key)
+            if pooled is not None:
+                return pooled
+
+            if len(self._sessions) >= self.max_sessions:
+                self._close_least_recently_used(len(self._sessions) - self.max_sessions + 1)
+            client = await client_factory()
+            pooled = PooledMCPSession(key, client, idle_timeout=self.idle_timeout)
+            pooled.on_closed = self._remove
+            # register before connecting so a session that closes straight away removes itself
+            self._sessions[key] = pooled
+            try:
+                await pooled.start()
+            except BaseException:
+                self._remove(pooled)
+                raise
+            return pooled
+
+    async def _get_live_session(self, key: MCPSessionKey) -> Optional[PooledMCPSession]:
+        pooled = self._sessions.get(key)
+        if pooled is None:
+            return None
+        if not await pooled.wait_ready():
+            return None
+        if not pooled.is_alive:
+            self._remove(pooled)
+            return None
+        # only ping sessions that haven't been used recently, an active session proves itself on every call
+        now = time.monotonic()
+        if pooled.in_use == 0 and now - max(pooled.last_used, pooled.last_health_check) > self.health_check_interval:
+            if not await pooled.check_health(timeout=tool_settings.mcp_connect_to_server_timeout):
+                return None
+        return pooled
+
+    def _close_least_recently_used(self, count: int) -> None:
+        """Close up to `count` idle sessions, least recently used first. Busy sessions are left for `run` to close."""
+        idle = sorted((pooled for pooled in self._sessions.values() if pooled.is_idle), key=lambda pooled: pooled.last_used)
+        for pooled in idle[:count]:
+            logger.debug(f"Closing MCP session for server {pooled.key.server_id}, pool is at {self.max_sessions} sessions")
+            self._remove(pooled)
+            pooled.close()
+
+    def _remove(self, pooled: PooledMCPSession) -> None:
+        if self._sessions.get(pooled.key) is pooled:
+            del self._sessions[pooled.key]
+            lock = self._connect_locks.get(pooled.key)
+            if lock is not None and not lock.locked():
+                del self._connect_locks[pooled.key]
+
+    def evict(self, server_id: Optional[str] = None, server_url: Optional[str] = None, user_id: Optional[str] = None) -> int:
+        """Close sessions matching all of the given filters, e.g. after a server's config or OAuth credentials change."""
+        evicted = 0
+        for key, pooled in list(self._sessions.items()):
+            if server_id is not None and key.server_id != server_id:
+                continue
+            if server_url is not None and key.server_url != server_url:
+                continue
+            if user_id is not None and key.user_id != user_id:
+                continue
+            self._remove(pooled)
+            pooled.close()
+            evicted += 1
+        return evicted
+
+    async def aclose(self) -> None:
+        """Close every session and wait for their connections to be torn down."""
+        sessions = list(self._sessions.values())
+        self._sessions.clear()
+        for pooled in sessions:
+            pooled.close()
+        await asyncio.gather(*(pooled.wait_closed() for pooled in sessions))
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+# Sessions are bound to the event loop they were connected on, so keep one pool per loop
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, MCPSessionPool]" = weakref.WeakKeyDictionary()
+
+
+def get_mcp_session_pool() -> Optional[MCPSessionPool]:
+    """Get the session pool for the running event loop, or None if pooling is disabled."""
+    if not tool_settings.mcp_session_pool_enabled:
+        return None
+
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        pool = MCPSessionPool(
+            max_concurrency=tool_settings.mcp_session_max_concurrency,
+            idle_timeout=tool_settings.mcp_session_idle_timeout,
+            max_sessions=tool_settings.mcp_session_max_sessions,
+        )
+        _pools[loop] = pool
+    return pool
@@ -39,6 +39,7 @@ from letta.schemas.secret import Secret, SecretDict
 from letta.schemas.tool import Tool as PydanticTool, ToolCreate, ToolUpdate
 from letta.schemas.user import User as PydanticUser
 from letta.server.db import db_registry
+from letta.services.mcp.session_pool import MCPSessionKey, get_mcp_session_pool
 from letta.services.mcp.sse_client import MCP_CONFIG_TOPLEVEL_KEY, AsyncSSEMCPClient
 from letta.services.mcp.stdio_client import AsyncStdioMCPClient
 from letta.services.mcp.streamable_http_client import AsyncStreamableHTTPMCPClient
@@ -65,11 +66,21 @@ class MCPManager:
             mcp_server_id = await self.get_mcp_server_id_by_name(mcp_server_name, actor=actor)
             mcp_config = await self.get_mcp_server_by_id_async(mcp_server_id, actor=actor)
             server_config = mcp_config.to_config()
-            mcp_client = await self.get_mcp_client(server_config, actor, agent_id=agent_id)
-            await mcp_client.connect_to_server()
 
-            # list tools
-            tools = await mcp_client.list_tools()
+            pool = get_mcp_session_pool()
+            if pool is not None:
+                key = MCPSessionKey.create(mcp_server_id, server_config, user_id=actor.id, agent_id=agent_id)
+                tools = await pool.run(
+                    key,
+                    client_factory=lambda: self.get_mcp_client(server_config, actor, agent_id=agent_id),
+                    fn=lambda client: client.list_tools(),
+                    idempotent=True,
+                )
+            else:
+                mcp_client = await self.get_mcp_client(server_config, actor, agent_id=agent_id)
+                await mcp_client.connect_to_server()
+                tools = await mcp_client.list_tools()
+
             # Add health information to each tool
             for tool in tools:
                 if tool.inputSchema:
@@ -115,12 +126,23 @@ class MCPManager:
                 if mcp_server_name not in mcp_config:
                     raise ValueError(f"MCP server {mcp_server_name} not found in config.")
                 server_config = mcp_config[mcp_server_name]
+                mcp_server_id = f"config:{mcp_server_name}"
+
+            pool = get_mcp_session_pool()
+            if pool is not None:
+                # the key includes a hash of the resolved config, so edits to the server or its env vars get a new session
+                key = MCPSessionKey.create(mcp_server_id, server_config, user_id=actor.id, agent_id=agent_id)
+                result, success = await pool.run(
+                    key,
+                    client_factory=lambda: self.get_mcp_client(server_config, actor, agent_id=agent_id),
+                    # never replayed: the server may have run the tool before the connection dropped
+                    fn=lambda client: client.execute_tool(tool_name, tool_args),
+                )
+            else:
+                mcp_client = await self.get_mcp_client(server_config, actor, agent_id=agent_id)
+                await mcp_client.connect_to_server()
+                result, success = await mcp_client.execute_tool(tool_name, tool_args)
 
-            mcp_client = await self.get_mcp_client(server_config, actor, agent_id=agent_id)
-            await mcp_client.connect_to_server()
-
-            # call tool
-            result, success = await mcp_client.execute_tool(tool_name, tool_args)
             logger.info(f"MCP Result: {result}, Success: {success}")
             # TODO: change to pydantic tool
             return result, success
@@ -516,6 +538,8 @@ class MCPManager:
                 setattr(mcp_server, key, value)
 
             mcp_server = await mcp_server.update_async(db_session=session, actor=actor)
+            # close pooled sessions so stdio processes for the old config don't linger until they go idle
+            self._evict_pooled_sessions(server_id=mcp_server_id)
 
             # Save the updated tool to the database mcp_server = await mcp_server.update_async(db_session=session, actor=actor)
             return mcp_server.to_pydantic()
@@ -638,6 +662,7 @@ class MCPManager:
                 )
 
                 await session.commit()
+                self._evict_pooled_sessions(server_id=mcp_server_id)
             except NoResultFound:
                 await session.rollback()
                 raise ValueError(f"MCP server with id {mcp_server_id} not found.")
@@ -750,6 +775,12 @@ class MCPManager:
         else:
             raise ValueError(f"Unsupported server config type: {type(server_config)}")
 
+    def _evict_pooled_sessions(self, server_id: Optional[str] = None, server_url: Optional[str] = None, user_id: Optional[str] = None):
+        """Close pooled MCP sessions whose server or credentials have changed."""
+        pool = get_mcp_session_pool()
+        if pool is not None:
+            pool.evict(server_id=server_id, server_url=server_url, user_id=user_id)
+
     # OAuth-related methods
     def _oauth_orm_to_pydantic(self, oauth_session: MCPOAuth) -> MCPOAuthSession:
         """
@@ -940,6 +971,10 @@ class MCPManager:
 
             oauth_session = await oauth_session.update_async(db_session=session, actor=actor)
 
+            # a new authorization replaces the credentials pooled sessions were connected with, token refreshes don't
+            if session_update.status is not None:
+                self._evict_pooled_sessions(server_url=oauth_session.server_url, user_id=actor.id)
+
             return self._oauth_orm_to_pydantic(oauth_session)
 
     @enforce_types
@@ -949,6 +984,7 @@ class MCPManager:
             try:
                 oauth_session = await MCPOAuth.read_async(db_session=session, identifier=session_id, actor=actor)
                 await oauth_session.hard_delete_async(db_session=session, actor=actor)
+                self._evict_pooled_sessions(server_url=oauth_session.server_url, user_id=actor.id)
             except NoResultFound:
                 raise ValueError(f"OAuth session with id {session_id} not found.")
 
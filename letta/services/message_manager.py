@@ -4,8 +4,10 @@ from datetime import datetime
 from typing import List, Optional, Sequence, Tuple
 
 from sqlalchemy import delete, exists, func, select, text
+from sqlalchemy.orm import aliased
 
 from letta.constants import CONVERSATION_SEARCH_TOOL_NAME, DEFAULT_MESSAGE_TOOL, DEFAULT_MESSAGE_TOOL_KWARG
+from letta.helpers.decorators import invalidate_single_flight, invalidate_single_flight_nowait, single_flight
 from letta.log import get_logger
 from letta.orm.agent import Agent as AgentModel
 from letta.orm.errors import NoResultFound
@@ -25,6 +27,115 @@ from letta.utils import enforce_types, fire_and_forget
 logger = get_logger(__name__)
 
 
+def _list_messages_key(
+    self,
+    agent_id: str,
+    actor: PydanticUser,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    query_text: Optional[str] = None,
+    roles: Optional[Sequence[MessageRole]] = None,
+    limit: Optional[int] = 50,
+    ascending: bool = True,
+    group_id: Optional[str] = None,
+    include_err: Optional[bool] = None,
+) -> str:
+    roles = ",".join(sorted(getattr(role, "value", role) for role in roles)) if roles else None
+    return f"{actor.organization_id}:{agent_id}:{after}:{before}:{query_text}:{roles}:{limit}:{ascending}:{group_id}:{include_err}"
+
+
+# Columns a PydanticMessage is built from. History pages select only these rather than ORM instances, which skips the
+# identity map and the eager load of every message's step.
+_MESSAGE_HISTORY_COLUMNS = (
+    *(getattr(MessageModel, name) for name in PydanticMessage.model_fields if name in MessageModel.__table__.c),
+    MessageModel.text,
+    MessageModel._created_by_id.label("created_by_id"),
+    MessageModel._last_updated_by_id.label("last_updated_by_id"),
+)
+
+
+def _message_from_row(row) -> PydanticMessage:
+    """Same result as `MessageModel.to_pydantic()`, for a row of `_MESSAGE_HISTORY_COLUMNS`."""
+    message = PydanticMessage.model_validate(row)
+    if row.text and not message.content:
+        message.content = [TextContent(text=row.text)]
+    if not row.tool_calls:
+        message.tool_calls = None
+    return message
+
+
+def _message_history_query(
+    agent_id: str,
+    after: Optional[str],
+    before: Optional[str],
+    query_text: Optional[str],
+    roles: Optional[Sequence[MessageRole]],
+    limit: Optional[int],
+    ascending: bool,
+    group_id: Optional[str],
+    include_err: Optional[bool],
+):
+    """A page of an agent's messages, keyset paginated on sequence_id.
+
+    The cursors are resolved to their sequence_id inside the statement, and the page is picked from the
+    (agent_id, sequence_id) index, which carries the id, role, is_err and group_id columns, before the page's rows are
+    read. Deep pages therefore cost the same as the first one.
+    """
+    page = select(MessageModel.id, MessageModel.sequence_id).where(MessageModel.agent_id == agent_id)
+
+    # If group_id is provided, filter messages by group_id.
+    if group_id:
+        page = page.where(MessageModel.group_id == group_id)
+
+    if not include_err:
+        page = page.where((MessageModel.is_err == False) | (MessageModel.is_err.is_(None)))
+
+    # If query_text is provided, filter messages using database-specific JSON search.
+    if query_text:
+        if settings.database_engine is DatabaseChoice.POSTGRES:
+            # PostgreSQL: Use json_array_elements and ILIKE
+            content_element = func.json_array_elements(MessageModel.content).alias("content_element")
+            page = page.where(
+                exists(
+                    select(1)
+                    .select_from(content_element)
+                    .where(text("content_element->>'type' = 'text' AND content_element->>'text' ILIKE :query_text"))
+                    .params(query_text=f"%{query_text}%")
+                )
+            )
+        else:
+            # SQLite: Use JSON_EXTRACT with individual array indices for case-insensitive search
+            # Since SQLite doesn't support $[*] syntax, we'll use a different approach
+            page = page.where(text("JSON_EXTRACT(content, '$') LIKE :query_text")).params(query_text=f"%{query_text}%")
+
+    # If role(s) are provided, filter messages by those roles.
+    if roles:
+        page = page.where(MessageModel.role.in_([r.value for r in roles]))
+
+    # Only messages after/before the cursors, a cursor that doesn't exist matches nothing
+    cursor = aliased(MessageModel)
+    if after:
+        page = page.where(MessageModel.sequence_id > select(cursor.sequence_id).where(cursor.id == after).scalar_subquery())
+    if before:
+        page = page.where(MessageModel.sequence_id < select(cursor.sequence_id).where(cursor.id == before).scalar_subquery())
+
+    order = MessageModel.sequence_id.asc() if ascending else MessageModel.sequence_id.desc()
+    page = page.order_by(order).limit(limit).subquery()
+
+    return (
+        select(*_MESSAGE_HISTORY_COLUMNS)
+        .join(page, MessageModel.id == page.c.id)
+        .order_by(page.c.sequence_id.asc() if ascending else page.c.sequence_id.desc())
+    )
+
+
+def _missing_cursor_error(agent_id: str, after: Optional[str], before: Optional[str], found_ids) -> Optional[NoResultFound]:
+    for cursor in (after, before):
+        if cursor and cursor not in found_ids:
+            return NoResultFound(f"No message found with id '{cursor}' for agent '{agent_id}'.")
+    return None
+
+
 class MessageManager:
     """Manager class to handle business logic related to Messages."""
 
@@ -275,6 +386,7 @@ class MessageManager:
             msg_data["organization_id"] = actor.organization_id
             msg = MessageModel(**msg_data)
             msg.create(session, actor=actor)  # Persist to database
+            invalidate_single_flight_nowait(msg.agent_id)
             return msg.to_pydantic()
 
     def _create_many_preprocess(self, pydantic_msgs: List[PydanticMessage], actor: PydanticUser) -> List[MessageModel]:
@@ -305,6 +417,7 @@ class MessageManager:
         orm_messages = self._create_many_preprocess(pydantic_msgs, actor)
         with db_registry.session() as session:
             created_messages = MessageModel.batch_create(orm_messages, session, actor=actor)
+            invalidate_single_flight_nowait(msg.agent_id for msg in pydantic_msgs)
             return [msg.to_pydantic() for msg in created_messages]
 
     @enforce_types
@@ -363,6 +476,7 @@ class MessageManager:
             created_messages = await MessageModel.batch_create_async(orm_messages, session, actor=actor, no_commit=True, no_refresh=True)
             result = [msg.to_pydantic() for msg in created_messages]
             await session.commit()
+            await invalidate_single_flight(msg.agent_id for msg in result)
 
             # embed messages in turbopuffer if enabled
             from letta.helpers.tpuf_client import should_use_tpuf_for_messages
@@ -533,6 +647,7 @@ class MessageManager:
 
             message = self._update_message_by_id_impl(message_id, message_update, actor, message)
             message.update(db_session=session, actor=actor)
+            invalidate_single_flight_nowait(message.agent_id)
             return message.to_pydantic()
 
     @enforce_types
@@ -570,6 +685,7 @@ class MessageManager:
             await message.update_async(db_session=session, actor=actor, no_commit=True, no_refresh=True)
             pydantic_message = message.to_pydantic()
             await session.commit()
+            await invalidate_single_flight(pydantic_message.agent_id)
 
             # update message in turbopuffer if enabled (delete and re-insert)
             from letta.helpers.tpuf_client import should_use_tpuf_for_messages
@@ -666,6 +782,7 @@ class MessageManager:
                     actor=actor,
                 )
                 msg.hard_delete(session, actor=actor)
+                invalidate_single_flight_nowait(msg.agent_id)
                 # Note: Turbopuffer deletion requires async, use delete_message_by_id_async for full deletion
             except NoResultFound:
                 raise ValueError(f"Message with id {message_id} not found.")
@@ -683,6 +800,7 @@ class MessageManager:
                 )
                 agent_id = msg.agent_id
                 await msg.hard_delete_async(session, actor=actor)
+                await invalidate_single_flight(agent_id)
 
                 # delete from turbopuffer if enabled
                 from letta.helpers.tpuf_client import TurbopufferClient, should_use_tpuf_for_messages
@@ -827,67 +945,32 @@ class MessageManager:
             # Permission check: raise if the agent doesn't exist or actor is not allowed.
             AgentModel.read(db_session=session, identifier=agent_id, actor=actor)
 
-            # Build a query that directly filters the Message table by agent_id.
-            query = session.query(MessageModel).filter(MessageModel.agent_id == agent_id)
-
-            # If group_id is provided, filter messages by group_id.
-            if group_id:
-                query = query.filter(MessageModel.group_id == group_id)
-
-            # If query_text is provided, filter messages using database-specific JSON search.
-            if query_text:
-                if settings.database_engine is DatabaseChoice.POSTGRES:
-                    # PostgreSQL: Use json_array_elements and ILIKE
-                    content_element = func.json_array_elements(MessageModel.content).alias("content_element")
-                    query = query.filter(
-                        exists(
-                            select(1)
-                            .select_from(content_element)
-                            .where(text("content_element->>'type' = 'text' AND content_element->>'text' ILIKE :query_text"))
-                            .params(query_text=f"%{query_text}%")
-                        )
-                    )
-                else:
-                    # SQLite: Use JSON_EXTRACT with individual array indices for case-insensitive search
-                    # Since SQLite doesn't support $[*] syntax, we'll use a different approach
-                    query = query.filter(text("JSON_EXTRACT(content, '$') LIKE :query_text")).params(query_text=f"%{query_text}%")
-
-            # If role(s) are provided, filter messages by those roles.
-            if roles:
-                role_values = [r.value for r in roles]
-                query = query.filter(MessageModel.role.in_(role_values))
-
-            # Apply 'after' pagination if specified.
-            if after:
-                after_ref = session.query(MessageModel.sequence_id).filter(MessageModel.id == after).one_or_none()
-                if not after_ref:
-                    raise NoResultFound(f"No message found with id '{after}' for agent '{agent_id}'.")
-                # Filter out any messages with a sequence_id <= after_ref.sequence_id
-                query = query.filter(MessageModel.sequence_id > after_ref.sequence_id)
-
-            # Apply 'before' pagination if specified.
-            if before:
-                before_ref = session.query(MessageModel.sequence_id).filter(MessageModel.id == before).one_or_none()
-                if not before_ref:
-                    raise NoResultFound(f"No message found with id '{before}' for agent '{agent_id}'.")
-                # Filter out any messages with a sequence_id >= before_ref.sequence_id
-                query = query.filter(MessageModel.sequence_id < before_ref.sequence_id)
-
-            # Apply ordering based on the ascending flag.
-            if ascending:
-                query = query.order_by(MessageModel.sequence_id.asc())
-            else:
-                query = query.order_by(MessageModel.sequence_id.desc())
-
-            # Limit the number of results.
-            query = query.limit(limit)
-
-            # Execute and convert each Message to its Pydantic representation.
-            results = query.all()
-            return [msg.to_pydantic() for msg in results]
+            query = _message_history_query(
+                agent_id,
+                after=after,
+                before=before,
+                query_text=query_text,
+                roles=roles,
+                limit=limit,
+                ascending=ascending,
+                group_id=group_id,
+                include_err=True,
+            )
+            rows = session.execute(query).all()
+
+            # An empty page may be due to a cursor that doesn't exist
+            if not rows and (after or before):
+                found_ids = set(session.execute(select(MessageModel.id).where(MessageModel.id.in_([after, before]))).scalars())
+                error = _missing_cursor_error(agent_id, after, before, found_ids)
+                if error:
+                    raise error
+            return [_message_from_row(row) for row in rows]
 
     @enforce_types
     @trace_method
+    @single_flight(
+        key_func=_list_messages_key, scope_func=lambda self, agent_id, *args, **kwargs: agent_id, model_class=List[PydanticMessage]
+    )
     async def list_messages_for_agent_async(
         self,
         agent_id: str,
@@ -932,72 +1015,26 @@ class MessageManager:
             # Permission check: raise if the agent doesn't exist or actor is not allowed.
             await validate_agent_exists_async(session, agent_id, actor)
 
-            # Build a query that directly filters the Message table by agent_id.
-            query = select(MessageModel).where(MessageModel.agent_id == agent_id)
-
-            # If group_id is provided, filter messages by group_id.
-            if group_id:
-                query = query.where(MessageModel.group_id == group_id)
-
-            if not include_err:
-                query = query.where((MessageModel.is_err == False) | (MessageModel.is_err.is_(None)))
-
-            # If query_text is provided, filter messages using database-specific JSON search.
-            if query_text:
-                if settings.database_engine is DatabaseChoice.POSTGRES:
-                    # PostgreSQL: Use json_array_elements and ILIKE
-                    content_element = func.json_array_elements(MessageModel.content).alias("content_element")
-                    query = query.where(
-                        exists(
-                            select(1)
-                            .select_from(content_element)
-                            .where(text("content_element->>'type' = 'text' AND content_element->>'text' ILIKE :query_text"))
-                            .params(query_text=f"%{query_text}%")
-                        )
-                    )
-                else:
-                    # SQLite: Use JSON_EXTRACT with individual array indices for case-insensitive search
-                    # Since SQLite doesn't support $[*] syntax, we'll use a different approach
-                    query = query.where(text("JSON_EXTRACT(content, '$') LIKE :query_text")).params(query_text=f"%{query_text}%")
-
-            # If role(s) are provided, filter messages by those roles.
-            if roles:
-                role_values = [r.value for r in roles]
-                query = query.where(MessageModel.role.in_(role_values))
-
-            # Apply 'after' pagination if specified.
-            if after:
-                after_query = select(MessageModel.sequence_id).where(MessageModel.id == after)
-                after_result = await session.execute(after_query)
-                after_ref = after_result.one_or_none()
-                if not after_ref:
-                    raise NoResultFound(f"No message found with id '{after}' for agent '{agent_id}'.")
-                # Filter out any messages with a sequence_id <= after_ref.sequence_id
-                query = query.where(MessageModel.sequence_id > after_ref.sequence_id)
-
-            # Apply 'before' pagination if specified.
-            if before:
-                before_query = select(MessageModel.sequence_id).where(MessageModel.id == before)
-                before_result = await session.execute(before_query)
-                before_ref = before_result.one_or_none()
-                if not before_ref:
-                    raise NoResultFound(f"No message found with id '{before}' for agent '{agent_id}'.")
-                # Filter out any messages with a sequence_id >= before_ref.sequence_id
-                query = query.where(MessageModel.sequence_id < before_ref.sequence_id)
-
-            # Apply ordering based on the ascending flag.
-            if ascending:
-                query = query.order_by(MessageModel.sequence_id.asc())
-            else:
-                query = query.order_by(MessageModel.sequence_id.desc())
-
-            # Limit the number of results.
-            query = query.limit(limit)
-
-            # Execute and convert each Message to its Pydantic representation.
-            result = await session.execute(query)
-            results = result.scalars().all()
-            return [msg.to_pydantic() for msg in results]
+            query = _message_history_query(
+                agent_id,
+                after=after,
+                before=before,
+                query_text=query_text,
+                roles=roles,
+                limit=limit,
+                ascending=ascending,
+                group_id=group_id,
+                include_err=include_err,
+            )
+            rows = (await session.execute(query)).all()
+
+            # An empty page may be due to a cursor that doesn't exist
+            if not rows and (after or before):
+                result = await session.execute(select(MessageModel.id).where(MessageModel.id.in_([after, before])))
+                error = _missing_cursor_error(agent_id, after, before, set(result.scalars()))
+                if error:
+                    raise error
+            return [_message_from_row(row) for row in rows]
 
     @enforce_types
     @trace_method
@@ -1026,6 +1063,7 @@ class MessageManager:
 
             # 4) commit once
             await session.commit()
+            await invalidate_single_flight(agent_id)
 
             # 5) delete from turbopuffer if enabled
             from letta.helpers.tpuf_client import TurbopufferClient, should_use_tpuf_for_messages
@@ -1060,19 +1098,17 @@ class MessageManager:
             return 0
 
         async with db_registry.async_session() as session:
-            # get agent_ids BEFORE deleting (for turbopuffer)
-            agent_ids = []
+            # get agent_ids BEFORE deleting (for turbopuffer and invalidating their reads)
             from letta.helpers.tpuf_client import TurbopufferClient, should_use_tpuf_for_messages
 
-            if should_use_tpuf_for_messages():
-                agent_query = (
-                    select(MessageModel.agent_id)
-                    .where(MessageModel.id.in_(message_ids))
-                    .where(MessageModel.organization_id == actor.organization_id)
-                    .distinct()
-                )
-                agent_result = await session.execute(agent_query)
-                agent_ids = [row[0] for row in agent_result.fetchall() if row[0]]
+            agent_query = (
+                select(MessageModel.agent_id)
+                .where(MessageModel.id.in_(message_ids))
+                .where(MessageModel.organization_id == actor.organization_id)
+                .distinct()
+            )
+            agent_result = await session.execute(agent_query)
+            agent_ids = [row[0] for row in agent_result.fetchall() if row[0]]
 
             # issue a CORE DELETE against the mapped class for specific message IDs
             stmt = delete(MessageModel).where(MessageModel.id.in_(message_ids)).where(MessageModel.organization_id == actor.organization_id)
@@ -1080,6 +1116,7 @@ class MessageManager:
 
             # commit once
             await session.commit()
+            await invalidate_single_flight(agent_ids)
 
             # delete from turbopuffer if enabled
             if should_use_tpuf_for_messages() and agent_ids:
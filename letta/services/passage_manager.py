@@ -4,12 +4,13 @@ from functools import lru_cache
 from typing import Dict, List, Optional
 
 from openai import AsyncOpenAI, OpenAI
-from sqlalchemy import func, select
+from sqlalchemy import delete, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from letta.constants import MAX_EMBEDDING_DIM
 from letta.embeddings import parse_and_chunk_text
 from letta.helpers.decorators import async_redis_cache
+from letta.helpers.embedding_cache import get_or_create_embeddings
 from letta.llm_api.llm_client import LLMClient
 from letta.log import get_logger
 from letta.orm import ArchivesAgents
@@ -570,10 +571,6 @@ class PassageManager:
         """
 
         embedding_chunk_size = agent_state.embedding_config.embedding_chunk_size
-        embedding_client = LLMClient.create(
-            provider_type=agent_state.embedding_config.embedding_endpoint_type,
-            actor=actor,
-        )
 
         # Get or create the default archive for the agent
         archive = await self.archive_manager.get_or_create_default_archive_for_agent_async(
@@ -587,7 +584,7 @@ class PassageManager:
 
         try:
             # Generate embeddings for all chunks using the new async API
-            embeddings = await embedding_client.request_embeddings(text_chunks, agent_state.embedding_config)
+            embeddings = await self._generate_embeddings_concurrent(text_chunks, agent_state.embedding_config, actor=actor)
 
             passages = []
 
@@ -644,14 +641,18 @@ class PassageManager:
             raise e
 
     async def _generate_embeddings_concurrent(self, text_chunks: List[str], embedding_config, actor: PydanticUser) -> List[List[float]]:
-        """Generate embeddings for all text chunks concurrently using LLMClient"""
+        """Generate embeddings for all text chunks concurrently using LLMClient, reusing cached embeddings of identical text"""
 
         embedding_client = LLMClient.create(
             provider_type=embedding_config.embedding_endpoint_type,
             actor=actor,
         )
 
-        embeddings = await embedding_client.request_embeddings(text_chunks, embedding_config)
+        embeddings = await get_or_create_embeddings(
+            texts=text_chunks,
+            embedding_config=embedding_config,
+            embed=lambda texts: embedding_client.request_embeddings(texts, embedding_config),
+        )
         return embeddings
 
     @enforce_types
@@ -1055,6 +1056,16 @@ class PassageManager:
             await SourcePassage.bulk_hard_delete_async(db_session=session, identifiers=[p.id for p in passages], actor=actor)
             return True
 
+    @enforce_types
+    @trace_method
+    async def delete_source_passages_by_file_id_async(self, file_id: str, actor: PydanticUser) -> None:
+        """Hard delete all source passages created for a file."""
+        async with db_registry.async_session() as session:
+            await session.execute(
+                delete(SourcePassage).where(SourcePassage.file_id == file_id).where(SourcePassage.organization_id == actor.organization_id)
+            )
+            await session.commit()
+
     # DEPRECATED - Use specific methods above
     @enforce_types
     @trace_method
@@ -1220,6 +1231,27 @@ class PassageManager:
             passages = result.scalars().all()
             return [p.to_pydantic() for p in passages]
 
+    @enforce_types
+    @trace_method
+    async def list_passages_by_file_ids_async(self, file_ids: List[str], actor: PydanticUser) -> Dict[str, List[PydanticPassage]]:
+        """
+        List the source passages of several files in a single query, grouped by file_id in the order they were created.
+        """
+        passages_by_file_id = {file_id: [] for file_id in file_ids}
+        if not file_ids:
+            return passages_by_file_id
+
+        async with db_registry.async_session() as session:
+            result = await session.execute(
+                select(SourcePassage)
+                .where(SourcePassage.file_id.in_(file_ids))
+                .where(SourcePassage.organization_id == actor.organization_id)
+                .order_by(SourcePassage.created_at.asc(), SourcePassage.id.asc())
+            )
+            for passage in result.scalars().all():
+                passages_by_file_id[passage.file_id].append(passage.to_pydantic())
+            return passages_by_file_id
+
     @enforce_types
     @trace_method
     async def get_unique_tags_for_archive_async(
@@ -0,0 +1,131 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from letta.schemas.memory import Memory
+from letta.settings import settings
+
+
+class _SectionCache(OrderedDict):
+    """Rendered block and file sections, least recently used first."""
+
+    def __init__(self, max_size: int):
+        super().__init__()
+        self.max_size = max_size
+
+    def get(self, key, default=None):
+        if key not in self:
+            return default
+        self.move_to_end(key)
+        return self[key]
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        while len(self) > self.max_size:
+            self.popitem(last=False)
+
+
+@dataclass
+class _AssembledPrompt:
+    fingerprint: tuple
+    compiled_memory: str
+    # the system message compiled_memory was last checked against or written to
+    system_message_id: Optional[str] = None
+    system_message_text: Optional[str] = None
+
+
+def _fingerprint(memory: Memory, tool_usage_rules: Any, sources: Optional[list], max_files_open: Optional[int]) -> tuple:
+    """Everything `Memory.compile` reads, two calls with equal fingerprints render the same string."""
+    agent_type = memory.agent_type.value if hasattr(memory.agent_type, "value") else memory.agent_type
+    blocks = tuple((b.label, b.description, b.limit, b.read_only, b.value) for b in memory.blocks)
+    rules = None
+    if tool_usage_rules is not None:
+        rules = (getattr(tool_usage_rules, "description", None), getattr(tool_usage_rules, "value", None))
+    directories = None
+    if sources:
+        directories = (
+            max_files_open,
+            tuple(
+                (getattr(s, "id", None), getattr(s, "name", ""), getattr(s, "description", None), getattr(s, "instructions", None))
+                for s in sources
+            ),
+            tuple((fb.source_id, fb.label, fb.description, fb.limit, fb.read_only, fb.value) for fb in memory.file_blocks),
+        )
+    return agent_type, blocks, rules, directories
+
+
+class PromptAssemblyCache:
+    """Remembers the compiled memory of each agent and the system message it was last found in.
+
+    An agent whose blocks, attached sources, open files and tool rules are unchanged since the last step gets the
+    previously compiled memory back without rendering anything. When something did change, only the blocks and files
+    that changed are rendered again, the other sections come from a shared cache of rendered sections.
+
+    Once a system message is known to contain an agent's compiled memory, the same message is not searched for it
+    again until either of them changes.
+    """
+
+    def __init__(self, max_agents: Optional[int] = None, max_sections: Optional[int] = None):
+        self._max_agents = max_agents
+        self._agents: "OrderedDict[str, _AssembledPrompt]" = OrderedDict()
+        self._sections = _SectionCache(max_sections if max_sections is not None else settings.prompt_assembly_cache_max_sections)
+
+    @property
+    def max_agents(self) -> int:
+        return self._max_agents if self._max_agents is not None else settings.prompt_assembly_cache_size
+
+    def compile_memory(
+        self,
+        agent_id: str,
+        memory: Memory,
+        tool_usage_rules: Any = None,
+        sources: Optional[list] = None,
+        max_files_open: Optional[int] = None,
+    ) -> str:
+        """Same result as `memory.compile(...)`."""
+        if not settings.prompt_assembly_cache_enabled:
+            return memory.compile(tool_usage_rules=tool_usage_rules, sources=sources, max_files_open=max_files_open)
+
+        fingerprint = _fingerprint(memory, tool_usage_rules, sources, max_files_open)
+        entry = self._agents.get(agent_id)
+        if entry is not None and entry.fingerprint == fingerprint:
+            self._agents.move_to_end(agent_id)
+            return entry.compiled_memory
+
+        compiled_memory = memory.compile(
+            tool_usage_rules=tool_usage_rules, sources=sources, max_files_open=max_files_open, section_cache=self._sections
+        )
+        self._agents[agent_id] = _AssembledPrompt(fingerprint=fingerprint, compiled_memory=compiled_memory)
+        self._agents.move_to_end(agent_id)
+        while len(self._agents) > self.max_agents:
+            self._agents.popitem(last=False)
+        return compiled_memory
+
+    def is_current(self, agent_id: str, compiled_memory: str, system_message_id: str, system_message_text: str) -> bool:
+        """Whether `system_message_text` was already found to be up to date with `compiled_memory`."""
+        entry = self._agents.get(agent_id)
+        return (
+            entry is not None
+            and entry.compiled_memory == compiled_memory
+            and entry.system_message_id == system_message_id
+            and entry.system_message_text == system_message_text
+        )
+
+    def mark_current(self, agent_id: str, compiled_memory: str, system_message_id: str, system_message_text: str) -> None:
+        """Record that `system_message_text` is up to date with `compiled_memory`, found so or just written."""
+        entry = self._agents.get(agent_id)
+        if entry is not None and entry.compiled_memory == compiled_memory:
+            entry.system_message_id = system_message_id
+            entry.system_message_text = system_message_text
+
+    def clear(self) -> None:
+        self._agents.clear()
+        self._sections.clear()
+
+
+_prompt_assembly_cache = PromptAssemblyCache()
+
+
+def get_prompt_assembly_cache() -> PromptAssemblyCache:
+    return _prompt_assembly_cache
@@ -0,0 +1,169 @@
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Literal, Optional, Tuple, Union
+
+from letta.log import get_logger
+from letta.schemas.embedding_config import EmbeddingConfig
+from letta.schemas.llm_config import LLMConfig
+from letta.schemas.providers import Provider
+from letta.settings import settings
+
+logger = get_logger(__name__)
+
+ModelKind = Literal["llm", "embedding"]
+ModelConfig = Union[LLMConfig, EmbeddingConfig]
+CatalogKey = Tuple[ModelKind, str]
+
+
+@dataclass
+class _CatalogEntry:
+    # provider settings the models were listed with
+    fingerprint: Any
+    models: List[ModelConfig]
+    fetched_at: float
+    by_handle: Dict[str, List[ModelConfig]] = field(default_factory=dict)
+    by_model: Dict[str, List[ModelConfig]] = field(default_factory=dict)
+
+    def __post_init__(self):
+        for model in self.models:
+            self.by_handle.setdefault(model.handle, []).append(model)
+            model_name = model.model if isinstance(model, LLMConfig) else model.embedding_model
+            self.by_model.setdefault(model_name, []).append(model)
+
+
+def _provider_key(provider: Provider) -> str:
+    # providers configured through the environment have no id, but their names are unique
+    return provider.id or f"base:{provider.name}"
+
+
+def _fingerprint(provider: Provider) -> Any:
+    return provider.updated_at
+
+
+class ProviderModelCatalog:
+    """Cache of the LLM and embedding models each provider offers, indexed by handle and model name.
+
+    A provider's model list is fetched at most once per `provider_catalog_ttl_seconds`. After that the stale list is
+    still served while a background task refreshes it, for up to `provider_catalog_max_stale_seconds` more. Lookups
+    only wait for the provider API when it was never listed, when its settings changed, or when its list is older than
+    that. Concurrent lookups that miss share one request, and a failed request falls back to the stale list.
+
+    Entries are keyed by provider id, or by name for providers configured through the environment, and are checked
+    against the provider's `updated_at`, so edits made through any server process are seen on the next lookup. At most
+    `provider_catalog_max_providers` model lists are kept, least recently used first out.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: Optional[float] = None,
+        max_stale_seconds: Optional[float] = None,
+        max_providers: Optional[int] = None,
+    ):
+        self._ttl_seconds = ttl_seconds
+        self._max_stale_seconds = max_stale_seconds
+        self._max_providers = max_providers
+        self._entries: "OrderedDict[CatalogKey, _CatalogEntry]" = OrderedDict()
+        self._inflight: Dict[Tuple[ModelKind, str, Any], asyncio.Task] = {}
+
+    @property
+    def ttl_seconds(self) -> float:
+        return self._ttl_seconds if self._ttl_seconds is not None else settings.provider_catalog_ttl_seconds
+
+    @property
+    def max_stale_seconds(self) -> float:
+        return self._max_stale_seconds if self._max_stale_seconds is not None else settings.provider_catalog_max_stale_seconds
+
+    @property
+    def max_providers(self) -> int:
+        return self._max_providers if self._max_providers is not None else settings.provider_catalog_max_providers
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def list_llm_models(self, provider: Provider) -> List[LLMConfig]:
+        entry = await self._get_entry(provider, "llm")
+        return [model.model_copy(deep=True) for model in entry.models]
+
+    async def list_embedding_models(self, provider: Provider) -> List[EmbeddingConfig]:
+        entry = await self._get_entry(provider, "embedding")
+        return [model.model_copy(deep=True) for model in entry.models]
+
+    async def find_llm_configs(self, provider: Provider, handle: str) -> List[LLMConfig]:
+        """Copies of the provider's LLM configs with `handle`, or failing that with the model name in `handle`."""
+        entry = await self._get_entry(provider, "llm")
+        configs = entry.by_handle.get(handle) or entry.by_model.get(handle.split("/", 1)[-1], [])
+        return [config.model_copy(deep=True) for config in configs]
+
+    async def find_embedding_configs(self, provider: Provider, handle: str) -> List[EmbeddingConfig]:
+        """Copies of the provider's embedding configs with `handle`."""
+        entry = await self._get_entry(provider, "embedding")
+        return [config.model_copy(deep=True) for config in entry.by_handle.get(handle, [])]
+
+    def invalidate(self, provider_id: str) -> None:
+        """Forget the model lists of a provider, e.g. after it was edited or deleted."""
+        for kind in ("llm", "embedding"):
+            self._entries.pop((kind, provider_id), None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def _get_entry(self, provider: Provider, kind: ModelKind) -> _CatalogEntry:
+        key = (kind, _provider_key(provider))
+        fingerprint = _fingerprint(provider)
+        entry = self._entries.get(key)
+        if entry is not None and entry.fingerprint == fingerprint:
+            age = time.monotonic() - entry.fetched_at
+            if age < self.ttl_seconds + self.max_stale_seconds:
+                if age >= self.ttl_seconds:
+                    self._start_fetch(key, provider, kind, fingerprint)
+                self._entries.move_to_end(key)
+                return entry
+        else:
+            entry = None
+
+        try:
+            # shielded so a caller timing out doesn't abort the request other callers share
+            return await asyncio.shield(self._start_fetch(key, provider, kind, fingerprint))
+        except Exception:
+            if entry is None:
+                raise
+            logger.info(f"Serving the stale {kind} model list of provider {provider.name}")
+            return entry
+
+    def _start_fetch(self, key: CatalogKey, provider: Provider, kind: ModelKind, fingerprint: Any) -> asyncio.Task:
+        inflight_key = (*key, fingerprint)
+        task = self._inflight.get(inflight_key)
+        if task is None:
+            # referenced from _inflight until done, and its result is what waiting lookups share
+            task = asyncio.create_task(self._fetch(key, provider, kind, fingerprint))
+            self._inflight[inflight_key] = task
+
+            def on_done(task: asyncio.Task) -> None:
+                self._inflight.pop(inflight_key, None)
+                if not task.cancelled() and task.exception() is not None:
+                    logger.warning(f"Failed to list {kind} models for provider {provider.name}: {task.exception()}")
+
+            task.add_done_callback(on_done)
+        return task
+
+    async def _fetch(self, key: CatalogKey, provider: Provider, kind: ModelKind, fingerprint: Any) -> _CatalogEntry:
+        if kind == "llm":
+            models = await provider.list_llm_models_async()
+        else:
+            models = await provider.list_embedding_models_async()
+        entry = _CatalogEntry(fingerprint=fingerprint, models=models, fetched_at=time.monotonic())
+
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_providers:
+            self._entries.popitem(last=False)
+        return entry
+
+
+_provider_catalog = ProviderModelCatalog()
+
+
+def get_provider_catalog() -> ProviderModelCatalog:
+    return _provider_catalog
@@ -0,0 +1,165 @@
+import asyncio
+import time
+import weakref
+from typing import TYPE_CHECKING, Awaitable, Callable, Optional
+
+from letta.data_sources.redis_client import AsyncRedisClient, NoopAsyncRedisClient, get_redis_client
+from letta.log import get_logger
+from letta.schemas.enums import JobStatus
+
+if TYPE_CHECKING:
+    from letta.schemas.user import User
+    from letta.services.job_manager import JobManager
+
+logger = get_logger(__name__)
+
+RUN_CANCELLATION_CHANNEL = "letta:run_cancellations"
+LISTENER_RECONNECT_DELAY_SECONDS = 1.0
+# How long each read of the subscription waits for a message, must stay below the Redis client's socket timeout
+LISTENER_POLL_TIMEOUT_SECONDS = 1.0
+
+
+class RunCancellationWatch:
+    """Local view of whether a run has been cancelled, shared by everything in this process working on the run."""
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.event = asyncio.Event()
+        # monotonic time the run's status was last read from the database, None if it never was
+        self.verified_at: Optional[float] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self.event.is_set()
+
+
+class RunCancellationBus:
+    """Pushes run cancellations to the agent loops and streams working on those runs.
+
+    Cancelling a run publishes its id on a Redis pub/sub channel, which every process listens on and turns into an
+    `asyncio.Event` for the run. While that subscription is up, a run only needs its status read from the database
+    once, so cancellations published before it started listening are seen. Without Redis, or while the subscription
+    is down, cancellations from this process still arrive instantly but other processes' are only seen by reading
+    the database, as before.
+    """
+
+    def __init__(self):
+        self._watches: "weakref.WeakValueDictionary[str, RunCancellationWatch]" = weakref.WeakValueDictionary()
+        self._listener_task: Optional[asyncio.Task] = None
+        self._listener_loop: Optional[asyncio.AbstractEventLoop] = None
+        # monotonic time the current Redis subscription was confirmed, None while not subscribed
+        self._subscribed_since: Optional[float] = None
+
+    def watch(self, run_id: str) -> RunCancellationWatch:
+        """Get the watch for a run. It stays registered for as long as a caller holds a reference to it."""
+        watch = self._watches.get(run_id)
+        if watch is None:
+            watch = RunCancellationWatch(run_id)
+            self._watches[run_id] = watch
+        return watch
+
+    async def is_cancelled(self, watch: RunCancellationWatch, check_db: Callable[[], Awaitable[bool]]) -> bool:
+        """Whether the run was cancelled, reading its status via `check_db` only if a cancellation could have been missed."""
+        if watch.cancelled:
+            return True
+
+        await self._ensure_listener()
+        if self._subscribed_since is not None and watch.verified_at is not None and watch.verified_at >= self._subscribed_since:
+            return False
+
+        # record the time before reading, anything published after it reaches us through the subscription
+        verified_at = time.monotonic()
+        if await check_db():
+            watch.event.set()
+            return True
+        watch.verified_at = verified_at
+        return False
+
+    async def is_run_cancelled(self, watch: RunCancellationWatch, job_manager: "JobManager", actor: "User") -> bool:
+        """`is_cancelled` for a run whose status is read from its job. A failed read counts as not cancelled."""
+
+        async def read_job_cancelled() -> bool:
+            try:
+                job = await job_manager.get_job_by_id_async(job_id=watch.run_id, actor=actor)
+                return job.status == JobStatus.cancelled
+            except Exception as e:
+                # the run or stream being checked keeps going, the next check reads the job again
+                logger.warning(f"Failed to check job cancellation status for job {watch.run_id}: {e}")
+                return False
+
+        return await self.is_cancelled(watch, check_db=read_job_cancelled)
+
+    async def publish(self, run_id: str) -> None:
+        """Signal that a run has been cancelled. Call after the cancelled status has been persisted."""
+        self._mark_cancelled(run_id)
+        redis_client = await get_redis_client()
+        if isinstance(redis_client, NoopAsyncRedisClient):
+            return
+        try:
+            await redis_client.publish(RUN_CANCELLATION_CHANNEL, run_id)
+        except Exception as e:
+            # runs in other processes still see the cancellation in the database
+            logger.warning(f"Failed to publish cancellation for run {run_id}: {e}")
+
+    def _mark_cancelled(self, run_id: str) -> None:
+        watch = self._watches.get(run_id)
+        if watch is not None:
+            watch.event.set()
+
+    async def _ensure_listener(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._listener_task is not None and not self._listener_task.done() and self._listener_loop is loop:
+            return
+        redis_client = await get_redis_client()
+        if isinstance(redis_client, NoopAsyncRedisClient):
+            return
+        if self._listener_task is None or self._listener_task.done() or self._listener_loop is not loop:
+            # a listener left behind by a closed event loop never got to clear its subscription state
+            self._subscribed_since = None
+            self._listener_loop = loop
+            self._listener_task = asyncio.create_task(self._listen(redis_client))
+
+    async def _listen(self, redis_client: AsyncRedisClient) -> None:
+        while True:
+            pubsub = None
+            try:
+                client = await redis_client.get_client()
+                pubsub = client.pubsub()
+                await pubsub.subscribe(RUN_CANCELLATION_CHANNEL)
+                while True:
+                    # listen() blocks without a timeout, so an idle channel would hit the socket timeout and drop the subscription
+                    message = await pubsub.get_message(ignore_subscribe_messages=False, timeout=LISTENER_POLL_TIMEOUT_SECONDS)
+                    if message is None:
+                        continue
+                    if message["type"] == "subscribe":
+                        self._subscribed_since = time.monotonic()
+                    elif message["type"] == "message":
+                        self._mark_cancelled(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Run cancellation subscription dropped, falling back to database checks: {e}")
+            finally:
+                self._subscribed_since = None
+                if pubsub is not None:
+                    try:
+                        await pubsub.aclose()
+                    except Exception:
+                        pass
+            await asyncio.sleep(LISTENER_RECONNECT_DELAY_SECONDS)
+
+    async def close(self) -> None:
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+
+
+_run_cancellation_bus = RunCancellationBus()
+
+
+def get_run_cancellation_bus() -> RunCancellationBus:
+    return _run_cancellation_bus
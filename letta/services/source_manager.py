@@ -15,6 +15,7 @@ from letta.schemas.enums import VectorDBProvider
 from letta.schemas.source import Source as PydanticSource, SourceUpdate
 from letta.schemas.user import User as PydanticUser
 from letta.server.db import db_registry
+from letta.services.agent_state_cache import get_agent_state_cache
 from letta.utils import enforce_types, printd
 
 
@@ -166,6 +167,7 @@ class SourceManager:
         upsert_stmt = stmt.on_conflict_do_update(index_elements=["name", "organization_id"], set_=update_dict)
         await session.execute(upsert_stmt)
         await session.commit()
+        await get_agent_state_cache().invalidate_relationship("sources")
 
         # fetch results
         source_names = [source.name for source in source_data_list]
@@ -211,6 +213,7 @@ class SourceManager:
                 for key, value in update_data.items():
                     setattr(source, key, value)
                 await source.update_async(db_session=session, actor=actor)
+                await get_agent_state_cache().invalidate_relationship("sources")
             else:
                 printd(
                     f"`update_source` was called with user_id={actor.id}, organization_id={actor.organization_id}, name={source.name}, but found existing source with nothing to update."
@@ -225,6 +228,9 @@ class SourceManager:
         async with db_registry.async_session() as session:
             source = await SourceModel.read_async(db_session=session, identifier=source_id)
             await source.hard_delete_async(db_session=session, actor=actor)
+            # deleting the source also removes its files from agents' context windows
+            await get_agent_state_cache().invalidate_relationship("sources")
+            await get_agent_state_cache().invalidate_relationship("memory")
             return source.to_pydantic()
 
     @enforce_types
@@ -0,0 +1,240 @@
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from letta.log import get_logger
+from letta.orm.agent import Agent as AgentModel
+from letta.orm.job import Job as JobModel
+from letta.orm.step import Step as StepModel
+from letta.orm.step_metrics import StepMetrics as StepMetricsModel
+from letta.otel.tracing import trace_method
+from letta.schemas.enums import StepStatus
+from letta.schemas.letta_stop_reason import LettaStopReason, StopReasonType
+from letta.schemas.openai.chat_completion_response import UsageStatistics
+from letta.server.db import db_registry
+from letta.services.agent_state_cache import get_agent_state_cache
+from letta.settings import settings
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class _PendingWrites:
+    # row id -> columns to set, later writes to a column replace earlier ones
+    steps: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    step_metrics: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    jobs: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    agents: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    # how many flushes already failed to write some of these rows
+    failed_attempts: int = 0
+
+    def __len__(self) -> int:
+        return len(self.steps) + len(self.step_metrics) + len(self.jobs) + len(self.agents)
+
+    def requeue(self, failed: "_PendingWrites") -> None:
+        """Put back the rows of a failed flush, keeping any column that was written again since."""
+        for rows, failed_rows in (
+            (self.steps, failed.steps),
+            (self.step_metrics, failed.step_metrics),
+            (self.jobs, failed.jobs),
+            (self.agents, failed.agents),
+        ):
+            for row_id, columns in failed_rows.items():
+                rows[row_id] = {**columns, **rows.get(row_id, {})}
+        self.failed_attempts = max(self.failed_attempts, failed.failed_attempts + 1)
+
+
+class TelemetryWriteBuffer:
+    """Write-behind buffer for the bookkeeping an agent step writes besides its messages.
+
+    Step status and usage, step metrics, run timings and the agent's last run metrics are collected here and coalesced
+    per row, then written in a single transaction: `telemetry_flush_interval_seconds` after the first buffered write,
+    as soon as `telemetry_max_pending_writes` are buffered, or when `flush` is called, which agents do before marking a
+    run as finished. Steps themselves are still inserted directly, since the messages of the step reference them, and
+    so are the links between a run and its messages.
+
+    Flushes run one at a time so a later state of a row is never overwritten by an earlier one. The rows of a flush
+    that fails are put back and written with the next one, up to `MAX_FLUSH_ATTEMPTS` times before they are dropped.
+    """
+
+    MAX_FLUSH_ATTEMPTS = 3
+
+    def __init__(self, flush_interval_seconds: Optional[float] = None, max_pending_writes: Optional[int] = None):
+        self._flush_interval_seconds = flush_interval_seconds
+        self._max_pending_writes = max_pending_writes
+        self._pending = _PendingWrites()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._flush_timer: Optional[asyncio.Task] = None
+
+    @property
+    def flush_interval_seconds(self) -> float:
+        return self._flush_interval_seconds if self._flush_interval_seconds is not None else settings.telemetry_flush_interval_seconds
+
+    @property
+    def max_pending_writes(self) -> int:
+        return self._max_pending_writes if self._max_pending_writes is not None else settings.telemetry_max_pending_writes
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def step_succeeded(self, step_id: str, usage: UsageStatistics, stop_reason: Optional[LettaStopReason] = None) -> None:
+        columns = {
+            "status": StepStatus.SUCCESS,
+            "completion_tokens": usage.completion_tokens,
+            "prompt_tokens": usage.prompt_tokens,
+            "total_tokens": usage.total_tokens,
+        }
+        if stop_reason:
+            columns["stop_reason"] = stop_reason.stop_reason
+        await self._update(self._pending.steps, step_id, columns)
+
+    async def step_failed(
+        self,
+        step_id: str,
+        error_type: str,
+        error_message: str,
+        error_traceback: str,
+        error_details: Optional[Dict] = None,
+        stop_reason: Optional[LettaStopReason] = None,
+    ) -> None:
+        columns = {
+            "status": StepStatus.FAILED,
+            "error_type": error_type,
+            "error_data": {"message": error_message, "traceback": error_traceback, "details": error_details},
+        }
+        if stop_reason:
+            columns["stop_reason"] = stop_reason.stop_reason
+        await self._update(self._pending.steps, step_id, columns)
+
+    async def step_stopped(self, step_id: str, stop_reason: StopReasonType) -> None:
+        await self._update(self._pending.steps, step_id, {"stop_reason": stop_reason})
+
+    async def record_step_metrics(
+        self,
+        step_id: str,
+        organization_id: str,
+        agent_id: str,
+        job_id: Optional[str] = None,
+        project_id: Optional[str] = None,
+        llm_request_ns: Optional[int] = None,
+        tool_execution_ns: Optional[int] = None,
+        step_ns: Optional[int] = None,
+        template_id: Optional[str] = None,
+        base_template_id: Optional[str] = None,
+    ) -> None:
+        # every row carries the same columns so the rows can be inserted in one statement
+        row = {
+            "id": step_id,
+            "organization_id": organization_id,
+            "agent_id": agent_id,
+            "job_id": job_id,
+            "project_id": project_id,
+            "llm_request_ns": llm_request_ns,
+            "tool_execution_ns": tool_execution_ns,
+            "step_ns": step_ns,
+            "template_id": template_id,
+            "base_template_id": base_template_id,
+        }
+        await self._update(self._pending.step_metrics, step_id, row)
+
+    async def record_ttft(self, job_id: str, ttft_ns: int) -> None:
+        await self._update(self._pending.jobs, job_id, {"ttft_ns": ttft_ns})
+
+    async def record_response_duration(self, job_id: str, total_duration_ns: int) -> None:
+        await self._update(self._pending.jobs, job_id, {"total_duration_ns": total_duration_ns})
+
+    async def update_agent_last_run(self, agent_id: str, last_run_completion: datetime, last_run_duration_ms: float) -> None:
+        columns = {"last_run_completion": last_run_completion, "last_run_duration_ms": last_run_duration_ms}
+        await self._update(self._pending.agents, agent_id, columns)
+
+    @trace_method
+    async def flush(self) -> None:
+        """Write everything buffered so far, including writes a flush already in progress is making."""
+        async with self._get_flush_lock():
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, _PendingWrites()
+            try:
+                await self._write(pending)
+            except Exception as e:
+                if pending.failed_attempts + 1 >= self.MAX_FLUSH_ATTEMPTS:
+                    logger.error(f"Dropping {len(pending)} buffered telemetry writes after {self.MAX_FLUSH_ATTEMPTS} failed flushes: {e}")
+                    return
+                logger.warning(f"Failed to write {len(pending)} buffered telemetry writes, retrying with the next flush: {e}")
+                self._pending.requeue(pending)
+                self._schedule_flush()
+
+    async def close(self) -> None:
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        await self.flush()
+
+    async def _update(self, rows: Dict[str, Dict[str, Any]], row_id: str, columns: Dict[str, Any]) -> None:
+        rows.setdefault(row_id, {}).update(columns)
+        await self._buffered()
+
+    async def _buffered(self) -> None:
+        self._get_flush_lock()
+        if not settings.telemetry_write_buffer_enabled or len(self._pending) >= self.max_pending_writes:
+            # writing inline holds back the callers while the database catches up
+            await self.flush()
+        elif self._flush_timer is None or self._flush_timer.done():
+            self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        self._flush_timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_interval_seconds)
+        await self.flush()
+
+    def _get_flush_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._flush_lock = asyncio.Lock()
+            self._flush_timer = None
+        return self._flush_lock
+
+    async def _write(self, pending: _PendingWrites) -> None:
+        now = datetime.now(timezone.utc)
+        agent_state_cache = get_agent_state_cache()
+        cached_versions = {agent_id: await agent_state_cache.snapshot(agent_id) for agent_id in pending.agents}
+
+        async with db_registry.async_session() as session:
+            # the agent row only records when it last ran, that isn't an edit of the agent
+            for model, rows, touch in (
+                (StepModel, pending.steps, True),
+                (JobModel, pending.jobs, True),
+                (AgentModel, pending.agents, False),
+            ):
+                if rows:
+                    mappings = [{"id": row_id, **({"updated_at": now} if touch else {}), **columns} for row_id, columns in rows.items()]
+                    await session.run_sync(lambda ses, model=model, mappings=mappings: ses.bulk_update_mappings(model, mappings))
+
+            if pending.step_metrics:
+                rows = list(pending.step_metrics.values())
+                if session.bind.dialect.name == "postgresql":
+                    stmt = pg_insert(StepMetricsModel).values(rows)
+                    stmt = stmt.on_conflict_do_update(index_elements=["id"], set_={column: stmt.excluded[column] for column in rows[0]})
+                else:
+                    stmt = sa.insert(StepMetricsModel).values(rows).prefix_with("OR REPLACE")
+                await session.execute(stmt)
+
+            await session.commit()
+
+        for agent_id, columns in pending.agents.items():
+            await agent_state_cache.update_fields(agent_id, cached_versions[agent_id], **columns)
+
+
+_telemetry_write_buffer = TelemetryWriteBuffer()
+
+
+def get_telemetry_write_buffer() -> TelemetryWriteBuffer:
+    return _telemetry_write_buffer
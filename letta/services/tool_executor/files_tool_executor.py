@@ -261,50 +261,6 @@ class LettaFileToolExecutor(ToolExecutor):
         except re.error as e:
             raise ValueError(f"Invalid regex pattern: {e}")
 
-    def _get_context_lines(
-        self,
-        formatted_lines: List[str],
-        match_line_num: int,
-        context_lines: int,
-    ) -> List[str]:
-        """Get context lines around a match from already-chunked lines.
-
-        Args:
-            formatted_lines: Already chunked lines from LineChunker (format: "line_num: content")
-            match_line_num: The 1-based line number of the match
-            context_lines: Number of context lines before and after
-        """
-        if not formatted_lines or context_lines < 0:
-            return []
-
-        # Find the index of the matching line in the formatted_lines list
-        match_formatted_idx = None
-        for i, line in enumerate(formatted_lines):
-            if line and ":" in line:
-                try:
-                    line_num = int(line.split(":", 1)[0].strip())
-                    if line_num == match_line_num:
-                        match_formatted_idx = i
-                        break
-                except ValueError:
-                    continue
-
-        if match_formatted_idx is None:
-            return []
-
-        # Calculate context range with bounds checking
-        start_idx = max(0, match_formatted_idx - context_lines)
-        end_idx = min(len(formatted_lines), match_formatted_idx + context_lines + 1)
-
-        # Extract context lines and add match indicator
-        context_lines_with_indicator = []
-        for i in range(start_idx, end_idx):
-            line = formatted_lines[i]
-            prefix = ">" if i == match_formatted_idx else " "
-            context_lines_with_indicator.append(f"{prefix} {line}")
-
-        return context_lines_with_indicator
-
     @trace_method
     async def grep_files(
         self,
@@ -387,65 +343,55 @@ class LettaFileToolExecutor(ToolExecutor):
         async def _search_files():
             nonlocal all_matches, total_content_size, files_processed, files_skipped, files_with_matches
 
+            # Load (cached) line indexes for all files at once
+            line_indexes = await self.file_manager.get_file_line_indexes_async(
+                file_ids=[file_agent.file_id for file_agent in file_agents], actor=self.actor
+            )
+
+            indexes_to_search = []
             for file_agent in file_agents:
-                # Load file content
-                file = await self.file_manager.get_file_by_id(file_id=file_agent.file_id, actor=self.actor, include_content=True)
+                index = line_indexes.get(file_agent.file_id)
 
-                if not file or not file.content:
+                if not index or not index.lines:
                     files_skipped += 1
                     self.logger.warning(f"Grep: Skipping file {file_agent.file_name} - no content available")
                     continue
 
                 # Check individual file size
-                content_size = len(file.content.encode("utf-8"))
-                if content_size > self.MAX_FILE_SIZE_BYTES:
+                if index.content_size > self.MAX_FILE_SIZE_BYTES:
                     files_skipped += 1
                     self.logger.warning(
-                        f"Grep: Skipping file {file.file_name} - too large ({content_size:,} bytes > {self.MAX_FILE_SIZE_BYTES:,} limit)"
+                        f"Grep: Skipping file {index.file_name} - too large ({index.content_size:,} bytes > {self.MAX_FILE_SIZE_BYTES:,} limit)"
                     )
                     continue
 
                 # Check total content size across all files
-                total_content_size += content_size
+                total_content_size += index.content_size
                 if total_content_size > self.MAX_TOTAL_CONTENT_SIZE:
                     files_skipped += 1
                     self.logger.warning(
-                        f"Grep: Skipping file {file.file_name} - total content size limit exceeded ({total_content_size:,} bytes > {self.MAX_TOTAL_CONTENT_SIZE:,} limit)"
+                        f"Grep: Skipping file {index.file_name} - total content size limit exceeded ({total_content_size:,} bytes > {self.MAX_TOTAL_CONTENT_SIZE:,} limit)"
                     )
                     break
 
                 files_processed += 1
+                indexes_to_search.append(index)
+
+            # Search files concurrently, off the event loop so the timeout can still fire
+            file_matches = await asyncio.gather(
+                *[
+                    asyncio.to_thread(index.search, pattern_regex, context_lines or 0, self.MAX_TOTAL_COLLECTED)
+                    for index in indexes_to_search
+                ]
+            )
 
-                # Use LineChunker to get all lines with proper formatting
-                chunker = LineChunker()
-                formatted_lines = chunker.chunk_text(file_metadata=file)
-
-                # Remove metadata header
-                if formatted_lines and formatted_lines[0].startswith("[Viewing"):
-                    formatted_lines = formatted_lines[1:]
-
-                # Search for matches in formatted lines
-                for formatted_line in formatted_lines:
-                    if len(all_matches) >= self.MAX_TOTAL_COLLECTED:
-                        # Stop collecting if we hit the upper limit
-                        break
-
-                    # Extract line number and content from formatted line
-                    if ":" in formatted_line:
-                        try:
-                            line_parts = formatted_line.split(":", 1)
-                            line_num = int(line_parts[0].strip())
-                            line_content = line_parts[1].strip() if len(line_parts) > 1 else ""
-                        except (ValueError, IndexError):
-                            continue
-
-                        if pattern_regex.search(line_content):
-                            # Mark this file as having matches for LRU tracking
-                            files_with_matches.add(file.file_name)
-                            context = self._get_context_lines(formatted_lines, match_line_num=line_num, context_lines=context_lines or 0)
-
-                            # Store match data for later pagination
-                            all_matches.append((file.file_name, line_num, context))
+            # Collect in file order, up to the collection limit
+            for index, matches in zip(indexes_to_search, file_matches):
+                for line_num, context in matches[: self.MAX_TOTAL_COLLECTED - len(all_matches)]:
+                    # Mark this file as having matches for LRU tracking
+                    files_with_matches.add(index.file_name)
+                    # Store match data for later pagination
+                    all_matches.append((index.file_name, line_num, context))
 
                 # Break if we've collected enough matches
                 if len(all_matches) >= self.MAX_TOTAL_COLLECTED:
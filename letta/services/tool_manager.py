@@ -30,6 +30,7 @@ from letta.schemas.enums import ToolType
 from letta.schemas.tool import Tool as PydanticTool, ToolCreate, ToolUpdate
 from letta.schemas.user import User as PydanticUser
 from letta.server.db import db_registry
+from letta.services.agent_state_cache import get_agent_state_cache
 from letta.services.helpers.agent_manager_helper import calculate_multi_agent_tools
 from letta.services.mcp.types import SSEServerConfig, StdioServerConfig
 from letta.settings import settings
@@ -674,7 +675,9 @@ class ToolManager:
                 tool.tool_type = updated_tool_type
 
             # Save the updated tool to the database
-            return tool.update(db_session=session, actor=actor).to_pydantic()
+            tool = tool.update(db_session=session, actor=actor)
+            get_agent_state_cache().invalidate_relationship_nowait("tools")
+            return tool.to_pydantic()
 
     @enforce_types
     @trace_method
@@ -745,6 +748,7 @@ class ToolManager:
 
             # Save the updated tool to the database
             tool = await tool.update_async(db_session=session, actor=actor)
+            await get_agent_state_cache().invalidate_relationship("tools")
             return tool.to_pydantic()
 
     @enforce_types
@@ -755,6 +759,7 @@ class ToolManager:
             try:
                 tool = ToolModel.read(db_session=session, identifier=tool_id, actor=actor)
                 tool.hard_delete(db_session=session, actor=actor)
+                get_agent_state_cache().invalidate_relationship_nowait("tools")
             except NoResultFound:
                 raise ValueError(f"Tool with id {tool_id} not found.")
 
@@ -766,6 +771,7 @@ class ToolManager:
             try:
                 tool = await ToolModel.read_async(db_session=session, identifier=tool_id, actor=actor)
                 await tool.hard_delete_async(db_session=session, actor=actor)
+                await get_agent_state_cache().invalidate_relationship("tools")
             except NoResultFound:
                 raise ValueError(f"Tool with id {tool_id} not found.")
 
@@ -985,6 +991,8 @@ class ToolManager:
 
         await session.execute(upsert_stmt)
         await session.commit()
+        if override_existing_tools:
+            await get_agent_state_cache().invalidate_relationship("tools")
 
         # fetch results (includes both inserted and skipped tools)
         tool_names = [tool.name for tool in tool_data_list]
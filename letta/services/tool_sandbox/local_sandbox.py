@@ -22,6 +22,7 @@ from letta.services.helpers.tool_execution_helper import (
 )
 from letta.services.helpers.tool_parser_helper import parse_stdout_best_effort
 from letta.services.tool_sandbox.base import AsyncToolSandboxBase
+from letta.services.tool_sandbox.local_worker_pool import LocalSandboxWorkerError, LocalSandboxWorkerPool, get_local_sandbox_worker_pool
 from letta.settings import tool_settings
 from letta.utils import get_friendly_error_msg, parse_stderr_error_msg, safe_create_task
 
@@ -53,7 +54,7 @@ class AsyncToolSandboxLocal(AsyncToolSandboxBase):
     ) -> ToolExecutionResult:
         """
         Run the tool in a local sandbox environment asynchronously.
-        Uses a subprocess for multi-core parallelism.
+        Uses a pooled warm worker process when available, otherwise a fresh subprocess, for multi-core parallelism.
         """
         if self.provided_sandbox_config:
             sbx_config = self.provided_sandbox_config
@@ -91,20 +92,9 @@ class AsyncToolSandboxLocal(AsyncToolSandboxBase):
             venv_path = str(os.path.join(sandbox_dir, local_configs.venv_name))
             venv_preparation_task = safe_create_task(self._prepare_venv(local_configs, venv_path, env), label="prepare_venv")
 
-        # Generate and write execution script (always with markers, since we rely on stdout)
+        # Generate execution script (always with markers, since we rely on stdout)
         code = await self.generate_execution_script(agent_state=agent_state, wrap_print_with_markers=True)
 
-        async def write_temp_file(dir, content):
-            def _write():
-                with tempfile.NamedTemporaryFile(mode="w", dir=dir, suffix=".py", delete=False) as temp_file:
-                    temp_file.write(content)
-                    temp_file.flush()
-                    return temp_file.name
-
-            return await asyncio.to_thread(_write)
-
-        temp_file_path = await write_temp_file(sandbox_dir, code)
-
         try:
             # If we started a venv preparation task, wait for it to complete
             if venv_preparation_task:
@@ -135,11 +125,25 @@ class AsyncToolSandboxLocal(AsyncToolSandboxBase):
                 }
             )
 
-            # Execute in subprocess
-            return await self._execute_tool_subprocess(
+            # A recreated venv invalidates anything a warm worker has already imported from it
+            worker_pool = None if self.force_recreate_venv else get_local_sandbox_worker_pool()
+            if worker_pool:
+                try:
+                    return await self._execute_tool_in_worker(
+                        worker_pool=worker_pool,
+                        sbx_config=sbx_config,
+                        python_executable=python_executable,
+                        code=code,
+                        env=exec_env,
+                        cwd=sandbox_dir,
+                    )
+                except LocalSandboxWorkerError as e:
+                    logger.warning(f"Falling back to a fresh subprocess for tool {self.tool_name}: {e}")
+
+            return await self._execute_tool_in_temp_file(
                 sbx_config=sbx_config,
                 python_executable=python_executable,
-                temp_file_path=temp_file_path,
+                code=code,
                 env=exec_env,
                 cwd=sandbox_dir,
             )
@@ -148,12 +152,6 @@ class AsyncToolSandboxLocal(AsyncToolSandboxBase):
             print(f"Executing tool {self.tool_name} has an unexpected error: {e}")
             print(f"Auto-generated code for debugging:\n\n{code}")
             raise e
-        finally:
-            # Clean up the temp file if not debugging
-            from letta.settings import settings
-
-            if not settings.debug:
-                await asyncio.to_thread(os.remove, temp_file_path)
 
     async def _prepare_venv(self, local_configs, venv_path: str, env: Dict[str, str]):
         """
@@ -178,6 +176,67 @@ class AsyncToolSandboxLocal(AsyncToolSandboxBase):
             )
             log_event(name="finish install_pip_requirements_for_sandbox", attributes={"local_configs": local_configs.model_dump_json()})
 
+    async def _execute_tool_in_worker(
+        self,
+        worker_pool: LocalSandboxWorkerPool,
+        sbx_config,
+        python_executable: str,
+        code: str,
+        env: Dict[str, str],
+        cwd: str,
+    ) -> ToolExecutionResult:
+        """
+        Execute user code in a warm worker process from the pool.
+        The worker forks a fresh child per call, so this behaves like `_execute_tool_subprocess` without the interpreter startup.
+        """
+        log_event(name="start worker execution")
+        result = await worker_pool.execute(
+            pool_key=LocalSandboxWorkerPool.get_pool_key(sbx_config.fingerprint(), python_executable, env),
+            python_executable=python_executable,
+            code=code,
+            env=env,
+            cwd=cwd,
+            script_path=os.path.join(cwd, f"{self.tool_name}_sandbox.py"),
+            timeout=tool_settings.tool_sandbox_timeout,
+        )
+        log_event(name="finish worker execution")
+
+        if result.timed_out:
+            raise TimeoutError(f"Executing tool {self.tool_name} timed out after {tool_settings.tool_sandbox_timeout} seconds.")
+
+        return self._build_execution_result(
+            sbx_config=sbx_config, returncode=result.returncode, stdout_bytes=result.stdout, stderr_bytes=result.stderr
+        )
+
+    async def _execute_tool_in_temp_file(
+        self, sbx_config, python_executable: str, code: str, env: Dict[str, str], cwd: str
+    ) -> ToolExecutionResult:
+        """
+        Write user code to a temp file in the sandbox directory and execute it in a fresh subprocess.
+        """
+
+        def _write():
+            with tempfile.NamedTemporaryFile(mode="w", dir=cwd, suffix=".py", delete=False) as temp_file:
+                temp_file.write(code)
+                temp_file.flush()
+                return temp_file.name
+
+        temp_file_path = await asyncio.to_thread(_write)
+        try:
+            return await self._execute_tool_subprocess(
+                sbx_config=sbx_config,
+                python_executable=python_executable,
+                temp_file_path=temp_file_path,
+                env=env,
+                cwd=cwd,
+            )
+        finally:
+            # Clean up the temp file if not debugging
+            from letta.settings import settings
+
+            if not settings.debug:
+                await asyncio.to_thread(os.remove, temp_file_path)
+
     async def _execute_tool_subprocess(
         self, sbx_config, python_executable: str, temp_file_path: str, env: Dict[str, str], cwd: str
     ) -> ToolExecutionResult:
@@ -206,28 +265,10 @@ class AsyncToolSandboxLocal(AsyncToolSandboxBase):
 
                 raise TimeoutError(f"Executing tool {self.tool_name} timed out after {tool_settings.tool_sandbox_timeout} seconds.")
 
-            stderr = stderr_bytes.decode("utf-8") if stderr_bytes else ""
             log_event(name="finish subprocess")
 
-            # Parse markers to isolate the function result
-            func_result_bytes, stdout_text = self.parse_out_function_results_markers(stdout_bytes)
-            func_return, agent_state = parse_stdout_best_effort(func_result_bytes)
-
-            if process.returncode != 0 and func_return is None:
-                exception_name, msg = parse_stderr_error_msg(stderr)
-                func_return = get_friendly_error_msg(
-                    function_name=self.tool_name,
-                    exception_name=exception_name,
-                    exception_message=msg,
-                )
-
-            return ToolExecutionResult(
-                func_return=func_return,
-                agent_state=agent_state,
-                stdout=[stdout_text] if stdout_text else [],
-                stderr=[stderr] if stderr else [],
-                status="success" if process.returncode == 0 else "error",
-                sandbox_config_fingerprint=sbx_config.fingerprint(),
+            return self._build_execution_result(
+                sbx_config=sbx_config, returncode=process.returncode, stdout_bytes=stdout_bytes, stderr_bytes=stderr_bytes
             )
 
         except (TimeoutError, Exception) as e:
@@ -252,6 +293,30 @@ class AsyncToolSandboxLocal(AsyncToolSandboxBase):
                 sandbox_config_fingerprint=sbx_config.fingerprint(),
             )
 
+    def _build_execution_result(self, sbx_config, returncode: int, stdout_bytes: bytes, stderr_bytes: bytes) -> ToolExecutionResult:
+        stderr = stderr_bytes.decode("utf-8") if stderr_bytes else ""
+
+        # Parse markers to isolate the function result
+        func_result_bytes, stdout_text = self.parse_out_function_results_markers(stdout_bytes)
+        func_return, agent_state = parse_stdout_best_effort(func_result_bytes)
+
+        if returncode != 0 and func_return is None:
+            exception_name, msg = parse_stderr_error_msg(stderr)
+            func_return = get_friendly_error_msg(
+                function_name=self.tool_name,
+                exception_name=exception_name,
+                exception_message=msg,
+            )
+
+        return ToolExecutionResult(
+            func_return=func_return,
+            agent_state=agent_state,
+            stdout=[stdout_text] if stdout_text else [],
+            stderr=[stderr] if stderr else [],
+            status="success" if returncode == 0 else "error",
+            sandbox_config_fingerprint=sbx_config.fingerprint(),
+        )
+
     def parse_out_function_results_markers(self, data: bytes) -> tuple[bytes, str]:
         """
         Parse the function results out of the stdout using special markers.
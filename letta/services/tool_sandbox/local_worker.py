@@ -0,0 +1,204 @@
+"""
+Warm worker process for the local tool sandbox.
+
+This file is executed by the sandbox's Python interpreter, which may be a venv without letta installed,
+so it must only depend on the standard library. The worker imports commonly used modules once and then,
+for every request, forks a child that runs the generated tool script with the request's environment and
+working directory. A worker serves the tools of many agents, so it starts with only the variables that configure
+the interpreter and must not import anything that reads the environment or credentials at import time. Forking gives each execution a clean copy of the warm interpreter, so tool runs stay
+as isolated from each other as they are with a fresh subprocess, without paying for startup and imports.
+
+Protocol (over stdin/stdout; every frame is a 4-byte big-endian length followed by the payload):
+    ready:    JSON {"pid": int}, sent once after preloading
+    request:  JSON {"code": str, "env": dict, "cwd": str, "script_path": str, "timeout": float}
+    response: JSON {"returncode": int, "timed_out": bool, "max_rss_kb": int}, then stdout bytes, then stderr bytes
+
+max_rss_kb is the peak resident memory of the worker or of the child that ran the tool, whichever is larger.
+"""
+
+import importlib
+import json
+import linecache
+import os
+import resource
+import select
+import signal
+import struct
+import sys
+import time
+import traceback
+from typing import Optional, Tuple
+
+# Modules without import-time state taken from the environment, every forked child inherits what they set up
+PRELOAD_MODULES = ("typing", "pickle", "base64", "struct", "hashlib", "asyncio", "pydantic")
+
+READ_CHUNK_SIZE = 65536
+
+# Descriptors the worker talks to the sandbox over, closed in forked children
+_protocol_fds = []
+
+
+def _read_exact(fd: int, size: int) -> bytes:
+    data = b""
+    while len(data) < size:
+        chunk = os.read(fd, size - len(data))
+        if not chunk:
+            return b""
+        data += chunk
+    return data
+
+
+def _read_frame(fd: int) -> Optional[bytes]:
+    header = _read_exact(fd, 4)
+    if not header:
+        return None
+    (size,) = struct.unpack(">I", header)
+    return _read_exact(fd, size)
+
+
+def _write_frame(fd: int, payload: bytes) -> None:
+    data = struct.pack(">I", len(payload)) + payload
+    while data:
+        written = os.write(fd, data)
+        data = data[written:]
+
+
+def _run_child(request: dict, stdout_w: int, stderr_w: int) -> None:
+    """Runs in the forked child: execute the tool script as `python <script_path>` would, then exit."""
+    os.setpgid(0, 0)
+    for fd in _protocol_fds:
+        os.close(fd)
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    os.dup2(stdout_w, 1)
+    os.dup2(stderr_w, 2)
+
+    cwd = request["cwd"]
+    script_path = request["script_path"]
+    os.chdir(cwd)
+    os.environ.clear()
+    os.environ.update(request["env"])
+    sys.path[0] = os.path.dirname(script_path) or cwd
+    sys.argv = [script_path]
+    importlib.invalidate_caches()
+
+    # The script is never written to disk, so register its source for tracebacks
+    linecache.cache[script_path] = (len(request["code"]), None, request["code"].splitlines(True), script_path)
+
+    exit_code = 0
+    try:
+        code = compile(request["code"], script_path, "exec")
+        exec(code, {"__name__": "__main__", "__file__": script_path, "__builtins__": __builtins__})
+    except SystemExit as e:
+        if e.code is None:
+            exit_code = 0
+        elif isinstance(e.code, int):
+            exit_code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            exit_code = 1
+    except BaseException:
+        # Drop this function's frame so the traceback looks like the script was run directly
+        exc_type, exc_value, exc_tb = sys.exc_info()
+        traceback.print_exception(exc_type, exc_value, exc_tb.tb_next)
+        exit_code = 1
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(exit_code)
+
+
+def _execute(request: dict) -> Tuple[dict, bytes, bytes]:
+    stdout_r, stdout_w = os.pipe()
+    stderr_r, stderr_w = os.pipe()
+
+    # Don't let anything buffered in the worker leak into the child's output
+    sys.stdout.flush()
+    sys.stderr.flush()
+    pid = os.fork()
+    if pid == 0:
+        os.close(stdout_r)
+        os.close(stderr_r)
+        _run_child(request, stdout_w, stderr_w)
+
+    os.close(stdout_w)
+    os.close(stderr_w)
+
+    outputs = {stdout_r: [], stderr_r: []}
+    open_fds = [stdout_r, stderr_r]
+    deadline = time.monotonic() + request["timeout"]
+    timed_out = False
+    while open_fds:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            timed_out = True
+            break
+        readable, _, _ = select.select(open_fds, [], [], remaining)
+        for fd in readable:
+            chunk = os.read(fd, READ_CHUNK_SIZE)
+            if chunk:
+                outputs[fd].append(chunk)
+            else:
+                open_fds.remove(fd)
+
+    # The child may close its output and keep running, so the deadline also applies to waiting for it
+    status = None
+    rusage = None
+    while not timed_out:
+        finished_pid, status, rusage = os.wait4(pid, os.WNOHANG)
+        if finished_pid:
+            break
+        if time.monotonic() >= deadline:
+            timed_out = True
+        else:
+            time.sleep(0.001)
+
+    if timed_out:
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        _, status, rusage = os.wait4(pid, 0)
+
+    os.close(stdout_r)
+    os.close(stderr_r)
+
+    header = {
+        "returncode": os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status),
+        "timed_out": timed_out,
+        # The tool runs in the child, so its memory only shows up in the child's usage
+        "max_rss_kb": max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, rusage.ru_maxrss),
+    }
+    return header, b"".join(outputs[stdout_r]), b"".join(outputs[stderr_r])
+
+
+def main() -> None:
+    # Keep the protocol on private descriptors so nothing printed during preloading can corrupt it
+    proto_in = os.dup(0)
+    proto_out = os.dup(1)
+    _protocol_fds.extend([proto_in, proto_out])
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+
+    for module_name in PRELOAD_MODULES:
+        try:
+            importlib.import_module(module_name)
+        except Exception:
+            pass
+    _write_frame(proto_out, json.dumps({"pid": os.getpid()}).encode("utf-8"))
+
+    while True:
+        frame = _read_frame(proto_in)
+        if frame is None:
+            return
+        header, stdout, stderr = _execute(json.loads(frame))
+        _write_frame(proto_out, json.dumps(header).encode("utf-8"))
+        _write_frame(proto_out, stdout)
+        _write_frame(proto_out, stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""Pool of warm Python worker processes for the local tool sandbox."""
+
+import asyncio
+import hashlib
+import json
+import os
+import signal
+import struct
+import weakref
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from letta.log import get_logger
+from letta.settings import tool_settings
+
+logger = get_logger(__name__)
+
+WORKER_SCRIPT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "local_worker.py")
+
+# Environment variables that are fixed when the interpreter starts, so workers can't be shared across them
+INTERPRETER_ENV_VARS = ("PATH", "PYTHONPATH", "VIRTUAL_ENV", "PYTHONHOME")
+
+# Time a new worker has to import its preloaded modules before we give up on it
+WORKER_STARTUP_TIMEOUT_SECONDS = 60
+
+# Extra time given to a worker beyond the tool timeout before it is considered wedged and killed
+WORKER_TIMEOUT_GRACE_SECONDS = 10
+
+
+class LocalSandboxWorkerError(Exception):
+    """Raised when a warm worker fails (as opposed to the tool failing), the caller should fall back to a fresh subprocess."""
+
+
+@dataclass
+class LocalSandboxWorkerResult:
+    returncode: int
+    stdout: bytes
+    stderr: bytes
+    timed_out: bool
+
+
+class LocalSandboxWorker:
+    """A warm interpreter that forks a child per execution, see local_worker.py for the protocol."""
+
+    def __init__(self, process: asyncio.subprocess.Process):
+        self.process = process
+        self.num_executions = 0
+        self.max_rss_kb = 0
+        self._killed = False
+
+    @classmethod
+    async def start(cls, python_executable: str, env: Dict[str, str], cwd: str) -> "LocalSandboxWorker":
+        with open(WORKER_SCRIPT_PATH, "r") as f:
+            worker_source = f.read()
+        # The worker is shared by every agent with the same interpreter, so it must not see the tool env vars and
+        # secrets of the request that happened to start it. Each execution gets its own env in the forked child.
+        interpreter_env = {name: env[name] for name in INTERPRETER_ENV_VARS if name in env}
+        process = await asyncio.create_subprocess_exec(
+            python_executable,
+            "-u",
+            "-c",
+            worker_source,
+            env=interpreter_env,
+            cwd=cwd,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        worker = cls(process)
+        try:
+            # Wait for preloading to finish so it doesn't count against the first tool call's timeout
+            await asyncio.wait_for(worker._read_frame(), timeout=WORKER_STARTUP_TIMEOUT_SECONDS)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, OSError) as e:
+            await worker.close()
+            raise LocalSandboxWorkerError(f"Local sandbox worker failed to start: {e!r}") from e
+        return worker
+
+    @property
+    def is_alive(self) -> bool:
+        return not self._killed and self.process.returncode is None
+
+    async def execute(self, code: str, env: Dict[str, str], cwd: str, script_path: str, timeout: float) -> LocalSandboxWorkerResult:
+        request = json.dumps({"code": code, "env": env, "cwd": cwd, "script_path": script_path, "timeout": timeout}).encode("utf-8")
+        try:
+            self.process.stdin.write(struct.pack(">I", len(request)) + request)
+            await self.process.stdin.drain()
+            header, stdout, stderr = await asyncio.wait_for(self._read_response(), timeout=timeout + WORKER_TIMEOUT_GRACE_SECONDS)
+        except asyncio.TimeoutError:
+            await self.close()
+            return LocalSandboxWorkerResult(returncode=-signal.SIGKILL, stdout=b"", stderr=b"", timed_out=True)
+        except (asyncio.IncompleteReadError, ConnectionError, OSError) as e:
+            await self.close()
+            raise LocalSandboxWorkerError(f"Local sandbox worker died: {e!r}") from e
+        except asyncio.CancelledError:
+            # The response is still in flight, so the worker can't be reused
+            self.kill()
+            raise
+
+        self.num_executions += 1
+        self.max_rss_kb = header.get("max_rss_kb", 0)
+        return LocalSandboxWorkerResult(
+            returncode=header["returncode"],
+            stdout=stdout,
+            stderr=stderr,
+            timed_out=header["timed_out"],
+        )
+
+    async def _read_response(self) -> Tuple[dict, bytes, bytes]:
+        header = json.loads(await self._read_frame())
+        stdout = await self._read_frame()
+        stderr = await self._read_frame()
+        return header, stdout, stderr
+
+    async def _read_frame(self) -> bytes:
+        (size,) = struct.unpack(">I", await self.process.stdout.readexactly(4))
+        return await self.process.stdout.readexactly(size)
+
+    def kill(self) -> None:
+        if self._killed or self.process.returncode is not None:
+            return
+        self._killed = True
+        try:
+            # The worker runs in its own session, so this also kills a child stuck in a tool call
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    async def close(self) -> None:
+        self.kill()
+        await self.process.wait()
+
+
+class LocalSandboxWorkerPool:
+    """
+    Warm worker processes for the local sandbox, pooled per interpreter configuration.
+
+    Workers are keyed by the sandbox config fingerprint and the interpreter (python executable and the
+    environment variables that are fixed at startup), and recycled after a number of executions or when
+    their memory grows past a limit.
+    """
+
+    def __init__(self, max_workers_per_key: int, max_executions: int, max_memory_mb: int):
+        self.max_workers_per_key = max_workers_per_key
+        self.max_executions = max_executions
+        self.max_memory_mb = max_memory_mb
+        self._idle: Dict[str, List[LocalSandboxWorker]] = {}
+        self._num_workers: Dict[str, int] = {}
+        self._condition = asyncio.Condition()
+
+    @staticmethod
+    def is_supported() -> bool:
+        """Workers fork a child per execution, which is not available on Windows."""
+        return hasattr(os, "fork")
+
+    @staticmethod
+    def get_pool_key(sandbox_config_fingerprint: str, python_executable: str, env: Dict[str, str]) -> str:
+        interpreter_env = {name: env.get(name) for name in INTERPRETER_ENV_VARS}
+        return hashlib.md5(
+            json.dumps([sandbox_config_fingerprint, python_executable, interpreter_env], sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    async def execute(
+        self,
+        pool_key: str,
+        python_executable: str,
+        code: str,
+        env: Dict[str, str],
+        cwd: str,
+        script_path: str,
+        timeout: float,
+    ) -> LocalSandboxWorkerResult:
+        worker = await self._acquire(pool_key, python_executable, env, cwd)
+        try:
+            return await worker.execute(code=code, env=env, cwd=cwd, script_path=script_path, timeout=timeout)
+        finally:
+            await self._release(pool_key, worker)
+
+    async def _acquire(self, pool_key: str, python_executable: str, env: Dict[str, str], cwd: str) -> LocalSandboxWorker:
+        async with self._condition:
+            while True:
+                idle_workers = self._idle.setdefault(pool_key, [])
+                while idle_workers:
+                    worker = idle_workers.pop()
+                    if worker.is_alive:
+                        return worker
+                    self._num_workers[pool_key] -= 1
+                if self._num_workers.get(pool_key, 0) < self.max_workers_per_key:
+                    self._num_workers[pool_key] = self._num_workers.get(pool_key, 0) + 1
+                    break
+                await self._condition.wait()
+
+        try:
+            return await LocalSandboxWorker.start(python_executable=python_executable, env=env, cwd=cwd)
+        except Exception as e:
+            async with self._condition:
+                self._num_workers[pool_key] -= 1
+                self._condition.notify()
+            if isinstance(e, LocalSandboxWorkerError):
+                raise
+            raise LocalSandboxWorkerError(f"Failed to start local sandbox worker: {e!r}") from e
+
+    async def _release(self, pool_key: str, worker: LocalSandboxWorker) -> None:
+        should_recycle = (
+            not worker.is_alive or worker.num_executions >= self.max_executions or worker.max_rss_kb > self.max_memory_mb * 1024
+        )
+        # Update the bookkeeping before awaiting anything, so it stays consistent if the caller was cancelled
+        if should_recycle:
+            self._num_workers[pool_key] -= 1
+            worker.kill()
+        else:
+            self._idle.setdefault(pool_key, []).append(worker)
+
+        async with self._condition:
+            self._condition.notify()
+        if should_recycle:
+            await worker.close()
+
+
+# Subprocess transports are bound to the event loop that created them, so keep one pool per loop
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, LocalSandboxWorkerPool]" = weakref.WeakKeyDictionary()
+
+
+def get_local_sandbox_worker_pool() -> Optional[LocalSandboxWorkerPool]:
+    """Get the worker pool for the running event loop, or None if pooling is disabled or unsupported."""
+    if not tool_settings.tool_sandbox_worker_pool_enabled or not LocalSandboxWorkerPool.is_supported():
+        return None
+
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        pool = LocalSandboxWorkerPool(
+            max_workers_per_key=tool_settings.tool_sandbox_worker_pool_size,
+            max_executions=tool_settings.tool_sandbox_worker_max_executions,
+            max_memory_mb=tool_settings.tool_sandbox_worker_max_memory_mb,
+        )
+        _pools[loop] = pool
+    return pool
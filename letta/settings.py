@@ -1,7 +1,7 @@
 import os
 from enum import Enum
 from pathlib import Path
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import AliasChoices, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -30,6 +30,12 @@ class ToolSettings(BaseSettings):
     tool_sandbox_timeout: float = 180
     tool_exec_venv_name: Optional[str] = None
     tool_exec_autoreload_venv: bool = True
+    tool_sandbox_worker_pool_enabled: bool = Field(
+        default=True, description="Run local sandbox tools in pooled warm worker processes instead of a fresh interpreter per call"
+    )
+    tool_sandbox_worker_pool_size: int = Field(default=4, description="Maximum warm workers per local sandbox interpreter configuration")
+    tool_sandbox_worker_max_executions: int = Field(default=100, description="Recycle a warm worker after this many tool executions")
+    tool_sandbox_worker_max_memory_mb: int = Field(default=512, description="Recycle a warm worker once its resident memory exceeds this")
 
     # MCP settings
     mcp_connect_to_server_timeout: float = 30.0
@@ -37,6 +43,16 @@ class ToolSettings(BaseSettings):
     mcp_execute_tool_timeout: float = 60.0
     mcp_read_from_config: bool = False  # if False, will throw if attempting to read/write from file
     mcp_disable_stdio: bool = False
+    mcp_session_pool_enabled: bool = Field(
+        default=True, description="Reuse connected MCP client sessions across tool calls instead of connecting for every call"
+    )
+    mcp_session_idle_timeout: float = Field(default=300.0, description="Close a pooled MCP session after this many seconds unused")
+    mcp_session_max_concurrency: int = Field(
+        default=8, description="Maximum concurrent requests to a single MCP server across its pooled sessions"
+    )
+    mcp_session_max_sessions: int = Field(
+        default=100, description="Maximum pooled MCP sessions, the least recently used idle sessions are closed beyond this"
+    )
 
     @property
     def sandbox_type(self) -> SandboxType:
@@ -249,6 +265,11 @@ class Settings(BaseSettings):
 
     redis_host: Optional[str] = Field(default=None, description="Host for Redis instance")
     redis_port: Optional[int] = Field(default=6379, description="Port for Redis instance")
+    redis_max_blocking_connections: int = Field(
+        default=200,
+        gt=0,
+        description="Redis connections for blocking stream reads, one per run streamed by this process. Further streams wait for one",
+    )
 
     plugin_register: Optional[str] = None
 
@@ -287,6 +308,65 @@ class Settings(BaseSettings):
     use_vertex_structured_outputs_experimental: bool = False
     use_asyncio_shield: bool = True
 
+    # runtime argument type checks done by @enforce_types on manager methods
+    enforce_types_mode: Literal["on", "off", "sampled"] = Field(
+        default="on", description="Check argument types on every call, never, or on a sampled fraction of calls"
+    )
+    enforce_types_sample_rate: float = Field(
+        default=0.01, ge=0.0, le=1.0, description="Fraction of calls checked when enforce_types_mode is 'sampled'"
+    )
+
+    # AgentState cache in front of AgentManager.get_agent_by_id_async
+    agent_state_cache_enabled: bool = Field(default=True, description="Serve repeated agent state reads from an in-process cache")
+    agent_state_cache_size: int = Field(default=1000, description="Number of agent states kept in the agent state cache")
+    agent_state_cache_ttl_seconds: float = Field(default=300.0, gt=0, description="Upper bound on how long a cached agent state is served")
+
+    # Catalog of the models each provider offers, behind handle lookups and model listing
+    provider_catalog_ttl_seconds: float = Field(
+        default=600.0, ge=0, description="How long a provider's model list is served before refreshing it"
+    )
+    provider_catalog_max_stale_seconds: float = Field(
+        default=3600.0, ge=0, description="How long past the ttl a model list is still served while it refreshes in the background"
+    )
+    provider_catalog_max_providers: int = Field(default=1000, gt=0, description="Number of provider model lists kept in the catalog")
+
+    # Write-behind buffer for step, step metrics and run telemetry
+    telemetry_write_buffer_enabled: bool = Field(
+        default=True, description="Batch step and run bookkeeping writes instead of writing each one"
+    )
+    telemetry_flush_interval_seconds: float = Field(default=1.0, gt=0, description="How long a buffered telemetry write waits for others")
+    telemetry_max_pending_writes: int = Field(default=500, gt=0, description="Number of buffered telemetry writes that triggers a flush")
+
+    # Compiled memory of each agent, behind system prompt rebuilds
+    prompt_assembly_cache_enabled: bool = Field(
+        default=True, description="Reuse an agent's compiled memory while its blocks, files and tool rules are unchanged"
+    )
+    prompt_assembly_cache_size: int = Field(default=1000, gt=0, description="Number of agents whose compiled memory is kept")
+    prompt_assembly_cache_max_sections: int = Field(
+        default=10_000, gt=0, description="Number of rendered memory block and file sections kept for reuse across agents"
+    )
+
+    # Coalescing of concurrent identical reads behind the agent, context window and message endpoints
+    single_flight_enabled: bool = Field(default=True, description="Let concurrent identical reads share one database round trip")
+    single_flight_redis_ttl_seconds: float = Field(
+        default=0.0, ge=0, description="How long coalesced read results are shared with other processes through Redis, 0 to not share them"
+    )
+
+    # Connection pools shared by the LLM provider clients
+    llm_http_pool_enabled: bool = Field(default=True, description="Reuse provider SDK clients and their connections across LLM requests")
+    llm_http_max_connections: int = Field(default=100, gt=0, description="Connections each pooled provider client opens at most")
+    llm_http_max_keepalive_connections: int = Field(default=20, ge=0, description="Idle connections each pooled provider client keeps open")
+    llm_http_keepalive_expiry_seconds: float = Field(default=60.0, ge=0, description="How long an idle provider connection is kept open")
+    llm_http2_enabled: bool = Field(default=False, description="Negotiate HTTP/2 with LLM providers, needs the h2 package")
+    llm_http_max_clients: int = Field(
+        default=256, gt=0, description="Number of provider clients, one per provider, endpoint and credentials, kept per event loop"
+    )
+
+    # Agent file export and import
+    agent_file_max_concurrency: int = Field(
+        default=8, gt=0, description="Number of agents or files an agent file export or import works on at the same time"
+    )
+
     # Database pool monitoring
     enable_db_pool_monitoring: bool = True  # Enable connection pool monitoring
     db_pool_monitoring_interval: int = 30  # Seconds between pool stats collection
@@ -306,6 +386,13 @@ class Settings(BaseSettings):
     llm_stream_timeout_seconds: float = Field(default=60.0, ge=10.0, le=1800.0, description="Timeout for LLM streaming requests in seconds")
 
     # For embeddings
+    embedding_cache_enabled: bool = Field(default=True, description="Reuse embeddings of identical text instead of re-embedding it")
+    embedding_cache_max_memory_mb: int = Field(default=64, description="Memory used by the in-memory embedding cache per process")
+    embedding_cache_persist: bool = Field(default=True, description="Back the embedding cache with a SQLite file in the letta directory")
+    embedding_cache_max_disk_mb: int = Field(default=1024, description="Size the embedding cache's SQLite file is pruned to")
+    embedding_max_concurrent_batches: int = Field(default=8, description="Maximum embedding batch requests in flight per process")
+    embedding_batch_max_tokens: int = Field(default=100_000, description="Maximum total tokens packed into one embedding batch request")
+    embedding_rate_limit_max_retries: int = Field(default=5, description="Retries for a rate limited embedding batch before giving up")
     enable_pinecone: bool = False
     pinecone_api_key: Optional[str] = None
     pinecone_source_index: Optional[str] = "sources"
@@ -379,6 +466,17 @@ class LogSettings(BaseSettings):
 class TelemetrySettings(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="letta_telemetry_", extra="ignore")
     profiler: bool | None = Field(False, description="Enable use of the profiler.")
+    profiler_backend: Literal["google_cloud", "sampling"] = Field(
+        "google_cloud",
+        description="Profiler to run when enabled. 'sampling' uses the built-in sampling profiler, which needs no cloud account "
+        "and serves collapsed stacks from the admin profiler endpoint.",
+    )
+    profiler_sampling_interval_ms: float = Field(
+        10.0, gt=0, description="CPU time between two samples of the built-in sampling profiler, in milliseconds."
+    )
+    profiler_max_stacks: int = Field(
+        20_000, gt=0, description="Distinct labelled stacks the sampling profiler keeps counts for before it drops samples."
+    )
 
 
 # singleton
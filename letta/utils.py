@@ -21,7 +21,6 @@ from typing import Any, Callable, Coroutine, Optional, Union, _GenericAlias, get
 from urllib.parse import urljoin, urlparse
 
 import demjson3 as demjson
-import tiktoken
 from pathvalidate import sanitize_filename as pathvalidate_sanitize_filename
 from sqlalchemy import text
 
@@ -37,10 +36,12 @@ from letta.constants import (
     MAX_FILENAME_LENGTH,
     TOOL_CALL_ID_MAX_LEN,
 )
+from letta.helpers import tokenizer
 from letta.helpers.json_helpers import json_dumps, json_loads
 from letta.log import get_logger
 from letta.otel.tracing import log_attributes, trace_method
 from letta.schemas.openai.chat_completion_response import ChatCompletionResponse
+from letta.settings import settings
 
 logger = get_logger(__name__)
 
@@ -511,56 +512,80 @@ def is_optional_type(hint):
     return False
 
 
+# Number of calls whose arguments @enforce_types has checked, see get_enforce_types_check_count
+_enforce_types_check_count = 0
+
+
+def get_enforce_types_check_count() -> int:
+    """Number of calls whose argument types have been checked by @enforce_types in this process."""
+    return _enforce_types_check_count
+
+
+def _compile_type_check(hint) -> Callable[[Any], bool]:
+    """Build a function checking whether a value matches `hint`, resolving the hint's structure once."""
+    origin = get_origin(hint)
+    args = get_args(hint)
+
+    if origin is Union or hint.__class__.__name__ == "UnionType":  # Handle Union types (including Optional and X | Y)
+        checks = [_compile_type_check(arg) for arg in args]
+        return lambda value: any(check(value) for check in checks)
+    elif origin is not None and (str(origin).endswith("Literal") or getattr(origin, "_name", None) == "Literal"):  # Handle Literal types
+        return lambda value: value in args
+    elif origin is list:  # Handle List[T]
+        element_type = args[0] if args else None
+        if element_type:
+            return lambda value: isinstance(value, list) and all(isinstance(v, element_type) for v in value)
+        return lambda value: isinstance(value, list)
+    elif origin:  # Handle other generics like Dict, Tuple, etc.
+        return lambda value: isinstance(value, origin)
+    else:  # Handle non-generic types
+        return lambda value: isinstance(value, hint)
+
+
 def enforce_types(func):
     """Enforces that values passed in match the expected types.
         Technically will handle coroutines as well.
 
+    The per-argument checks are compiled on the first call rather than at decoration time, since annotations may
+    reference classes that don't exist yet when the module is imported. `settings.enforce_types_mode` turns checking
+    off or restricts it to a sampled fraction of calls.
+
     TODO (cliandy): use stricter pydantic fields
     """
+    plan = None
 
-    @wraps(func)
-    def wrapper(*args, **kwargs):
+    def compile_plan():
         # Get type hints, excluding the return type hint
         hints = {k: v for k, v in get_type_hints(func).items() if k != "return"}
+        checks = {name: (hint, _compile_type_check(hint)) for name, hint in hints.items() if hint}
+        # Get the function's argument names, skipping 'self'
+        positional = [(name, checks.get(name)) for name in inspect.getfullargspec(func).args[1:]]
+        return positional, checks
 
-        # Get the function's argument names
-        arg_names = inspect.getfullargspec(func).args
-
-        # Pair each argument with its corresponding type hint
-        args_with_hints = dict(zip(arg_names[1:], args[1:], strict=False))  # Skipping 'self'
-
-        # Function to check if a value matches a given type hint
-        def matches_type(value, hint):
-            origin = get_origin(hint)
-            args = get_args(hint)
-
-            if origin is Union:  # Handle Union types (including Optional)
-                return any(matches_type(value, arg) for arg in args)
-            elif hasattr(hint, "__class__") and hint.__class__.__name__ == "UnionType":  # Handle Python 3.10+ X | Y syntax
-                return any(matches_type(value, arg) for arg in args)
-            elif origin is list and isinstance(value, list):  # Handle List[T]
-                element_type = args[0] if args else None
-                return all(isinstance(v, element_type) for v in value) if element_type else True
-            elif origin is not None and (
-                str(origin).endswith("Literal") or getattr(origin, "_name", None) == "Literal"
-            ):  # Handle Literal types
-                return value in args
-            elif origin:  # Handle other generics like Dict, Tuple, etc.
-                return isinstance(value, origin)
-            else:  # Handle non-generic types
-                return isinstance(value, hint)
-
-        # Check types of arguments
-        for arg_name, arg_value in args_with_hints.items():
-            hint = hints.get(arg_name)
-            if hint and not matches_type(arg_value, hint):
-                raise ValueError(f"Argument {arg_name} does not match type {hint}; is {arg_value}")
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        global _enforce_types_check_count
+        nonlocal plan
+
+        mode = settings.enforce_types_mode
+        if mode == "off" or (mode == "sampled" and random.random() >= settings.enforce_types_sample_rate):
+            return func(*args, **kwargs)
+
+        if plan is None:
+            plan = compile_plan()
+        positional, checks = plan
+        _enforce_types_check_count += 1
+
+        # Check types of positional arguments
+        for (arg_name, check), arg_value in zip(positional, args[1:]):
+            if check and not check[1](arg_value):
+                raise ValueError(f"Argument {arg_name} does not match type {check[0]}; is {arg_value}")
 
         # Check types of keyword arguments
         for arg_name, arg_value in kwargs.items():
-            hint = hints.get(arg_name)
-            if hint and not matches_type(arg_value, hint):
-                raise ValueError(f"Argument {arg_name} does not match type {hint}; is {arg_value} of type {type(arg_value)}")
+            check = checks.get(arg_name)
+            if check and not check[1](arg_value):
+                raise ValueError(f"Argument {arg_name} does not match type {check[0]}; is {arg_value} of type {type(arg_value)}")
 
         return func(*args, **kwargs)
 
@@ -811,13 +836,8 @@ class OpenAIBackcompatUnpickler(pickle.Unpickler):
         return super().find_class(module, name)
 
 
-def count_tokens(s: str, model: str = "gpt-4") -> int:
-    try:
-        encoding = tiktoken.encoding_for_model(model)
-    except KeyError:
-        print("Falling back to cl100k base for token counting.")
-        encoding = tiktoken.get_encoding("cl100k_base")
-    return len(encoding.encode(s))
+def count_tokens(s: str, model: str = "gpt-4", approximate: bool = False) -> int:
+    return tokenizer.count_tokens(s, model, approximate=approximate)
 
 
 def printd(*args, **kwargs):
@@ -1224,6 +1244,7 @@ class CancellationSignal:
         self.job_id: str | None = job_id
         self.actor: User | None = actor
         self._is_cancelled = False
+        self._watch = None
         self.logger = get_logger(__name__)
 
     async def is_cancelled(self) -> bool:
@@ -1233,7 +1254,7 @@ class CancellationSignal:
         Returns:
             True if cancelled, False otherwise
         """
-        from letta.schemas.enums import JobStatus
+        from letta.services.run_cancellation_bus import get_run_cancellation_bus
 
         if self._is_cancelled:
             return True
@@ -1241,13 +1262,12 @@ class CancellationSignal:
         if not self.job_manager or not self.job_id or not self.actor:
             return False
 
-        try:
-            job = await self.job_manager.get_job_by_id_async(job_id=self.job_id, actor=self.actor)
-            self._is_cancelled = job.status == JobStatus.cancelled
-            return self._is_cancelled
-        except Exception as e:
-            self.logger.warning(f"Failed to check cancellation status for job {self.job_id}: {e}")
-            return False
+        # cancellations are pushed through the bus, so the job is only read when one could have been missed
+        bus = get_run_cancellation_bus()
+        if self._watch is None:
+            self._watch = bus.watch(self.job_id)
+        self._is_cancelled = await bus.is_run_cancelled(self._watch, job_manager=self.job_manager, actor=self.actor)
+        return self._is_cancelled
 
     def cancel(self):
         """Mark this signal as cancelled locally (for testing or direct cancellation)."""
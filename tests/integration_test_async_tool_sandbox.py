@@ -25,6 +25,7 @@ from letta.services.sandbox_config_manager import SandboxConfigManager
 from letta.services.tool_manager import ToolManager
 from letta.services.tool_sandbox.e2b_sandbox import AsyncToolSandboxE2B
 from letta.services.tool_sandbox.local_sandbox import AsyncToolSandboxLocal
+from letta.services.tool_sandbox.local_worker_pool import get_local_sandbox_worker_pool
 from letta.services.user_manager import UserManager
 from tests.helpers.utils import create_tool_from_func
 
@@ -221,6 +222,28 @@ def list_tool(test_user):
     yield tool
 
 
+@pytest.fixture
+def worker_pid_tool(test_user):
+    def get_worker_pid(allocate_mb: int = 0) -> int:
+        """
+        Returns the pid of the process that ran this tool, after using some memory.
+
+        Parameters:
+            allocate_mb (int): Megabytes of memory to fill before returning.
+
+        Returns:
+            int: The parent pid of the tool's process.
+        """
+        import os
+
+        data = "x" * (allocate_mb * 1024 * 1024)
+        return os.getppid()
+
+    tool = create_tool_from_func(get_worker_pid)
+    tool = ToolManager().create_or_update_tool(tool, test_user)
+    yield tool
+
+
 @pytest.fixture
 def clear_core_memory_tool(test_user):
     def clear_memory(agent_state: "AgentState"):
@@ -549,6 +572,57 @@ async def test_local_sandbox_with_list_rv(disable_e2b_api_key, list_tool, test_u
     assert len(result.func_return) == 5
 
 
+@pytest.mark.asyncio
+@pytest.mark.local_sandbox
+async def test_local_sandbox_reuses_warm_worker(disable_e2b_api_key, worker_pid_tool, test_user):
+    worker_pids = []
+    with patch.object(AsyncToolSandboxLocal, "_execute_tool_subprocess") as mock_subprocess:
+        for _ in range(3):
+            sandbox = AsyncToolSandboxLocal(worker_pid_tool.name, {}, user=test_user)
+            result = await sandbox.run()
+            worker_pids.append(result.func_return)
+        mock_subprocess.assert_not_called()
+
+    # every call was forked from the same warm worker
+    assert len(set(worker_pids)) == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.local_sandbox
+async def test_local_sandbox_recycles_worker_past_its_limits(disable_e2b_api_key, worker_pid_tool, test_user):
+    async def run_tool(allocate_mb: int = 0) -> int:
+        sandbox = AsyncToolSandboxLocal(worker_pid_tool.name, {"allocate_mb": allocate_mb}, user=test_user)
+        return (await sandbox.run()).func_return
+
+    pool = get_local_sandbox_worker_pool()
+    pool.max_executions = 2
+    first_pid = await run_tool()
+    assert await run_tool() == first_pid
+    # the worker reached max_executions, so the next call starts a new one
+    second_pid = await run_tool()
+    assert second_pid != first_pid
+
+    # a tool run using more memory than allowed recycles the worker it ran on
+    pool.max_executions = 100
+    (idle_worker,) = [worker for workers in pool._idle.values() for worker in workers]
+    pool.max_memory_mb = idle_worker.max_rss_kb // 1024 + 100
+    assert await run_tool(allocate_mb=200) == second_pid
+    assert await run_tool() != second_pid
+
+
+@pytest.mark.asyncio
+@pytest.mark.local_sandbox
+async def test_local_sandbox_worker_pool_disabled(disable_e2b_api_key, add_integers_tool, test_user):
+    args = {"x": 10, "y": 5}
+
+    with patch("letta.services.tool_sandbox.local_worker_pool.tool_settings.tool_sandbox_worker_pool_enabled", False):
+        with patch.object(AsyncToolSandboxLocal, "_execute_tool_in_worker") as mock_worker:
+            sandbox = AsyncToolSandboxLocal(add_integers_tool.name, args, user=test_user)
+            result = await sandbox.run()
+            assert result.func_return == args["x"] + args["y"]
+            mock_worker.assert_not_called()
+
+
 @pytest.mark.asyncio
 @pytest.mark.local_sandbox
 async def test_local_sandbox_env(disable_e2b_api_key, get_env_tool, test_user):
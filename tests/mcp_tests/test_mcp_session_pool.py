@@ -0,0 +1,238 @@
+import asyncio
+
+import anyio
+import pytest
+
+from letta.functions.mcp_client.types import StdioServerConfig
+from letta.services.mcp.session_pool import MCPSessionKey, MCPSessionPool
+
+
+class FakeSession:
+    def __init__(self, client):
+        self.client = client
+
+    async def send_ping(self):
+        if self.client.ping_fails:
+            raise anyio.ClosedResourceError()
+
+
+class FakeMCPClient:
+    """Stands in for an MCP client, recording connects, cleanups and concurrent calls."""
+
+    instances = []
+
+    def __init__(self):
+        self.initialized = False
+        self.cleaned_up = False
+        self.connect_task = None
+        self.cleanup_task = None
+        self.ping_fails = False
+        self.session = FakeSession(self)
+        FakeMCPClient.instances.append(self)
+
+    async def connect_to_server(self):
+        self.connect_task = asyncio.current_task()
+        self.initialized = True
+
+    async def cleanup(self):
+        self.cleanup_task = asyncio.current_task()
+        self.cleaned_up = True
+
+
+@pytest.fixture(autouse=True)
+def reset_fake_clients():
+    FakeMCPClient.instances = []
+
+
+@pytest.fixture
+def key():
+    server_config = StdioServerConfig(server_name="weather", command="python", args=["weather.py"])
+    return MCPSessionKey.create("mcp_server-123", server_config, user_id="user-123", agent_id="agent-123")
+
+
+async def client_factory():
+    return FakeMCPClient()
+
+
+@pytest.mark.asyncio
+async def test_session_is_reused_across_calls(key):
+    pool = MCPSessionPool(max_concurrency=4, idle_timeout=60)
+
+    results = [await pool.run(key, client_factory, fn=lambda client: asyncio.sleep(0, result=id(client))) for _ in range(5)]
+
+    assert len(FakeMCPClient.instances) == 1
+    assert set(results) == {id(FakeMCPClient.instances[0])}
+    await pool.aclose()
+
+    # the connection is torn down by the same task that opened it, as anyio requires
+    client = FakeMCPClient.instances[0]
+    assert client.cleaned_up
+    assert client.cleanup_task is client.connect_task
+
+
+def test_key_changes_with_config_and_identity(key):
+    other_config = StdioServerConfig(server_name="weather", command="python", args=["weather.py"], env={"API_KEY": "new"})
+
+    assert MCPSessionKey.create("mcp_server-123", other_config, user_id="user-123", agent_id="agent-123") != key
+    assert MCPSessionKey.create("mcp_server-123", other_config, user_id="user-456", agent_id="agent-123").user_id == "user-456"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_connection_and_respect_cap(key):
+    pool = MCPSessionPool(max_concurrency=2, idle_timeout=60)
+    in_flight = 0
+    max_in_flight = 0
+
+    async def call(client):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+
+    await asyncio.gather(*(pool.run(key, client_factory, fn=call) for _ in range(6)))
+
+    assert len(FakeMCPClient.instances) == 1
+    assert max_in_flight == 2
+    await pool.aclose()
+
+
+@pytest.mark.asyncio
+async def test_concurrency_cap_is_shared_by_all_sessions_to_a_server():
+    pool = MCPSessionPool(max_concurrency=2, idle_timeout=60)
+    server_config = StdioServerConfig(server_name="weather", command="python", args=["weather.py"])
+    keys = [MCPSessionKey.create("mcp_server-123", server_config, user_id=f"user-{i}", agent_id="agent-123") for i in range(3)]
+    in_flight = 0
+    max_in_flight = 0
+
+    async def call(client):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+
+    await asyncio.gather(*(pool.run(k, client_factory, fn=call) for k in keys for _ in range(2)))
+
+    # one session per user, but never more than the server's cap in flight
+    assert len(FakeMCPClient.instances) == 3
+    assert max_in_flight == 2
+    await pool.aclose()
+
+
+def dropping_once():
+    calls = []
+
+    async def call(client):
+        calls.append(client)
+        if len(calls) == 1:
+            raise anyio.ClosedResourceError()
+        return "ok"
+
+    return call, calls
+
+
+@pytest.mark.asyncio
+async def test_dropped_connection_is_transparently_reconnected_for_idempotent_calls(key):
+    pool = MCPSessionPool(max_concurrency=4, idle_timeout=60)
+    call, calls = dropping_once()
+
+    assert await pool.run(key, client_factory, fn=call, idempotent=True) == "ok"
+    assert len(FakeMCPClient.instances) == 2 and len(calls) == 2
+    await asyncio.sleep(0)
+    assert FakeMCPClient.instances[0].cleaned_up
+    await pool.aclose()
+
+
+@pytest.mark.asyncio
+async def test_dropped_connection_never_replays_other_calls(key):
+    pool = MCPSessionPool(max_concurrency=4, idle_timeout=60)
+    call, calls = dropping_once()
+
+    with pytest.raises(anyio.ClosedResourceError):
+        await pool.run(key, client_factory, fn=call)
+    assert len(calls) == 1
+
+    # the dropped session is replaced on the next call
+    assert await pool.run(key, client_factory, fn=call) == "ok"
+    assert len(FakeMCPClient.instances) == 2
+    await pool.aclose()
+
+
+@pytest.mark.asyncio
+async def test_tool_errors_do_not_drop_the_session(key):
+    pool = MCPSessionPool(max_concurrency=4, idle_timeout=60)
+
+    async def call(client):
+        raise ValueError("bad arguments")
+
+    with pytest.raises(ValueError):
+        await pool.run(key, client_factory, fn=call)
+    await pool.run(key, client_factory, fn=lambda client: asyncio.sleep(0))
+
+    assert len(FakeMCPClient.instances) == 1
+    await pool.aclose()
+
+
+@pytest.mark.asyncio
+async def test_unhealthy_idle_session_is_replaced(key):
+    pool = MCPSessionPool(max_concurrency=4, idle_timeout=60, health_check_interval=0)
+
+    await pool.run(key, client_factory, fn=lambda client: asyncio.sleep(0))
+    FakeMCPClient.instances[0].ping_fails = True
+    await pool.run(key, client_factory, fn=lambda client: asyncio.sleep(0))
+
+    assert len(FakeMCPClient.instances) == 2
+    await pool.aclose()
+
+
+@pytest.mark.asyncio
+async def test_idle_sessions_are_evicted(key):
+    pool = MCPSessionPool(max_concurrency=4, idle_timeout=0.05)
+
+    await pool.run(key, client_factory, fn=lambda client: asyncio.sleep(0))
+    assert len(pool) == 1
+    await asyncio.sleep(0.3)
+
+    assert len(pool) == 0
+    assert FakeMCPClient.instances[0].cleaned_up
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_idle_sessions_are_closed_beyond_the_cap():
+    pool = MCPSessionPool(max_concurrency=4, idle_timeout=60, max_sessions=2)
+    server_config = StdioServerConfig(server_name="weather", command="python", args=["weather.py"])
+    keys = [MCPSessionKey.create("mcp_server-123", server_config, user_id=f"user-{i}", agent_id="agent-123") for i in range(4)]
+
+    await pool.run(keys[0], client_factory, fn=lambda client: asyncio.sleep(0))
+    await pool.run(keys[1], client_factory, fn=lambda client: asyncio.sleep(0))
+    await pool.run(keys[0], client_factory, fn=lambda client: asyncio.sleep(0))
+    await pool.run(keys[2], client_factory, fn=lambda client: asyncio.sleep(0))
+
+    # user-1's session was the least recently used
+    assert len(pool) == 2
+    await asyncio.sleep(0)
+    assert [client.cleaned_up for client in FakeMCPClient.instances] == [False, True, False]
+
+    # a busy session is not closed under a caller, the pool goes over the cap until it finishes
+    release = asyncio.Event()
+    busy = asyncio.gather(*(pool.run(k, client_factory, fn=lambda client: release.wait()) for k in keys[:3]))
+    await asyncio.sleep(0.01)
+    assert len(pool) == 3
+    release.set()
+    await busy
+    assert len(pool) == 2
+    await pool.aclose()
+
+
+@pytest.mark.asyncio
+async def test_evict_by_server(key):
+    pool = MCPSessionPool(max_concurrency=4, idle_timeout=60)
+    await pool.run(key, client_factory, fn=lambda client: asyncio.sleep(0))
+
+    assert pool.evict(server_id="some-other-server") == 0
+    assert pool.evict(server_id=key.server_id) == 1
+    await pool.run(key, client_factory, fn=lambda client: asyncio.sleep(0))
+
+    assert len(FakeMCPClient.instances) == 2
+    await pool.aclose()
@@ -0,0 +1,137 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from letta.orm import Base
+from letta.schemas.agent import CreateAgent
+from letta.schemas.block import CreateBlock
+from letta.schemas.embedding_config import EmbeddingConfig
+from letta.schemas.identity import IdentityCreate, IdentityType
+from letta.schemas.llm_config import LLMConfig
+from letta.server.rest_api.dependencies import HeaderParams
+from letta.server.rest_api.routers.v1.agents import list_agents
+from letta.services.agent_manager import AgentManager
+from letta.services.helpers.agent_manager_helper import AGENT_LOAD_PROFILES
+from letta.services.identity_manager import IdentityManager
+from letta.services.tool_manager import ToolManager
+from tests.utils import count_queries
+
+# Statements each profile issues for a page of agents, however many agents are on it: the agents, then one per
+# relationship the profile loads. Raise these only when a profile starts rendering more of the agent.
+EXPECTED_QUERIES = {
+    "list_summary": 3,
+    "step_runtime": 6,
+    "full_export": 9,
+}
+
+
+@pytest.fixture(autouse=True)
+def clear_tables():
+    from letta.server.db import db_context
+
+    with db_context() as session:
+        for table in reversed(Base.metadata.sorted_tables):
+            session.execute(table.delete())
+        session.commit()
+
+
+@pytest.fixture
+async def agent_ids(default_user):
+    await ToolManager().upsert_base_tools_async(actor=default_user)
+    identity = await IdentityManager().create_identity_async(
+        IdentityCreate(identifier_key="user-1", name="User", identity_type=IdentityType.user), actor=default_user
+    )
+    agent_manager = AgentManager()
+    agent_ids = []
+    for i in range(3):
+        agent = await agent_manager.create_agent_async(
+            CreateAgent(
+                name=f"agent-{i}",
+                llm_config=LLMConfig.default_config("gpt-4o-mini"),
+                embedding_config=EmbeddingConfig.default_config(provider="openai"),
+                memory_blocks=[CreateBlock(label="human", value="name: User"), CreateBlock(label="persona", value="helpful")],
+                tags=["profile-test", f"agent-{i}"],
+                identity_ids=[identity.id],
+            ),
+            actor=default_user,
+        )
+        agent_ids.append(agent.id)
+    return agent_ids
+
+
+async def load(profile_name: str, agent_ids, actor):
+    if profile_name == "list_summary":
+        return await AgentManager().list_agents_async(actor=actor, tags=["profile-test"], load_profile=profile_name)
+    profile = AGENT_LOAD_PROFILES[profile_name]
+    return await AgentManager().get_agents_by_ids_async(
+        agent_ids=agent_ids, actor=actor, include_relationships=list(profile.include_relationships)
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("profile_name", sorted(EXPECTED_QUERIES))
+async def test_profile_query_count_is_pinned(profile_name, agent_ids, default_user):
+    with count_queries() as statements:
+        agents = await load(profile_name, agent_ids, default_user)
+    assert len(agents) == 3
+    assert len(statements) == EXPECTED_QUERIES[profile_name], "\n\n".join(statements)
+
+    # fewer agents on the page don't change the number of statements
+    await AgentManager().delete_agent_async(agent_ids[0], actor=default_user)
+    with count_queries() as statements:
+        agents = await load(profile_name, agent_ids[1:], default_user)
+    assert len(agents) == 2
+    assert len(statements) == EXPECTED_QUERIES[profile_name], "\n\n".join(statements)
+
+
+@pytest.mark.asyncio
+async def test_list_summary_loads_only_what_listings_render(agent_ids, default_user):
+    agents = await load("list_summary", agent_ids, default_user)
+    agent = next(agent for agent in agents if agent.id == agent_ids[0])
+
+    assert agent.name == "agent-0"
+    assert sorted(agent.tags) == ["agent-0", "profile-test"]
+    assert len(agent.identity_ids) == 1
+    assert agent.memory.blocks == [] and agent.tools == []
+    assert agent.message_ids is None and agent.tool_rules is None
+
+    (full_agent,) = await load("full_export", agent_ids[:1], default_user)
+    assert full_agent.message_ids and full_agent.tool_rules
+    assert {block.label for block in full_agent.memory.blocks} == {"human", "persona"}
+    assert full_agent.tools
+
+
+@pytest.mark.asyncio
+async def test_list_route_leaves_deferred_columns_out(agent_ids, default_user):
+    async def get_actor_or_default_async(actor_id):
+        return default_user
+
+    server = SimpleNamespace(
+        agent_manager=AgentManager(), user_manager=SimpleNamespace(get_actor_or_default_async=get_actor_or_default_async)
+    )
+    # the route is called directly, so every query parameter is passed explicitly
+    params = dict.fromkeys(
+        ["name", "before", "after", "query_text", "project_id", "template_id", "base_template_id", "identity_id", "identifier_keys"]
+    )
+    params.update(
+        tags=["profile-test"],
+        match_all_tags=False,
+        limit=50,
+        include_relationships=None,
+        order="desc",
+        order_by="created_at",
+        ascending=False,
+        sort_by="created_at",
+        show_hidden_agents=False,
+    )
+
+    response = await list_agents(server=server, headers=HeaderParams(actor_id=default_user.id), load_profile="list_summary", **params)
+    agents = json.loads(response.body)
+    assert len(agents) == 3
+    for agent in agents:
+        assert not {"message_ids", "tool_rules", "response_format"} & set(agent)
+        assert "profile-test" in agent["tags"]
+
+    agents = await list_agents(server=server, headers=HeaderParams(actor_id=default_user.id), load_profile=None, **params)
+    assert all(agent.message_ids for agent in agents)
@@ -1,4 +1,6 @@
+import asyncio
 from typing import List, Optional
+from unittest.mock import AsyncMock, patch
 
 import pytest
 
@@ -18,15 +20,17 @@ from letta.schemas.agent_file import (
 )
 from letta.schemas.block import Block, CreateBlock
 from letta.schemas.embedding_config import EmbeddingConfig
-from letta.schemas.enums import MessageRole
+from letta.schemas.enums import FileProcessingStatus, MessageRole
 from letta.schemas.group import ManagerType
 from letta.schemas.llm_config import LLMConfig
 from letta.schemas.message import MessageCreate
 from letta.schemas.organization import Organization
+from letta.schemas.passage import Passage
 from letta.schemas.source import Source
 from letta.schemas.user import User
 from letta.server.server import SyncServer
 from letta.services.agent_serialization_manager import AgentSerializationManager
+from letta.services.file_processor.embedder.openai_embedder import OpenAIEmbedder
 from tests.utils import create_tool_from_func
 
 # ------------------------------
@@ -1397,6 +1401,74 @@ class TestAgentFileImportWithProcessing:
             # When using Pinecone, status stays at embedding until chunks are confirmed uploaded
             assert imported_file.processing_status.value in {"embedding", "completed"}
 
+    async def test_import_reuses_exported_passages(self, server, agent_serialization_manager, default_user, other_user):
+        """Test that passages exported with a file are inserted on import instead of embedding the file again."""
+        source = await create_test_source(server, "reuse-source", default_user)
+        file_metadata = await create_test_file(server, "reuse.txt", source.id, default_user, content="First chunk. Second chunk.")
+        passages = [
+            Passage(
+                text=text,
+                embedding=[0.1] * source.embedding_config.embedding_dim,
+                embedding_config=source.embedding_config,
+                organization_id=default_user.organization_id,
+                source_id=source.id,
+                file_id=file_metadata.id,
+            )
+            for text in ("First chunk.", "Second chunk.")
+        ]
+        await server.passage_manager.create_many_source_passages_async(passages, file_metadata, default_user)
+
+        agent = await create_test_agent_with_files(server, "reuse-agent", default_user, [(source.id, file_metadata.id)])
+
+        exported = await agent_serialization_manager.export([agent.id], default_user, include_file_passages=True)
+        (file_schema,) = exported.files
+        assert [passage.text for passage in file_schema.passages] == ["First chunk.", "Second chunk."]
+        assert len(file_schema.passages[0].embedding) == source.embedding_config.embedding_dim
+
+        with patch.object(OpenAIEmbedder, "generate_embedded_passages", side_effect=AssertionError("file was embedded again")):
+            result = await agent_serialization_manager.import_file(exported, other_user)
+            imported_file_id = result.id_mappings[file_schema.id]
+            for _ in range(50):
+                imported_file = await server.file_manager.get_file_by_id(imported_file_id, other_user)
+                if imported_file.processing_status == FileProcessingStatus.COMPLETED:
+                    break
+                await asyncio.sleep(0.1)
+
+        assert imported_file.processing_status == FileProcessingStatus.COMPLETED
+        assert imported_file.total_chunks == 2
+        imported_passages = await server.passage_manager.list_passages_by_file_id_async(imported_file_id, other_user)
+        assert sorted(passage.text for passage in imported_passages) == ["First chunk.", "Second chunk."]
+
+    async def test_import_embeds_again_when_exported_passages_have_wrong_dimension(
+        self, server, agent_serialization_manager, default_user, other_user
+    ):
+        """Test that passages whose embeddings don't match the source's embedding dimension are not reused."""
+        source = await create_test_source(server, "wrong-dim-source", default_user)
+        file_metadata = await create_test_file(server, "wrong-dim.txt", source.id, default_user, content="Only chunk.")
+        passage = Passage(
+            text="Only chunk.",
+            embedding=[0.1] * source.embedding_config.embedding_dim,
+            embedding_config=source.embedding_config,
+            organization_id=default_user.organization_id,
+            source_id=source.id,
+            file_id=file_metadata.id,
+        )
+        await server.passage_manager.create_many_source_passages_async([passage], file_metadata, default_user)
+        agent = await create_test_agent_with_files(server, "wrong-dim-agent", default_user, [(source.id, file_metadata.id)])
+
+        exported = await agent_serialization_manager.export([agent.id], default_user, include_file_passages=True)
+        exported.files[0].passages[0].embedding = [0.1] * 8
+
+        embed = AsyncMock(return_value=[])
+        with patch.object(OpenAIEmbedder, "generate_embedded_passages", embed):
+            await agent_serialization_manager.import_file(exported, other_user)
+            for _ in range(50):
+                if embed.called:
+                    break
+                await asyncio.sleep(0.1)
+
+        assert embed.called
+
 
 class TestAgentFileRoundTrip:
     """Tests for complete export -> import -> export cycles."""
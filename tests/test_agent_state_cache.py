@@ -0,0 +1,169 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from letta.data_sources.redis_client import NoopAsyncRedisClient
+from letta.schemas.agent import AgentState
+from letta.schemas.embedding_config import EmbeddingConfig
+from letta.schemas.llm_config import LLMConfig
+from letta.schemas.memory import Memory
+from letta.services.agent_state_cache import AgentStateCache
+from letta.settings import settings
+
+ORG_ID = "org-1"
+
+
+class FakeRedisClient:
+    """Just enough of AsyncRedisClient to share version tokens between caches."""
+
+    def __init__(self):
+        self.values = {}
+
+    async def mget(self, *keys):
+        return [self.values.get(key) for key in keys]
+
+    async def set(self, key, value, ex=None, **kwargs):
+        self.values[key] = value
+        return True
+
+
+def make_agent_state(agent_id: str = "agent-1", **kwargs) -> AgentState:
+    return AgentState(
+        id=agent_id,
+        name=agent_id,
+        system="system",
+        agent_type="memgpt_v2_agent",
+        llm_config=LLMConfig.default_config("gpt-4o-mini"),
+        embedding_config=EmbeddingConfig.default_config(provider="openai"),
+        memory=Memory(blocks=[]),
+        tools=[],
+        sources=[],
+        tags=[],
+        message_ids=["message-1"],
+        **kwargs,
+    )
+
+
+def make_loader(agent_id: str = "agent-1"):
+    return AsyncMock(side_effect=lambda: make_agent_state(agent_id))
+
+
+@pytest.fixture
+def redis_client():
+    client = NoopAsyncRedisClient()
+    with patch("letta.services.agent_state_cache.get_redis_client", AsyncMock(side_effect=lambda: client)):
+        yield client
+
+
+@pytest.fixture
+def cache(redis_client):
+    return AgentStateCache(max_entries=10, ttl_seconds=60)
+
+
+@pytest.mark.asyncio
+async def test_serves_copies_until_relationship_is_invalidated(cache):
+    load_tools, load_memory = make_loader(), make_loader()
+
+    state = await cache.get_or_load("agent-1", ORG_ID, ["tools"], load_tools)
+    state.name = "mutated by caller"
+    cached = await cache.get_or_load("agent-1", ORG_ID, ["tools"], load_tools)
+    await cache.get_or_load("agent-1", ORG_ID, ["memory"], load_memory)
+
+    assert load_tools.await_count == 1
+    assert cached.name == "agent-1"
+
+    await cache.invalidate("agent-1", ["tools"])
+    await cache.get_or_load("agent-1", ORG_ID, ["tools"], load_tools)
+    await cache.get_or_load("agent-1", ORG_ID, ["memory"], load_memory)
+    assert load_tools.await_count == 2
+    assert load_memory.await_count == 1
+
+    # invalidating the agent row drops every state of the agent
+    await cache.invalidate("agent-1")
+    await cache.get_or_load("agent-1", ORG_ID, ["memory"], load_memory)
+    assert load_memory.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_relationship_invalidation_spans_agents(cache):
+    loaders = {agent_id: make_loader(agent_id) for agent_id in ("agent-1", "agent-2")}
+    for agent_id, load in loaders.items():
+        await cache.get_or_load(agent_id, ORG_ID, ["secrets"], load)
+        await cache.get_or_load(agent_id, ORG_ID, None, load)
+
+    await cache.invalidate_relationship("tool_exec_environment_variables")
+
+    for agent_id, load in loaders.items():
+        await cache.get_or_load(agent_id, ORG_ID, ["secrets"], load)
+        assert load.await_count == 3
+    # other organizations never share an entry
+    other_org_load = make_loader()
+    await cache.get_or_load("agent-1", "org-2", ["secrets"], other_org_load)
+    assert other_org_load.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_write_during_load_is_not_served(cache):
+    async def load():
+        await cache.invalidate("agent-1", ["memory"])
+        return make_agent_state()
+
+    load = AsyncMock(side_effect=load)
+    await cache.get_or_load("agent-1", ORG_ID, ["memory"], load)
+    await cache.get_or_load("agent-1", ORG_ID, ["memory"], load)
+    assert load.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_update_fields_and_write_through(cache):
+    load = make_loader()
+    await cache.get_or_load("agent-1", ORG_ID, [], load)
+
+    before = await cache.snapshot("agent-1")
+    await cache.update_fields("agent-1", before, message_ids=["message-1", "message-2"])
+    state = await cache.get_or_load("agent-1", ORG_ID, [], load)
+    assert state.message_ids == ["message-1", "message-2"]
+    assert load.await_count == 1
+
+    before = await cache.snapshot("agent-1")
+    await cache.write_through(make_agent_state(description="updated"), ORG_ID, before)
+    state = await cache.get_or_load("agent-1", ORG_ID, None, load)
+    assert state.description == "updated"
+    assert load.await_count == 1
+    # the write through invalidated every narrower state it didn't replace
+    await cache.get_or_load("agent-1", ORG_ID, [], load)
+    assert load.await_count == 2
+
+    # a concurrent write since the snapshot means the written state can't be trusted
+    before = await cache.snapshot("agent-1")
+    await cache.invalidate("agent-1", ["tools"])
+    await cache.write_through(make_agent_state(description="stale"), ORG_ID, before)
+    state = await cache.get_or_load("agent-1", ORG_ID, None, load)
+    assert state.description is None
+    assert load.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_versions_are_shared_through_redis():
+    redis_client = FakeRedisClient()
+    with patch("letta.services.agent_state_cache.get_redis_client", AsyncMock(return_value=redis_client)):
+        cache, other_process_cache = AgentStateCache(ttl_seconds=60), AgentStateCache(ttl_seconds=60)
+        load = make_loader()
+
+        await cache.get_or_load("agent-1", ORG_ID, ["memory"], load)
+        await cache.get_or_load("agent-1", ORG_ID, ["memory"], load)
+        assert load.await_count == 1
+
+        await other_process_cache.invalidate(["agent-1"], ["memory"])
+        await cache.get_or_load("agent-1", ORG_ID, ["memory"], load)
+        assert load.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_bypassed_without_redis_when_running_several_workers(cache, monkeypatch):
+    monkeypatch.setattr(settings, "uvicorn_workers", 2)
+    load = make_loader()
+    await cache.get_or_load("agent-1", ORG_ID, None, load)
+    await cache.get_or_load("agent-1", ORG_ID, None, load)
+    assert load.await_count == 2
+    assert len(cache) == 0
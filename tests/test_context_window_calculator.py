@@ -0,0 +1,143 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+import pytest
+
+from letta.schemas.enums import MessageRole
+from letta.schemas.letta_message_content import TextContent
+from letta.schemas.message import Message
+from letta.services.context_window_calculator.context_window_calculator import ContextWindowCalculator
+from letta.services.context_window_calculator.token_counter import TokenCounter
+
+
+class WordCounter(TokenCounter):
+    """Counts words, recording everything it was asked to count."""
+
+    additive_message_counts = True
+
+    def __init__(self):
+        self.counted_texts = []
+        self.counted_messages = []
+
+    @property
+    def counter_id(self) -> str:
+        return "words"
+
+    async def count_text_tokens(self, text: str) -> int:
+        self.counted_texts.append(text)
+        return len(text.split())
+
+    async def count_message_tokens(self, messages: List[Dict[str, Any]]) -> int:
+        return sum(len(m["content"].split()) for m in messages)
+
+    async def count_tool_tokens(self, tools: List[Any]) -> int:
+        return 0
+
+    def convert_messages(self, messages: List[Any]) -> List[Dict[str, Any]]:
+        return [{"role": m.role.value, "content": m.content[0].text} for m in messages]
+
+    async def count_single_message_tokens(self, message: Message) -> int:
+        self.counted_messages.append(message.id)
+        return await super().count_single_message_tokens(message)
+
+
+class NonAdditiveWordCounter(WordCounter):
+    additive_message_counts = False
+
+
+class MessageStore:
+    def __init__(self, messages: List[Message]):
+        self.messages = {m.id: m for m in messages}
+
+    async def get_messages_by_ids_async(self, message_ids: List[str], actor) -> List[Message]:
+        return [self.messages[message_id] for message_id in message_ids]
+
+
+def make_message(text: str, role: MessageRole = MessageRole.user) -> Message:
+    return Message(role=role, content=[TextContent(text=text)], updated_at=datetime.now(timezone.utc))
+
+
+def system_message(core_memory: str) -> Message:
+    return make_message(
+        f"<base_instructions>be helpful</base_instructions><memory_blocks>{core_memory}</memory_blocks><memory_metadata>none",
+        role=MessageRole.system,
+    )
+
+
+async def calculate(messages: List[Message], counter: TokenCounter, core_memory: str = "name: User", token_ledger=None):
+    system = system_message(core_memory)
+    agent_state = SimpleNamespace(
+        message_ids=[system.id] + [m.id for m in messages],
+        system="be helpful",
+        tools=[],
+        llm_config=SimpleNamespace(context_window=8192),
+    )
+    return await ContextWindowCalculator().calculate_context_window(
+        agent_state=agent_state,
+        actor=None,
+        token_counter=counter,
+        message_manager=MessageStore(messages),
+        system_message_compiled=system,
+        num_archival_memories=0,
+        num_messages=len(messages),
+        token_ledger=token_ledger,
+    )
+
+
+@pytest.mark.asyncio
+async def test_only_new_and_edited_messages_are_counted():
+    messages = [make_message("hello there"), make_message("how are you today")]
+    counter = WordCounter()
+    overview, ledger = await calculate(messages, counter)
+    assert overview.num_tokens_messages == 6
+    assert counter.counted_messages == [m.id for m in messages]
+
+    counter = WordCounter()
+    edited = messages[0].model_copy(update={"content": [TextContent(text="hello again friend")]})
+    edited.updated_at = messages[0].updated_at + timedelta(seconds=1)
+    appended = make_message("fine thanks")
+    overview, ledger = await calculate([edited, messages[1], appended], counter, token_ledger=ledger)
+
+    assert counter.counted_messages == [edited.id, appended.id]
+    assert overview.num_tokens_messages == 9
+    assert ledger.messages[edited.id].num_tokens == 3
+
+
+@pytest.mark.asyncio
+async def test_only_changed_components_are_counted():
+    overview, ledger = await calculate([make_message("hi")], WordCounter())
+    assert overview.num_tokens_core_memory == len(overview.core_memory.split())
+
+    counter = WordCounter()
+    await calculate([], counter, token_ledger=ledger)
+    assert counter.counted_texts == []
+
+    counter = WordCounter()
+    overview, _ = await calculate([], counter, core_memory="name: User\nlikes: tea", token_ledger=ledger)
+    assert counter.counted_texts == [overview.core_memory]
+
+
+@pytest.mark.asyncio
+async def test_trimmed_messages_drop_out_of_the_ledger():
+    messages = [make_message("first"), make_message("second"), make_message("third")]
+    _, ledger = await calculate(messages, WordCounter())
+    assert set(ledger.messages) == {m.id for m in messages}
+
+    counter = WordCounter()
+    overview, ledger = await calculate(messages[1:], counter, token_ledger=ledger)
+    assert set(ledger.messages) == {m.id for m in messages[1:]}
+    assert counter.counted_messages == []
+    assert overview.num_tokens_messages == 2
+
+
+@pytest.mark.asyncio
+async def test_non_additive_counters_keep_no_message_entries():
+    messages = [make_message("hello there")]
+    _, ledger = await calculate(messages, WordCounter())
+
+    counter = NonAdditiveWordCounter()
+    overview, ledger = await calculate(messages, counter, token_ledger=ledger)
+    assert ledger.messages == {}
+    assert counter.counted_messages == []
+    assert overview.num_tokens_messages == 2
@@ -1,13 +1,24 @@
+import asyncio
+import os
+import weakref
 from unittest.mock import AsyncMock, Mock, patch
 
 import openai
 import pytest
 
-from letta.errors import ErrorCode, LLMBadRequestError
+from letta.errors import ErrorCode, LLMBadRequestError, LLMRateLimitError
+from letta.helpers.embedding_cache import EmbeddingCache
 from letta.schemas.embedding_config import EmbeddingConfig
 from letta.services.file_processor.embedder.openai_embedder import OpenAIEmbedder
 
 
+@pytest.fixture(autouse=True)
+def disable_embedding_cache():
+    """Mocked embeddings differ between tests for the same text, so don't let them be cached"""
+    with patch("letta.helpers.embedding_cache.settings.embedding_cache_enabled", False):
+        yield
+
+
 class TestOpenAIEmbedder:
     """Test suite for OpenAI embedder functionality"""
 
@@ -218,6 +229,78 @@ class TestOpenAIEmbedder:
         assert passages[3].text == "chunk 4"
         assert passages[3].embedding[:2] == [0.4, 0.4]
 
+    def test_batches_are_packed_by_token_budget(self, embedder):
+        """Test that batches are capped by the token budget as well as the batch size"""
+        embedder.embedding_config.batch_size = 10
+        chunks = ["a" * 300, "b" * 300, "c" * 300, "d" * 3000, "e"]
+
+        with patch("letta.services.file_processor.embedder.openai_embedder.settings.embedding_batch_max_tokens", 250):
+            batches, batch_indices = embedder._create_batches(chunks)
+
+        # two ~100 token chunks fit together, the oversized chunk gets a batch of its own
+        assert batch_indices == [[0, 1], [2], [3], [4]]
+        assert [chunk for batch in batches for chunk in batch] == chunks
+
+    @pytest.mark.asyncio
+    async def test_concurrent_batches_are_bounded(self, embedder, mock_user):
+        """Test that no more than embedding_max_concurrent_batches requests are in flight at once"""
+        in_flight = 0
+        max_in_flight = 0
+
+        async def mock_request_embeddings(inputs, embedding_config):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return [[0.1, 0.2, 0.3]] * len(inputs)
+
+        embedder.client.request_embeddings = AsyncMock(side_effect=mock_request_embeddings)
+        chunks = [f"chunk {i}" for i in range(20)]
+
+        with (
+            patch("letta.services.file_processor.embedder.openai_embedder._in_flight_semaphores", weakref.WeakKeyDictionary()),
+            patch("letta.services.file_processor.embedder.openai_embedder.settings.embedding_max_concurrent_batches", 3),
+        ):
+            passages = await embedder.generate_embedded_passages("test_file", "test_source", chunks, mock_user)
+
+        assert len(passages) == 20
+        assert embedder.client.request_embeddings.call_count == 10
+        assert max_in_flight == 3
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_retries_with_backoff(self, embedder, mock_user):
+        """Test that rate limited batches are retried after backing off instead of failing the file"""
+        rate_limit_error = openai.RateLimitError(
+            message="Rate limit reached", response=Mock(status_code=429, headers={"retry-after": "2"}), body=None
+        )
+        embedder.client.request_embeddings = AsyncMock(side_effect=[rate_limit_error, rate_limit_error, [[0.1, 0.2, 0.3]]])
+
+        with patch("letta.services.file_processor.embedder.openai_embedder.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+            passages = await embedder.generate_embedded_passages("test_file", "test_source", ["chunk 1"], mock_user)
+
+        assert len(passages) == 1
+        assert embedder.client.request_embeddings.call_count == 3
+        # the provider's retry-after is honoured
+        assert [call.args[0] for call in mock_sleep.await_args_list] == [2.0, 2.0]
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_gives_up_after_max_retries(self, embedder, mock_user):
+        """Test that persistent rate limiting surfaces as an error once retries are exhausted"""
+        rate_limit_error = openai.RateLimitError(message="Rate limit reached", response=Mock(status_code=429, headers={}), body=None)
+        handled_error = LLMRateLimitError(message="Rate limited", code=ErrorCode.RATE_LIMIT_EXCEEDED)
+        embedder.client.handle_llm_error.return_value = handled_error
+        embedder.client.request_embeddings = AsyncMock(side_effect=rate_limit_error)
+
+        with (
+            patch("letta.services.file_processor.embedder.openai_embedder.asyncio.sleep", new_callable=AsyncMock),
+            patch("letta.services.file_processor.embedder.openai_embedder.settings.embedding_rate_limit_max_retries", 2),
+        ):
+            with pytest.raises(LLMRateLimitError):
+                await embedder.generate_embedded_passages("test_file", "test_source", ["chunk 1"], mock_user)
+
+        assert embedder.client.request_embeddings.call_count == 3
+
 
 class TestFileProcessorWithPinecone:
     """Test suite for file processor with Pinecone integration"""
@@ -291,3 +374,215 @@ class TestFileProcessorWithPinecone:
                         assert call_args.kwargs["file_id"] == mock_file.id
                         assert call_args.kwargs["source_id"] == mock_file.source_id
                         assert len(call_args.kwargs["chunks"]) > 0
+
+
+class TestFileProcessorNativePipeline:
+    """Test suite for the native chunk/embed/insert pipeline"""
+
+    @pytest.mark.asyncio
+    async def test_passages_are_inserted_in_batches_in_document_order(self):
+        """Test that passages are inserted batch by batch while keeping document order"""
+        import asyncio
+        import random
+
+        from letta.schemas.enums import FileProcessingStatus
+        from letta.schemas.file import FileMetadata
+        from letta.services.file_processor.file_processor import FileProcessor
+        from letta.services.file_processor.parser.markitdown_parser import MarkitdownFileParser
+
+        mock_actor = Mock()
+        mock_actor.organization_id = "test_org"
+
+        embedding_config = EmbeddingConfig(
+            embedding_model="text-embedding-3-small",
+            embedding_endpoint_type="openai",
+            embedding_endpoint="https://api.openai.com/v1",
+            embedding_dim=3,
+            embedding_chunk_size=300,
+            batch_size=2,
+        )
+        with patch("letta.services.file_processor.embedder.openai_embedder.LLMClient.create"):
+            embedder = OpenAIEmbedder(embedding_config)
+
+        async def mock_request_embeddings(inputs, embedding_config):
+            # finish batches out of order
+            await asyncio.sleep(random.random() / 100)
+            return [[0.1, 0.2, 0.3]] * len(inputs)
+
+        embedder.client = Mock()
+        embedder.client.request_embeddings = AsyncMock(side_effect=mock_request_embeddings)
+
+        content = "\n\n".join(f"Paragraph number {i}." for i in range(11))
+        mock_file = FileMetadata(
+            file_name="test.txt",
+            source_id="source-87654321",
+            processing_status=FileProcessingStatus.PARSING,
+            content=content,
+        )
+        file_processor = FileProcessor(file_parser=MarkitdownFileParser(), embedder=embedder, actor=mock_actor)
+
+        # one page per paragraph, so the chunker yields one chunk per page
+        pages = content.split("\n\n")
+
+        inserted_batches = []
+
+        async def track_insert(passages, file_metadata, actor):
+            inserted_batches.append(passages)
+            return passages
+
+        update_calls = []
+
+        async def track_update(*args, **kwargs):
+            update_calls.append(kwargs)
+            return mock_file
+
+        with patch.object(file_processor.file_manager, "update_file_status", new=track_update):
+            with patch.object(file_processor.passage_manager, "create_many_source_passages_async", new=track_insert):
+                passages = await file_processor._chunk_embed_and_insert_with_fallback(
+                    file_metadata=mock_file, pages=pages, source_id=mock_file.source_id
+                )
+
+        assert [p.text for p in passages] == pages
+        assert all(p.embedding is None for p in passages)
+        assert sorted(len(batch) for batch in inserted_batches) == [1, 2, 2, 2, 2, 2]
+        assert {"file_id": mock_file.id, "actor": mock_actor, "total_chunks": 11} in update_calls
+        assert max(call.get("chunks_embedded", 0) for call in update_calls) == 11
+
+    @pytest.mark.asyncio
+    async def test_failed_chunking_retries_with_default_chunker(self):
+        """Test that a page the file-specific chunker can't split reruns the pipeline with the default chunker"""
+        from letta.schemas.enums import FileProcessingStatus
+        from letta.schemas.file import FileMetadata
+        from letta.services.file_processor.chunker.llama_index_chunker import LlamaIndexChunker
+        from letta.services.file_processor.file_processor import FileProcessor
+        from letta.services.file_processor.parser.markitdown_parser import MarkitdownFileParser
+
+        mock_actor = Mock()
+        mock_actor.organization_id = "test_org"
+
+        embedding_config = EmbeddingConfig(
+            embedding_model="text-embedding-3-small",
+            embedding_endpoint_type="openai",
+            embedding_endpoint="https://api.openai.com/v1",
+            embedding_dim=3,
+            embedding_chunk_size=300,
+            batch_size=1,
+        )
+        with patch("letta.services.file_processor.embedder.openai_embedder.LLMClient.create"):
+            embedder = OpenAIEmbedder(embedding_config)
+        embedder.client = Mock()
+        embedder.client.request_embeddings = AsyncMock(side_effect=lambda inputs, embedding_config: [[0.1, 0.2, 0.3]] * len(inputs))
+
+        pages = ["First page.", "", "Third page."]
+        mock_file = FileMetadata(file_name="test.txt", source_id="source-87654321", processing_status=FileProcessingStatus.PARSING)
+        file_processor = FileProcessor(file_parser=MarkitdownFileParser(), embedder=embedder, actor=mock_actor)
+
+        async def insert(passages, file_metadata, actor):
+            return passages
+
+        with (
+            patch.object(file_processor.file_manager, "update_file_status", new=AsyncMock(return_value=mock_file)),
+            patch.object(file_processor.passage_manager, "create_many_source_passages_async", new=insert),
+            patch.object(file_processor.passage_manager, "delete_source_passages_by_file_id_async", new=AsyncMock()) as delete_passages,
+            patch.object(LlamaIndexChunker, "chunk_text", new=lambda self, page: [page] if page else []),
+            patch.object(LlamaIndexChunker, "default_chunk_text", new=lambda self, page: [page or "(empty)"]),
+        ):
+            passages = await file_processor._chunk_embed_and_insert_with_fallback(
+                file_metadata=mock_file, pages=pages, source_id=mock_file.source_id
+            )
+
+        assert [p.text for p in passages] == ["First page.", "(empty)", "Third page."]
+        # passages inserted by the failed first attempt are dropped before the retry
+        delete_passages.assert_awaited_once_with(file_id=mock_file.id, actor=mock_actor)
+
+
+class TestEmbeddingCache:
+    """Test suite for the content-addressed embedding cache"""
+
+    @pytest.fixture
+    def embedding_config(self):
+        return EmbeddingConfig(
+            embedding_model="text-embedding-3-small",
+            embedding_endpoint_type="openai",
+            embedding_endpoint="https://api.openai.com/v1",
+            embedding_dim=3,
+            embedding_chunk_size=300,
+            batch_size=2,
+        )
+
+    @pytest.mark.asyncio
+    async def test_embedder_only_embeds_uncached_chunks(self, embedding_config):
+        """Test that repeated and previously embedded chunks are not sent to the provider again"""
+        mock_user = Mock()
+        mock_user.organization_id = "test_org_id"
+
+        with patch("letta.services.file_processor.embedder.openai_embedder.LLMClient.create"):
+            embedder = OpenAIEmbedder(embedding_config)
+
+        requested_inputs = []
+
+        async def mock_request_embeddings(inputs, embedding_config):
+            requested_inputs.extend(inputs)
+            return [[float(len(text)), 0.0, 0.0] for text in inputs]
+
+        embedder.client = Mock()
+        embedder.client.request_embeddings = AsyncMock(side_effect=mock_request_embeddings)
+
+        cache = EmbeddingCache(max_memory_bytes=1024 * 1024)
+        with patch("letta.helpers.embedding_cache.settings.embedding_cache_enabled", True):
+            with patch("letta.helpers.embedding_cache._embedding_cache", cache):
+                passages = await embedder.generate_embedded_passages("test_file", "test_source", ["a", "bb", "a"], mock_user)
+                assert sorted(requested_inputs) == ["a", "bb"]
+                assert [p.embedding[0] for p in passages] == [1.0, 2.0, 1.0]
+
+                requested_inputs.clear()
+                passages = await embedder.generate_embedded_passages("test_file", "test_source", ["bb", "ccc"], mock_user)
+                assert requested_inputs == ["ccc"]
+                assert [p.embedding[0] for p in passages] == [2.0, 3.0]
+
+        assert cache.hits == 1
+        assert cache.misses == 3
+
+    def test_cache_is_keyed_by_endpoint_model_and_dim(self, embedding_config):
+        other_dim = embedding_config.model_copy(update={"embedding_dim": 4})
+        other_model = embedding_config.model_copy(update={"embedding_model": "text-embedding-3-large"})
+        other_endpoint = embedding_config.model_copy(update={"embedding_endpoint": "http://localhost:8000/v1"})
+
+        keys = {EmbeddingCache.make_key(config, "text") for config in (embedding_config, other_dim, other_model, other_endpoint)}
+        assert len(keys) == 4
+
+    def test_cache_persists_to_disk(self, embedding_config, tmp_path):
+        db_path = str(tmp_path / "embedding_cache.db")
+        key = EmbeddingCache.make_key(embedding_config, "text")
+
+        EmbeddingCache(max_memory_bytes=1024, db_path=db_path).set_many({key: [0.5, 0.25, 0.125]})
+
+        cache = EmbeddingCache(max_memory_bytes=1024, db_path=db_path)
+        assert cache.get_many([key]) == {key: [0.5, 0.25, 0.125]}
+        assert len(cache) == 1
+
+    def test_memory_is_bounded_by_bytes(self, embedding_config):
+        keys = [EmbeddingCache.make_key(embedding_config, str(i)) for i in range(3)]
+        entry_bytes = len(keys[0]) + 3 * 4  # three float32s
+        cache = EmbeddingCache(max_memory_bytes=2 * entry_bytes)
+
+        cache.set_many({key: [1.0, 2.0, 3.0] for key in keys})
+        assert len(cache) == 2
+        assert cache.get_many(keys) == {key: [1.0, 2.0, 3.0] for key in keys[1:]}
+
+    def test_disk_is_pruned_least_recently_used_first(self, embedding_config, tmp_path):
+        db_path = str(tmp_path / "embedding_cache.db")
+        cache = EmbeddingCache(max_memory_bytes=0, db_path=db_path, max_disk_bytes=512 * 1024)
+        keys = [EmbeddingCache.make_key(embedding_config, str(i)) for i in range(400)]
+        embedding = [0.5] * 1024
+
+        first_key = keys[0]
+        cache.set_many({first_key: embedding})
+        for i in range(1, len(keys), 50):
+            cache.set_many({key: embedding for key in keys[i : i + 50]})
+
+        assert os.path.getsize(db_path) < 2 * 512 * 1024
+        kept = cache.get_many(keys)
+        assert 0 < len(kept) < len(keys)
+        # the newest entries survive, the oldest were deleted
+        assert keys[-1] in kept and first_key not in kept
@@ -0,0 +1,134 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from openai import AsyncOpenAI, OpenAI
+
+from letta.llm_api.transport_registry import LLMTransportRegistry
+from letta.settings import settings
+
+
+class OkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OkHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_clients_are_shared_per_endpoint_and_credentials():
+    registry = LLMTransportRegistry()
+    client = registry.get_client(OpenAI, "openai", api_key="key-1", base_url="http://a/v1")
+
+    assert registry.get_client(OpenAI, "openai", api_key="key-1", base_url="http://a/v1") is client
+    assert registry.get_client(OpenAI, "openai", api_key="key-2", base_url="http://a/v1") is not client
+    assert registry.get_client(OpenAI, "openai", api_key="key-1", base_url="http://b/v1") is not client
+    assert registry.get_client(OpenAI, "openai", api_key="key-1", base_url="http://a/v1", max_retries=0) is not client
+    assert registry.get_client(OpenAI, "together", api_key="key-1", base_url="http://a/v1") is not client
+
+
+def test_least_recently_used_clients_are_evicted():
+    registry = LLMTransportRegistry(max_clients=2)
+    first = registry.get_client(OpenAI, "openai", api_key="key-1")
+    second = registry.get_client(OpenAI, "openai", api_key="key-2")
+    assert registry.get_client(OpenAI, "openai", api_key="key-1") is first
+    registry.get_client(OpenAI, "openai", api_key="key-3")
+
+    assert registry.get_client(OpenAI, "openai", api_key="key-1") is first
+    assert registry.get_client(OpenAI, "openai", api_key="key-2") is not second
+
+
+def test_async_clients_are_kept_per_event_loop():
+    registry = LLMTransportRegistry()
+
+    async def get():
+        return registry.get_async_client(AsyncOpenAI, "openai", api_key="key")
+
+    async def get_twice():
+        return await get(), await get()
+
+    first, again = asyncio.run(get_twice())
+    assert first is again
+    # connections opened on a finished loop can't be used from a new one
+    assert asyncio.run(get()) is not first
+
+
+def test_fresh_clients_when_pooling_is_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "llm_http_pool_enabled", False)
+    registry = LLMTransportRegistry()
+
+    assert registry.get_client(OpenAI, "openai", api_key="key") is not registry.get_client(OpenAI, "openai", api_key="key")
+
+
+def test_direct_http_clients_are_fresh_when_pooling_is_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "llm_http_pool_enabled", False)
+    registry = LLMTransportRegistry()
+
+    assert registry.get_http_client("openai") is not registry.get_http_client("openai")
+    assert not registry._clients
+
+
+def test_evicted_idle_clients_are_closed():
+    registry = LLMTransportRegistry(max_clients=1)
+    first = registry.get_http_client("openai")
+    registry.get_http_client("anthropic")
+
+    assert first.is_closed
+
+
+@pytest.mark.asyncio
+async def test_evicted_clients_are_closed_once_their_requests_are_done(server_url):
+    registry = LLMTransportRegistry(max_clients=1)
+    first = registry.get_async_http_client("openai")
+
+    async with first.stream("GET", server_url) as response:
+        second = registry.get_async_http_client("anthropic")
+        # still streaming the response
+        assert not first.is_closed
+        assert await response.aread() == b"{}"
+    assert first.is_closed
+
+    registry.get_async_http_client("openai")
+    await asyncio.sleep(0)
+    assert second.is_closed
+    await registry.aclose()
+
+
+def test_requests_reuse_pooled_connections(server_url):
+    registry = LLMTransportRegistry()
+    for _ in range(3):
+        registry.get_http_client("openai").get(server_url).raise_for_status()
+
+    assert registry.stats[("openai", "request")] == 3
+    assert registry.stats[("openai", "connect")] == 1
+    assert registry.stats[("openai", "tls_handshake")] == 0
+
+
+@pytest.mark.asyncio
+async def test_async_requests_reuse_pooled_connections(server_url):
+    registry = LLMTransportRegistry()
+    for _ in range(3):
+        (await registry.get_async_http_client("anthropic").get(server_url)).raise_for_status()
+    await registry.aclose()
+    (await registry.get_async_http_client("anthropic").get(server_url)).raise_for_status()
+
+    assert registry.stats[("anthropic", "request")] == 4
+    # closing the registry drops its connections
+    assert registry.stats[("anthropic", "connect")] == 2
+    await registry.aclose()
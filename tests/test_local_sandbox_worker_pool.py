@@ -0,0 +1,45 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+from letta.services.tool_sandbox.local_worker_pool import LocalSandboxWorkerPool
+
+pytestmark = pytest.mark.skipif(not LocalSandboxWorkerPool.is_supported(), reason="workers fork a child per execution")
+
+# Prints what a tool can see besides its own env: the variables the worker was started with, and whether letta,
+# whose settings are read from the environment at import, was already imported when the tool was forked
+REPORT_SCRIPT = """
+import os
+import sys
+
+with open(f"/proc/{os.getppid()}/environ", "rb") as f:
+    worker_env = dict(entry.split(b"=", 1) for entry in f.read().split(b"\\0") if entry)
+print(sorted(key.decode() for key in worker_env))
+print("letta" in sys.modules, os.environ.get("AGENT_SECRET"))
+"""
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not os.path.exists("/proc/self/environ"), reason="reads the worker's environment from /proc")
+async def test_worker_does_not_keep_the_env_it_was_started_with():
+    pool = LocalSandboxWorkerPool(max_workers_per_key=1, max_executions=10, max_memory_mb=1024)
+    agent_a_env = {**os.environ, "AGENT_SECRET": "agent-a-secret"}
+    agent_b_env = {key: value for key, value in os.environ.items() if key != "AGENT_SECRET"}
+    pool_key = pool.get_pool_key("config", sys.executable, agent_a_env)
+    assert pool_key == pool.get_pool_key("config", sys.executable, agent_b_env)
+
+    with tempfile.TemporaryDirectory() as cwd:
+        run = dict(pool_key=pool_key, python_executable=sys.executable, code=REPORT_SCRIPT, cwd=cwd, script_path="tool.py", timeout=30)
+        first = await pool.execute(env=agent_a_env, **run)
+        second = await pool.execute(env=agent_b_env, **run)
+
+    assert first.returncode == 0, first.stderr
+    worker_env, first_seen = first.stdout.decode().splitlines()
+    assert "AGENT_SECRET" not in worker_env
+    assert first_seen == "False agent-a-secret"
+    assert second.stdout.decode().splitlines()[1] == "False None"
+    for workers in pool._idle.values():
+        for worker in workers:
+            await worker.close()
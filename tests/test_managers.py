@@ -1053,6 +1053,20 @@ async def test_get_context_window_basic(
     assert len(list_agents) == 0
 
 
+@pytest.mark.asyncio
+async def test_context_token_ledger_is_persisted(server: SyncServer, sarah_agent, default_user):
+    assert await server.agent_manager.get_context_token_ledger_async(agent_id=sarah_agent.id, actor=default_user) is None
+
+    context_window_overview = await server.agent_manager.get_context_window(agent_id=sarah_agent.id, actor=default_user)
+    ledger = await server.agent_manager.get_context_token_ledger_async(agent_id=sarah_agent.id, actor=default_user)
+    assert ledger.num_tokens_core_memory == context_window_overview.num_tokens_core_memory
+    assert set(ledger.messages) == set(sarah_agent.message_ids[1:])
+
+    # clearing the ledger makes the next count start over
+    await server.agent_manager.update_context_token_ledger_async(agent_id=sarah_agent.id, token_ledger=None, actor=default_user)
+    assert await server.agent_manager.get_context_token_ledger_async(agent_id=sarah_agent.id, actor=default_user) is None
+
+
 @pytest.mark.asyncio
 async def test_create_agent_passed_in_initial_messages(server: SyncServer, default_user, default_block):
     memory_blocks = [CreateBlock(label="human", value="BananaBoy"), CreateBlock(label="persona", value="I am a helpful assistant")]
@@ -3675,6 +3689,57 @@ async def test_passage_tags_functionality(disable_turbopuffer, server: SyncServe
         assert len(expected_matches) >= 1
 
 
+@pytest.mark.asyncio
+async def test_query_agent_passages_tag_filter_applies_before_limit(disable_turbopuffer, server: SyncServer, default_user, sarah_agent):
+    """Tag filtering happens in SQL, so a limited query returns the first `limit` matching passages."""
+    from letta.schemas.enums import TagMatchMode
+
+    archive = await server.archive_manager.get_or_create_default_archive_for_agent_async(
+        agent_id=sarah_agent.id, agent_name=sarah_agent.name, actor=default_user
+    )
+
+    # interleave untagged passages so a limit applied before filtering would cut off matches
+    for i in range(6):
+        for text, tags in [(f"untagged {i}", ["other"]), (f"tagged {i}", ["keep", "extra"] if i % 2 == 0 else ["keep"])]:
+            await server.passage_manager.create_agent_passage_async(
+                PydanticPassage(
+                    text=text,
+                    archive_id=archive.id,
+                    organization_id=default_user.organization_id,
+                    embedding=[0.1, 0.2, 0.3],
+                    embedding_config=DEFAULT_EMBEDDING_CONFIG,
+                    tags=tags,
+                ),
+                actor=default_user,
+            )
+
+    any_results = await server.agent_manager.query_agent_passages_async(
+        actor=default_user,
+        agent_id=sarah_agent.id,
+        tags=["keep", "missing"],
+        tag_match_mode=TagMatchMode.ANY,
+        limit=4,
+    )
+    assert [p.text for p, _, _ in any_results] == ["tagged 0", "tagged 1", "tagged 2", "tagged 3"]
+
+    all_results = await server.agent_manager.query_agent_passages_async(
+        actor=default_user,
+        agent_id=sarah_agent.id,
+        tags=["keep", "extra"],
+        tag_match_mode=TagMatchMode.ALL,
+        limit=3,
+    )
+    assert [p.text for p, _, _ in all_results] == ["tagged 0", "tagged 2", "tagged 4"]
+
+    none_results = await server.agent_manager.query_agent_passages_async(
+        actor=default_user,
+        agent_id=sarah_agent.id,
+        tags=["keep", "missing"],
+        tag_match_mode=TagMatchMode.ALL,
+    )
+    assert none_results == []
+
+
 @pytest.mark.asyncio
 async def test_comprehensive_tag_functionality(disable_turbopuffer, server: SyncServer, sarah_agent, default_user):
     """Comprehensive test for tag functionality including dual storage and junction table."""
@@ -5845,6 +5910,31 @@ def test_message_listing_text_search(server: SyncServer, hello_world_message_fix
     assert len(search_results) == 0
 
 
+@pytest.mark.asyncio
+async def test_message_listing_pages_backwards(server: SyncServer, hello_world_message_fixture, default_user, sarah_agent):
+    """Test paging from the newest message back to the oldest, as clients scroll through history"""
+    create_test_messages(server, hello_world_message_fixture, default_user)
+    all_messages = await server.message_manager.list_messages_for_agent_async(agent_id=sarah_agent.id, actor=default_user, limit=100)
+
+    paged, before = [], None
+    while True:
+        page = await server.message_manager.list_messages_for_agent_async(
+            agent_id=sarah_agent.id, actor=default_user, before=before, limit=2, ascending=False
+        )
+        if not page:
+            break
+        paged.extend(page)
+        before = page[-1].id
+    assert [m.id for m in reversed(paged)] == [m.id for m in all_messages]
+
+    # Pages are the same messages a full read returns
+    by_id = {m.id: m for m in await server.message_manager.get_messages_by_ids_async([m.id for m in paged], actor=default_user)}
+    assert all(m == by_id[m.id] for m in paged)
+
+    with pytest.raises(NoResultFound):
+        await server.message_manager.list_messages_for_agent_async(agent_id=sarah_agent.id, actor=default_user, before="message-missing")
+
+
 # ======================================================================================================================
 # Block Manager Tests - Basic
 # ======================================================================================================================
@@ -3,7 +3,7 @@ from unittest.mock import patch
 
 import pytest
 
-from letta.server.rest_api.json_parser import OptimisticJSONParser
+from letta.server.rest_api.json_parser import IncrementalJSONParser, OptimisticJSONParser
 
 
 @pytest.fixture
@@ -278,3 +278,58 @@ def test_unescaped_control_characters_strict(strict_parser):
 
     with pytest.raises(json.JSONDecodeError, match="Invalid control character"):
         strict_parser.parse(input_str)
+
+
+INCREMENTAL_DOCUMENTS = [
+    '{"inner_thoughts": "Thinking \\"hard\\"\\n", "message": "Caf\\u00e9 \\ud83d\\ude00 ok", "request_heartbeat": true}',
+    '{ "label" : "human", "old_content": "a\\\\b", "new_content" : "", "count": -12.5e3, "empty": null }',
+    '{"args": {"nested": ["x", {"y": "}]\\""}], "n": [1, 2]}, "flag": false}',
+    "{}",
+]
+
+
+@pytest.mark.parametrize("document", INCREMENTAL_DOCUMENTS)
+@pytest.mark.parametrize("fragment_size", [1, 3, 7, 1000])
+def test_incremental_parser_matches_json_loads(document, fragment_size):
+    parser = IncrementalJSONParser()
+    fragments = [document[i : i + fragment_size] for i in range(0, len(document), fragment_size)]
+    texts, raws = {}, {}
+    for fragment in fragments:
+        for delta in parser.feed(fragment):
+            texts[delta.key] = texts.get(delta.key, "") + delta.text
+            raws[delta.key] = raws.get(delta.key, "") + delta.raw
+
+    expected = json.loads(document)
+    assert parser.done
+    assert parser.value == expected
+    assert parser.keys == list(expected)
+    for key, value in expected.items():
+        # string values stream as decoded text, every value streams its source text
+        assert texts[key] == (value if isinstance(value, str) else "")
+        assert json.loads(raws[key].rstrip(",")) == value
+
+
+def test_incremental_parser_partial_values():
+    parser = IncrementalJSONParser()
+    assert parser.parse('{"inner_thoughts": "Hmm", "mess') == {"inner_thoughts": "Hmm"}
+    assert parser.keys == ["inner_thoughts"]
+    assert parser.parse('{"inner_thoughts": "Hmm", "message": "Hel') == {"inner_thoughts": "Hmm", "message": "Hel"}
+    assert parser.keys == ["inner_thoughts", "message"]
+
+    # a split escape is held back until it can be decoded
+    deltas = parser.feed("lo\\u00")
+    assert [(d.key, d.text, d.complete) for d in deltas] == [("message", "lo", False)]
+    deltas = parser.feed('e9", "n": 4')
+    assert [(d.key, d.text, d.complete) for d in deltas] == [("message", "é", True), ("n", "", False)]
+    assert parser.value == {"inner_thoughts": "Hmm", "message": "Helloé", "n": 4}
+    assert not parser.done
+
+    # input that doesn't extend the previous input starts over
+    assert parser.parse('{"other": 1}') == {"other": 1}
+
+
+def test_incremental_parser_falls_back_for_non_objects():
+    parser = IncrementalJSONParser()
+    parser.feed("[1, 2")
+    assert not parser.valid
+    assert parser.value == [1, 2]
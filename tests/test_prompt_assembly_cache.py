@@ -0,0 +1,116 @@
+from types import SimpleNamespace
+
+import pytest
+
+from letta.schemas.block import Block, FileBlock
+from letta.schemas.enums import AgentType
+from letta.schemas.memory import Memory
+from letta.services.prompt_assembly_cache import PromptAssemblyCache
+from letta.settings import settings
+
+
+@pytest.fixture
+def rendered(monkeypatch):
+    """Labels of the blocks and files rendered, in order."""
+    labels = []
+    render_block, render_file_block = Memory._render_block, Memory._render_file_block
+
+    def count_block(block, line_numbered):
+        labels.append(block.label)
+        return render_block(block, line_numbered)
+
+    def count_file_block(fb, react):
+        labels.append(fb.label)
+        return render_file_block(fb, react)
+
+    monkeypatch.setattr(Memory, "_render_block", staticmethod(count_block))
+    monkeypatch.setattr(Memory, "_render_file_block", staticmethod(count_file_block))
+    return labels
+
+
+def make_memory(agent_type=AgentType.memgpt_v2_agent, persona="helpful", file_value="data"):
+    return Memory(
+        agent_type=agent_type,
+        blocks=[Block(label="human", value="name: User"), Block(label="persona", value=persona)],
+        file_blocks=[FileBlock(label="notes.txt", value=file_value, file_id="f1", source_id="src1", is_open=bool(file_value))],
+    )
+
+
+SOURCES = [SimpleNamespace(id="src1", name="project", description="Sdesc", instructions=None)]
+RULES = SimpleNamespace(description="RDESC", value="RVAL")
+
+
+@pytest.mark.parametrize("agent_type", [AgentType.memgpt_agent, AgentType.memgpt_v2_agent, AgentType.react_agent])
+def test_matches_memory_compile(agent_type):
+    cache = PromptAssemblyCache()
+    for memory in (make_memory(agent_type), make_memory(agent_type, persona="terse", file_value="")):
+        for kwargs in ({}, {"tool_usage_rules": RULES, "sources": SOURCES, "max_files_open": 3}):
+            assert cache.compile_memory("agent-1", memory, **kwargs) == memory.compile(**kwargs)
+
+
+def test_unchanged_memory_is_not_rendered_again(rendered):
+    cache = PromptAssemblyCache()
+    compiled = cache.compile_memory("agent-1", make_memory(), tool_usage_rules=RULES, sources=SOURCES, max_files_open=3)
+    assert rendered == ["human", "persona", "notes.txt"]
+
+    # a reloaded agent state with the same contents
+    again = cache.compile_memory("agent-1", make_memory(), tool_usage_rules=RULES, sources=SOURCES, max_files_open=3)
+    assert again is compiled
+    assert len(rendered) == 3
+
+
+def test_only_changed_sections_are_rendered_again(rendered):
+    cache = PromptAssemblyCache()
+    cache.compile_memory("agent-1", make_memory(), sources=SOURCES)
+    rendered.clear()
+
+    memory = make_memory(persona="terse")
+    compiled = cache.compile_memory("agent-1", memory, sources=SOURCES)
+    assert rendered == ["persona"]
+    assert compiled == memory.compile(sources=SOURCES)
+
+    # other agents with the same blocks reuse the sections
+    rendered.clear()
+    cache.compile_memory("agent-2", memory, sources=SOURCES)
+    assert rendered == []
+
+
+def test_tool_rules_and_file_limits_are_part_of_the_key():
+    cache = PromptAssemblyCache()
+    memory = make_memory()
+    cache.compile_memory("agent-1", memory, sources=SOURCES, max_files_open=3)
+    assert "RVAL" in cache.compile_memory("agent-1", memory, tool_usage_rules=RULES, sources=SOURCES, max_files_open=3)
+    assert "- max_files_open=5" in cache.compile_memory("agent-1", memory, tool_usage_rules=RULES, sources=SOURCES, max_files_open=5)
+
+
+def test_system_message_is_current_until_memory_or_message_changes():
+    cache = PromptAssemblyCache()
+    compiled = cache.compile_memory("agent-1", make_memory())
+    text = f"base instructions\n\n{compiled}\n\n<memory_metadata>"
+    assert not cache.is_current("agent-1", compiled, "message-1", text)
+
+    cache.mark_current("agent-1", compiled, "message-1", text)
+    assert cache.is_current("agent-1", compiled, "message-1", text)
+    assert not cache.is_current("agent-1", compiled, "message-1", text + "edited")
+    assert not cache.is_current("agent-1", compiled, "message-2", text)
+
+    changed = cache.compile_memory("agent-1", make_memory(persona="terse"))
+    assert not cache.is_current("agent-1", changed, "message-1", text)
+
+
+def test_evicts_least_recently_used_agents():
+    cache = PromptAssemblyCache(max_agents=1)
+    compiled = cache.compile_memory("agent-1", make_memory())
+    cache.mark_current("agent-1", compiled, "message-1", compiled)
+    cache.compile_memory("agent-2", make_memory())
+    assert not cache.is_current("agent-1", compiled, "message-1", compiled)
+
+
+def test_disabled(rendered, monkeypatch):
+    monkeypatch.setattr(settings, "prompt_assembly_cache_enabled", False)
+    cache = PromptAssemblyCache()
+    compiled = cache.compile_memory("agent-1", make_memory())
+    cache.compile_memory("agent-1", make_memory())
+    assert len(rendered) == 4
+    cache.mark_current("agent-1", compiled, "message-1", compiled)
+    assert not cache.is_current("agent-1", compiled, "message-1", compiled)
@@ -0,0 +1,112 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import ClassVar, Dict, List
+
+import pytest
+
+from letta.schemas.embedding_config import EmbeddingConfig
+from letta.schemas.enums import ProviderCategory, ProviderType
+from letta.schemas.llm_config import LLMConfig
+from letta.schemas.providers import Provider
+from letta.services.provider_catalog import ProviderModelCatalog
+
+
+class FakeProvider(Provider):
+    """Lists one LLM per call so refetches are visible, counting calls per provider name."""
+
+    calls: ClassVar[Dict[str, int]] = {}
+    fail: ClassVar[bool] = False
+    delay: ClassVar[float] = 0
+
+    async def list_llm_models_async(self) -> List[LLMConfig]:
+        FakeProvider.calls[self.name] = FakeProvider.calls.get(self.name, 0) + 1
+        await asyncio.sleep(FakeProvider.delay)
+        if FakeProvider.fail:
+            raise RuntimeError("provider is down")
+        config = LLMConfig.default_config("gpt-4o-mini")
+        config.handle = f"{self.name}/gpt-4o-mini"
+        config.context_window = FakeProvider.calls[self.name]
+        return [config]
+
+    async def list_embedding_models_async(self) -> List[EmbeddingConfig]:
+        return [EmbeddingConfig.default_config(provider="openai")]
+
+
+def make_provider(name: str = "fake", **kwargs) -> FakeProvider:
+    return FakeProvider(name=name, provider_type=ProviderType.openai, provider_category=ProviderCategory.base, **kwargs)
+
+
+@pytest.fixture(autouse=True)
+def reset_fake_provider():
+    FakeProvider.calls, FakeProvider.fail, FakeProvider.delay = {}, False, 0
+
+
+@pytest.mark.asyncio
+async def test_lookups_share_one_listing_and_return_copies():
+    catalog = ProviderModelCatalog(ttl_seconds=60, max_stale_seconds=60)
+    provider = make_provider()
+    FakeProvider.delay = 0.01
+
+    results = await asyncio.gather(*[catalog.find_llm_configs(provider, "fake/gpt-4o-mini") for _ in range(5)])
+    assert FakeProvider.calls == {"fake": 1}
+    assert all(len(configs) == 1 for configs in results)
+
+    results[0][0].context_window = 123
+    # found by model name when the handle doesn't match
+    (config,) = await catalog.find_llm_configs(provider, "other/gpt-4o-mini")
+    assert config.context_window == 1
+    assert await catalog.find_llm_configs(provider, "fake/missing") == []
+    assert [model.handle for model in await catalog.list_llm_models(provider)] == ["fake/gpt-4o-mini"]
+    assert FakeProvider.calls == {"fake": 1}
+
+
+@pytest.mark.asyncio
+async def test_stale_lists_are_served_while_refreshing():
+    catalog = ProviderModelCatalog(ttl_seconds=0, max_stale_seconds=60)
+    provider = make_provider()
+
+    (config,) = await catalog.list_llm_models(provider)
+    assert config.context_window == 1
+    # past the ttl the stale list comes back at once, and the refresh lands for the next lookup
+    (config,) = await catalog.list_llm_models(provider)
+    assert config.context_window == 1
+    await asyncio.sleep(0.01)
+    (config,) = await catalog.list_llm_models(provider)
+    assert config.context_window == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_refresh_falls_back_to_stale_list():
+    catalog = ProviderModelCatalog(ttl_seconds=0, max_stale_seconds=0)
+    provider = make_provider()
+    await catalog.list_llm_models(provider)
+
+    FakeProvider.fail = True
+    (config,) = await catalog.list_llm_models(provider)
+    assert config.context_window == 1
+    assert FakeProvider.calls == {"fake": 2}
+
+    with pytest.raises(RuntimeError):
+        await catalog.list_llm_models(make_provider("never-listed"))
+
+
+@pytest.mark.asyncio
+async def test_edits_invalidate_and_size_is_bounded():
+    catalog = ProviderModelCatalog(ttl_seconds=60, max_stale_seconds=60, max_providers=2)
+    updated_at = datetime(2025, 1, 1)
+    provider = make_provider(id="provider-1", updated_at=updated_at)
+    await catalog.list_llm_models(provider)
+
+    # an edit made by another process shows up as a new updated_at
+    await catalog.list_llm_models(make_provider(id="provider-1", updated_at=updated_at + timedelta(seconds=1)))
+    assert FakeProvider.calls == {"fake": 2}
+
+    catalog.invalidate("provider-1")
+    await catalog.list_llm_models(make_provider(id="provider-1", updated_at=updated_at + timedelta(seconds=1)))
+    assert FakeProvider.calls == {"fake": 3}
+
+    for name in ("a", "b"):
+        await catalog.list_llm_models(make_provider(name))
+    assert len(catalog) == 2
+    await catalog.list_llm_models(make_provider(id="provider-1", updated_at=updated_at + timedelta(seconds=1)))
+    assert FakeProvider.calls["fake"] == 4
@@ -1,6 +1,9 @@
+from types import SimpleNamespace
+
 import pytest
+from redis.asyncio import BlockingConnectionPool
 
-from letta.data_sources.redis_client import get_redis_client
+from letta.data_sources.redis_client import AsyncRedisClient, get_redis_client
 
 
 @pytest.mark.asyncio
@@ -24,3 +27,29 @@ async def test_redis_client():
         assert await redis_client.smismember(k, v[0]) == 1
         assert await redis_client.smismember(k, v[:2]) == [1, 1]
         assert await redis_client.smismember(k, v[2:] + ["invalid"]) == [1, 0]
+
+
+@pytest.mark.asyncio
+async def test_blocking_reads_use_their_own_pool():
+    redis_client = AsyncRedisClient(max_blocking_connections=2)
+    assert isinstance(redis_client.blocking_pool, BlockingConnectionPool)
+    assert redis_client.blocking_pool.max_connections == 2
+    assert (await redis_client.get_blocking_client()).connection_pool is redis_client.blocking_pool
+
+    reads = []
+
+    def fake_client(pool_name):
+        async def xread(streams, count=None, block=None):
+            reads.append(pool_name)
+            return []
+
+        async def get():
+            return SimpleNamespace(xread=xread)
+
+        return get
+
+    redis_client.get_client = fake_client("shared")
+    redis_client.get_blocking_client = fake_client("blocking")
+    await redis_client.xread({"stream": "0-0"})
+    await redis_client.xread({"stream": "0-0"}, block=100)
+    assert reads == ["shared", "blocking"]
@@ -0,0 +1,163 @@
+import asyncio
+
+import pytest
+
+from letta.server.rest_api.redis_stream_manager import (
+    RedisSSEStreamReader,
+    RedisSSEStreamWriter,
+    _get_stream_key,
+    _parse_stream_id,
+    _seq_id_to_stream_id,
+)
+
+
+class InMemoryPipeline:
+    """Non-transactional pipeline: commands apply one by one, `fail_after` of them before the connection drops."""
+
+    def __init__(self, redis: "InMemoryStreams"):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def xadd(self, name, fields, id, maxlen=None, approximate=True):
+        self.commands.append((name, fields, id))
+        return self
+
+    async def expire(self, name, seconds):
+        return self
+
+    async def execute(self):
+        for i, (name, fields, entry_id) in enumerate(self.commands):
+            if self.redis.fail_after is not None and i == self.redis.fail_after:
+                self.redis.fail_after = None
+                raise TimeoutError("Timeout reading from socket")
+            stream = self.redis.streams.setdefault(name, [])
+            if stream and _parse_stream_id(entry_id) <= _parse_stream_id(stream[-1][0]):
+                raise Exception("ERR The ID specified in XADD is equal or smaller than the target stream top item")
+            stream.append((entry_id, {key: str(value) for key, value in fields.items()}))
+
+
+class InMemoryStreams:
+    """The stream commands the SSE stream reader and writer use, backed by lists. XREAD blocks until an entry arrives."""
+
+    def __init__(self):
+        self.streams = {}
+        self.blocked_xreads = 0
+        self.max_blocked_xreads = 0
+        self.fail_after = None
+        self._appended = asyncio.Condition()
+
+    async def get_client(self):
+        return self
+
+    def pipeline(self, transaction=True):
+        return InMemoryPipeline(self)
+
+    async def add(self, run_id: str, seq_id: int, complete: bool = False):
+        fields = {"seq_id": str(seq_id), "data": f"data: {seq_id}\n\n"}
+        if complete:
+            fields["complete"] = "true"
+        async with self._appended:
+            self.streams.setdefault(_get_stream_key(run_id), []).append((_seq_id_to_stream_id(seq_id), fields))
+            self._appended.notify_all()
+
+    def _after(self, stream: str, last_id: str):
+        return [entry for entry in self.streams.get(stream, []) if _parse_stream_id(entry[0]) > _parse_stream_id(last_id)]
+
+    async def xread(self, streams, count=None, block=None):
+        ((stream, last_id),) = streams.items()
+        self.blocked_xreads += 1
+        self.max_blocked_xreads = max(self.max_blocked_xreads, self.blocked_xreads)
+        try:
+            async with self._appended:
+                try:
+                    await asyncio.wait_for(self._appended.wait_for(lambda: self._after(stream, last_id)), block / 1000)
+                except asyncio.TimeoutError:
+                    return []
+                return [[stream, self._after(stream, last_id)[:count]]]
+        finally:
+            self.blocked_xreads -= 1
+
+    async def xrange(self, stream, start="-", end="+", count=None):
+        return [entry for entry in self.streams.get(stream, []) if _parse_stream_id(entry[0]) >= _parse_stream_id(start)][:count]
+
+    async def xrevrange(self, stream, start="+", end="-", count=None):
+        return list(reversed(self.streams.get(stream, [])))[:count]
+
+
+async def collect(reader: RedisSSEStreamReader, run_id: str, starting_after=None):
+    return [int(fields["seq_id"]) async for _, fields in reader.read(run_id, starting_after=starting_after)]
+
+
+@pytest.mark.asyncio
+async def test_live_entries_fan_out_to_every_reader():
+    redis = InMemoryStreams()
+    reader = RedisSSEStreamReader(redis, block_ms=50)
+    await redis.add("run-1", 1)
+
+    tasks = [asyncio.create_task(collect(reader, "run-1")) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    for seq_id in (2, 3):
+        await redis.add("run-1", seq_id)
+    await redis.add("run-1", 4, complete=True)
+
+    assert await asyncio.gather(*tasks) == [[1, 2, 3, 4]] * 3
+    # the readers shared one XREAD loop instead of each reading on their own
+    assert redis.max_blocked_xreads == 1
+
+
+@pytest.mark.asyncio
+async def test_reader_resumes_after_last_seen_seq_id():
+    redis = InMemoryStreams()
+    reader = RedisSSEStreamReader(redis, block_ms=50, batch_size=2)
+    for seq_id in range(1, 6):
+        await redis.add("run-1", seq_id)
+
+    task = asyncio.create_task(collect(reader, "run-1", starting_after=3))
+    await asyncio.sleep(0.01)
+    await redis.add("run-1", 6, complete=True)
+
+    assert await task == [4, 5, 6]
+
+
+@pytest.mark.asyncio
+async def test_reader_stops_when_run_completes_or_subscribers_leave():
+    redis = InMemoryStreams()
+    reader = RedisSSEStreamReader(redis, block_ms=20)
+    await redis.add("run-1", 1, complete=True)
+
+    # the catch-up delivered the whole run, the XREAD loop exits once its current block times out
+    assert await collect(reader, "run-1") == [1]
+    await asyncio.sleep(0.1)
+    assert reader._readers == {}
+
+    await redis.add("run-2", 1)
+    stream = reader.read("run-2")
+    assert (await anext(stream))[1]["seq_id"] == "1"
+    await stream.aclose()
+    await asyncio.sleep(0.1)
+    assert reader._readers == {}
+
+
+@pytest.mark.asyncio
+async def test_writer_recovers_from_a_partially_applied_flush():
+    redis = InMemoryStreams()
+    # the first chunk of a run is flushed right away, the next ones in pairs
+    writer = RedisSSEStreamWriter(redis, flush_size=2)
+    await writer.write_chunk("run-1", "data: 1\n\n")
+    await writer.write_chunk("run-1", "data: 2\n\n")
+
+    # Redis ran the first XADD of the flush, then the connection dropped before the reply came back
+    redis.fail_after = 1
+    with pytest.raises(TimeoutError):
+        await writer.write_chunk("run-1", "data: 3\n\n")
+    assert [fields["seq_id"] for _, fields in redis.streams[_get_stream_key("run-1")]] == ["1", "2"]
+
+    await writer.write_chunk("run-1", "data: [DONE]\n\n", is_complete=True)
+    assert [fields["seq_id"] for _, fields in redis.streams[_get_stream_key("run-1")]] == ["1", "2", "3", "4"]
+    assert "run-1" not in writer.buffer and "run-1" not in writer.unconfirmed_runs
@@ -0,0 +1,142 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from letta.data_sources.redis_client import NoopAsyncRedisClient
+from letta.schemas.enums import JobStatus
+from letta.services.run_cancellation_bus import RunCancellationBus
+from letta.utils import CancellationSignal
+
+
+@pytest.fixture
+def bus():
+    with patch("letta.services.run_cancellation_bus.get_redis_client", AsyncMock(return_value=NoopAsyncRedisClient())):
+        yield RunCancellationBus()
+
+
+@pytest.mark.asyncio
+async def test_publish_wakes_local_watchers_without_db_reads(bus):
+    watch = bus.watch("run-1")
+    check_db = AsyncMock(return_value=False)
+
+    assert not await bus.is_cancelled(watch, check_db=check_db)
+    await bus.publish("run-1")
+
+    assert watch.cancelled
+    assert await bus.is_cancelled(watch, check_db=check_db)
+    assert check_db.await_count == 1
+    # the same watch is shared by everything in the process working on the run
+    assert bus.watch("run-1") is watch
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_db_without_subscription(bus):
+    watch = bus.watch("run-1")
+    check_db = AsyncMock(side_effect=[False, False, True])
+
+    assert not await bus.is_cancelled(watch, check_db=check_db)
+    assert not await bus.is_cancelled(watch, check_db=check_db)
+    assert await bus.is_cancelled(watch, check_db=check_db)
+    assert watch.cancelled
+
+
+@pytest.mark.asyncio
+async def test_db_is_read_once_per_subscription(bus):
+    bus._ensure_listener = AsyncMock()
+    bus._subscribed_since = time.monotonic()
+    watch = bus.watch("run-1")
+    check_db = AsyncMock(return_value=False)
+
+    for _ in range(5):
+        assert not await bus.is_cancelled(watch, check_db=check_db)
+    assert check_db.await_count == 1
+
+    # cancellations published while resubscribing could have been missed, so check once more
+    bus._subscribed_since = time.monotonic() + 1
+    assert not await bus.is_cancelled(watch, check_db=check_db)
+    assert check_db.await_count == 2
+
+    bus._mark_cancelled("run-1")
+    assert await bus.is_cancelled(watch, check_db=check_db)
+    assert check_db.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_watches_are_released_when_unreferenced(bus):
+    bus.watch("run-1")
+    assert "run-1" not in bus._watches
+
+
+@pytest.mark.asyncio
+async def test_cancellation_signal_uses_bus(bus):
+    job_manager = Mock()
+    job_manager.get_job_by_id_async = AsyncMock(return_value=Mock(status=JobStatus.running))
+
+    with patch("letta.services.run_cancellation_bus._run_cancellation_bus", bus):
+        signal = CancellationSignal(job_manager=job_manager, job_id="run-1", actor=Mock())
+        await signal.check_and_raise_if_cancelled()
+
+        await bus.publish("run-1")
+        with pytest.raises(asyncio.CancelledError):
+            await signal.check_and_raise_if_cancelled()
+
+    assert job_manager.get_job_by_id_async.await_count == 1
+
+
+class IdlePubSub:
+    """Reads like redis-py's PubSub: a read without its own timeout fails once the socket timeout passes."""
+
+    def __init__(self, socket_timeout: float):
+        self.socket_timeout = socket_timeout
+        self.messages = asyncio.Queue()
+        self.subscribes = 0
+
+    async def subscribe(self, channel):
+        self.subscribes += 1
+        self.messages.put_nowait({"type": "subscribe", "channel": channel, "data": 1})
+
+    async def get_message(self, ignore_subscribe_messages=False, timeout=0.0):
+        read_timeout = self.socket_timeout if timeout is None else timeout
+        try:
+            return await asyncio.wait_for(self.messages.get(), read_timeout)
+        except asyncio.TimeoutError:
+            if timeout is None:
+                raise TimeoutError("Timeout reading from socket")
+            return None
+
+    async def listen(self):
+        while True:
+            yield await self.get_message(timeout=None)
+
+    async def aclose(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_idle_subscription_outlives_socket_timeout():
+    pubsub = IdlePubSub(socket_timeout=0.05)
+    redis_client = Mock()
+    redis_client.get_client = AsyncMock(return_value=Mock(pubsub=Mock(return_value=pubsub)))
+
+    with (
+        patch("letta.services.run_cancellation_bus.get_redis_client", AsyncMock(return_value=redis_client)),
+        patch("letta.services.run_cancellation_bus.LISTENER_POLL_TIMEOUT_SECONDS", 0.01),
+    ):
+        bus = RunCancellationBus()
+        watch = bus.watch("run-1")
+        await bus._ensure_listener()
+        await asyncio.sleep(0.02)
+        subscribed_since = bus._subscribed_since
+        assert subscribed_since is not None
+
+        # idle for several socket timeouts
+        await asyncio.sleep(0.3)
+        assert bus._subscribed_since == subscribed_since
+        assert pubsub.subscribes == 1
+
+        pubsub.messages.put_nowait({"type": "message", "channel": "letta:run_cancellations", "data": "run-1"})
+        await asyncio.sleep(0.05)
+        assert watch.cancelled
+        await bus.close()
@@ -0,0 +1,106 @@
+import asyncio
+import json
+import sys
+import time
+
+import pytest
+
+from letta.otel import sampling_profiler
+from letta.otel.sampling_profiler import WAITING_FRAME, SamplingProfiler, profile_phase, set_profile_labels
+from letta.server.rest_api.middleware.profiler_context import route_labels
+
+
+def busy(seconds: float):
+    end = time.process_time() + seconds
+    while time.process_time() < end:
+        json.dumps({"value": list(range(50))})
+
+
+@pytest.fixture
+def profiler():
+    profiler = SamplingProfiler(interval_seconds=0.001, max_stacks=1000)
+    assert profiler.start()
+    yield profiler
+    profiler.stop()
+
+
+def test_samples_are_labelled_and_collapsed(profiler):
+    async def run(agent_id: str, run_id: str):
+        set_profile_labels(route="POST /v1/agents/{agent_id}/messages", agent_id=agent_id)
+        set_profile_labels(run_id=run_id)
+        busy(0.2)
+
+    async def main():
+        await asyncio.gather(asyncio.create_task(run("agent-1", "run-1")), asyncio.create_task(run("agent-2", "run-2")))
+        busy(0.05)
+
+    asyncio.run(main())
+    profiler.stop()
+
+    assert profiler.total_samples > 0
+    agent_1 = profiler.collapsed(agent_id="agent-1")
+    assert agent_1 and "agent_id=agent-2" not in profiler.collapsed(run_id="run-1")
+    for line in agent_1.splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert stack.startswith("route=POST /v1/agents/{agent_id}/messages;agent_id=agent-1;run_id=run-1;phase=")
+        assert int(count) > 0
+    # labels set inside the tasks don't leak to the code that started them
+    assert any(line.startswith("phase=") for line in profiler.collapsed().splitlines())
+    assert "tests.test_sampling_profiler:busy" in profiler.collapsed(include_labels=False)
+    assert profiler.collapsed(phase="serialization")
+
+
+def test_time_awaited_in_a_phase_is_counted_as_waiting(profiler, monkeypatch):
+    monkeypatch.setattr(sampling_profiler, "_sampling_profiler", profiler)
+
+    async def run():
+        set_profile_labels(run_id="run-1")
+        with profile_phase("llm"):
+            await asyncio.sleep(0.1)
+            busy(0.05)
+            # phases inside a phase count toward the outer one
+            with profile_phase("db"):
+                await asyncio.sleep(0.05)
+
+    asyncio.run(run())
+    profiler.stop()
+
+    ((key, waiting),) = [(key, count) for key, count in profiler.samples(run_id="run-1") if key[1] == (WAITING_FRAME,)]
+    assert dict(key[0])["phase"] == "llm"
+    # 150ms awaited at 1ms per sample, give or take the CPU samples taken in between
+    assert 100 <= waiting <= 300
+    # CPU samples in the phase whose stack doesn't tell fall back to it
+    assert profiler.collapsed(include_labels=False, run_id="run-1", phase="llm")
+    assert not profiler.collapsed(phase="db")
+
+
+def test_reset_and_bounded_stacks():
+    profiler = SamplingProfiler(interval_seconds=0.001, max_stacks=1)
+    profiler._sample(None, sys._getframe())
+    profiler._sample(None, sys._getframe())
+
+    def elsewhere():
+        profiler._sample(None, sys._getframe())
+
+    elsewhere()
+    assert profiler.total_samples == 3 and profiler.dropped == 1
+    assert profiler.collapsed().endswith(" 2\n")
+
+    profiler.reset()
+    assert profiler.total_samples == 0 and profiler.collapsed() == ""
+
+
+@pytest.mark.parametrize(
+    "method, path, expected",
+    [
+        (
+            "POST",
+            "/v1/agents/agent-6f0e1a52-2d3c-4b5e-9f7a-0c1d2e3f4a5b/messages/",
+            {"route": "POST /v1/agents/{agent_id}/messages", "agent_id": "agent-6f0e1a52-2d3c-4b5e-9f7a-0c1d2e3f4a5b"},
+        ),
+        ("GET", "/v1/runs/run-6f0e1a52-2d3c-4b5e-9f7a-0c1d2e3f4a5b", {"route": "GET /v1/runs/{run_id}", "agent_id": None}),
+        ("GET", "/v1/agents/search-term", {"route": "GET /v1/agents/search-term", "agent_id": None}),
+    ],
+)
+def test_route_labels(method, path, expected):
+    assert route_labels(method, path) == expected
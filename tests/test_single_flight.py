@@ -0,0 +1,103 @@
+import asyncio
+from typing import List
+
+import pytest
+from pydantic import BaseModel
+
+from letta.helpers.decorators import invalidate_single_flight, invalidate_single_flight_nowait, single_flight
+from letta.settings import settings
+
+
+class Row(BaseModel):
+    agent_id: str
+    value: int
+
+
+class Reader:
+    def __init__(self):
+        self.calls = 0
+        self.value = 0
+        self.release = asyncio.Event()
+
+    @single_flight(key_func=lambda self, agent_id, limit=10: f"{agent_id}:{limit}", scope_func=lambda self, agent_id, limit=10: agent_id)
+    async def list_rows(self, agent_id: str, limit: int = 10) -> List[Row]:
+        self.calls += 1
+        value = self.value
+        await self.release.wait()
+        if agent_id == "missing":
+            raise ValueError("not found")
+        return [Row(agent_id=agent_id, value=value)]
+
+
+async def start(reader: Reader, *calls):
+    tasks = [asyncio.create_task(reader.list_rows(*call)) for call in calls]
+    # let the calls get as far as waiting for the release
+    for _ in range(3):
+        await asyncio.sleep(0)
+    return tasks
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_reads_share_one_call():
+    reader = Reader()
+    tasks = await start(reader, ("agent-1",), ("agent-1",), ("agent-1",), ("agent-1", 20), ("agent-2",))
+    reader.release.set()
+    results = await asyncio.gather(*tasks)
+
+    # agent-1 with the default limit ran once, the other keys once each
+    assert reader.calls == 3
+    assert results[0] == results[1] == results[2]
+    # callers sharing a call get their own copies
+    results[0][0].value = 5
+    assert results[1][0].value == 0 and results[1] is not results[2]
+
+    # finished calls aren't reused
+    await reader.list_rows("agent-1")
+    assert reader.calls == 4
+
+
+@pytest.mark.asyncio
+async def test_invalidation_stops_joining_calls_in_flight():
+    reader = Reader()
+    (stale,) = await start(reader, ("agent-1",))
+    reader.value = 1
+    await invalidate_single_flight("agent-1")
+    fresh, other = await start(reader, ("agent-1",), ("agent-2",))
+    (joined,) = await start(reader, ("agent-2",))
+    reader.release.set()
+
+    assert [row.value for row in (await stale) + (await fresh)] == [0, 1]
+    await asyncio.gather(other, joined)
+    assert reader.calls == 3
+
+    invalidate_single_flight_nowait()
+    tasks = await start(reader, ("agent-1",), ("agent-2",))
+    await asyncio.gather(*tasks)
+    assert reader.calls == 5
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_caller_and_callers_can_leave():
+    reader = Reader()
+    first, second = await start(reader, ("missing",), ("missing",))
+    reader.release.set()
+    for task in (first, second):
+        with pytest.raises(ValueError):
+            await task
+
+    reader = Reader()
+    leaving, staying = await start(reader, ("agent-1",), ("agent-1",))
+    leaving.cancel()
+    reader.release.set()
+    assert (await staying)[0].agent_id == "agent-1"
+    assert reader.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "single_flight_enabled", False)
+    reader = Reader()
+    tasks = await start(reader, ("agent-1",), ("agent-1",))
+    reader.release.set()
+    await asyncio.gather(*tasks)
+    assert reader.calls == 2
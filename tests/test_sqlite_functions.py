@@ -0,0 +1,85 @@
+import sqlite3
+
+import numpy as np
+import pytest
+from sqlalchemy import column
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from letta.constants import MAX_EMBEDDING_DIM
+from letta.orm import sqlite_functions
+from letta.orm.sqlite_functions import adapt_array, cosine_distance, register_functions, sqlite_cosine_distance
+
+can_load_extensions = hasattr(sqlite3.connect(":memory:"), "enable_load_extension")
+
+
+def padded(*values: float) -> np.ndarray:
+    embedding = np.zeros(MAX_EMBEDDING_DIM, dtype=np.float32)
+    embedding[: len(values)] = values
+    return embedding
+
+
+@pytest.fixture
+def passages():
+    connection = sqlite3.connect(":memory:")
+    connection.create_function("cosine_distance", 2, cosine_distance)
+    connection.execute("CREATE TABLE passages (id INTEGER PRIMARY KEY, embedding BLOB)")
+    rng = np.random.default_rng(0)
+    for i in range(20):
+        connection.execute("INSERT INTO passages VALUES (?, ?)", (i, adapt_array(padded(*rng.normal(size=8)))))
+    yield connection
+    connection.close()
+
+
+def ordered_ids(connection, function: str, query: np.ndarray):
+    rows = connection.execute(f"SELECT id FROM passages ORDER BY {function}(embedding, ?) ASC", (adapt_array(query),))
+    return [row[0] for row in rows]
+
+
+@pytest.mark.skipif(not can_load_extensions, reason="this Python can't load SQLite extensions")
+def test_vec_distance_cosine_orders_like_the_python_udf(passages):
+    register_functions(passages, None)
+    query = padded(*np.random.default_rng(1).normal(size=8))
+    assert passages.execute("SELECT vec_version()").fetchone()
+    assert ordered_ids(passages, "vec_distance_cosine", query) == ordered_ids(passages, "cosine_distance", query)
+
+
+def test_distance_expression_follows_whether_the_extension_loaded(monkeypatch):
+    monkeypatch.setattr(sqlite_functions, "_sqlite_vec_loaded", False)
+    assert "cosine_distance(" in str(sqlite_cosine_distance(column("embedding"), padded(1.0)))
+    assert "vec_distance_cosine" not in str(sqlite_cosine_distance(column("embedding"), padded(1.0)))
+
+    monkeypatch.setattr(sqlite_functions, "_sqlite_vec_loaded", True)
+    assert "vec_distance_cosine(" in str(sqlite_cosine_distance(column("embedding"), padded(1.0)))
+
+
+def test_connection_failing_to_load_the_extension_still_answers_vec_queries(passages, monkeypatch):
+    def fail(connection):
+        raise sqlite3.OperationalError("not authorized")
+
+    # another connection loaded the extension, so queries are built with vec_distance_cosine
+    monkeypatch.setattr(sqlite_functions, "_sqlite_vec_loaded", True)
+    monkeypatch.setattr(sqlite_functions.sqlite_vec, "load", fail)
+    assert sqlite_functions._load_sqlite_vec(passages) is False
+    assert sqlite_functions.is_sqlite_vec_loaded()
+
+    query = padded(*np.random.default_rng(1).normal(size=8))
+    assert ordered_ids(passages, "vec_distance_cosine", query) == ordered_ids(passages, "cosine_distance", query)
+    ((distance,),) = passages.execute("SELECT vec_distance_cosine(?, ?)", (adapt_array(padded(1.0)), adapt_array(padded(0.0, 1.0))))
+    assert distance == pytest.approx(cosine_distance(padded(1.0), padded(0.0, 1.0)))
+
+
+@pytest.mark.asyncio
+async def test_extension_is_loaded_on_the_raw_aiosqlite_connection(tmp_path, monkeypatch):
+    loaded_into = []
+    load = sqlite_functions._load_sqlite_vec
+    monkeypatch.setattr(sqlite_functions, "_load_sqlite_vec", lambda connection: loaded_into.append(connection) or load(connection))
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/sqlite.db")
+    try:
+        async with engine.connect() as connection:
+            await connection.exec_driver_sql("SELECT 1")
+    finally:
+        await engine.dispose()
+
+    (raw_connection,) = loaded_into
+    assert isinstance(raw_connection, sqlite3.Connection)
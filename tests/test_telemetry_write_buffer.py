@@ -0,0 +1,114 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from letta.schemas.enums import StepStatus
+from letta.schemas.letta_stop_reason import LettaStopReason, StopReasonType
+from letta.schemas.openai.chat_completion_response import UsageStatistics
+from letta.services.telemetry_write_buffer import TelemetryWriteBuffer
+from letta.settings import settings
+
+
+@pytest.fixture
+def written(monkeypatch):
+    """Batches the buffer hands to the database, in order."""
+    batches = []
+
+    async def write(self, pending):
+        batches.append(pending)
+
+    monkeypatch.setattr(TelemetryWriteBuffer, "_write", write)
+    return batches
+
+
+@pytest.mark.asyncio
+async def test_step_transitions_coalesce_into_one_batch(written):
+    buffer = TelemetryWriteBuffer(flush_interval_seconds=60)
+    usage = UsageStatistics(completion_tokens=1, prompt_tokens=2, total_tokens=3)
+
+    await buffer.step_succeeded("step-1", usage, LettaStopReason(stop_reason=StopReasonType.tool_rule.value))
+    await buffer.step_stopped("step-1", StopReasonType.end_turn)
+    await buffer.record_step_metrics("step-1", "org-1", "agent-1", step_ns=10)
+    await buffer.record_ttft("run-1", 5)
+    await buffer.record_response_duration("run-1", 50)
+    await buffer.update_agent_last_run("agent-1", datetime.now(timezone.utc), 1.5)
+    assert written == []
+
+    await buffer.flush()
+    (batch,) = written
+    assert batch.steps == {
+        "step-1": {
+            "status": StepStatus.SUCCESS,
+            "completion_tokens": 1,
+            "prompt_tokens": 2,
+            "total_tokens": 3,
+            "stop_reason": StopReasonType.end_turn,
+        }
+    }
+    assert batch.step_metrics["step-1"]["step_ns"] == 10
+    assert batch.jobs == {"run-1": {"ttft_ns": 5, "total_duration_ns": 50}}
+    assert len(buffer) == 0
+
+    await buffer.flush()
+    assert len(written) == 1
+
+
+@pytest.mark.asyncio
+async def test_flushes_on_timer_and_when_full(written):
+    buffer = TelemetryWriteBuffer(flush_interval_seconds=0.01, max_pending_writes=3)
+    await buffer.record_ttft("run-1", 5)
+    await asyncio.sleep(0.05)
+    assert len(written) == 1
+
+    for step_id in ("step-1", "step-2", "step-3"):
+        await buffer.step_stopped(step_id, StopReasonType.end_turn)
+    assert len(written) == 2
+
+
+@pytest.mark.asyncio
+async def test_writes_inline_when_disabled(written, monkeypatch):
+    monkeypatch.setattr(settings, "telemetry_write_buffer_enabled", False)
+    buffer = TelemetryWriteBuffer(flush_interval_seconds=60)
+    await buffer.step_stopped("step-1", StopReasonType.end_turn)
+    assert len(written) == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_is_retried_with_the_next_one(monkeypatch):
+    written = []
+
+    async def write(self, pending):
+        if len(written) == 0 and pending.failed_attempts == 0:
+            raise RuntimeError("database is down")
+        written.append(pending)
+
+    monkeypatch.setattr(TelemetryWriteBuffer, "_write", write)
+    buffer = TelemetryWriteBuffer(flush_interval_seconds=60)
+    await buffer.step_failed("step-1", "ValueError", "boom", "traceback")
+    await buffer.flush()
+    assert len(buffer) == 1
+
+    # a newer write to the same row wins over the requeued one
+    await buffer.step_stopped("step-1", StopReasonType.error)
+    await buffer.flush()
+    (batch,) = written
+    assert batch.steps["step-1"]["status"] == StepStatus.FAILED
+    assert batch.steps["step-1"]["stop_reason"] == StopReasonType.error
+    await buffer.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_is_dropped_after_max_attempts(monkeypatch):
+    async def write(self, pending):
+        raise RuntimeError("database is down")
+
+    monkeypatch.setattr(TelemetryWriteBuffer, "_write", write)
+    buffer = TelemetryWriteBuffer(flush_interval_seconds=60)
+    await buffer.record_ttft("run-1", 5)
+    for _ in range(TelemetryWriteBuffer.MAX_FLUSH_ATTEMPTS - 1):
+        await buffer.flush()
+        assert len(buffer) == 1
+    await buffer.flush()
+    assert len(buffer) == 0
+    await buffer.close()
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from letta.local_llm import utils as local_llm_utils
+from letta.schemas.enums import MessageRole
+from letta.schemas.letta_message_content import TextContent
+from letta.schemas.message import Message
+from letta.services.context_window_calculator import token_counter
+from letta.services.context_window_calculator.token_counter import (
+    TIKTOKEN_REPLY_PRIMING_TOKENS,
+    TiktokenCounter,
+    TokenCountCache,
+    token_count_lru_cache,
+)
+
+
+@pytest.fixture
+def tokenized(monkeypatch):
+    """Contents tiktoken was asked to tokenize, counted one token per word, behind an empty cache."""
+    contents = []
+
+    def num_tokens_from_messages(messages, model):
+        contents.extend(m["content"] for m in messages)
+        return sum(len(m["content"].split()) for m in messages) + TIKTOKEN_REPLY_PRIMING_TOKENS
+
+    monkeypatch.setattr(local_llm_utils, "num_tokens_from_messages", num_tokens_from_messages)
+    monkeypatch.setattr(token_counter, "token_count_cache", TokenCountCache())
+    return contents
+
+
+def make_message(text: str) -> Message:
+    return Message(role=MessageRole.user, content=[TextContent(text=text)], updated_at=datetime.now(timezone.utc))
+
+
+def test_cache_evicts_least_recently_used_entries():
+    cache = TokenCountCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+@pytest.mark.asyncio
+async def test_lru_decorator_counts_each_key_once(monkeypatch):
+    monkeypatch.setattr(token_counter, "token_count_cache", TokenCountCache())
+    counted = []
+
+    @token_count_lru_cache(key_func=lambda text: ("words", text))
+    async def count(text: str) -> int:
+        counted.append(text)
+        return len(text.split())
+
+    assert [await count("a b"), await count("a b"), await count("c")] == [2, 2, 1]
+    assert counted == ["a b", "c"]
+
+
+@pytest.mark.asyncio
+async def test_edited_message_is_counted_again(tokenized):
+    counter = TiktokenCounter("gpt-4o")
+    message = make_message("hello there")
+    assert await counter.count_single_message_tokens(message) == 2
+    assert await counter.count_single_message_tokens(message) == 2
+    assert tokenized == ["hello there"]
+
+    edited = message.model_copy(update={"content": [TextContent(text="hello again friend")]})
+    edited.updated_at = message.updated_at + timedelta(seconds=1)
+    assert await counter.count_single_message_tokens(edited) == 3
+    assert tokenized == ["hello there", "hello again friend"]
+
+    # messages that were never saved have no updated_at to key them by
+    unsaved = make_message("not saved")
+    unsaved.updated_at = None
+    await counter.count_single_message_tokens(unsaved)
+    await counter.count_single_message_tokens(unsaved)
+    assert tokenized[2:] == ["not saved", "not saved"]
+
+
+@pytest.mark.asyncio
+async def test_growing_context_only_tokenizes_new_messages(tokenized):
+    counter = TiktokenCounter("gpt-4o")
+    messages = [make_message("one two"), make_message("three")]
+    assert await counter.count_in_context_message_tokens(messages) == 3 + TIKTOKEN_REPLY_PRIMING_TOKENS
+
+    messages.append(make_message("four five six"))
+    assert await counter.count_in_context_message_tokens(messages) == 6 + TIKTOKEN_REPLY_PRIMING_TOKENS
+    assert tokenized == ["one two", "three", "four five six"]
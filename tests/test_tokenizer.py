@@ -0,0 +1,82 @@
+import pytest
+import tiktoken
+
+from letta.helpers import tokenizer
+from letta.local_llm.utils import num_tokens_from_functions, num_tokens_from_messages
+
+
+@pytest.fixture(autouse=True)
+def byte_encoding(monkeypatch):
+    """A byte-level encoding (one token per byte) so tests don't need to download BPE files."""
+    encoding = tiktoken.Encoding(
+        name="test_bytes",
+        pat_str=r"[\s\S]",
+        mergeable_ranks={bytes([i]): i for i in range(256)},
+        special_tokens={"<|endoftext|>": 256},
+    )
+    calls = []
+
+    def encoding_for_model(model):
+        calls.append(model)
+        if not model.startswith("gpt-"):
+            raise KeyError(model)
+        return encoding
+
+    monkeypatch.setattr(tiktoken, "encoding_for_model", encoding_for_model)
+    monkeypatch.setattr(tiktoken, "get_encoding", lambda name: encoding)
+    tokenizer.get_encoding.cache_clear()
+    yield calls
+    tokenizer.get_encoding.cache_clear()
+
+
+def test_encodings_are_resolved_once_per_model(byte_encoding):
+    for _ in range(3):
+        assert tokenizer.count_tokens("hello", model="gpt-4") == 5
+        assert tokenizer.count_tokens("hello", model="unknown-model") == 5
+    assert byte_encoding == ["gpt-4", "unknown-model"]
+
+    # special tokens in user text are counted as text instead of raising
+    assert tokenizer.count_tokens("<|endoftext|>") == len("<|endoftext|>")
+
+
+def test_batch_matches_single_counts(monkeypatch):
+    texts = ["", "a", "hello world", "x" * 1000]
+    expected = [tokenizer.count_tokens(text) for text in texts]
+    assert tokenizer.count_tokens_batch(texts) == expected
+
+    # the threaded path gives the same results
+    monkeypatch.setattr(tokenizer, "MIN_THREADED_BATCH_CHARS", 0)
+    assert tokenizer.count_tokens_batch(texts) == expected
+    assert tokenizer.encode_batch(texts) == [list(text.encode()) for text in texts]
+
+
+def test_approximate_counts_skip_tokenization(byte_encoding):
+    assert tokenizer.count_tokens("x" * 10, model="gpt-4", approximate=True) == 4
+    assert tokenizer.count_tokens_batch(["", "abc", "abcd"], approximate=True) == [0, 1, 2]
+    assert byte_encoding == []
+
+
+def test_message_and_function_counts():
+    messages = [
+        {"role": "system", "content": "abc"},
+        {
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [{"id": "id", "type": "function", "function": {"name": "f", "arguments": "{}"}}],
+        },
+        {"role": "tool", "name": "f", "content": "ok"},
+    ]
+    # 3 per message, 1 per name, 6 per tool call and 12 per tool call list, 3 for the reply, plus one token per byte
+    text_tokens = len("system" + "abc" + "assistant" + "id" + "function" + "f" + "{}" + "tool" + "f" + "ok")
+    assert num_tokens_from_messages(messages, model="gpt-4") == 3 * 3 + 1 + 6 + 12 + 3 + text_tokens
+
+    functions = [
+        {
+            "name": "f",
+            "description": "desc",
+            "parameters": {"properties": {"x": {"type": "string", "description": "an x", "enum": ["a", "b"]}}},
+        }
+    ]
+    # 2 for type and description, 3 per enum value less 3, 11 per function with parameters, 12 for the list
+    text_tokens = len("f" + "desc" + "x" + "string" + "an x" + "a" + "b")
+    assert num_tokens_from_functions(functions, model="gpt-4") == 2 + 2 + 3 + 11 + 12 + text_tokens
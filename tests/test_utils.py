@@ -1,11 +1,17 @@
+import re
+from datetime import datetime
+from typing import List, Literal, Optional
+
 import pytest
 
 from letta.constants import MAX_FILENAME_LENGTH
 from letta.functions.ast_parsers import coerce_dict_args_by_annotations, get_function_annotations_from_source
 from letta.schemas.file import FileMetadata
 from letta.services.file_processor.chunker.line_chunker import LineChunker
+from letta.services.file_processor.line_index import FileLineIndex, FileLineIndexCache
 from letta.services.helpers.agent_manager_helper import safe_format
-from letta.utils import sanitize_filename, validate_function_response
+from letta.settings import settings
+from letta.utils import enforce_types, get_enforce_types_check_count, sanitize_filename, validate_function_response
 
 CORE_MEMORY_VAR = "My core memory is that I like to eat bananas"
 VARS_DICT = {"CORE_MEMORY": CORE_MEMORY_VAR}
@@ -517,6 +523,47 @@ def test_line_chunker_only_start_parameter():
         chunker.chunk_text(file, start=3, validate_range=True)
 
 
+# ---------------------- FileLineIndex TESTS ---------------------- #
+
+
+def test_file_line_index_search_matches_chunker_line_numbers():
+    """Test that line index matches use the same numbering and context format as LineChunker"""
+    file = FileMetadata(file_name="test.py", source_id="test_source", content="import os\nx = 1\n\ndef foo():\n    return x")
+    index = FileLineIndex.build(file)
+
+    assert [index.format_line(i) for i in range(len(index.lines))] == LineChunker().chunk_text(file, add_metadata=False)
+
+    matches = index.search(re.compile("^return", re.IGNORECASE | re.MULTILINE), context_lines=1, max_matches=10)
+    assert matches == [(4, ["  3: def foo():", "> 4:     return x"])]
+
+    matches = index.search(re.compile("x", re.IGNORECASE | re.MULTILINE), context_lines=0, max_matches=1)
+    assert matches == [(2, ["> 2: x = 1"])]
+
+
+def test_file_line_index_cache_invalidation():
+    """Test that cached line indexes are dropped when invalidated or when the content timestamp changes"""
+    cache = FileLineIndexCache(max_bytes=10)
+    file = FileMetadata(file_name="test.txt", source_id="test_source", content="line1")
+    updated_at = datetime(2024, 1, 1)
+    cache.set(FileLineIndex.build(file, content_updated_at=updated_at))
+
+    assert cache.get(file.id, updated_at) is not None
+    assert cache.get(file.id, datetime(2024, 1, 2)) is None
+    assert len(cache) == 0
+
+    cache.set(FileLineIndex.build(file, content_updated_at=updated_at))
+    cache.invalidate(file.id)
+    assert cache.get(file.id) is None
+
+    # Evicted once the total content size exceeds the limit
+    other = FileMetadata(file_name="other.txt", source_id="test_source", content="line2")
+    cache.set(FileLineIndex.build(file))
+    cache.set(FileLineIndex.build(other))
+    cache.set(FileLineIndex.build(FileMetadata(file_name="third.txt", source_id="test_source", content="x")))
+    assert cache.get(file.id) is None
+    assert cache.get(other.id) is not None
+
+
 # ---------------------- Alembic Revision TESTS ---------------------- #
 
 
@@ -669,3 +716,44 @@ def test_validate_function_response_whitespace():
     """Test whitespace-only string handling"""
     response = validate_function_response("   \n\t  ", return_char_limit=100)
     assert response == "   \n\t  "
+
+
+class _TypedManager:
+    @enforce_types
+    def method(self, name: str, tags: Optional[List[str]] = None, mode: Literal["any", "all"] = "any", count: int | None = None):
+        return name
+
+
+def test_enforce_types_checks_args_and_kwargs():
+    manager = _TypedManager()
+
+    assert manager.method("a", ["x", "y"], mode="all", count=3) == "a"
+    assert manager.method("a", None, count=None) == "a"
+    with pytest.raises(ValueError, match="Argument name does not match type"):
+        manager.method(1)
+    with pytest.raises(ValueError, match="Argument tags does not match type"):
+        manager.method("a", ["x", 1])
+    with pytest.raises(ValueError, match="Argument mode does not match type"):
+        manager.method("a", mode="some")
+    with pytest.raises(ValueError, match="Argument count does not match type"):
+        manager.method("a", count="3")
+
+
+def test_enforce_types_modes(monkeypatch):
+    manager = _TypedManager()
+
+    checks_before = get_enforce_types_check_count()
+    manager.method("a")
+    assert get_enforce_types_check_count() == checks_before + 1
+
+    monkeypatch.setattr(settings, "enforce_types_mode", "off")
+    assert manager.method(1) == 1
+    assert get_enforce_types_check_count() == checks_before + 1
+
+    monkeypatch.setattr(settings, "enforce_types_mode", "sampled")
+    monkeypatch.setattr(settings, "enforce_types_sample_rate", 0.0)
+    assert manager.method(1) == 1
+    monkeypatch.setattr(settings, "enforce_types_sample_rate", 1.0)
+    with pytest.raises(ValueError):
+        manager.method(1)
+    assert get_enforce_types_check_count() == checks_before + 2
@@ -2,10 +2,13 @@ import os
 import random
 import string
 import time
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from typing import Dict, Iterator, List, Optional, Tuple
 
 from letta_client import Letta, SystemMessage
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 
 from letta.config import LettaConfig
 from letta.data_sources.connectors import DataConnector
@@ -195,3 +198,18 @@ def create_tool_from_func(
         tags=tags,
         description=description,
     )
+
+
+@contextmanager
+def count_queries() -> Iterator[List[str]]:
+    """Collect the SQL statements every engine executes inside the block, to pin how many queries a code path issues."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(Engine, "before_cursor_execute", before_cursor_execute)